@@ -0,0 +1,66 @@
+"""Micro-benchmark: per-request signing cost of BinanceClient._make_private_url.
+
+Compares building the Ed25519 SigningKey on every call (the old _hashing) with
+the per-client cached key, and batch signing via sign_query_strings().
+
+Usage:
+    python -m benchmarks.bench_binance_signing [--number 20000]
+"""
+import argparse
+import base64
+import logging
+import timeit
+
+from nacl.signing import SigningKey
+
+from pytradekit.restful.binance_restful import BinanceClient
+from pytradekit.utils.dynamic_types import BinanceAuxiliary
+
+DEFAULT_NUMBER = 20000
+BATCH_SIZE = 100
+
+
+def make_client() -> BinanceClient:
+    # Bypass __init__: it expects an encrypted PEM key and opens an HTTP session.
+    client = BinanceClient.__new__(BinanceClient)
+    client.logger = logging.getLogger(__name__)
+    client.api_key = 'bench-api-key'
+    client.secret_key = base64.b64encode(bytes(SigningKey.generate())).decode()
+    client._url = BinanceAuxiliary.url.value
+    return client
+
+
+def make_order_params() -> dict:
+    return {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC',
+            'quantity': '0.001', 'price': '65000.00', 'newClientOrderId': 'bench-order'}
+
+
+def sign_uncached(client, query_string) -> str:
+    signing_key = SigningKey(base64.b64decode(client.secret_key))
+    return base64.b64encode(signing_key.sign(query_string.encode('UTF-8')).signature).decode('ASCII')
+
+
+def report(name, seconds, number):
+    print(f'{name:<36} {seconds / number * 1e6:8.2f} us/request')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=DEFAULT_NUMBER)
+    number = parser.parse_args().number
+
+    client = make_client()
+    payload = '&'.join(f'{k}={v}' for k, v in make_order_params().items()) + '&timestamp=1700000000000'
+    payloads = [payload] * BATCH_SIZE
+
+    report('sign, key built per call', timeit.timeit(lambda: sign_uncached(client, payload), number=number), number)
+    report('sign, cached key', timeit.timeit(lambda: client._hashing(payload), number=number), number)
+    report(f'sign_query_strings (batch {BATCH_SIZE})',
+           timeit.timeit(lambda: client.sign_query_strings(payloads), number=number // BATCH_SIZE), number)
+    report('_make_private_url (cached key)',
+           timeit.timeit(lambda: client._make_private_url(BinanceAuxiliary.url_order.value, make_order_params()),
+                         number=number), number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Micro-benchmark: per-message cost of InstCode parsing and symbol -> inst_code conversion.
+
+Cycles through 300 instrument strings, as the websocket handlers and the
+order / trade readers do, and compares the old regex parse (no cache) with
+the LRU-cached `InstCode.from_string`, the registry built from
+inst_code_basic, and `convert_symbol_to_inst_code` with and without the
+registry. A trade-report sized symbol column is converted row by row and with
+`convert_symbols_to_pairs`.
+
+Usage:
+    python -m benchmarks.bench_inst_code [--number 200000]
+"""
+import argparse
+import itertools
+import re
+import timeit
+
+import pandas as pd
+
+from pytradekit.trading_setup.inst_code_usage import SYMBOL_SPLITTER, convert_symbol_to_inst_code, \
+    convert_symbol_to_pair, convert_symbols_to_pairs
+from pytradekit.utils.custom_types import INST_CODE_REGISTRY, InstCode
+
+DEFAULT_NUMBER = 200000
+N_INSTRUMENTS = 300
+N_TRADE_ROWS = 300_000
+QUOTES = ('USDT', 'USDC', 'FDUSD', 'BTC', 'ETH')
+OLD_PATTERN = r"([A-Za-z0-9]+(?:-[A-Za-z0-9]+)?)_([A-Za-z0-9]+)\.([A-Za-z0-9]+)"
+
+
+def make_inst_code_basic() -> list:
+    rows = []
+    for i in range(N_INSTRUMENTS):
+        base, quote = f'COIN{i}', QUOTES[i % len(QUOTES)]
+        rows.append({'inst_code': f'{base}{quote}_BN.SPOT', 'symbol': f'{base}{quote}', 'base': base,
+                     'quote': quote, 'pair': f'{base}-{quote}'})
+    return rows
+
+
+def parse_uncached(inst_code):
+    # InstCode.from_string before the cache: re.match plus the lazy import on every call
+    pair_or_symbol, exchange_id, category = re.match(OLD_PATTERN, inst_code).groups()
+    if '-' not in pair_or_symbol:
+        from pytradekit.trading_setup.inst_code_usage import convert_symbol_to_pair as convert
+        pair = convert(pair_or_symbol)
+    else:
+        pair = pair_or_symbol.upper()
+    return InstCode(pair, exchange_id, category)
+
+
+def report(name, seconds, number):
+    print(f'{name:<44} {seconds / number * 1e9:8.0f} ns/message')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=DEFAULT_NUMBER)
+    number = parser.parse_args().number
+
+    rows = make_inst_code_basic()
+    inst_codes = itertools.cycle([row['inst_code'] for row in rows])
+    symbols = itertools.cycle([row['symbol'] for row in rows])
+
+    report('from_string, regex (old)', timeit.timeit(lambda: parse_uncached(next(inst_codes)), number=number), number)
+    report('from_string, LRU cache', timeit.timeit(lambda: InstCode.from_string(next(inst_codes)), number=number),
+           number)
+    report('symbol -> inst_code, uncached split',
+           timeit.timeit(lambda: f'{convert_symbol_to_pair(next(symbols))}_BN.SPOT', number=number), number)
+    report('symbol -> inst_code, LRU cache',
+           timeit.timeit(lambda: convert_symbol_to_inst_code(next(symbols)), number=number), number)
+
+    INST_CODE_REGISTRY.load(rows)
+    report('from_string, registry', timeit.timeit(lambda: InstCode.from_string(next(inst_codes)), number=number),
+           number)
+    report('symbol -> inst_code, registry',
+           timeit.timeit(lambda: convert_symbol_to_inst_code(next(symbols)), number=number), number)
+    report('read_orders exchange_id, registry',
+           timeit.timeit(lambda: InstCode.from_string(next(inst_codes)).exchange_id, number=number), number)
+
+    SYMBOL_SPLITTER.load_inst_code_basic(rows)
+    column = pd.Series([row['symbol'] for row in rows] * (N_TRADE_ROWS // N_INSTRUMENTS))
+    report(f'{N_TRADE_ROWS} rows, Series.apply (per row)',
+           timeit.timeit(lambda: column.apply(convert_symbol_to_pair), number=1), N_TRADE_ROWS)
+    report(f'{N_TRADE_ROWS} rows, convert_symbols_to_pairs',
+           timeit.timeit(lambda: convert_symbols_to_pairs(column), number=1), N_TRADE_ROWS)
+
+
+if __name__ == '__main__':
+    main()
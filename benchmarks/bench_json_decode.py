@@ -0,0 +1,87 @@
+"""Micro-benchmark: websocket frame decode cost per message type and JSON backend.
+
+Compares stdlib json, orjson and msgspec (whichever are installed) on the
+frames that dominate `_on_message` profiles, plus the typed-struct decoders
+of pytradekit.utils.json_codec for the hot Binance events.
+
+Usage:
+    python -m benchmarks.bench_json_decode [--number 20000]
+"""
+import argparse
+import gzip
+import json
+import timeit
+
+from pytradekit.utils import json_codec
+from pytradekit.utils.json_codec import BookTicker, ExecutionReport, OrderTradeUpdate, get_struct_decoder
+
+DEFAULT_NUMBER = 20000
+TICKER_ARR_SYMBOLS = 300
+
+
+def make_frames() -> dict:
+    ticker = {'e': '24hrTicker', 'E': 1700000000000, 's': 'BTCUSDT', 'p': '-94.99', 'P': '-0.145',
+              'w': '65012.52', 'x': '65100.01', 'c': '65005.02', 'Q': '0.012', 'b': '65005.01', 'B': '1.2',
+              'a': '65005.02', 'A': '0.8', 'o': '65100.01', 'h': '65400.00', 'l': '64800.00', 'v': '12345.6',
+              'q': '802512345.1', 'O': 1699913600000, 'C': 1700000000000, 'F': 1, 'L': 2, 'n': 2}
+    return {
+        'bookTicker': json.dumps({'u': 400900217, 's': 'BNBUSDT', 'b': '25.35190000', 'B': '31.21000000',
+                                  'a': '25.36520000', 'A': '40.66000000'}),
+        'executionReport': json.dumps({
+            'e': 'executionReport', 'E': 1499405658658, 's': 'ETHBTC', 'c': 'mUvoqJxFIILMdfAW5iGSOW', 'S': 'BUY',
+            'o': 'LIMIT', 'f': 'GTC', 'q': '1.00000000', 'p': '0.10264410', 'P': '0.00000000', 'F': '0.00000000',
+            'g': -1, 'C': '', 'x': 'TRADE', 'X': 'FILLED', 'r': 'NONE', 'i': 4293153, 'l': '1.00000000',
+            'z': '1.00000000', 'L': '0.10264410', 'n': '0.0001', 'N': 'BNB', 'T': 1499405658657, 't': 221,
+            'I': 8641984, 'w': False, 'm': True, 'M': False, 'O': 1499405658657, 'Z': '0.10264410',
+            'Y': '0.10264410', 'Q': '0.00000000', 'W': 1499405658657, 'V': 'NONE'}),
+        'ORDER_TRADE_UPDATE': json.dumps({
+            'e': 'ORDER_TRADE_UPDATE', 'E': 1568879465651, 'T': 1568879465650,
+            'o': {'s': 'BTCUSDT', 'c': 'TEST', 'S': 'SELL', 'o': 'LIMIT', 'f': 'GTC', 'q': '0.001', 'p': '65000',
+                  'ap': '0', 'sp': '0', 'x': 'NEW', 'X': 'NEW', 'i': 8886774, 'l': '0', 'z': '0', 'L': '0',
+                  'N': 'USDT', 'n': '0', 'T': 1568879465650, 't': 0, 'b': '0', 'a': '9.91', 'm': False,
+                  'R': False, 'wt': 'CONTRACT_PRICE', 'ot': 'LIMIT', 'ps': 'LONG', 'cp': False, 'rp': '0'}}),
+        f'!ticker@arr ({TICKER_ARR_SYMBOLS} symbols)': json.dumps([ticker] * TICKER_ARR_SYMBOLS),
+    }
+
+
+def get_backends() -> dict:
+    backends = {}
+    for backend in (json_codec.JSON_BACKEND_STDLIB, json_codec.JSON_BACKEND_ORJSON, json_codec.JSON_BACKEND_MSGSPEC):
+        try:
+            backends[backend] = json_codec.get_loads(backend)
+        except ValueError:
+            print(f'{backend} not installed, skipped')
+    return backends
+
+
+def report(frame_name, name, seconds, number):
+    print(f'{frame_name:<28} {name:<24} {seconds / number * 1e6:8.2f} us/msg')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=DEFAULT_NUMBER)
+    number = parser.parse_args().number
+
+    backends = get_backends()
+    structs = {'bookTicker': BookTicker, 'executionReport': ExecutionReport, 'ORDER_TRADE_UPDATE': OrderTradeUpdate}
+    for frame_name, frame in make_frames().items():
+        frame_number = number if frame_name in structs else max(1, number // TICKER_ARR_SYMBOLS)
+        for name, decode in backends.items():
+            report(frame_name, name, timeit.timeit(lambda: decode(frame), number=frame_number), frame_number)
+        if frame_name in structs:
+            decode = get_struct_decoder(structs[frame_name])
+            struct_name = f"struct ({'msgspec' if json_codec.msgspec else json_codec.JSON_BACKEND})"
+            report(frame_name, struct_name, timeit.timeit(lambda: decode(frame), number=frame_number), frame_number)
+
+    # Huobi: gunzip + decode, old str round trip vs bytes straight into the decoder
+    gz_frame = gzip.compress(b'{"ch":"market.btcusdt.bbo","ts":1700000000000,"tick":{"symbol":"btcusdt",'
+                             b'"bid":65000.01,"bidSize":1.2,"ask":65000.02,"askSize":0.8,"seqId":1}}')
+    report('huobi bbo (gzip)', 'json + str decode',
+           timeit.timeit(lambda: json.loads(gzip.decompress(gz_frame).decode('utf-8')), number=number), number)
+    report('huobi bbo (gzip)', f'loads_gzip ({json_codec.JSON_BACKEND})',
+           timeit.timeit(lambda: json_codec.loads_gzip(gz_frame), number=number), number)
+
+
+if __name__ == '__main__':
+    main()
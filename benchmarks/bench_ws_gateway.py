@@ -0,0 +1,141 @@
+"""Benchmark: threaded BaseWebsocketManager vs asyncio AsyncWsGateway on a local echo server.
+
+Opens --connections sockets to a local websocket echo server with each
+implementation, pushes --messages JSON frames through every socket and reports
+round-trip throughput and the process thread count while streaming.
+
+Usage:
+    python -m benchmarks.bench_ws_gateway [--connections 20] [--messages 2000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import websockets
+
+from pytradekit.gateway.websocket.async_ws_gateway import AsyncWsGateway, WsCodec
+from pytradekit.gateway.websocket.base_ws_manager import BaseWebsocketManager
+
+DEFAULT_CONNECTIONS = 20
+DEFAULT_MESSAGES = 2000
+TIMEOUT_S = 120
+
+
+def start_echo_server():
+    """Echo server on its own loop and thread; returns its URL."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    url = []
+
+    async def echo(ws, *args):
+        async for message in ws:
+            await ws.send(message)
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(websockets.serve(echo, '127.0.0.1', 0))
+        url.append(f'ws://127.0.0.1:{list(server.sockets)[0].getsockname()[1]}')
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    return url[0]
+
+
+def make_frame(n) -> dict:
+    return {'e': 'bookTicker', 's': 'BTCUSDT', 'b': '65000.01', 'B': '1.5', 'a': '65000.02', 'A': '2.1', 'u': n}
+
+
+class CountingManager(BaseWebsocketManager):
+    def __init__(self, logger, url, expected, done):
+        super().__init__(logger, None)
+        self._url = url
+        self.expected = expected
+        self.done = done
+        self.received = 0
+
+    def _get_url(self):
+        return self._url
+
+    def _on_message(self, ws, message, *args, **kwargs):
+        json.loads(message)
+        self.received += 1
+        if self.received == self.expected:
+            self.done.release()
+
+
+def bench_threaded(url, connections, messages):
+    logger = logging.getLogger(__name__)
+    done = threading.Semaphore(0)
+    managers = [CountingManager(logger, url, messages, done) for _ in range(connections)]
+    for manager in managers:
+        manager.connect()
+    start = time.perf_counter()
+    for n in range(messages):
+        for manager in managers:
+            manager.send_json(make_frame(n))
+    threads = threading.active_count()
+    for _ in managers:
+        done.acquire(timeout=TIMEOUT_S)
+    elapsed = time.perf_counter() - start
+    for manager in managers:
+        manager.close()
+    return elapsed, threads
+
+
+def bench_gateway(url, connections, messages):
+    gateway = AsyncWsGateway(logging.getLogger(__name__))
+    received = {}
+
+    async def on_message(name, msg):
+        received[name] += 1
+        if received[name] == messages:
+            finished[name].set()
+
+    finished = {}
+    for n in range(connections):
+        received[n] = 0
+        gateway.add_connection(n, WsCodec(url), on_message)
+
+    async def scenario():
+        for n in range(connections):
+            finished[n] = asyncio.Event()
+        task = asyncio.ensure_future(gateway.run())
+        while any(connection.status != 'ACTIVE' for connection in gateway.connections.values()):
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        for n in range(messages):
+            for connection in gateway.connections.values():
+                await connection.send(make_frame(n))
+        threads = threading.active_count()
+        await asyncio.wait_for(asyncio.gather(*(event.wait() for event in finished.values())), TIMEOUT_S)
+        elapsed = time.perf_counter() - start
+        await gateway.close()
+        await task
+        return elapsed, threads
+
+    return asyncio.new_event_loop().run_until_complete(scenario())
+
+
+def report(name, elapsed, threads, total):
+    print(f'{name:<28} {total / elapsed:12,.0f} msg/s  {elapsed:7.3f} s  {threads:4d} threads')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES)
+    args = parser.parse_args()
+
+    url = start_echo_server()
+    total = args.connections * args.messages
+    report('threaded BaseWebsocketManager', *bench_threaded(url, args.connections, args.messages), total)
+    report('asyncio AsyncWsGateway', *bench_gateway(url, args.connections, args.messages), total)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+"""asyncio websocket gateway: many exchange streams multiplexed on one event loop.
+
+Alternative to WsManager / BaseWebsocketManager, which spend a `run_forever`
+thread per socket plus per-exchange `_ping` threads. Here every connection is
+a task on a shared loop, so following more symbols costs sockets, not threads.
+
+Exchange specifics (URL, login, application-level ping/pong, encoding and
+parsing) live in a WsCodec. Subscribe keeps BaseWebsocketManager's semantics:
+every subscribe message is remembered in `_subs` and replayed, after the
+codec's auth messages, on each reconnect.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import inspect
+import itertools
+import json
+import threading
+
+import websockets
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from pytradekit.gateway.websocket.ws_supervisor import ReconnectBackoff
+from pytradekit.utils.dynamic_types import WebsocketStatus, BinanceAuxiliary, BinanceWebSocket, OkexAuxiliary, \
+    BitfinexAuxiliary, KucoinAuxiliary
+from pytradekit.utils.json_codec import loads
+from pytradekit.utils.time_handler import get_timestamp_ms, get_timestamp_s
+
+# websockets 协议层 ping，和 BaseWebsocketManager 的 run_forever 配置一致
+PROTOCOL_PING_INTERVAL_S = 60
+PROTOCOL_PING_TIMEOUT_S = 30
+CONNECT_TIMEOUT_S = 5
+# OKX 30s 无消息断开，Kucoin 服务端 pingInterval 约 18s
+OKEX_PING_INTERVAL_S = 20
+KUCOIN_PING_INTERVAL_S = 15
+BITFINEX_PING_INTERVAL_S = 30
+
+
+class WsCodec:
+    """Exchange protocol of one connection; subclass per exchange.
+
+    Args:
+        url: Websocket URL.
+    """
+    # 应用层心跳间隔，None 表示只靠协议层 ping
+    ping_interval_s = None
+
+    def __init__(self, url):
+        self.url = url
+
+    async def get_url(self) -> str:
+        """URL for the next connect; override when it needs a fresh token (e.g. Kucoin bullet)."""
+        return self.url
+
+    def get_auth_messages(self) -> list:
+        """Messages sent right after connecting, before the subscriptions are replayed."""
+        return []
+
+    def get_ping_message(self):
+        return None
+
+    def get_reply(self, raw):
+        """Reply to a server heartbeat, or None when `raw` is not one."""
+        return None
+
+    def encode(self, message):
+        return message if isinstance(message, str) else json.dumps(message)
+
+    def decode(self, raw) -> list:
+        """Messages to dispatch for one frame; an empty list drops it (pongs, acks)."""
+        return [loads(raw)]
+
+
+class BinanceCodec(WsCodec):
+    """Binance streams; heartbeats are protocol pings, subscriptions carry an increasing id like WsManager."""
+
+    def __init__(self, url=BinanceAuxiliary.url_ws.value):
+        super().__init__(url)
+        self._ids = itertools.count()
+
+    def encode(self, message):
+        if isinstance(message, dict) and message.get('method') == BinanceWebSocket.subscribe.value:
+            message = {**message, 'id': next(self._ids)}
+        return super().encode(message)
+
+    def decode(self, raw) -> list:
+        msg = loads(raw)
+        # 订阅回执 {"result": null, "id": n}
+        if isinstance(msg, dict) and 'result' in msg and 'id' in msg:
+            return []
+        return [msg]
+
+
+class OkexCodec(WsCodec):
+    """OKX v5: text 'ping' every 20s, login op signed like OkexWsManager._login."""
+    ping_interval_s = OKEX_PING_INTERVAL_S
+
+    def __init__(self, url=OkexAuxiliary.url_ws_public.value, api_key=None, api_secret=None, passphrase=None):
+        super().__init__(url)
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self._passphrase = passphrase
+
+    def get_auth_messages(self) -> list:
+        if not self._api_key:
+            return []
+        nonce = str(get_timestamp_s())
+        mac = hmac.new(bytes(self._api_secret, encoding='utf8'),
+                       bytes(nonce + 'GET' + '/users/self/verify', encoding='utf-8'), digestmod='sha256')
+        return [{'op': 'login', 'args': [{'apiKey': self._api_key, 'passphrase': self._passphrase,
+                                          'timestamp': nonce, 'sign': base64.b64encode(mac.digest()).decode()}]}]
+
+    def get_ping_message(self):
+        return 'ping'
+
+    def decode(self, raw) -> list:
+        if raw == 'pong':
+            return []
+        return [loads(raw)]
+
+
+class BitfinexCodec(WsCodec):
+    """Bitfinex v2: event ping, auth signed like BitfinexWsManager.start_subscribe."""
+    ping_interval_s = BITFINEX_PING_INTERVAL_S
+
+    def __init__(self, url=BitfinexAuxiliary.url_ws.value, api_key=None, api_secret=None):
+        super().__init__(url)
+        self._api_key = api_key
+        self._api_secret = api_secret
+        self._cids = itertools.count()
+
+    def get_auth_messages(self) -> list:
+        if not self._api_key:
+            return []
+        nonce = str(get_timestamp_ms())
+        auth_payload = f'AUTH{nonce}'
+        signature = hmac.new(self._api_secret.encode(), auth_payload.encode(), hashlib.sha384).hexdigest()
+        return [{'event': 'auth', 'apiKey': self._api_key, 'authSig': signature, 'authPayload': auth_payload,
+                 'authNonce': nonce}]
+
+    def get_ping_message(self):
+        return {'event': 'ping', 'cid': next(self._cids)}
+
+    def decode(self, raw) -> list:
+        msg = loads(raw)
+        # 心跳 [chan_id, "hb"] 和 pong 不下发
+        if (isinstance(msg, list) and len(msg) == 2 and msg[1] == 'hb') or \
+                (isinstance(msg, dict) and msg.get('event') == 'pong'):
+            return []
+        return [msg]
+
+
+class KucoinCodec(WsCodec):
+    """Kucoin: typed ping/pong keyed by id.
+
+    Args:
+        url: Endpoint with token, e.g. from KucoinWsManager.get_ws_token().
+    """
+    ping_interval_s = KUCOIN_PING_INTERVAL_S
+
+    def __init__(self, url=KucoinAuxiliary.url_ws.value):
+        super().__init__(url)
+
+    def get_ping_message(self):
+        return {'id': str(get_timestamp_ms()), 'type': 'ping'}
+
+    def get_reply(self, raw):
+        if '"ping"' not in raw:
+            return None
+        msg = loads(raw)
+        if msg.get('type') == 'ping':
+            return {'id': msg.get('id'), 'type': 'pong'}
+        return None
+
+    def decode(self, raw) -> list:
+        msg = loads(raw)
+        if msg.get('type') in ('pong', 'welcome', 'ack'):
+            return []
+        return [msg]
+
+
+class AsyncWsConnection:
+    """One exchange websocket kept alive on the gateway loop.
+
+    Args:
+        name: Key of the connection in the gateway.
+        codec: WsCodec of the exchange.
+        on_message: Called as `on_message(name, msg)` per decoded message; may be a coroutine function.
+        logger: Logger instance.
+        backoff: ReconnectBackoff between failed connects.
+        connect: Websocket connect function, `websockets.connect` by default.
+    """
+
+    def __init__(self, name, codec, on_message, logger, backoff=None, connect=None):
+        self.name = name
+        self.codec = codec
+        self.on_message = on_message
+        self.logger = logger
+        self.backoff = backoff or ReconnectBackoff()
+        self._connect = connect or websockets.connect
+        self._is_coroutine = inspect.iscoroutinefunction(on_message)
+        self._subs = []
+        self.ws = None
+        self.status = WebsocketStatus.INIT.name
+        self.messages = 0
+        self.reconnects = 0
+        self.last_message_ms = None
+
+    async def subscribe(self, message):
+        if message not in self._subs:
+            self._subs.append(message)
+        if self.ws is not None and self.status == WebsocketStatus.ACTIVE.name:
+            await self.send(message)
+
+    async def send(self, message):
+        await self.ws.send(self.codec.encode(message))
+
+    async def close(self):
+        self.status = WebsocketStatus.STOP.name
+        if self.ws is not None:
+            await self.ws.close()
+
+    def get_stats(self) -> dict:
+        return {'status': self.status, 'messages': self.messages, 'reconnects': self.reconnects,
+                'last_message_ms': self.last_message_ms}
+
+    async def run(self):
+        attempt = 0
+        while self.status != WebsocketStatus.STOP.name:
+            try:
+                self.ws = await asyncio.wait_for(
+                    self._connect(await self.codec.get_url(), ping_interval=PROTOCOL_PING_INTERVAL_S,
+                                  ping_timeout=PROTOCOL_PING_TIMEOUT_S), CONNECT_TIMEOUT_S)
+            except (OSError, InvalidHandshake, asyncio.TimeoutError) as e:
+                self.logger.debug(f"{self.name} connect error: {e}")
+                await asyncio.sleep(self.backoff.get_delay(attempt))
+                attempt += 1
+                continue
+            if self.status == WebsocketStatus.RECOVERY.name:
+                self.reconnects += 1
+            attempt = 0
+            await self._serve()
+            if self.status != WebsocketStatus.STOP.name:
+                self.status = WebsocketStatus.RECOVERY.name
+                await asyncio.sleep(self.backoff.get_delay(attempt))
+
+    async def _serve(self):
+        ping_task = None
+        try:
+            for message in self.codec.get_auth_messages():
+                await self.send(message)
+            # 与 BaseWebsocketManager._reconnect_streams 一样重放全部订阅
+            for message in list(self._subs):
+                await self.send(message)
+            self.status = WebsocketStatus.ACTIVE.name
+            if self.codec.ping_interval_s:
+                ping_task = asyncio.ensure_future(self._ping())
+            async for raw in self.ws:
+                await self._handle(raw)
+        except ConnectionClosed as e:
+            self.logger.debug(f"{self.name} connection closed: {e}")
+        finally:
+            if ping_task:
+                ping_task.cancel()
+            self.ws = None
+
+    async def _handle(self, raw):
+        reply = self.codec.get_reply(raw)
+        if reply is not None:
+            await self.send(reply)
+            return
+        try:
+            msgs = self.codec.decode(raw)
+        except ValueError as e:
+            self.logger.debug(f"{self.name} undecodable message {raw!r}: {e}")
+            return
+        self.messages += len(msgs)
+        self.last_message_ms = get_timestamp_ms()
+        for msg in msgs:
+            try:
+                if self._is_coroutine:
+                    await self.on_message(self.name, msg)
+                else:
+                    self.on_message(self.name, msg)
+            except Exception as e:
+                self.logger.exception(e)
+
+    async def _ping(self):
+        while True:
+            await asyncio.sleep(self.codec.ping_interval_s)
+            try:
+                await self.send(self.codec.get_ping_message())
+            except ConnectionClosed:
+                return
+
+
+class AsyncWsGateway:
+    """Runs AsyncWsConnections on one event loop, either awaited directly or on a background thread.
+
+    Args:
+        logger: Logger instance.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.connections = {}
+        self.loop = None
+        self._thread = None
+        self._tasks = {}
+
+    def add_connection(self, name, codec, on_message, backoff=None, connect=None) -> AsyncWsConnection:
+        connection = AsyncWsConnection(name, codec, on_message, self.logger, backoff=backoff, connect=connect)
+        self.connections[name] = connection
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._start_connection, connection)
+        return connection
+
+    async def run(self):
+        """Run every connection until close(); for callers already on an event loop."""
+        self.loop = asyncio.get_running_loop()
+        for connection in self.connections.values():
+            self._start_connection(connection)
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def start(self):
+        """Run the gateway on a daemon thread for threaded callers."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_until_complete, args=(self.run(),),
+                                        name='ws-gateway', daemon=True)
+        self._thread.start()
+
+    def subscribe(self, name, message):
+        """Thread-safe subscribe; remembered for replay even before the connection is up."""
+        connection = self.connections[name]
+        if self.loop is None or not self.loop.is_running():
+            if message not in connection._subs:
+                connection._subs.append(message)
+            return None
+        return asyncio.run_coroutine_threadsafe(connection.subscribe(message), self.loop)
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.connections.values()))
+        for task in self._tasks.values():
+            task.cancel()
+
+    def stop(self, timeout_s=CONNECT_TIMEOUT_S):
+        """Thread-safe close() for a gateway started with start()."""
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop).result(timeout_s)
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+
+    def get_stats(self) -> dict:
+        return {name: connection.get_stats() for name, connection in self.connections.items()}
+
+    def _start_connection(self, connection):
+        if connection.name not in self._tasks:
+            task = asyncio.ensure_future(connection.run())
+            self._tasks[connection.name] = task
+            task.add_done_callback(lambda _: self._tasks.pop(connection.name, None))
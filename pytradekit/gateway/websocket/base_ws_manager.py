@@ -4,22 +4,31 @@ from threading import Thread, Event, Semaphore
 from websocket import WebSocketApp
 from websocket._abnf import ABNF
 
+from pytradekit.gateway.websocket.ws_supervisor import WebsocketSupervisor
 from pytradekit.utils.tools import synchronized
 from pytradekit.utils.dynamic_types import WebsocketStatus
 from pytradekit.utils.exceptions import ExchangeException
 from pytradekit.utils.time_handler import sleep_min_time
 
+# 等待 on_open 的最长时间，超时算本次连接失败
+CONNECT_TIMEOUT_S = 5
+
 
 class BaseWebsocketManager:
+    # 进程内所有连接共用一个重连调度线程，断线由 on_close / on_error / pong 超时事件触发
+    _supervisor = WebsocketSupervisor()
 
     def __init__(self, logger, start_end_time_dict):
         self._ping_interval = 0
+        # None: 有 _ping_interval 时取其一半，超时未收到 pong 由 run_forever 报错触发重连
+        self._ping_timeout = None
         self._subs = []
         self.ws = None
         self.status = WebsocketStatus.INIT.name
         self.logger = logger
         self.start_end_time_dict = start_end_time_dict
         self._semaphore = Semaphore()
+        self._opened = Event()
 
     def _get_url(self):
         raise NotImplementedError()
@@ -31,11 +40,11 @@ class BaseWebsocketManager:
         pass
 
     def _on_close(self, ws, *args, **kwargs):
-        self.reconnect()
+        self.reconnect('closed')
 
     def _on_error(self, ws, error, *args, **kwargs):
         self.logger.debug(f"ws :{ws} connection error: {error}")
-        self.reconnect()
+        self.reconnect(error)
 
     def _on_ping(self, ws, *args, **kwargs):
         pass
@@ -54,59 +63,50 @@ class BaseWebsocketManager:
     def send_json(self, message):
         self.send(json.dumps(message))
 
-    def reconnect(self) -> None:
-        if self.status == WebsocketStatus.RECOVERY.name:
+    def reconnect(self, reason=None) -> None:
+        # 首次连接由 connect() 自己重试；恢复中或已停止的不再排队
+        if self.status in (WebsocketStatus.RECOVERY.name, WebsocketStatus.INIT.name, WebsocketStatus.STOP.name):
             return
-        self._needRecovery.set()
+        self._supervisor.request_recovery(self, reason)
 
     def connect(self):
         if self.status == WebsocketStatus.ACTIVE.name:
             return
 
+        attempt = 0
         while not self.ws:
             self._connect()
             if self.ws:
                 return
+            sleep_min_time(self._supervisor.backoff.get_delay(attempt))
+            attempt += 1
+
+    @classmethod
+    def get_reconnect_stats(cls) -> dict:
+        """Per-connection reconnect metrics of every manager in this process."""
+        return cls._supervisor.get_stats()
 
     def close(self):
         self.status = WebsocketStatus.STOP.name
+        self._supervisor.unregister(self)
         try:
             self.ws.close()
             self.ws = None
         except:
             pass
 
-    def _monitor(self):
-        ctr = 0
-        while self.status != WebsocketStatus.STOP.name:
-            sleep_min_time(0.01)
-            ctr += 1
-            if ctr >= 5:
-                ctr = 0
-                if self.status in [WebsocketStatus.RECOVERY.name, WebsocketStatus.INIT.name]:
-                    continue
-                if not self.ws.sock or not self.ws.sock.connected or self._needRecovery.is_set():
-                    self.status = WebsocketStatus.RECOVERY.name
-                    self._needRecovery.clear()
-                    self._recovery()
-                    break
-
     def _connect(self):
         assert not self.ws, "ws should be closed before attempting to connect"
 
         if self.start_end_time_dict:
             self.start_end_time_dict['connect_status'] = True
 
-        self._needRecovery = Event()
-        self._needRecovery.clear()
-
-        self._monitorThread = Thread(target=self._monitor)
-        self._monitorThread.daemon = True
-        self._monitorThread.start()
+        self._supervisor.register(self)
+        self._opened.clear()
         self.ws = WebSocketApp(
             self._get_url(),
             on_message=self._wrap_callback(self._on_message),
-            on_open=self._wrap_callback(self._on_open),
+            on_open=self._wrap_callback(self._handle_open),
             on_close=self._wrap_callback(self._on_close),
             on_error=self._wrap_callback(self._on_error),
             on_ping=self._on_ping,
@@ -117,15 +117,19 @@ class BaseWebsocketManager:
         wst.daemon = True
         wst.start()
 
-        ctr = 0
-        while self.ws and (not self.ws.sock or not self.ws.sock.connected):
-            if ctr > 5 / 0.01:
-                self.ws = None
-                return
-            ctr += 1
-            sleep_min_time(0.01)
+        if not self._opened.wait(CONNECT_TIMEOUT_S):
+            ws, self.ws = self.ws, None
+            try:
+                ws.close()
+            except Exception:
+                pass
+            return
         self.status = WebsocketStatus.ACTIVE.name
 
+    def _handle_open(self, ws, *args, **kwargs):
+        self._opened.set()
+        self._on_open(ws, *args, **kwargs)
+
     def _wrap_callback(self, f):
         def wrapped_f(ws, *args, **kwargs):
             if ws is self.ws:
@@ -139,22 +143,34 @@ class BaseWebsocketManager:
 
     def _run_websocket(self, ws):
         try:
-            ws.run_forever(ping_interval=self._ping_interval)
+            ws.run_forever(ping_interval=self._ping_interval, ping_timeout=self._get_ping_timeout())
         except Exception as e:
             self.logger.debug(f"websocket run_forever error: {e}")
         finally:
             if ws is self.ws:
-                self.reconnect()
-
-    def _recovery(self):
+                self.reconnect('run_forever exited')
+
+    def _get_ping_timeout(self):
+        if self._ping_timeout:
+            return self._ping_timeout
+        return self._ping_interval / 2 if self._ping_interval else None
+
+    def _recovery(self) -> bool:
+        """One reconnect attempt, called by the supervisor; True once the streams are resubscribed."""
+        if self.status == WebsocketStatus.STOP.name:
+            return False
+        self.status = WebsocketStatus.RECOVERY.name
         try:
             if self.ws:
                 self.ws.close()
         except:
             self.logger.debug("websocket recovery error")
         self.ws = None
-        self.connect()
+        self._connect()
+        if not self.ws:
+            return False
         self._reconnect_streams()
+        return True
 
     def _reconnect_streams(self):
         self.logger.debug("reconnect_streams: ", self._subs)
@@ -0,0 +1,180 @@
+"""Process-wide reconnect supervisor for BaseWebsocketManager connections.
+
+Replaces the per-connection `_monitor` thread that woke every 10 ms to poll
+`ws.sock.connected`. Dead connections are reported by events instead:
+`on_close`, `on_error` (including websocket-client's ping/pong timeout) and
+`run_forever` returning all call `manager.reconnect()`, which queues the
+manager here. One scheduler thread sleeps on a condition until the next
+recovery is due and hands it to a small worker pool; a failed attempt is
+retried with exponential backoff plus jitter so a venue outage does not turn
+into a reconnect storm.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 重连退避：0.5s 起，每次翻倍，封顶 60s；jitter 为随机扣减比例，错开同时断线的连接
+RECONNECT_BASE_DELAY_S = 0.5
+RECONNECT_MAX_DELAY_S = 60
+RECONNECT_BACKOFF_FACTOR = 2
+RECONNECT_JITTER = 0.5
+# 同时执行的重连数；单次 _connect 最长等 CONNECT_TIMEOUT_S
+RECOVERY_WORKERS = 4
+
+
+class ReconnectBackoff:
+    """Exponential backoff with jitter: attempt n waits base * factor**n capped at max_delay, minus up to jitter of it.
+
+    Args:
+        base_delay_s: Delay before the first retry.
+        max_delay_s: Upper bound on any delay.
+        factor: Growth per failed attempt.
+        jitter: Fraction of the delay randomly removed, in [0, 1].
+    """
+
+    __slots__ = ('base_delay_s', 'max_delay_s', 'factor', 'jitter')
+
+    def __init__(self, base_delay_s=RECONNECT_BASE_DELAY_S, max_delay_s=RECONNECT_MAX_DELAY_S,
+                 factor=RECONNECT_BACKOFF_FACTOR, jitter=RECONNECT_JITTER):
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.factor = factor
+        self.jitter = jitter
+
+    def get_delay(self, attempt) -> float:
+        delay = min(self.max_delay_s, self.base_delay_s * self.factor ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+class ConnectionMetrics:
+    """Reconnect counters of one managed connection."""
+
+    __slots__ = ('name', 'reconnects', 'failed_attempts', 'attempt', 'last_reason', 'last_reconnect_s',
+                 'down_since', 'last_downtime_s', 'max_downtime_s')
+
+    def __init__(self, name):
+        self.name = name
+        self.reconnects = 0
+        self.failed_attempts = 0
+        # 当前这轮断线已失败的次数，决定下一次退避时长
+        self.attempt = 0
+        self.last_reason = None
+        self.last_reconnect_s = None
+        self.down_since = None
+        self.last_downtime_s = None
+        self.max_downtime_s = 0.0
+
+    def to_dict(self) -> dict:
+        return {'reconnects': self.reconnects, 'failed_attempts': self.failed_attempts,
+                'last_reason': self.last_reason, 'last_reconnect_s': self.last_reconnect_s,
+                'is_down': self.down_since is not None, 'last_downtime_s': self.last_downtime_s,
+                'max_downtime_s': self.max_downtime_s}
+
+
+class WebsocketSupervisor:
+    """Schedules `manager._recovery()` calls for every registered connection on one thread.
+
+    `_recovery()` makes a single connect attempt and returns whether the socket
+    came up; the supervisor owns retries, backoff and metrics.
+
+    Args:
+        backoff: ReconnectBackoff used between failed attempts.
+        max_workers: Recoveries run concurrently.
+    """
+
+    def __init__(self, backoff=None, max_workers=RECOVERY_WORKERS):
+        self.backoff = backoff or ReconnectBackoff()
+        self.max_workers = max_workers
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = set()
+        self._metrics = {}
+        self._thread = None
+        self._executor = None
+
+    def register(self, manager):
+        with self._cond:
+            self._get_metrics(manager)
+
+    def unregister(self, manager):
+        with self._cond:
+            self._metrics.pop(id(manager), None)
+            self._pending.discard(id(manager))
+
+    def request_recovery(self, manager, reason=None, delay_s=0):
+        """Queue a recovery of `manager`; repeated requests while one is pending are merged."""
+        with self._cond:
+            metrics = self._get_metrics(manager)
+            if id(manager) in self._pending:
+                return
+            if metrics.down_since is None:
+                metrics.down_since = time.monotonic()
+            metrics.last_reason = str(reason) if reason is not None else None
+            self._pending.add(id(manager))
+            heapq.heappush(self._heap, (time.monotonic() + delay_s, next(self._seq), manager))
+            self._start()
+            self._cond.notify()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {metrics.name: metrics.to_dict() for metrics in self._metrics.values()}
+
+    def _get_metrics(self, manager):
+        metrics = self._metrics.get(id(manager))
+        if metrics is None:
+            metrics = self._metrics[id(manager)] = ConnectionMetrics(f'{type(manager).__name__}@{id(manager):x}')
+        return metrics
+
+    def _start(self):
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ws-recovery')
+            self._thread = threading.Thread(target=self._run, name='ws-supervisor', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, manager = self._heap[0]
+                wait_s = due - time.monotonic()
+                if wait_s > 0:
+                    # 只在有到期任务或新请求时醒来，不再轮询
+                    self._cond.wait(wait_s)
+                    continue
+                heapq.heappop(self._heap)
+                if id(manager) not in self._metrics:
+                    continue
+            self._executor.submit(self._recover, manager)
+
+    def _recover(self, manager):
+        try:
+            recovered = manager._recovery()
+        except Exception as e:
+            manager.logger.debug(f"websocket recovery error: {e}")
+            recovered = False
+        with self._cond:
+            metrics = self._metrics.get(id(manager))
+            self._pending.discard(id(manager))
+            if metrics is None:
+                # close() 之后不再重连
+                return
+            if recovered:
+                now = time.monotonic()
+                metrics.reconnects += 1
+                metrics.attempt = 0
+                metrics.last_reconnect_s = time.time()
+                metrics.last_downtime_s = now - metrics.down_since if metrics.down_since is not None else 0.0
+                metrics.max_downtime_s = max(metrics.max_downtime_s, metrics.last_downtime_s)
+                metrics.down_since = None
+                return
+            metrics.failed_attempts += 1
+            delay_s = self.backoff.get_delay(metrics.attempt)
+            metrics.attempt += 1
+            self._pending.add(id(manager))
+            heapq.heappush(self._heap, (time.monotonic() + delay_s, next(self._seq), manager))
+            self._cond.notify()
@@ -0,0 +1,292 @@
+"""Client-side Binance rate limiter.
+
+BN counts REQUEST_WEIGHT per IP and ORDERS per account on fixed wall-clock
+windows (10s / 1m / 1d). All worker processes on a box share the same IP, so
+the window counters live in Redis and every request is charged *before* it is
+sent, to all of its windows at once or to none of them. The
+`X-MBX-USED-WEIGHT-*` / `X-MBX-ORDER-COUNT-*` response headers then resync the
+counters with what BN actually counted (restarts, manual tools, processes that
+do not use the limiter). A 418/429 stores the Retry-After deadline next to the
+counters so every process backs off until it passes.
+"""
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qs, urlparse
+
+from pytradekit.utils.dynamic_types import BinanceAuxiliary, BinanceRateLimitType, HttpMmthod, RedisFields
+from pytradekit.utils.exceptions import DependencyException
+
+# 只用到交易所额度的 90%，给未接入限速器的进程和时钟偏差留余量
+SAFETY_RATIO = 0.9
+DEFAULT_REQUEST_WEIGHT = 1
+DEFAULT_ORDER_SCOPE = 'default'
+ORDER_SCOPE_HASH_LENGTH = 16
+ORDER_URL_PATHS = (BinanceAuxiliary.url_order.value, BinanceAuxiliary.url_perp_order.value)
+
+INTERVAL_UNITS_S = {'S': 1, 'M': 60, 'H': 60 * 60, 'D': 60 * 60 * 24}
+RATE_LIMIT_HEADER_PATTERN = re.compile(r'^x-mbx-(used-weight|order-count)-(\d+)([smhd])$', re.IGNORECASE)
+RATE_LIMIT_HEADER_BUCKETS = {
+    'used-weight': BinanceRateLimitType.REQUEST_WEIGHT,
+    'order-count': BinanceRateLimitType.ORDERS,
+}
+
+# (weight with `symbol`, weight without `symbol`), from the BN API docs.
+ENDPOINT_WEIGHTS = {
+    BinanceAuxiliary.url_exchange.value: (2, 20),
+    BinanceAuxiliary.url_balance.value: (20, 20),
+    BinanceAuxiliary.url_spot_commission_rate.value: (20, 20),
+    BinanceAuxiliary.url_order.value: (4, 4),
+    BinanceAuxiliary.url_open_order.value: (6, 80),
+    BinanceAuxiliary.url_all_order.value: (20, 20),
+    BinanceAuxiliary.url_trade.value: (20, 20),
+    BinanceAuxiliary.url_kline.value: (2, 2),
+    BinanceAuxiliary.url_ticker_24hr.value: (2, 80),
+    BinanceAuxiliary.url_perp_ticker_24hr.value: (1, 40),
+    BinanceAuxiliary.url_perp_last_funding_rate.value: (1, 10),
+    BinanceAuxiliary.url_perp_ticker_price.value: (1, 2),
+    BinanceAuxiliary.url_perp_all_order.value: (5, 5),
+    BinanceAuxiliary.url_perp_user_trades.value: (5, 5),
+    BinanceAuxiliary.url_perp_force_order.value: (20, 50),
+    BinanceAuxiliary.url_perp_position_risk.value: (5, 5),
+    BinanceAuxiliary.url_perp_income.value: (30, 30),
+    BinanceAuxiliary.url_perp_balance.value: (5, 5),
+    BinanceAuxiliary.url_perp_account.value: (5, 5),
+    BinanceAuxiliary.url_perp_multi_margin.value: (30, 30),
+    BinanceAuxiliary.url_commission_rate.value: (20, 20),
+}
+# /api/v3/depth 的权重随 limit 档位变化：(limit 上限, 权重)，默认 limit=100
+DEPTH_WEIGHTS = ((100, 5), (500, 25), (1000, 50), (5000, 250))
+DEPTH_DEFAULT_LIMIT = 100
+# /fapi/v1/depth：默认 limit=500
+PERP_DEPTH_WEIGHTS = ((50, 2), (100, 5), (500, 10), (1000, 20))
+PERP_DEPTH_DEFAULT_LIMIT = 500
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """One BN rate-limit window, e.g. REQUEST_WEIGHT 6000 per 1 minute."""
+    bucket: BinanceRateLimitType
+    interval_s: int
+    limit: int
+
+    @property
+    def capacity(self) -> int:
+        return int(self.limit * SAFETY_RATIO)
+
+    @property
+    def interval_label(self) -> str:
+        """Header suffix BN uses for this window, e.g. 60 -> '1M', 10 -> '10S'."""
+        for unit in ('D', 'H', 'M'):
+            if self.interval_s % INTERVAL_UNITS_S[unit] == 0:
+                return f'{self.interval_s // INTERVAL_UNITS_S[unit]}{unit}'
+        return f'{self.interval_s}S'
+
+    def get_window_id(self, now: float) -> int:
+        return int(now // self.interval_s)
+
+    def get_window_remaining(self, now: float) -> float:
+        return self.interval_s - now % self.interval_s
+
+
+SPOT_RATE_LIMIT_RULES = (
+    RateLimitRule(BinanceRateLimitType.REQUEST_WEIGHT, 60, 6000),
+    RateLimitRule(BinanceRateLimitType.ORDERS, 10, 100),
+    RateLimitRule(BinanceRateLimitType.ORDERS, 60 * 60 * 24, 200000),
+)
+PERP_RATE_LIMIT_RULES = (
+    RateLimitRule(BinanceRateLimitType.REQUEST_WEIGHT, 60, 2400),
+    RateLimitRule(BinanceRateLimitType.ORDERS, 10, 300),
+    RateLimitRule(BinanceRateLimitType.ORDERS, 60, 1200),
+)
+
+
+def _get_depth_weight(args, weights, default_limit) -> int:
+    limit = int(args.get('limit') or default_limit)
+    for max_limit, weight in weights:
+        if limit <= max_limit:
+            return weight
+    return weights[-1][1]
+
+
+def get_request_weight(method, url, params=None) -> int:
+    """REQUEST_WEIGHT cost of one call; query args may sit in `url` or in `params`."""
+    parsed = urlparse(url)
+    args = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    if isinstance(params, dict):
+        args.update(params)
+    if parsed.path == BinanceAuxiliary.url_orderbook.value:
+        return _get_depth_weight(args, DEPTH_WEIGHTS, DEPTH_DEFAULT_LIMIT)
+    if parsed.path == BinanceAuxiliary.url_perp_orderbook.value:
+        return _get_depth_weight(args, PERP_DEPTH_WEIGHTS, PERP_DEPTH_DEFAULT_LIMIT)
+    if parsed.path == BinanceAuxiliary.url_order.value and method != HttpMmthod.GET.name:
+        return 1
+    weights = ENDPOINT_WEIGHTS.get(parsed.path)
+    if weights is None:
+        return DEFAULT_REQUEST_WEIGHT
+    return weights[0] if 'symbol' in args else weights[1]
+
+
+def get_request_costs(method, url, params=None) -> dict:
+    """Amount each bucket is charged for one call."""
+    costs = {BinanceRateLimitType.REQUEST_WEIGHT: get_request_weight(method, url, params)}
+    if method == HttpMmthod.POST.name and urlparse(url).path in ORDER_URL_PATHS:
+        costs[BinanceRateLimitType.ORDERS] = 1
+    return costs
+
+
+def get_order_scope(account_id=None, api_key=None) -> str:
+    """ORDERS are counted per account; never put the raw api key into a Redis key."""
+    if account_id:
+        return str(account_id)
+    if api_key:
+        return hashlib.sha256(api_key.encode()).hexdigest()[:ORDER_SCOPE_HASH_LENGTH]
+    return DEFAULT_ORDER_SCOPE
+
+
+class LocalRateLimitStore:
+    """In-process window counters, used without Redis or while Redis is down.
+
+    Mirrors the RedisOperations rate-limit scripts; values expire on the wall clock in ms.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _get_value(self, key, now_ms) -> int:
+        value, expire_at_ms = self._counters.get(key, (0, 0))
+        return value if expire_at_ms > now_ms else 0
+
+    def _prune(self, now_ms):
+        for key in [k for k, (_, expire_at_ms) in self._counters.items() if expire_at_ms <= now_ms]:
+            del self._counters[key]
+
+    def reserve_rate_limit_weights(self, counters, blocked_keys, now_ms) -> int:
+        with self._lock:
+            self._prune(now_ms)
+            wait_ms = max([self._get_value(key, now_ms) - now_ms for key in blocked_keys], default=0)
+            for key, weight, capacity, interval_ms in counters:
+                if self._get_value(key, now_ms) + weight > capacity:
+                    wait_ms = max(wait_ms, interval_ms - now_ms % interval_ms)
+            if wait_ms > 0:
+                return wait_ms
+            for key, weight, capacity, interval_ms in counters:
+                self._counters[key] = (self._get_value(key, now_ms) + weight, now_ms + interval_ms + 1000)
+            return 0
+
+    def sync_rate_limit_used(self, key, used, ttl_s):
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            if used > self._get_value(key, now_ms):
+                self._counters[key] = (used, now_ms + ttl_s * 1000)
+
+    def set_rate_limit_blocked_until(self, key, until_ms, ttl_ms):
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            if until_ms > self._get_value(key, now_ms):
+                self._counters[key] = (until_ms, now_ms + ttl_ms)
+
+
+class BinanceRateLimiter:
+    """Charges BN rate-limit windows before a request is sent.
+
+    Args:
+        logger: Logger instance.
+        rules: RateLimitRule windows to enforce.
+        store: Counter store, normally RedisOperations so every process shares
+            one budget; defaults to a LocalRateLimitStore.
+    """
+
+    def __init__(self, logger, rules, store=None):
+        self.logger = logger
+        self.rules = tuple(rules)
+        self._fallback = LocalRateLimitStore()
+        self.store = store or self._fallback
+
+    def _get_key(self, rule, scope, now) -> str:
+        return f"{RedisFields.rate_limit.name}:{rule.bucket.name}:{scope}:{rule.interval_label}:" \
+               f"{rule.get_window_id(now)}"
+
+    @staticmethod
+    def _get_blocked_key(bucket, scope) -> str:
+        return f"{RedisFields.rate_limit.name}:{bucket.name}:{scope}:blocked"
+
+    @staticmethod
+    def _get_scope(bucket, url, order_scope):
+        if bucket == BinanceRateLimitType.ORDERS:
+            return order_scope or DEFAULT_ORDER_SCOPE
+        return urlparse(url).netloc
+
+    def _call_store(self, method_name, *args):
+        try:
+            return getattr(self.store, method_name)(*args)
+        except DependencyException as e:
+            self.logger.debug(f'Rate limit store unavailable, using local counters: {e.note}', exc_info=True)
+            return getattr(self._fallback, method_name)(*args)
+
+    def try_acquire(self, method, url, params=None, order_scope=None) -> float:
+        """Reserve budget for one call in every window it is charged to, or in none.
+
+        Returns:
+            0 if reserved, otherwise seconds until the exhausted windows reset or
+            the bucket's Retry-After block ends.
+        """
+        now = time.time()
+        costs = get_request_costs(method, url, params)
+        counters = [(self._get_key(rule, self._get_scope(rule.bucket, url, order_scope), now), costs[rule.bucket],
+                     rule.capacity, rule.interval_s * 1000)
+                    for rule in self.rules if costs.get(rule.bucket)]
+        blocked_keys = [self._get_blocked_key(bucket, self._get_scope(bucket, url, order_scope)) for bucket in costs]
+        wait_ms = self._call_store('reserve_rate_limit_weights', counters, blocked_keys, int(now * 1000))
+        return wait_ms / 1000
+
+    def acquire(self, method, url, params=None, order_scope=None):
+        """Block the calling thread until the call fits in every window."""
+        while (wait_s := self.try_acquire(method, url, params, order_scope)) > 0:
+            self.logger.info(f'Rate limit budget exhausted for {method} {url}, wait {wait_s:.2f}s')
+            time.sleep(wait_s)
+
+    async def acquire_async(self, method, url, params=None, order_scope=None):
+        """Like acquire(), but the store round trip runs in a worker thread and the wait on the event loop."""
+        while (wait_s := await asyncio.to_thread(self.try_acquire, method, url, params, order_scope)) > 0:
+            self.logger.info(f'Rate limit budget exhausted for {method} {url}, wait {wait_s:.2f}s')
+            await asyncio.sleep(wait_s)
+
+    def observe(self, headers, url, order_scope=None):
+        """Raise local/shared counters to the usage BN reports in response headers."""
+        now = time.time()
+        for name, value in headers.items():
+            match = RATE_LIMIT_HEADER_PATTERN.match(name)
+            if match is None:
+                continue
+            bucket = RATE_LIMIT_HEADER_BUCKETS[match.group(1).lower()]
+            interval_s = int(match.group(2)) * INTERVAL_UNITS_S[match.group(3).upper()]
+            rule = next((r for r in self.rules if r.bucket == bucket and r.interval_s == interval_s), None)
+            if rule is None:
+                continue
+            key = self._get_key(rule, self._get_scope(bucket, url, order_scope), now)
+            self._call_store('sync_rate_limit_used', key, int(value), rule.interval_s + 1)
+
+    async def observe_async(self, headers, url, order_scope=None):
+        """observe() without blocking the event loop on the store round trip."""
+        await asyncio.to_thread(self.observe, headers, url, order_scope)
+
+    def block(self, bucket, url, retry_after_s, order_scope=None):
+        """After a 418/429, hold every call charged to `bucket` for `retry_after_s` in all processes."""
+        ttl_ms = int(retry_after_s * 1000)
+        key = self._get_blocked_key(bucket, self._get_scope(bucket, url, order_scope))
+        self._call_store('set_rate_limit_blocked_until', key, int(time.time() * 1000) + ttl_ms, ttl_ms)
+
+    async def block_async(self, bucket, url, retry_after_s, order_scope=None):
+        """block() without blocking the event loop on the store round trip."""
+        await asyncio.to_thread(self.block, bucket, url, retry_after_s, order_scope)
+
+
+def create_binance_rate_limiter(logger, redis_ops=None, is_perp=False) -> BinanceRateLimiter:
+    """Build a limiter with BN's default windows, shared through `redis_ops` when given."""
+    rules = PERP_RATE_LIMIT_RULES if is_perp else SPOT_RATE_LIMIT_RULES
+    return BinanceRateLimiter(logger, rules, store=redis_ops)
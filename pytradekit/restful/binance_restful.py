@@ -1,3 +1,4 @@
+import asyncio
 from decimal import Decimal
 from urllib.parse import urlencode
 import time
@@ -11,10 +12,13 @@ import base64
 from cryptography.hazmat.primitives import serialization
 from nacl.signing import SigningKey
 
+from pytradekit.restful.binance_rate_limiter import create_binance_rate_limiter, get_order_scope
+from pytradekit.trading_setup.inst_code_usage import SYMBOL_SPLITTER
 from pytradekit.utils import time_handler
-from pytradekit.utils.dynamic_types import HttpMmthod, RestfulRequestsAttribute, BinanceAuxiliary, BinanceRestful, InstCodeType
+from pytradekit.utils.dynamic_types import HttpMmthod, RestfulRequestsAttribute, BinanceAuxiliary, BinanceRestful, \
+    InstCodeType, BinanceRateLimitType
 from pytradekit.utils.exceptions import ExchangeException, MinNotionalException, LotSizeException, InsufficientBalanceException
-from pytradekit.utils.tools import async_retry_decorator
+from pytradekit.utils.tools import async_retry_decorator, optional_import
 from pytradekit.utils.static_types import FeeStructureKey
 
 # Signed-request validity window. BN's server default is 5000ms; incident-time
@@ -29,10 +33,35 @@ RETRY_INTERVAL = 5
 # 仅对 GET 自动重试，避免 POST/DELETE（下单/撤单）被重复执行。
 SYNC_HTTP_TIMEOUT = (5, 30)  # (connect, read)
 
+# 异步 HTTP 连接池：下单/撤单复用长连接，避免每次请求都重新 TLS 握手。
+# keepalive_expiry 必须小于 BN 的 60s idle 断连，否则会复用到已被关闭的 socket。
+# 安装了 h2 时走 HTTP/2，同一连接上多路复用并发的下单/撤单请求。
+h2 = optional_import("h2")
+ASYNC_HTTP_TIMEOUT = 5
+ASYNC_POOL_MAX_CONNECTIONS = 20
+ASYNC_POOL_MAX_KEEPALIVE = 20
+ASYNC_POOL_KEEPALIVE_EXPIRY = 50
+RATE_LIMIT_STATUS_CODES = (418, 429)
+# BN error code for "Too many new orders" — the ORDERS bucket, not IP weight.
+ORDER_RATE_LIMIT_CODE = -1015
+
 
 class BinanceClient:
-    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None, is_perp=False, is_alpha=False):
+    _async_client = None
+    # BinanceRateLimiter that paces requests before they are sent and keeps the
+    # per-bucket 418/429 backoff deadlines. Without an injected (e.g. Redis-shared)
+    # one, __init__ builds a process-local limiter and sets owns_rate_limiter.
+    rate_limiter = None
+    owns_rate_limiter = False
+    # Ed25519 key built from secret_key on first signed request, see _get_signing_key().
+    _signing_key = None
+
+    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None, is_perp=False, is_alpha=False,
+                 rate_limiter=None):
         self.api_key = key
+        self.owns_rate_limiter = rate_limiter is None
+        self.rate_limiter = rate_limiter if rate_limiter is not None else \
+            create_binance_rate_limiter(logger, is_perp=is_perp)
         if secret is not None:
             self.secret_key = self._decrypt_private_key(secret, passphrase)
         self.passphrase = passphrase
@@ -77,6 +106,8 @@ class BinanceClient:
             headers = {}
             if use_sign:
                 headers["X-MBX-APIKEY"] = self.api_key
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(method, url, params, self._get_order_scope())
 
             if method == "GET":
                 resp = self.session.get(url, headers=headers, params=params, timeout=SYNC_HTTP_TIMEOUT)
@@ -86,11 +117,13 @@ class BinanceClient:
                 resp = self.session.delete(url, headers=headers, data=params, timeout=SYNC_HTTP_TIMEOUT)
             else:
                 raise ExchangeException(f"Unsupported HTTP method: {method}")
+            self._observe_rate_limit(resp, url)
 
             if resp.status_code in [418, 429]:
-                retry_after = int(resp.headers.get("Retry-After", 1))
+                retry_after = self._get_retry_after(resp)
                 self.logger.info(f"Request rate limited: {resp.text}, retry after {retry_after}s")
-                time.sleep(retry_after)
+                if self.rate_limiter is None:
+                    time.sleep(retry_after)
                 return None
 
             # Check for non-2xx status codes
@@ -124,15 +157,14 @@ class BinanceClient:
             headers = {}
             if use_sign:
                 headers.update({'X-MBX-APIKEY': self.api_key})
-            if http_client:
-                resp = await self.requests_result(method, url, headers, http_client, params=params)
-            else:
-                async with httpx.AsyncClient() as client:
-                    resp = await self.requests_result(method, url, headers, client, params=params)
-            if resp.status_code in [418, 429]:
-                retry_after = int(resp.headers['Retry-After'])
-                self.logger.info(f'Request failed {resp.content} sleep:{retry_after}')
-                time.sleep(retry_after)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(method, url, params, self._get_order_scope())
+            client = http_client or self._get_async_client()
+            resp = await self.requests_result(method, url, headers, client, params=params)
+            if resp.status_code in RATE_LIMIT_STATUS_CODES:
+                await self._handle_rate_limited(resp, url)
+            elif self.rate_limiter is not None:
+                await self.rate_limiter.observe_async(resp.headers, url, self._get_order_scope())
             result = resp.json()
             if 'code' in result:
                 if result['code'] == -1013:
@@ -161,32 +193,98 @@ class BinanceClient:
 
     async def requests_result(self, method, url, headers, client, params=None):
         if method == 'GET':
-            resp = await client.get(url, params=params, headers=headers, timeout=5)
+            resp = await client.get(url, params=params, headers=headers, timeout=ASYNC_HTTP_TIMEOUT)
         elif method == 'POST':
-            resp = await client.post(url, params=params, headers=headers, timeout=5)
+            resp = await client.post(url, params=params, headers=headers, timeout=ASYNC_HTTP_TIMEOUT)
         elif method == 'DELETE':
-            resp = await client.delete(url, params=params, headers=headers, timeout=5)
+            resp = await client.delete(url, params=params, headers=headers, timeout=ASYNC_HTTP_TIMEOUT)
         else:
             return None
         return resp
 
+    def _get_async_client(self):
+        """Return the long-lived pooled AsyncClient, creating it on first use.
+
+        The pool is bound to the event loop that first uses it; call
+        close_async_client() before switching loops.
+        """
+        if self._async_client is None or self._async_client.is_closed:
+            limits = httpx.Limits(max_connections=ASYNC_POOL_MAX_CONNECTIONS,
+                                  max_keepalive_connections=ASYNC_POOL_MAX_KEEPALIVE,
+                                  keepalive_expiry=ASYNC_POOL_KEEPALIVE_EXPIRY)
+            self._async_client = httpx.AsyncClient(http2=h2 is not None, limits=limits,
+                                                   timeout=ASYNC_HTTP_TIMEOUT)
+        return self._async_client
+
+    async def close_async_client(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _get_order_scope(self):
+        return get_order_scope(getattr(self, 'account_id', None), self.api_key)
+
+    def _observe_rate_limit(self, resp, url):
+        """Feed BN's usage headers to the shared limiter; on 418/429 block the tripped bucket for Retry-After."""
+        if self.rate_limiter is None or resp is None:
+            return
+        self.rate_limiter.observe(resp.headers, url, self._get_order_scope())
+        if resp.status_code in RATE_LIMIT_STATUS_CODES:
+            self.rate_limiter.block(self._get_rate_limited_bucket(resp), url, self._get_retry_after(resp),
+                                    self._get_order_scope())
+
+    @staticmethod
+    def _get_rate_limited_bucket(resp):
+        try:
+            code = resp.json().get('code')
+        except (ValueError, AttributeError):
+            code = None
+        return BinanceRateLimitType.ORDERS if code == ORDER_RATE_LIMIT_CODE else BinanceRateLimitType.REQUEST_WEIGHT
+
+    @staticmethod
+    def _get_retry_after(resp) -> int:
+        return int(resp.headers.get('Retry-After', 1))
+
+    async def _handle_rate_limited(self, resp, url):
+        """Record the backoff in the shared limiter so every process waits it out
+        before its next call; without a limiter, wait here without blocking the event loop."""
+        retry_after = self._get_retry_after(resp)
+        bucket = self._get_rate_limited_bucket(resp)
+        self.logger.info(f'Request rate limited on {bucket.name}: {resp.content} sleep:{retry_after}')
+        if self.rate_limiter is None:
+            await asyncio.sleep(retry_after)
+            return
+        await self.rate_limiter.observe_async(resp.headers, url, self._get_order_scope())
+        await self.rate_limiter.block_async(bucket, url, retry_after, self._get_order_scope())
+
     @staticmethod
     def get_timestamp():
         return time_handler.get_timestamp_ms()
 
+    def _get_signing_key(self):
+        """
+        私钥以 Base64 存储，每个 client 只解码并构建一次 SigningKey，
+        下单/撤单路径上不再重复构建
+        """
+        if self._signing_key is None:
+            self._signing_key = SigningKey(base64.b64decode(self.secret_key))
+        return self._signing_key
+
     def _hashing(self, query_string):
         """
         使用 Ed25519 私钥签名（代替 HMAC-SHA256）
         返回 Base64 编码的签名字符串
         """
-        try:
-            # 私钥以 Base64 存储
-            private_key_bytes = base64.b64decode(self.secret_key)
-            signing_key = SigningKey(private_key_bytes)
+        return self.sign_query_strings([query_string])[0]
 
-            signed = signing_key.sign(query_string.encode("UTF-8")).signature
-            signature_b64 = base64.b64encode(signed).decode("ASCII")
-            return signature_b64
+    def sign_query_strings(self, query_strings):
+        """
+        批量签名：一次调用对多个 query string 签名，返回与输入顺序一致的 Base64 签名列表
+        """
+        try:
+            signing_key = self._get_signing_key()
+            return [base64.b64encode(signing_key.sign(query_string.encode("UTF-8")).signature).decode("ASCII")
+                    for query_string in query_strings]
         except Exception as e:
             self.logger.exception(e)
             raise ExchangeException("Ed25519 签名失败") from e
@@ -216,12 +314,14 @@ class BinanceClient:
         url, params, _ = self._make_private_url(url_path=BinanceAuxiliary.url_exchange.value,
                                                 params={}, use_sign=False, timestamp=False)
         exch_info = self.request(HttpMmthod.GET.name, url, use_sign=False)
+        SYMBOL_SPLITTER.load_exchange_info(exch_info)
         return exch_info
 
     def get_alpha_exchange_information(self):
         url, params, _ = self._make_private_url(url_path=BinanceAuxiliary.url_alpha_exchange_info.value,
                                                 params={}, use_sign=False, timestamp=False)
         exch_info = self.request(HttpMmthod.GET.name, url, use_sign=False)
+        SYMBOL_SPLITTER.load_exchange_info(exch_info)
         return exch_info
 
     def get_account_information(self):
@@ -285,6 +385,15 @@ class BinanceClient:
         ob = self.request(HttpMmthod.GET.name, url, use_sign=False)
         return ob
 
+    def get_perp_orderbook(self, symbol, limit=None):
+        params = {RestfulRequestsAttribute.symbol.name: symbol}
+        if limit is not None:
+            params[RestfulRequestsAttribute.limit.name] = limit
+        url = self._make_public_url(url_path=BinanceAuxiliary.url_perp_orderbook.value,
+                                    params=params)
+        ob = self.request(HttpMmthod.GET.name, url, use_sign=False)
+        return ob
+
     def get_klines(self, symbol, interval, from_date=None, to_date=None):
         params = {RestfulRequestsAttribute.symbol.name: symbol,
                   RestfulRequestsAttribute.interval.name: interval}
@@ -749,8 +858,8 @@ class BinanceClient:
 
 
 class BinancePerpClient(BinanceClient):
-    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None):
-        super().__init__(logger, key, secret, passphrase, account_id)
+    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None, rate_limiter=None):
+        super().__init__(logger, key, secret, passphrase, account_id, rate_limiter=rate_limiter)
         self._url = BinanceAuxiliary.perp_url.value
 
     @staticmethod
@@ -862,6 +971,6 @@ class BinancePerpClient(BinanceClient):
 
 
 class BinanceAlphaClient(BinanceClient):
-    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None):
-        super().__init__(logger, key, secret, passphrase, account_id)
+    def __init__(self, logger, key=None, secret=None, passphrase=None, account_id=None, rate_limiter=None):
+        super().__init__(logger, key, secret, passphrase, account_id, rate_limiter=rate_limiter)
         self._url = BinanceAuxiliary.alpha_url.value
@@ -3,13 +3,16 @@ author: Willem Wang
 date: 2024-10-15
 description: 存每个交易所的需要做市的交易对，以及获取这些交易对的方法。获取做市目标的做法。
 """
+import threading
+from functools import lru_cache
 from pandas import DataFrame
 import pandas as pd
 from typing import Union
 from pytradekit.utils.dynamic_types import MmTarget, ExchangeId, InstCodeType
 from pytradekit.utils.static_types import InstcodeBasicAttribute
 from pytradekit.utils.exceptions import DataTypeException
-from pytradekit.utils.custom_types import Pair, InstCode
+from pytradekit.utils.custom_types import Pair, InstCode, INST_CODE_REGISTRY, INST_CODE_CACHE_SIZE, \
+    clear_inst_code_cache
 
 VENDOR_EXCHANGE = [ExchangeId.MCO.name, ExchangeId.EMO.name, ExchangeId.BUL.name, ExchangeId.BCI.name,
                    ExchangeId.PNX.name, ExchangeId.HKG.name]
@@ -71,6 +74,11 @@ class DepthThreshold:
     okex = 100_000
     bybit_usdd = 1_000_000
 
+    @classmethod
+    def get_depth_pcts(cls):
+        """统计深度用的盘口百分比，从小到大"""
+        return sorted({cls.depth_pct, cls.orderbook_pct})
+
 
 class RankPctThreshold:
     normal = 75
@@ -225,11 +233,18 @@ def convert_symbol_to_inst_code(symbol: str, exchange_id=ExchangeId.BN.name, typ
     Example:
         'BTCUSDT' -> 'BTC-USDT_BN.SPOT'
     """
-    pair = convert_symbol_to_pair(symbol)
-    inst_code = f'{pair}_{exchange_id}.{types}'
+    # 已注册的交易对直接取预先算好的字符串，其余走缓存的推断
+    inst_code = INST_CODE_REGISTRY.get_inst_code_str(symbol, exchange_id, types)
+    if inst_code is None:
+        inst_code = _guess_symbol_inst_code(symbol, exchange_id, types)
     return inst_code
 
 
+@lru_cache(maxsize=INST_CODE_CACHE_SIZE)
+def _guess_symbol_inst_code(symbol, exchange_id, types) -> str:
+    return f'{convert_symbol_to_pair(symbol)}_{exchange_id}.{types}'
+
+
 def convert_base_quote_to_inst_code(base: str, quote: str, exchange_id=ExchangeId.BN.name, types=InstCodeType.SPOT.name) -> str:
     """
     Convert base and quote to inst_code.
@@ -301,6 +316,128 @@ def convert_pair_to_symbol(pair: str) -> str:
     return symbol
 
 
+# 没加载 exchangeInfo / inst_code_basic 时使用的计价币
+DEFAULT_QUOTE_ASSETS = ("USDT", "USDC", "BUSD", "USD", "BTC", "ETH")
+# exchangeInfo 里交易对列表所在的键，以及各交易所 (symbol, base, quote) 的字段名
+EXCHANGE_INFO_LIST_KEYS = ('symbols', 'data', 'result', 'list')
+EXCHANGE_INFO_ASSET_KEYS = (('symbol', 'baseAsset', 'quoteAsset'), ('instId', 'baseCcy', 'quoteCcy'),
+                            ('symbol', 'baseCoin', 'quoteCoin'), ('id', 'base', 'quote'),
+                            ('symbol', 'base', 'quote'))
+_QUOTE_END = ''
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.upper().replace('-', '').replace('_', '').replace('/', '')
+
+
+def iter_exchange_info_assets(exchange_info):
+    """(symbol, base, quote) of every instrument in a get_exchange_information response."""
+    items = exchange_info
+    while isinstance(items, dict):
+        key = next((k for k in EXCHANGE_INFO_LIST_KEYS if k in items), None)
+        if key is None:
+            return
+        items = items[key]
+    for item in items or []:
+        for symbol_key, base_key, quote_key in EXCHANGE_INFO_ASSET_KEYS:
+            if item.get(symbol_key) and item.get(base_key) and item.get(quote_key):
+                yield item[symbol_key], item[base_key], item[quote_key]
+                break
+
+
+class SymbolSplitter:
+    """Splits exchange symbols ('BTCFDUSD') into (base, quote) from the exchanges' own asset tables.
+
+    Symbols listed in exchangeInfo / inst_code_basic are looked up exactly. Any
+    other symbol is matched against a trie of the known quote assets, built on
+    the reversed quote strings. That is one walk from the end of the symbol,
+    O(len), and it takes the longest quote that leaves a non-empty base. If
+    several quotes fit, a base that is already known is preferred.
+
+    Args:
+        quote_assets: Quote assets known before anything is loaded.
+    """
+
+    def __init__(self, quote_assets=DEFAULT_QUOTE_ASSETS):
+        self._lock = threading.Lock()
+        self._pairs = {}
+        self._bases = frozenset()
+        self._quotes = frozenset(quote_assets)
+        self._trie = self._build_trie(self._quotes)
+
+    @staticmethod
+    def _build_trie(quotes) -> dict:
+        trie = {}
+        for quote in quotes:
+            node = trie
+            for char in reversed(quote):
+                node = node.setdefault(char, {})
+            node[_QUOTE_END] = quote
+        return trie
+
+    def add_assets(self, assets) -> int:
+        """Register (symbol, base, quote) triples; returns how many were read."""
+        assets = [(normalize_symbol(symbol), base.upper(), quote.upper()) for symbol, base, quote in assets]
+        # 复制、合并、替换都在锁内，并发加载不会互相覆盖；读路径只取替换后的引用，不加锁
+        with self._lock:
+            pairs = dict(self._pairs)
+            bases, quotes = set(self._bases), set(self._quotes)
+            for symbol, base, quote in assets:
+                pairs[symbol] = (base, quote)
+                bases.add(base)
+                quotes.add(quote)
+            if quotes != self._quotes:
+                self._trie = self._build_trie(quotes)
+            self._pairs, self._bases, self._quotes = pairs, frozenset(bases), frozenset(quotes)
+        # 旧的拆分结果已被缓存，清掉重新算
+        if self is SYMBOL_SPLITTER:
+            clear_inst_code_cache()
+            _guess_symbol_inst_code.cache_clear()
+        return len(pairs)
+
+    def load_exchange_info(self, exchange_info) -> int:
+        return self.add_assets(iter_exchange_info_assets(exchange_info))
+
+    def load_inst_code_basic(self, inst_code_basic) -> int:
+        return self.add_assets((row[InstcodeBasicAttribute.symbol.name], row[InstcodeBasicAttribute.base.name],
+                                row[InstcodeBasicAttribute.quote.name]) for row in inst_code_basic
+                               if row.get(InstcodeBasicAttribute.symbol.name)
+                               and row.get(InstcodeBasicAttribute.base.name)
+                               and row.get(InstcodeBasicAttribute.quote.name))
+
+    def split(self, symbol: str):
+        """(base, quote) of a normalized symbol, or None when no known quote fits."""
+        known = self._pairs.get(symbol)
+        if known is not None:
+            return known
+        node, best = self._trie, None
+        for i in range(len(symbol) - 1, 0, -1):
+            node = node.get(symbol[i])
+            if node is None:
+                break
+            quote = node.get(_QUOTE_END)
+            if quote is not None:
+                base = symbol[:i]
+                # 越往前匹配到的计价币越长；已知 base 的拆法优先
+                if best is None or base in self._bases or best[0] not in self._bases:
+                    best = (base, quote)
+        return best
+
+    def to_pair(self, symbol: str) -> str:
+        symbol = normalize_symbol(symbol)
+        split = self.split(symbol)
+        # If no known quote currency found, return as-is (for edge cases)
+        return f"{split[0]}-{split[1]}" if split else symbol
+
+    def to_pairs(self, symbols: pd.Series) -> pd.Series:
+        """Vectorized to_pair for a DataFrame column: each distinct symbol is split once."""
+        uniques = symbols.dropna().unique()
+        return symbols.map({symbol: self.to_pair(symbol) for symbol in uniques})
+
+
+SYMBOL_SPLITTER = SymbolSplitter()
+
+
 def convert_symbol_to_pair(symbol: str) -> str:
     """
     Convert symbol to pair.
@@ -314,19 +451,17 @@ def convert_symbol_to_pair(symbol: str) -> str:
     Example:
         'BTCUSDT' -> 'BTC-USDT'
     """
-    symbol = symbol.upper().replace("-", "")
+    return SYMBOL_SPLITTER.to_pair(symbol)
 
-    # Common quote currencies (ordered by length to match longest first)
-    quote_currencies = ["USDT", "USDC", "BUSD", "USD", "BTC", "ETH"]
 
-    for quote in quote_currencies:
-        if symbol.endswith(quote):
-            base = symbol[: -len(quote)]
-            if base:
-                return f"{base}-{quote}"
+def convert_symbols_to_pairs(symbols: pd.Series) -> pd.Series:
+    """
+    Convert a column of symbols to pairs, e.g. a trades DataFrame's symbol column.
 
-    # If no known quote currency found, return as-is (for edge cases)
-    return symbol
+    Example:
+        pd.Series(['BTCUSDT', 'ETHBTC']) -> pd.Series(['BTC-USDT', 'ETH-BTC'])
+    """
+    return SYMBOL_SPLITTER.to_pairs(symbols)
 
 
 def extract_base_from_inst_code(inst_code: str) -> str:
@@ -0,0 +1,199 @@
+"""
+asyncio 版 MongodbOperations，给 asyncio 下单引擎用，避免阻塞插入卡住事件循环。
+
+命名规范与同步版一致：insert / read。查询条件、集合名、值转换和结果整理
+全部继承自 MongodbQueries，与同步版共用同一份代码。
+"""
+import functools
+
+from pandas import DataFrame
+from pymongo import AsyncMongoClient
+from pymongo.errors import ConnectionFailure, NetworkTimeout, OperationFailure, ServerSelectionTimeoutError
+
+from pytradekit.utils.exceptions import NoDataException
+from pytradekit.utils.mongodb_indexes import get_collection_indexes
+from pytradekit.utils.mongodb_operations import AtUser, MongodbOperations, MongodbQueries, CollectionPath, \
+    UPSERT_KEY_FIELDS, get_safe_mongodb_url
+from pytradekit.utils.static_types import Database, OrderBookAttribute
+
+
+class AsyncMongodbOperations(MongodbQueries):
+    """Coroutine `insert_*`/`read_*` for the order path, on pymongo's native async client.
+
+    Unlike MongodbOperations the client is per instance: an async client is bound
+    to the event loop it first runs on. It shares the process-wide heartbeat
+    monitor, so `MongodbOperations.get_health_stats()` covers both clients, and
+    writes go through the same circuit breaker: while it is open, or when the
+    server is unreachable, they log and return None instead of stalling the
+    order loop.
+
+    Args:
+        mongodb_url: MongoDB connection URL.
+        logger: Logger instance.
+    """
+    # (db_name, collection_name) already checked against the index registry in this process
+    _registry_indexed = set()
+
+    @staticmethod
+    def handle_mongodb_errors_async(default_return=None):
+        """Coroutine version of MongodbOperations.handle_mongodb_errors, on the same circuit breaker."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                instance_or_class = args[0] if args else None
+                health = MongodbOperations._health
+
+                try:
+                    if not health.allow_request():
+                        instance_or_class.logger.info(
+                            f"MongoDB circuit {health.state} in {func.__name__}. Using default value. {AtUser.debug}")
+                        return default_return
+                    result = await func(*args, **kwargs)
+                    health.record_success()
+                    return result
+                except (ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError) as e:
+                    health.record_failure()
+                    instance_or_class.logger.info(
+                        f"MongoDB operation failed in {func.__name__}: {str(e)}. Using default value. {AtUser.debug}")
+                    return default_return
+                except OperationFailure as e:
+                    instance_or_class.logger.info(
+                        f"MongoDB operation failed in {func.__name__}: {str(e)}. Using default value. {AtUser.debug}")
+                    return default_return
+                except Exception as e:
+                    instance_or_class.logger.info(f"Unexpected error in {func.__name__}: {str(e)} {AtUser.debug}")
+                    raise
+
+            return wrapper
+
+        return decorator
+
+    def __init__(self, mongodb_url, logger=None):
+        self.client = AsyncMongoClient(get_safe_mongodb_url(mongodb_url),
+                                       event_listeners=[MongodbOperations._health])
+        self.logger = logger
+
+    async def close(self):
+        await self.client.close()
+        if self.logger:
+            self.logger.debug("Async MongoDB connection closed.")
+
+    async def _get_collection(self, db_name, collection_name):
+        collection = self.client[db_name][collection_name]
+        key = (db_name, collection_name)
+        if key not in AsyncMongodbOperations._registry_indexed:
+            for index in get_collection_indexes(db_name, collection_name):
+                try:
+                    await collection.create_index(index.keys, **index.get_options())
+                except OperationFailure as e:
+                    if self.logger:
+                        self.logger.info(f'Skip index {index.name} on {db_name}.{collection_name}: {e}')
+            AsyncMongodbOperations._registry_indexed.add(key)
+        return collection
+
+    @handle_mongodb_errors_async()
+    async def insert_data(self, data, collection_path):
+        collection = await self._get_collection(collection_path.db_name, collection_path.collection_name)
+        if isinstance(data, list):
+            await collection.insert_many([self.get_correct_dict(d) for d in data])
+        else:
+            await collection.insert_one(self.get_correct_dict(data))
+
+    @handle_mongodb_errors_async()
+    async def insert_data_if_not_exists(self, data, collection_path):
+        collection = await self._get_collection(collection_path.db_name, collection_path.collection_name)
+        items, requests = self._build_if_not_exists_requests(data)
+        if not items:
+            return
+        result = await collection.bulk_write(requests, ordered=False)
+        self._log_existing(items, result)
+
+    @handle_mongodb_errors_async()
+    async def insert_data_unordered(self, data, collection_path, key_fields=UPSERT_KEY_FIELDS):
+        requests = self._build_unordered_requests(data, key_fields)
+        if not requests:
+            return None
+        collection = await self._get_collection(collection_path.db_name, collection_path.collection_name)
+        return await collection.bulk_write(requests, ordered=False)
+
+    async def insert_orders(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_orders.name,
+                                                    collection_name=self.get_orders_collection_name(
+                                                        exchange_id, False, False)))
+
+    async def insert_orders_raw(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_orders.name,
+                                                    collection_name=self.get_orders_collection_name(
+                                                        exchange_id, False, True)))
+
+    async def insert_trades(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_orders.name,
+                                                    collection_name=self.get_trades_collection_name(
+                                                        exchange_id, False)))
+
+    async def insert_trades_inventory(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_orders.name,
+                                                    collection_name=self.get_trades_collection_name(
+                                                        exchange_id, False, True)))
+
+    async def insert_balances(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_accounts.name,
+                                                    collection_name=f'{exchange_id}_{Database.balance.name}'))
+
+    async def insert_orderbook(self, data, exchange_id):
+        await self.insert_data(data, CollectionPath(db_name=Database.raw_market.name,
+                                                    collection_name=f'{exchange_id}_{Database.order_book.name}'))
+
+    async def read_accounts(self, account_id=None, account_name=None, exchange_id=None, user=None, is_mm=None,
+                            is_df=False):
+        params = self._build_accounts_query(account_id=account_id, account_name=account_name, exchange_id=exchange_id,
+                                            user=user, is_mm=is_mm)
+        res = await self.client[Database.raw_accounts.name][Database.all_accounts.name].find(params).to_list(None)
+        if len(res) == 0:
+            raise NoDataException(f"No accounts found for account {account_id}")
+        if is_df:
+            return DataFrame(res)
+        return res
+
+    async def read_balance(self, account_id=None, exchange_id=None, hour=None, time_span=None, is_df=False, limit=1,
+                           asc=True):
+        collection_name, params = self._prepare_balance_read(account_id=account_id, exchange_id=exchange_id, hour=hour,
+                                                             time_span=time_span)
+        collection = await self._get_collection(Database.raw_accounts.name, collection_name)
+        res = await self._get_balance_cursor(collection, params, limit, asc).to_list(None)
+        if len(res) == 0:
+            raise NoDataException(f'No balance found for account_id {account_id}')
+        if is_df:
+            return DataFrame(res)
+        return res
+
+    async def read_last_orderbook(self, inst_code, exchange_id=None, is_other=False) -> dict:
+        for coll in self._get_last_orderbook_collection_names(inst_code, exchange_id, is_other):
+            collection = await self._get_collection(Database.raw_market.name, coll)
+            res = await collection.find({OrderBookAttribute.inst_code.name: inst_code}).sort(
+                OrderBookAttribute.time_ms.name, -1).limit(1).to_list(None)
+            if res:
+                return res[0]
+        raise NoDataException(f'No last order book found for inst_code {inst_code}')
+
+    async def read_orders(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                          day=None, strategy_id=None, is_other=False, is_raw=False, sort=False, limit=None,
+                          client_order_id=None, order_id=None, is_df=True):
+        exchange_id, collection_name, params = self._prepare_orders_read(
+            time_span=time_span, inst_code=inst_code, account_id=account_id, exchange_id=exchange_id, side=side,
+            day=day, strategy_id=strategy_id, is_other=is_other, is_raw=is_raw, client_order_id=client_order_id,
+            order_id=order_id)
+        collection = await self._get_collection(Database.raw_orders.name, collection_name)
+        res = await self._get_orders_cursor(collection, params, sort, limit).to_list(None)
+        return self._shape_orders(res, inst_code, exchange_id, is_df)
+
+    async def read_trades(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                          day=None, strategy_id=None, is_other=False, is_inventory=None, limit=None,
+                          client_order_id=None):
+        exchange_id, collection_name, params = self._prepare_trades_read(
+            time_span=time_span, inst_code=inst_code, account_id=account_id, exchange_id=exchange_id, side=side,
+            day=day, strategy_id=strategy_id, is_other=is_other, is_inventory=is_inventory,
+            client_order_id=client_order_id)
+        collection = await self._get_collection(Database.raw_orders.name, collection_name)
+        res = await self._get_trades_cursor(collection, params, limit).to_list(None)
+        return self._shape_trades(res, inst_code, exchange_id)
@@ -5,19 +5,29 @@ description: 存放一些业务中需要的，自定义的数据类型
 """
 from decimal import Decimal
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional, Union
 import re
 import subprocess
+import threading
 
 from pytradekit.utils.time_handler import TimeFrame, TimeSpan, convert_date_str_timezone, check_str_format, \
     convert_timestamp_to_str
 from pytradekit.utils.dynamic_types import ExchangeId, StrategyId, OrderSide, OrderType, InstCodeType
-from pytradekit.utils.exceptions import DataTypeException
+from pytradekit.utils.exceptions import DataTypeException, NoDataException
+from pytradekit.utils.static_types import InstcodeBasicAttribute
 from pytradekit.utils.number_tools import get_random_num, handle_pcs_decimal, generate_client_order_id
 
 
-@dataclass
+# from_string 解析结果的 LRU 容量，覆盖所有交易所的交易对还有余量
+INST_CODE_CACHE_SIZE = 8192
+INST_CODE_PATTERN = re.compile(r"([A-Za-z0-9]+(?:-[A-Za-z0-9]+)?)_([A-Za-z0-9]+)\.([A-Za-z0-9]+)")
+
+
+@dataclass(frozen=True)
 class InstCode:
+    """Immutable, so parsed and registered instances are shared between callers."""
+    __slots__ = ('pair', 'exchange_id', 'category')
     pair: str  # Changed from symbol to pair (e.g., 'BTC-USDT')
     exchange_id: ExchangeId
     category: str
@@ -25,23 +35,17 @@ class InstCode:
     def __str__(self) -> str:
         return f"{self.pair}_{self.exchange_id}.{self.category}"
 
+    def __reduce__(self):
+        # frozen + __slots__ 不能走默认的 setattr 反序列化
+        return InstCode, (self.pair, self.exchange_id, self.category)
+
     @staticmethod
     def from_string(inst_code: str):
         # Support both old format (BTCUSDT_BN.SPOT) and new format (BTC-USDT_BN.SPOT)
-        # Pattern matches: BASE-QUOTE_EXCHANGE.TYPE or BASEQUOTE_EXCHANGE.TYPE
-        pattern = r"([A-Za-z0-9]+(?:-[A-Za-z0-9]+)?)_([A-Za-z0-9]+)\.([A-Za-z0-9]+)"
-        match = re.match(pattern, inst_code)
-        if match:
-            pair_or_symbol, exchange_id, category = match.groups()
-            # If no hyphen, it's old format - convert to new format
-            if '-' not in pair_or_symbol:
-                from pytradekit.trading_setup.inst_code_usage import convert_symbol_to_pair
-                pair = convert_symbol_to_pair(pair_or_symbol)
-            else:
-                pair = pair_or_symbol.upper()
-            return InstCode(pair, exchange_id, category)
-        else:
-            raise DataTypeException(f"Invalid inst code format: {inst_code}")
+        registered = INST_CODE_REGISTRY.get(inst_code)
+        if registered is not None:
+            return registered
+        return _parse_inst_code(inst_code)
 
     def get_exchange_type_suffix(self) -> str:
         return f"_{self.exchange_id}.{self.category}"
@@ -55,6 +59,117 @@ class InstCode:
             return f"{symbol}_{self.category}"
 
 
+def _is_ascii_alnum(value: str) -> bool:
+    return value.isascii() and value.isalnum()
+
+
+@lru_cache(maxsize=INST_CODE_CACHE_SIZE)
+def _parse_inst_code(inst_code: str) -> InstCode:
+    """BASE-QUOTE_EXCHANGE.TYPE or BASEQUOTE_EXCHANGE.TYPE; plain splits, INST_CODE_PATTERN only for odd strings."""
+    pair_or_symbol, _, rest = inst_code.partition('_')
+    exchange_id, _, category = rest.partition('.')
+    base, hyphen, quote = pair_or_symbol.partition('-')
+    if not (_is_ascii_alnum(base) and (not hyphen or _is_ascii_alnum(quote)) and _is_ascii_alnum(exchange_id)
+            and _is_ascii_alnum(category)):
+        match = INST_CODE_PATTERN.match(inst_code)
+        if not match:
+            raise DataTypeException(f"Invalid inst code format: {inst_code}")
+        pair_or_symbol, exchange_id, category = match.groups()
+        hyphen = '-' in pair_or_symbol
+    # If no hyphen, it's old format - convert to new format
+    if not hyphen:
+        from pytradekit.trading_setup.inst_code_usage import convert_symbol_to_pair
+        pair = convert_symbol_to_pair(pair_or_symbol)
+    else:
+        pair = pair_or_symbol.upper()
+    return InstCode(pair, exchange_id, category)
+
+
+def clear_inst_code_cache():
+    """Drop cached parses, e.g. after the symbol splitter learned new quote assets."""
+    _parse_inst_code.cache_clear()
+
+
+class InstCodeRegistry:
+    """Interned InstCode objects of the instruments in inst_code_basic.
+
+    Maps inst_code strings (as stored and in the new 'BTC-USDT_BN.SPOT' form),
+    (symbol, exchange_id, category) and (pair, exchange_id, category) to one
+    shared InstCode, with the pair taken from base / quote instead of guessed
+    from the symbol. `load` rebuilds the maps of the exchanges it is given and
+    swaps them in whole, so readers never see a half-built registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_inst_code = {}
+        self._by_symbol = {}
+        self._by_pair = {}
+        self._inst_code_str = {}
+
+    def __len__(self):
+        return len(self._by_symbol)
+
+    def load(self, inst_code_basic) -> int:
+        """Register read_inst_code_basic rows, replacing earlier entries of the same exchanges."""
+        by_symbol = {}
+        for row in inst_code_basic:
+            raw = row[InstcodeBasicAttribute.inst_code.name]
+            exchange_id, _, category = raw.partition('_')[2].partition('.')
+            base, quote = row.get(InstcodeBasicAttribute.base.name), row.get(InstcodeBasicAttribute.quote.name)
+            if base and quote:
+                pair = f'{base}-{quote}'.upper()
+            else:
+                pair = _parse_inst_code(raw).pair
+            symbol = row.get(InstcodeBasicAttribute.symbol.name) or pair.replace('-', '')
+            by_symbol[(symbol.upper(), exchange_id, category)] = (raw, InstCode(pair, exchange_id, category))
+        exchange_ids = {key[1] for key in by_symbol}
+        with self._lock:
+            maps = [{key: value for key, value in current.items() if key[1] not in exchange_ids}
+                    for current in (self._by_symbol, self._by_pair, self._inst_code_str)]
+            by_inst_code = {key: value for key, value in self._by_inst_code.items()
+                            if value.exchange_id not in exchange_ids}
+            for (symbol, exchange_id, category), (raw, inst_code) in by_symbol.items():
+                maps[0][(symbol, exchange_id, category)] = inst_code
+                maps[1][(inst_code.pair, exchange_id, category)] = inst_code
+                maps[2][(symbol, exchange_id, category)] = str(inst_code)
+                by_inst_code[raw] = by_inst_code[str(inst_code)] = inst_code
+                by_inst_code[f'{symbol}_{exchange_id}.{category}'] = inst_code
+            self._by_symbol, self._by_pair, self._inst_code_str = maps
+            self._by_inst_code = by_inst_code
+        return len(by_symbol)
+
+    def refresh(self, mongo_ops, exchange_ids) -> int:
+        """Reload the inst_code_basic of `exchange_ids`; exchanges without rows keep their entries."""
+        loaded = 0
+        for exchange_id in exchange_ids:
+            try:
+                loaded += self.load(mongo_ops.read_inst_code_basic(exchange_id=exchange_id))
+            except NoDataException:
+                continue
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._by_inst_code, self._by_symbol, self._by_pair, self._inst_code_str = {}, {}, {}, {}
+
+    def get(self, inst_code):
+        return self._by_inst_code.get(inst_code)
+
+    def get_by_symbol(self, symbol, exchange_id, category=InstCodeType.SPOT.name):
+        return self._by_symbol.get((symbol, exchange_id, category))
+
+    def get_by_pair(self, pair, exchange_id, category=InstCodeType.SPOT.name):
+        return self._by_pair.get((pair, exchange_id, category))
+
+    def get_inst_code_str(self, symbol, exchange_id, category=InstCodeType.SPOT.name):
+        """str(InstCode) of a registered symbol, precomputed at load."""
+        return self._inst_code_str.get((symbol, exchange_id, category))
+
+
+INST_CODE_REGISTRY = InstCodeRegistry()
+
+
 @dataclass
 class Pair:
     base: Optional[str] = field(default=None)
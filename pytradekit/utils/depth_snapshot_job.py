@@ -0,0 +1,191 @@
+"""Batch depth / spread metrics over stored order-book snapshots.
+
+Recomputing `order_depth_ratio` used to mean reading every snapshot with
+`read_orderbook` and feeding them one by one to `compute_depth`. Here a time
+range of one exchange is split into parts (an hour each by default); every
+part streams its snapshots with `read_orderbook_chunks`, runs
+`compute_depth_batch` once per chunk for all symbols and all
+`DepthThreshold.get_depth_pcts()` bands, and bulk-writes the resulting
+documents with `insert_order_depth_ratio`, which files them in the rotated
+collection of their snapshot's `time_ms` day (not the day the job runs).
+Parts run on a process pool, each worker with its own Mongo client.
+
+Order-book snapshots carry no own orders, so `order_bid` / `order_ask` stay
+None; the ratios are market depth over the `get_mm_target` depth target, the
+number that moves when `DepthThreshold` changes.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pytradekit.trading_setup.inst_code_usage import DepthThreshold, get_mm_target
+from pytradekit.utils.dynamic_types import MmTarget
+from pytradekit.utils.indicator_algorithm import compute_depth_batch
+from pytradekit.utils.mongodb_operations import MongodbOperations
+from pytradekit.utils.static_types import InstcodeBasicAttribute, OrderBookAttribute, OrderDepthRatio
+from pytradekit.utils.time_handler import TimeConvert, TimeSpan, get_timestamp_ms
+from pytradekit.utils.tools import get_coin_price
+
+DEPTH_JOB_CHUNK_SIZE = 10_000
+DEPTH_JOB_PART_MS = TimeConvert.HOUR_TO_MS
+DEPTH_JOB_WORKERS = 4
+ORDERBOOK_PROJECTION = {'_id': 0, OrderBookAttribute.time_ms.name: 1, OrderBookAttribute.event_time_ms.name: 1,
+                        OrderBookAttribute.inst_code.name: 1, OrderBookAttribute.bids.name: 1,
+                        OrderBookAttribute.asks.name: 1}
+
+
+def get_instrument_info(inst_code_basic) -> dict:
+    """inst_code -> (tick_price, quote) from read_inst_code_basic rows."""
+    return {i[InstcodeBasicAttribute.inst_code.name]: (float(i[InstcodeBasicAttribute.tick_price.name]),
+                                                       i[InstcodeBasicAttribute.quote.name])
+            for i in inst_code_basic}
+
+
+def split_time_span(time_span, part_ms=DEPTH_JOB_PART_MS) -> list:
+    """Consecutive, non-overlapping TimeSpans of at most `part_ms` covering `time_span` (both ends inclusive)."""
+    return [TimeSpan(start, min(start + part_ms - 1, time_span.end))
+            for start in range(time_span.start, time_span.end + 1, part_ms)]
+
+
+def get_depth_target(exchange_id, quote):
+    """Per-side depth target: side_depth where the exchange sets one, else average_depth."""
+    target = get_mm_target(exchange_id, quote)
+    side_depth = target[MmTarget.side_depth.name]
+    return side_depth if side_depth > 0 else target[MmTarget.average_depth.name]
+
+
+def compute_depth_ratio_docs(logger, chunk, exchange_id, instrument_info, ticker_price, depth_pcts=None,
+                             run_time_ms=None) -> list:
+    """
+    一个 order book chunk 向量化算出深度，生成 OrderDepthRatio 文档
+
+    Args:
+        logger: Logger instance.
+        chunk: DataFrame of order-book documents (inst_code, time_ms, bids, asks).
+        exchange_id: Exchange of the chunk.
+        instrument_info: get_instrument_info output; snapshots of unknown inst_codes are skipped.
+        ticker_price: Exchange ticker prices for get_coin_price.
+        depth_pcts: Depth bands, by default DepthThreshold.get_depth_pcts(); the first one fills
+            depth_bid / depth_ask, all of them go to other['depths'].
+        run_time_ms: run_time_ms of the documents, default now.
+
+    Returns:
+        list: OrderDepthRatio dicts.
+    """
+    if depth_pcts is None:
+        depth_pcts = DepthThreshold.get_depth_pcts()
+    if chunk.empty:
+        return []
+    inst_codes = chunk[OrderBookAttribute.inst_code.name]
+    valid = (inst_codes.isin(list(instrument_info))
+             & chunk[OrderBookAttribute.bids.name].map(bool) & chunk[OrderBookAttribute.asks.name].map(bool))
+    if not valid.all():
+        logger.debug(f'{exchange_id} depth job skipped {int((~valid).sum())} snapshots without tick size or levels')
+        chunk = chunk[valid]
+        inst_codes = inst_codes[valid]
+    if chunk.empty:
+        return []
+
+    tick_sizes = [instrument_info[inst_code][0] for inst_code in inst_codes]
+    quotes = [instrument_info[inst_code][1] for inst_code in inst_codes]
+    # 带上 inst_code，BTTCUSDT_BN.SPOT 按最优价外一个 tick 统计
+    orderbooks = chunk[[OrderBookAttribute.inst_code.name, OrderBookAttribute.bids.name,
+                        OrderBookAttribute.asks.name]].to_dict('records')
+    res = compute_depth_batch(orderbooks, tick_sizes, depth_pcts)
+
+    # 计价币价格和做市目标按计价币算一次
+    quote_prices = {quote: get_coin_price(logger, quote, ticker_price, exchange_id) for quote in set(quotes)}
+    targets = {quote: get_depth_target(exchange_id, quote) for quote in quote_prices}
+    usd_prices = np.array([quote_prices[quote] if quote_prices[quote] is not None else np.nan for quote in quotes])
+    target_depths = np.array([targets[quote] for quote in quotes], dtype=np.float64)
+    bid_depths = res['bid_amount'] * usd_prices[:, None]
+    ask_depths = res['ask_amount'] * usd_prices[:, None]
+
+    run_time_ms = run_time_ms or get_timestamp_ms()
+    time_ms = chunk[OrderBookAttribute.time_ms.name].tolist()
+    event_time_ms = chunk[OrderBookAttribute.event_time_ms.name].tolist() \
+        if OrderBookAttribute.event_time_ms.name in chunk.columns else time_ms
+    docs = []
+    for i, inst_code in enumerate(inst_codes):
+        if np.isnan(usd_prices[i]):
+            continue
+        bid_depth, ask_depth = int(bid_depths[i, 0]), int(ask_depths[i, 0])
+        target = target_depths[i]
+        other = {'spread': float(res['spread'][i]), 'tick_pct': float(res['tick_pct'][i]),
+                 'depth_target': int(target),
+                 'depths': [{'depth_pct': float(pct), 'depth_bid': int(bid_depths[i, k]),
+                             'depth_ask': int(ask_depths[i, k]),
+                             'volume_bid': float(res['bid_volume'][i, k]),
+                             'volume_ask': float(res['ask_volume'][i, k]),
+                             'price_lower': float(res['depth_lower'][i, k]),
+                             'price_upper': float(res['depth_upper'][i, k])}
+                            for k, pct in enumerate(depth_pcts)]}
+        docs.append(OrderDepthRatio(event_time_ms=event_time_ms[i], run_time_ms=run_time_ms, time_ms=time_ms[i],
+                                    strategy_id=None, inst_code=inst_code, depth_bid=bid_depth,
+                                    depth_ask=ask_depth, order_bid=None, order_ask=None,
+                                    bid_ratio=round(bid_depth / target, 4),
+                                    ask_ratio=round(ask_depth / target, 4),
+                                    depth_ratio=round((bid_depth + ask_depth) / 2 / target, 4),
+                                    other=other).to_dict())
+    return docs
+
+
+def run_depth_snapshot_part(mongodb_url, exchange_id, time_span, instrument_info, ticker_price, depth_pcts=None,
+                            chunk_size=DEPTH_JOB_CHUNK_SIZE) -> int:
+    """One part of DepthSnapshotJob; module level so the process pool can pickle it. Returns documents written."""
+    logger = logging.getLogger(__name__)
+    mongo_ops = MongodbOperations(mongodb_url, logger)
+    run_time_ms = get_timestamp_ms()
+    written = 0
+    for chunk in mongo_ops.read_orderbook_chunks(time_span, exchange_id, chunk_size=chunk_size,
+                                                 projection=ORDERBOOK_PROJECTION):
+        docs = compute_depth_ratio_docs(logger, chunk, exchange_id, instrument_info, ticker_price, depth_pcts,
+                                        run_time_ms)
+        if docs:
+            mongo_ops.insert_order_depth_ratio(docs, exchange_id)
+            written += len(docs)
+    return written
+
+
+class DepthSnapshotJob:
+    """Recompute order_depth_ratio of one exchange over a time range.
+
+    Args:
+        logger: Logger instance.
+        mongodb_url: Mongo URL; every worker process opens its own client.
+        exchange_id: Exchange whose `{exchange_id}_order_book` snapshots are read.
+        inst_code_basic: read_inst_code_basic rows, for tick sizes and quotes.
+        ticker_price: Exchange ticker prices used to convert depth to USD.
+        depth_pcts: Depth bands, default DepthThreshold.get_depth_pcts().
+        workers: Process count; 1 runs the parts in this process.
+        chunk_size: Snapshots per chunk.
+    """
+
+    def __init__(self, logger, mongodb_url, exchange_id, inst_code_basic, ticker_price, depth_pcts=None,
+                 workers=DEPTH_JOB_WORKERS, chunk_size=DEPTH_JOB_CHUNK_SIZE):
+        self.logger = logger
+        self.mongodb_url = mongodb_url
+        self.exchange_id = exchange_id
+        self.instrument_info = get_instrument_info(inst_code_basic)
+        self.ticker_price = ticker_price
+        self.depth_pcts = depth_pcts if depth_pcts is not None else DepthThreshold.get_depth_pcts()
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def run(self, time_span, part_ms=DEPTH_JOB_PART_MS) -> int:
+        """Process `time_span` in parts of `part_ms`; returns the number of documents written."""
+        parts = split_time_span(time_span, part_ms)
+        args = [(self.mongodb_url, self.exchange_id, part, self.instrument_info, self.ticker_price,
+                 self.depth_pcts, self.chunk_size) for part in parts]
+        if self.workers <= 1:
+            counts = [run_depth_snapshot_part(*arg) for arg in args]
+        else:
+            # spawn：pymongo 客户端不能跨 fork 使用
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(parts)),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                counts = list(executor.map(run_depth_snapshot_part, *zip(*args)))
+        written = sum(counts)
+        self.logger.info(f'{self.exchange_id} depth job wrote {written} documents in {len(parts)} parts')
+        return written
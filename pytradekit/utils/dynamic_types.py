@@ -140,6 +140,8 @@ class BinanceWebSocket(Enum):
     account_balance = 'outboundAccountPosition'
     balance_update = 'balanceUpdate'
     perp_order_trade = 'ORDER_TRADE_UPDATE'
+    depth_update = 'depthUpdate'
+    perp_previous_update_id = 'pu'
     symbol = "s"
     order_volume = 'q'
     order_price = 'p'
@@ -960,6 +962,7 @@ class BinanceAuxiliary(Enum):
     url_futures_transfer = '/sapi/v1/futures/transfer'
     url_fapi_transfer = '/fapi/v1/transfer'
     url_perp_order = '/fapi/v1/order'  # 合约下单API
+    url_perp_orderbook = '/fapi/v1/depth'
     url_perp_open_interes_hist = '/futures/data/openInterestHist'
     url_alpha_exchange_info = "/bapi/defi/v1/public/wallet-direct/buw/wallet/cex/alpha/all/token/list"
     url_commission_rate = '/fapi/v1/commissionRate'  # Futures commission rate
@@ -969,6 +972,7 @@ class BinanceAuxiliary(Enum):
     ws_kline_interval = '@kline_15m'
     ws_book_ticker = '@bookTicker'
     ws_orderbook = '@depth'
+    ws_diff_depth = '@depth@100ms'
     ws_lastprice = '@markPrice@1s'
     ws_ping_sleep = 1800
     ws_reconnect_interval = 60 * 60 * 24
@@ -978,6 +982,13 @@ class BinanceAuxiliary(Enum):
     ws_listen_key_sleep = 60
 
 
+class BinanceRateLimitType(Enum):
+    """Binance rate-limit buckets, named after exchangeInfo `rateLimitType`."""
+    REQUEST_WEIGHT = auto()
+    ORDERS = auto()
+    RAW_REQUESTS = auto()
+
+
 class BitfinexAuxiliary(Enum):
     url = 'https://api-pub.bitfinex.com/'
     url_ws = 'wss://api.bitfinex.com/ws/2'
@@ -1401,6 +1412,9 @@ class RedisFields(Enum):
     premium = auto()
     order_link = auto()
     arbitrage_threshold = auto()
+    rate_limit = auto()
+    trade_backfill_checkpoint = auto()
+    cache_invalidation = auto()
 
 
 class DuplicateFields(Enum):
@@ -63,3 +63,9 @@ class CancelOrderException(JwjException):
     def __init__(self, note=None):
         super().__init__('cancel order exception')
         self.note = note
+
+
+class OrderBookSequenceException(JwjException):
+    def __init__(self, note=None):
+        super().__init__('order book update out of sequence')
+        self.note = note
@@ -1,10 +1,15 @@
 from decimal import Decimal
 
-from pytradekit.utils.number_tools import handle_pcs_decimal
+import numpy as np
+
+from pytradekit.utils.number_tools import handle_pcs_decimal, convert_to_decimal, convert_decimal_to_str
 from pytradekit.utils.static_types import OrderBookAttribute
-from pytradekit.utils.number_tools import convert_to_decimal, convert_decimal_to_str
 from pytradekit.utils.tools import get_coin_price
 from pytradekit.utils.exceptions import DataTypeException
+from pytradekit.trading_setup.inst_code_usage import DepthThreshold
+
+# 该品种按最优买卖价外一个 tick 统计深度
+BN_BTTCUSDT_INST_CODE = 'BTTCUSDT_BN.SPOT'
 
 
 def get_median_price(bid1_price, ask1_price):
@@ -74,60 +79,136 @@ def calculate_depth_bounds_with_best_prices(bid1_price: float, ask1_price: float
     return depth_lower, depth_upper, median_price
 
 
-def compute_bid_ask_for_bn_bttcusdt(bids, asks, tick_size, bid_amount, ask_amount, bid_volume, ask_volume):
-    depth_lower, depth_upper, _ = calculate_best_prices(bids[0][0], asks[0][0], tick_size)
-    depth_upper += tick_size
-    depth_lower -= tick_size
-    for bid in bids:
-        if bid[0] >= depth_lower:
-            bid_amount += bid[1] * bid[0]
-            bid_volume += bid[1]
-    for ask in asks:
-        if ask[0] <= depth_upper:
-            ask_amount += ask[1] * ask[0]
-            ask_volume += ask[1]
-    return bid_amount, ask_amount, bid_volume, ask_volume, depth_upper, depth_lower
+def ladders_to_arrays(ladders):
+    """
+    把多本盘口的同一侧摊平成一维数组，供向量化计算
+
+    Args:
+        ladders: 每本盘口一侧的 [[price, volume], ...]，价格数量可以是数字或字符串
+
+    Returns:
+        tuple: (prices, volumes, book_index) 三个等长数组，book_index 为档位所属的盘口序号
+    """
+    sizes = [len(ladder) for ladder in ladders]
+    levels = [level[:2] for ladder in ladders for level in ladder]
+    flat = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    book_index = np.repeat(np.arange(len(ladders)), sizes)
+    return flat[:, 0], flat[:, 1], book_index
+
+
+def calculate_bn_bttcusdt_bounds(bid1_price, ask1_price, tick_size) -> tuple:
+    """
+    BTTCUSDT_BN.SPOT 的深度边界：calculate_best_prices 的最优买卖价各向外一个 tick，按浮点计算
+
+    中间价取整的分支 handle_pcs_decimal 返回 Decimal，原先与浮点相加会报错，这里转回浮点再算
+    """
+    median_price = get_median_price(bid1_price, ask1_price)
+    if median_price - bid1_price < tick_size or ask1_price - median_price < tick_size:
+        best_bid, best_ask, _ = calculate_best_prices(bid1_price, ask1_price, tick_size)
+    else:
+        best_bid = float(handle_pcs_decimal(tick_size, median_price))
+        best_ask = best_bid + tick_size
+    return best_bid - tick_size, best_ask + tick_size
+
+
+def _round_pcts(values):
+    # 与 get_tick_pct_spread 的 round 一致，np.round 在 .xx5 附近会差一位
+    return np.array([round(value, 2) for value in values.tolist()], dtype=np.float64)
+
+
+def compute_depth_batch(orderbooks, tick_sizes, depth_pcts=None) -> dict:
+    """
+    一次计算多本盘口、多个深度百分比下的深度、价差和 tick 占比，结果与逐本调用 compute_depth 一致
+
+    - tick 占比不超过深度百分比：统计中间价上下 depth_pct% 内的档位；
+    - 大 tick 品种：边界为 calculate_best_prices 的最优买卖价，仅当价差等于 tick 占比时统计第一档；
+    - BTTCUSDT_BN.SPOT：不论 tick 占比，统计最优买卖价各向外一个 tick 内的档位。
+
+    Args:
+        orderbooks: 盘口列表，每个含 bids / asks（可选 inst_code），按价格由优到劣排列
+        tick_sizes: 与 orderbooks 对应的最小价格变动单位
+        depth_pcts: 深度百分比列表，默认 DepthThreshold.get_depth_pcts()
+
+    Returns:
+        dict: spread / tick_pct / median_price 形状为 (盘口数,)；
+            bid_amount / ask_amount / bid_volume / ask_volume / depth_lower / depth_upper
+            形状为 (盘口数, 百分比数)，金额以计价币计
+    """
+    if depth_pcts is None:
+        depth_pcts = DepthThreshold.get_depth_pcts()
+    depth_pcts = np.asarray(depth_pcts, dtype=np.float64)
+    tick_sizes = np.asarray(tick_sizes, dtype=np.float64)
+    n_books = len(orderbooks)
+    bid_prices, bid_volumes, bid_index = ladders_to_arrays([ob[OrderBookAttribute.bids.name] for ob in orderbooks])
+    ask_prices, ask_volumes, ask_index = ladders_to_arrays([ob[OrderBookAttribute.asks.name] for ob in orderbooks])
+    bid_counts = np.bincount(bid_index, minlength=n_books)
+    ask_counts = np.bincount(ask_index, minlength=n_books)
+    if (bid_counts == 0).any() or (ask_counts == 0).any():
+        raise DataTypeException('orderbook has an empty side')
+    # 每本盘口第一档在扁平数组中的位置
+    bid_starts = np.cumsum(bid_counts) - bid_counts
+    ask_starts = np.cumsum(ask_counts) - ask_counts
+    bid1_prices = bid_prices[bid_starts]
+    ask1_prices = ask_prices[ask_starts]
+
+    median_prices = get_median_price(bid1_prices, ask1_prices)
+    spreads = _round_pcts(100 * (ask1_prices - bid1_prices) / median_prices)
+    tick_pcts = _round_pcts((tick_sizes / median_prices) * 100)
+
+    depth_lower = median_prices[:, None] * (1 - depth_pcts[None, :] / 100)
+    depth_upper = median_prices[:, None] * (1 + depth_pcts[None, :] / 100)
+    in_bid = bid_prices[:, None] >= depth_lower[bid_index]
+    in_ask = ask_prices[:, None] <= depth_upper[ask_index]
+
+    is_big_tick = tick_pcts[:, None] > depth_pcts[None, :]
+    if is_big_tick.any():
+        for i in np.flatnonzero(is_big_tick.any(axis=1)):
+            best_bid, best_ask, _ = calculate_best_prices(convert_to_decimal(float(bid1_prices[i])),
+                                                          convert_to_decimal(float(ask1_prices[i])),
+                                                          convert_to_decimal(float(tick_sizes[i])))
+            depth_lower[i, is_big_tick[i]] = float(convert_decimal_to_str(best_bid))
+            depth_upper[i, is_big_tick[i]] = float(convert_decimal_to_str(best_ask))
+        is_top_level = spreads == tick_pcts
+        is_bid_top = np.zeros(len(bid_prices), dtype=bool)
+        is_bid_top[bid_starts] = True
+        is_ask_top = np.zeros(len(ask_prices), dtype=bool)
+        is_ask_top[ask_starts] = True
+        in_bid = np.where(is_big_tick[bid_index], (is_bid_top & is_top_level[bid_index])[:, None], in_bid)
+        in_ask = np.where(is_big_tick[ask_index], (is_ask_top & is_top_level[ask_index])[:, None], in_ask)
+
+    is_bttc = np.array([ob.get(OrderBookAttribute.inst_code.name) == BN_BTTCUSDT_INST_CODE for ob in orderbooks],
+                       dtype=bool)
+    if is_bttc.any():
+        for i in np.flatnonzero(is_bttc):
+            depth_lower[i], depth_upper[i] = calculate_bn_bttcusdt_bounds(
+                float(bid1_prices[i]), float(ask1_prices[i]), float(tick_sizes[i]))
+        in_bid = np.where(is_bttc[bid_index][:, None], bid_prices[:, None] >= depth_lower[bid_index], in_bid)
+        in_ask = np.where(is_bttc[ask_index][:, None], ask_prices[:, None] <= depth_upper[ask_index], in_ask)
+
+    res = {'spread': spreads, 'tick_pct': tick_pcts, 'median_price': median_prices,
+           'depth_lower': depth_lower, 'depth_upper': depth_upper}
+    for name, index, values, mask in (('bid_amount', bid_index, bid_volumes * bid_prices, in_bid),
+                                      ('ask_amount', ask_index, ask_volumes * ask_prices, in_ask),
+                                      ('bid_volume', bid_index, bid_volumes, in_bid),
+                                      ('ask_volume', ask_index, ask_volumes, in_ask)):
+        res[name] = np.stack([np.bincount(index, weights=values * mask[:, i], minlength=n_books)
+                              for i in range(len(depth_pcts))], axis=1)
+    return res
 
 
 def compute_depth(logger, pair, orderbook, tick_size, depth_pct, ticker_price, exchange_id):
     try:
-        bids = orderbook[OrderBookAttribute.bids.name]
-        asks = orderbook[OrderBookAttribute.asks.name]
-        tick_pct, spread, median_price = get_tick_pct_spread(bids[0][0], asks[0][0], tick_size)
+        res = compute_depth_batch([orderbook], [tick_size], [depth_pct])
+        spread = float(res['spread'][0])
+        tick_pct = float(res['tick_pct'][0])
         if tick_pct > spread:
             logger.info(
                 f'tick pct:{tick_pct}, spread:{spread}, pair:{pair}, exchange_id:{exchange_id}')
-        bid_amount = 0
-        ask_amount = 0
-        bid_volume = 0
-        ask_volume = 0
-        if orderbook[OrderBookAttribute.inst_code.name] == 'BTTCUSDT_BN.SPOT':
-            bid_amount, ask_amount, bid_volume, ask_volume, depth_upper, depth_lower \
-                = compute_bid_ask_for_bn_bttcusdt(bids, asks, tick_size, bid_amount, ask_amount, bid_volume, ask_volume)
-        elif tick_pct <= depth_pct:
-            depth_lower, depth_upper = calculate_depth_bounds(median_price, depth_pct)
-            for bid in bids:
-                if bid[0] >= depth_lower:
-                    bid_amount += bid[1] * bid[0]
-                    bid_volume += bid[1]
-            for ask in asks:
-                if ask[0] <= depth_upper:
-                    ask_amount += ask[1] * ask[0]
-                    ask_volume += ask[1]
-        else:
-            depth_lower, depth_upper, _ = calculate_best_prices(convert_to_decimal(bids[0][0]),
-                                                                convert_to_decimal(asks[0][0]),
-                                                                convert_to_decimal(tick_size))
-            if spread == tick_pct:
-                bid_amount = bids[0][1] * bids[0][0]
-                ask_amount = asks[0][1] * asks[0][0]
-                bid_volume = bids[0][1]
-                ask_volume = asks[0][1]
         quote = pair.split('_')[1]
         quote_price = get_coin_price(logger, quote, ticker_price, exchange_id)
-        bid_depth = int(bid_amount * quote_price)
-        ask_depth = int(ask_amount * quote_price)
-        return bid_depth, ask_depth, bid_volume, ask_volume, spread, tick_pct, float(
-            convert_decimal_to_str(depth_lower)), float(convert_decimal_to_str(depth_upper))
+        bid_depth = int(res['bid_amount'][0, 0] * quote_price)
+        ask_depth = int(res['ask_amount'][0, 0] * quote_price)
+        return bid_depth, ask_depth, float(res['bid_volume'][0, 0]), float(res['ask_volume'][0, 0]), spread, \
+            tick_pct, float(res['depth_lower'][0, 0]), float(res['depth_upper'][0, 0])
     except Exception as e:
         raise DataTypeException('compute_depth error') from e
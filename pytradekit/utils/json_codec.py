@@ -0,0 +1,163 @@
+"""Pluggable JSON decoding for the websocket hot path.
+
+`loads` picks the fastest installed backend (orjson, then msgspec, then the
+stdlib) once at import; all three accept str or bytes and raise ValueError
+subclasses, so `_on_message` handlers can swap `json.loads` for it unchanged.
+
+For the highest-volume Binance events the wire keys can also be decoded
+straight into typed structs (BookTicker, ExecutionReport, OrderTradeUpdate)
+with `get_struct_decoder`: msgspec builds them without an intermediate dict;
+without msgspec the same classes are filled from `loads` output.
+"""
+import gzip
+import json
+from typing import Optional
+
+from pytradekit.utils.optional_imports import optional_import
+
+orjson = optional_import("orjson")
+msgspec = optional_import("msgspec")
+
+JSON_BACKEND_ORJSON = 'orjson'
+JSON_BACKEND_MSGSPEC = 'msgspec'
+JSON_BACKEND_STDLIB = 'json'
+JSON_BACKEND = JSON_BACKEND_ORJSON if orjson else JSON_BACKEND_MSGSPEC if msgspec else JSON_BACKEND_STDLIB
+
+
+def get_loads(backend=JSON_BACKEND):
+    """Decoder of `backend`, by default the fastest one installed."""
+    if backend == JSON_BACKEND_ORJSON and orjson:
+        return orjson.loads
+    if backend == JSON_BACKEND_MSGSPEC and msgspec:
+        return msgspec.json.decode
+    if backend == JSON_BACKEND_STDLIB:
+        return json.loads
+    raise ValueError(f'JSON backend {backend} is not installed')
+
+
+loads = get_loads()
+
+
+def loads_gzip(data):
+    """Huobi frames: gunzip and decode the bytes directly, without the utf-8 str round trip."""
+    return loads(gzip.decompress(data))
+
+
+class WireStruct:
+    """Typed event filled from Binance's one-letter keys.
+
+    Subclasses list `_fields` as (attribute, wire key, type); a WireStruct type
+    marks a nested object. Missing keys become None.
+    """
+    __slots__ = ()
+    _fields = ()
+    # __init_subclass__ 预先拆出 (slot setter, key) 与嵌套字段，from_dict 里不再做类型判断
+    _plain = ()
+    _nested = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._plain = tuple((getattr(cls, attr).__set__, key) for attr, key, typ in cls._fields
+                           if not (isinstance(typ, type) and issubclass(typ, WireStruct)))
+        cls._nested = tuple((getattr(cls, attr).__set__, key, typ) for attr, key, typ in cls._fields
+                            if isinstance(typ, type) and issubclass(typ, WireStruct))
+
+    @classmethod
+    def from_dict(cls, msg):
+        obj = cls.__new__(cls)
+        get = msg.get
+        for setter, key in cls._plain:
+            setter(obj, get(key))
+        for setter, key, typ in cls._nested:
+            value = get(key)
+            setter(obj, typ.from_dict(value) if value is not None else None)
+        return obj
+
+    def to_dict(self) -> dict:
+        res = {}
+        for attr, key, _ in self._fields:
+            value = getattr(self, attr)
+            res[key] = value.to_dict() if isinstance(value, WireStruct) else value
+        return res
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, attr) == getattr(other, attr)
+                                                 for attr, _, _ in self._fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{attr}={getattr(self, attr)!r}' for attr, _, _ in self._fields)})"
+
+
+class BookTicker(WireStruct):
+    __slots__ = ('update_id', 'symbol', 'bid_price', 'bid_qty', 'ask_price', 'ask_qty', 'event_time',
+                 'transaction_time')
+    _fields = (('update_id', 'u', int), ('symbol', 's', str), ('bid_price', 'b', str), ('bid_qty', 'B', str),
+               ('ask_price', 'a', str), ('ask_qty', 'A', str),
+               # 合约 bookTicker 才有
+               ('event_time', 'E', int), ('transaction_time', 'T', int))
+
+
+class ExecutionReport(WireStruct):
+    __slots__ = ('event_type', 'event_time', 'symbol', 'client_order_id', 'side', 'order_type', 'time_in_force',
+                 'quantity', 'price', 'execution_type', 'status', 'order_id', 'last_qty', 'cumulative_qty',
+                 'last_price', 'commission', 'commission_asset', 'trade_time', 'trade_id', 'is_maker',
+                 'orig_client_order_id', 'create_time', 'cumulative_quote_qty')
+    _fields = (('event_type', 'e', str), ('event_time', 'E', int), ('symbol', 's', str),
+               ('client_order_id', 'c', str), ('side', 'S', str), ('order_type', 'o', str),
+               ('time_in_force', 'f', str), ('quantity', 'q', str), ('price', 'p', str),
+               ('execution_type', 'x', str), ('status', 'X', str), ('order_id', 'i', int), ('last_qty', 'l', str),
+               ('cumulative_qty', 'z', str), ('last_price', 'L', str), ('commission', 'n', str),
+               ('commission_asset', 'N', str), ('trade_time', 'T', int), ('trade_id', 't', int),
+               ('is_maker', 'm', bool), ('orig_client_order_id', 'C', str), ('create_time', 'O', int),
+               ('cumulative_quote_qty', 'Z', str))
+
+
+class OrderTradeUpdateOrder(WireStruct):
+    __slots__ = ('symbol', 'client_order_id', 'side', 'order_type', 'time_in_force', 'quantity', 'price',
+                 'avg_price', 'execution_type', 'status', 'order_id', 'last_qty', 'cumulative_qty', 'last_price',
+                 'commission', 'commission_asset', 'trade_time', 'trade_id', 'is_maker', 'reduce_only',
+                 'position_side', 'realized_profit')
+    _fields = (('symbol', 's', str), ('client_order_id', 'c', str), ('side', 'S', str), ('order_type', 'o', str),
+               ('time_in_force', 'f', str), ('quantity', 'q', str), ('price', 'p', str), ('avg_price', 'ap', str),
+               ('execution_type', 'x', str), ('status', 'X', str), ('order_id', 'i', int), ('last_qty', 'l', str),
+               ('cumulative_qty', 'z', str), ('last_price', 'L', str), ('commission', 'n', str),
+               ('commission_asset', 'N', str), ('trade_time', 'T', int), ('trade_id', 't', int),
+               ('is_maker', 'm', bool), ('reduce_only', 'R', bool), ('position_side', 'ps', str),
+               ('realized_profit', 'rp', str))
+
+
+class OrderTradeUpdate(WireStruct):
+    __slots__ = ('event_type', 'event_time', 'transaction_time', 'order')
+    _fields = (('event_type', 'e', str), ('event_time', 'E', int), ('transaction_time', 'T', int),
+               ('order', 'o', OrderTradeUpdateOrder))
+
+
+# 事件类型 'e' -> 结构体；现货 bookTicker 没有 'e'，按订阅的流直接取 BookTicker
+EVENT_STRUCTS = {'bookTicker': BookTicker, 'executionReport': ExecutionReport,
+                 'ORDER_TRADE_UPDATE': OrderTradeUpdate}
+_msgspec_types = {}
+
+
+def _get_msgspec_type(struct_cls):
+    if struct_cls not in _msgspec_types:
+        fields = []
+        for attr, key, typ in struct_cls._fields:
+            if isinstance(typ, type) and issubclass(typ, WireStruct):
+                typ = _get_msgspec_type(typ)
+            fields.append((attr, Optional[typ], msgspec.field(default=None, name=key)))
+        _msgspec_types[struct_cls] = msgspec.defstruct(struct_cls.__name__, fields)
+    return _msgspec_types[struct_cls]
+
+
+def get_struct_decoder(struct_cls):
+    """Function decoding one raw frame into `struct_cls`; attribute names are the same with or without msgspec."""
+    if msgspec:
+        return msgspec.json.Decoder(_get_msgspec_type(struct_cls)).decode
+    return lambda raw: struct_cls.from_dict(loads(raw))
+
+
+def decode_event(raw):
+    """Struct for hot event types by their 'e' field, plain decoded JSON for everything else."""
+    msg = loads(raw)
+    struct_cls = EVENT_STRUCTS.get(msg.get('e')) if isinstance(msg, dict) else None
+    return struct_cls.from_dict(msg) if struct_cls else msg
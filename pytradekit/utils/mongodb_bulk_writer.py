@@ -0,0 +1,168 @@
+"""Buffered background writer for high-rate Mongo inserts (ws orders/trades).
+
+Callers only append to an in-memory buffer; a single flusher thread drains it
+per collection with `MongodbOperations.insert_data_unordered` once a
+collection holds `max_batch` documents or `flush_interval_s` has passed, so
+Mongo latency never reaches the websocket queue drain loop.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from pymongo.errors import BulkWriteError, ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError
+
+from pytradekit.utils.exceptions import DependencyException
+from pytradekit.utils.mongodb_operations import CollectionPath, UPSERT_KEY_FIELDS
+from pytradekit.utils.static_types import Database
+
+BULK_WRITER_MAX_BATCH = 1000
+BULK_WRITER_FLUSH_INTERVAL_S = 1
+# 连接故障时最多在内存里攒的文档数，超出后丢弃最旧的并打日志
+BULK_WRITER_MAX_PENDING = 200_000
+RETRYABLE_ERRORS = (ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError)
+
+
+class MongodbBulkWriter:
+    """Batches documents per collection and flushes them from a background thread.
+
+    Args:
+        logger: Logger instance.
+        mongo_ops: MongodbOperations used for the bulk writes.
+        max_batch: Documents per collection that trigger an early flush.
+        flush_interval_s: Longest time a document waits in the buffer.
+        key_fields: Upsert keys passed to insert_data_unordered.
+        max_pending: Buffered documents kept while Mongo is unreachable.
+    """
+
+    def __init__(self, logger, mongo_ops, max_batch=BULK_WRITER_MAX_BATCH,
+                 flush_interval_s=BULK_WRITER_FLUSH_INTERVAL_S, key_fields=UPSERT_KEY_FIELDS,
+                 max_pending=BULK_WRITER_MAX_PENDING):
+        self.logger = logger
+        self.mongo_ops = mongo_ops
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self.key_fields = key_fields
+        self.max_pending = max_pending
+        self._buffers = defaultdict(list)
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name='mongodb-bulk-writer', daemon=True)
+        self._thread.start()
+
+    def insert(self, data, collection_path):
+        """Queue one document or a list of documents for `collection_path`; never touches Mongo."""
+        items = data if isinstance(data, list) else [data]
+        if not items:
+            return
+        key = (collection_path.db_name, collection_path.collection_name)
+        with self._condition:
+            if self._closed:
+                raise DependencyException('MongodbBulkWriter is closed')
+            self._buffers[key].extend(items)
+            self._pending += len(items)
+            self._drop_oldest_over_limit()
+            if len(self._buffers[key]) >= self.max_batch:
+                self._condition.notify()
+
+    def insert_orders(self, data, exchange_id):
+        self.insert(data, CollectionPath(Database.raw_orders.name,
+                                         self.mongo_ops.get_orders_collection_name(exchange_id, False, False)))
+
+    def insert_trades(self, data, exchange_id):
+        self.insert(data, CollectionPath(Database.raw_orders.name,
+                                         self.mongo_ops.get_trades_collection_name(exchange_id, False)))
+
+    def flush(self):
+        """Write everything buffered so far from the calling thread."""
+        with self._condition:
+            batches = self._take_batches(force=True)
+        self._write_batches(batches)
+
+    def close(self):
+        """Stop the flusher thread and write what is left."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {'pending': self._pending, 'written': self.written, 'dropped': self.dropped,
+                    'failed_batches': self.failed_batches}
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            with self._condition:
+                while not self._closed and not self._has_full_batch():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+                timed_out = time.monotonic() >= deadline
+                batches = self._take_batches(force=timed_out)
+            if timed_out:
+                deadline = time.monotonic() + self.flush_interval_s
+            self._write_batches(batches)
+
+    def _has_full_batch(self) -> bool:
+        return any(len(items) >= self.max_batch for items in self._buffers.values())
+
+    def _take_batches(self, force) -> list:
+        batches = []
+        for key in list(self._buffers):
+            items = self._buffers[key]
+            if force or len(items) >= self.max_batch:
+                batches.append((key, self._buffers.pop(key)))
+                self._pending -= len(items)
+        return batches
+
+    def _drop_oldest_over_limit(self):
+        while self._pending > self.max_pending:
+            key = max(self._buffers, key=lambda k: len(self._buffers[k]))
+            overflow = min(self._pending - self.max_pending, len(self._buffers[key]))
+            del self._buffers[key][:overflow]
+            self._pending -= overflow
+            self.dropped += overflow
+            self.logger.info(f'Mongo bulk writer over {self.max_pending} pending documents, '
+                             f'dropped {overflow} oldest for {key}')
+
+    def _write_batches(self, batches):
+        for key, items in batches:
+            for start in range(0, len(items), self.max_batch):
+                self._write_batch(key, items[start:start + self.max_batch])
+
+    def _write_batch(self, key, items):
+        try:
+            self.mongo_ops.insert_data_unordered(items, CollectionPath(*key), key_fields=self.key_fields)
+            rejected = 0
+        except BulkWriteError as e:
+            # ordered=False: everything but the reported documents was written; they would fail again
+            errors = e.details.get('writeErrors', [])
+            rejected = len(errors)
+            self.logger.info(f'Mongo bulk write to {key} rejected {rejected} of {len(items)} documents: '
+                             f'{errors[:1]}')
+        except RETRYABLE_ERRORS as e:
+            self.logger.info(f'Mongo bulk write to {key} failed, re-queued {len(items)} documents: {e}')
+            with self._condition:
+                self.failed_batches += 1
+                self._buffers[key][:0] = items
+                self._pending += len(items)
+                self._drop_oldest_over_limit()
+            return
+        except Exception as e:
+            # keep the flusher thread alive; the batch is lost
+            self.logger.exception(e)
+            rejected = len(items)
+        with self._condition:
+            self.written += len(items) - rejected
+            self.dropped += rejected
+            if rejected:
+                self.failed_batches += 1
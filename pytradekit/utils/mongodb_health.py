@@ -0,0 +1,110 @@
+"""Cached MongoDB health state fed by pymongo's SDAM heartbeats.
+
+pymongo's monitor threads already heartbeat every server in the background;
+this listener turns those events into a process-wide healthy/unhealthy flag
+plus a circuit breaker, so guarded calls no longer pay an `admin.command('ping')`
+round trip each. While the circuit is open calls fail fast; after
+`probe_interval_s` one trial call is let through (half-open) and its outcome,
+or the next successful heartbeat, closes or re-opens the circuit.
+"""
+import threading
+import time
+
+from pymongo import monitoring
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+# 熔断后每隔多久放行一次试探请求；心跳默认 10s 一次，试探可以更早发现恢复
+HEALTH_PROBE_INTERVAL_S = 5
+
+
+class MongodbHealthMonitor(monitoring.ServerHeartbeatListener):
+    """Server heartbeat listener holding the circuit breaker and recovery metrics.
+
+    Args:
+        probe_interval_s: How long an open circuit rejects calls before a trial call is allowed.
+    """
+
+    def __init__(self, probe_interval_s=HEALTH_PROBE_INTERVAL_S):
+        self.probe_interval_s = probe_interval_s
+        self._lock = threading.Lock()
+        self._server_ok = {}
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = None
+        self._next_probe_at = 0
+        self._outage_started_at = None
+        self.outages = 0
+        self.rejected_calls = 0
+        self.last_recovery_s = None
+        self.max_recovery_s = 0.0
+        self.total_downtime_s = 0.0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self._server_ok[event.connection_id] = True
+            self._close()
+
+    def failed(self, event):
+        with self._lock:
+            self._server_ok[event.connection_id] = False
+            if not any(self._server_ok.values()):
+                self._open()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_healthy(self) -> bool:
+        return self._state == CIRCUIT_CLOSED
+
+    def allow_request(self) -> bool:
+        """True if a call may go to Mongo now; an open circuit admits one trial call per probe interval."""
+        if self._state == CIRCUIT_CLOSED:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_probe_at:
+                self._state = CIRCUIT_HALF_OPEN
+                self._next_probe_at = now + self.probe_interval_s
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        if self._state == CIRCUIT_CLOSED:
+            return
+        with self._lock:
+            self._close()
+
+    def record_failure(self):
+        """A call failed on the connection (not on the query): open the circuit until the next success."""
+        with self._lock:
+            self._open()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            outage_s = time.monotonic() - self._outage_started_at if self._outage_started_at is not None else 0.0
+            return {'state': self._state, 'outages': self.outages, 'rejected_calls': self.rejected_calls,
+                    'current_outage_s': outage_s, 'last_recovery_s': self.last_recovery_s,
+                    'max_recovery_s': self.max_recovery_s, 'total_downtime_s': self.total_downtime_s + outage_s}
+
+    def _open(self):
+        now = time.monotonic()
+        if self._outage_started_at is None:
+            self._outage_started_at = now
+            self.outages += 1
+        self._state = CIRCUIT_OPEN
+        self._next_probe_at = now + self.probe_interval_s
+
+    def _close(self):
+        if self._outage_started_at is not None:
+            recovery_s = time.monotonic() - self._outage_started_at
+            self.last_recovery_s = recovery_s
+            self.max_recovery_s = max(self.max_recovery_s, recovery_s)
+            self.total_downtime_s += recovery_s
+            self._outage_started_at = None
+        self._state = CIRCUIT_CLOSED
@@ -0,0 +1,192 @@
+"""Index registry for the per-exchange collections MongodbOperations creates on the fly.
+
+Collections such as `{exchange_id}_orders` appear the first time an exchange is
+written to, so `_ensure_indexes` cannot know them up front. Each registry entry
+matches a collection-name pattern and lists the compound indexes its hot
+`read_*` filters need plus those query shapes; MongodbOperations creates the
+indexes the first time it touches a matching collection in a process.
+
+`verify_indexes` explains every registered query shape against the live
+collections and reports the ones that still fall back to a COLLSCAN:
+
+    python -m pytradekit.utils.mongodb_indexes --mongodb-url mongodb://host:27017/
+"""
+import argparse
+import json
+import re
+
+from pymongo import DESCENDING
+
+from pytradekit.utils.static_types import Database, OrderAttribute, TradeAttribute, RankAttribute, \
+    OrderBookAttribute, BalanceAttribute, DepositWithdrawAttribute, OrderDepthRatioAttribute
+
+# 成交的唯一键，也是 insert_data_unordered 的 upsert 键
+TRADE_KEY_FIELDS = (TradeAttribute.account_id.name, TradeAttribute.inst_code.name, TradeAttribute.trade_id.name)
+# mongodb_lifecycle 按天轮转的集合名前缀，如 2024-01-01_BN_order_book_ws
+ROTATED_DAY_PREFIX = r'\d{4}-\d{2}-\d{2}_'
+
+
+class IndexSpec:
+    """One compound index; the name is derived from its fields so repeated creation is a no-op."""
+
+    __slots__ = ('keys', 'name', 'unique', 'partial_filter')
+
+    def __init__(self, keys, unique=False, partial_filter=None):
+        self.keys = keys
+        self.name = 'idx_' + '_'.join(field for field, _ in keys)
+        self.unique = unique
+        self.partial_filter = partial_filter
+
+    def get_options(self) -> dict:
+        """Keyword arguments for `create_index`."""
+        options = {'name': self.name, 'unique': self.unique, 'background': True}
+        if self.partial_filter is not None:
+            options['partialFilterExpression'] = self.partial_filter
+        return options
+
+
+class QueryShape:
+    """A hot read filter: equality fields plus an optional range field."""
+
+    __slots__ = ('equality', 'range_field')
+
+    def __init__(self, equality=(), range_field=None):
+        self.equality = equality
+        self.range_field = range_field
+
+    def get_sample_filter(self) -> dict:
+        # 取值无所谓，explain 只看有没有可用索引
+        query = {field: '' for field in self.equality}
+        if self.range_field:
+            query[self.range_field] = {'$gte': 0, '$lte': 0}
+        return query
+
+    def __repr__(self):
+        return f'QueryShape({list(self.equality)}, range={self.range_field})'
+
+
+class CollectionIndexes:
+    def __init__(self, db_name, pattern, indexes, queries):
+        self.db_name = db_name
+        self.pattern = re.compile(pattern)
+        self.indexes = indexes
+        self.queries = queries
+
+    def matches(self, db_name, collection_name) -> bool:
+        return db_name == self.db_name and self.pattern.fullmatch(collection_name) is not None
+
+
+def _time_indexes(time_field, prefixes):
+    """(prefix, time desc) for each prefix plus time alone, matching the `sort(time, -1).limit()` readers."""
+    indexes = [IndexSpec([(prefix, 1), (time_field, DESCENDING)]) for prefix in prefixes]
+    indexes.append(IndexSpec([(time_field, DESCENDING)]))
+    queries = [QueryShape((prefix,), time_field) for prefix in prefixes]
+    queries.append(QueryShape((), time_field))
+    return indexes, queries
+
+
+def _build_registry():
+    orders_indexes, orders_queries = _time_indexes(
+        OrderAttribute.order_time_ms.name,
+        (OrderAttribute.inst_code.name, OrderAttribute.account_id.name, OrderAttribute.strategy_id.name))
+    orders_indexes += [IndexSpec([(OrderAttribute.client_order_id.name, 1)]),
+                       IndexSpec([(OrderAttribute.order_id.name, 1)])]
+    orders_queries += [QueryShape((OrderAttribute.client_order_id.name,)),
+                       QueryShape((OrderAttribute.order_id.name,))]
+
+    trades_indexes, trades_queries = _time_indexes(
+        TradeAttribute.traded_time_ms.name,
+        (TradeAttribute.inst_code.name, TradeAttribute.account_id.name, TradeAttribute.strategy_id.name))
+    trades_indexes.append(IndexSpec([(TradeAttribute.client_order_id.name, 1)]))
+    trades_queries.append(QueryShape((TradeAttribute.client_order_id.name,)))
+    # insert_data_unordered 按成交主键 upsert；交易所的 trade_id 只在单个品种内唯一
+    trades_indexes.append(IndexSpec([(field, 1) for field in TRADE_KEY_FIELDS], unique=True,
+                                    partial_filter={TradeAttribute.trade_id.name: {'$exists': True}}))
+    trades_queries.append(QueryShape(TRADE_KEY_FIELDS))
+
+    rank_indexes, rank_queries = _time_indexes(RankAttribute.hour.name, (RankAttribute.inst_code.name,))
+    order_book_indexes, order_book_queries = _time_indexes(OrderBookAttribute.time_ms.name,
+                                                           (OrderBookAttribute.inst_code.name,))
+    depth_ratio_indexes, depth_ratio_queries = _time_indexes(OrderDepthRatioAttribute.time_ms.name,
+                                                             (OrderDepthRatioAttribute.inst_code.name,))
+
+    balance_indexes = [IndexSpec([(BalanceAttribute.account_id.name, 1), (BalanceAttribute.hour.name, 1)]),
+                       IndexSpec([(BalanceAttribute.account_id.name, 1),
+                                  (BalanceAttribute.event_time_ms.name, DESCENDING)])]
+    balance_queries = [QueryShape((BalanceAttribute.account_id.name,), BalanceAttribute.hour.name),
+                       QueryShape((BalanceAttribute.account_id.name,))]
+
+    deposit_withdraw_indexes = [IndexSpec([(DepositWithdrawAttribute.account_id.name, 1),
+                                           (DepositWithdrawAttribute.time_ms.name, 1)])]
+    deposit_withdraw_queries = [QueryShape((DepositWithdrawAttribute.account_id.name,),
+                                           DepositWithdrawAttribute.time_ms.name)]
+
+    orders = '|'.join((Database.orders.name, Database.orders_raw.name, Database.orders_other.name))
+    trades = '|'.join((Database.trades.name, Database.trades_inventory.name, Database.trades_other.name))
+    return (
+        CollectionIndexes(Database.raw_orders.name, rf'\w+_({orders})', orders_indexes, orders_queries),
+        CollectionIndexes(Database.raw_orders.name, rf'\w+_({trades})', trades_indexes, trades_queries),
+        CollectionIndexes(Database.raw_market.name, rf'\w+_{Database.rank.name}', rank_indexes, rank_queries),
+        CollectionIndexes(Database.raw_market.name,
+                          rf'({ROTATED_DAY_PREFIX})?\w+_({Database.order_book.name}|{Database.order_book_ws.name})',
+                          order_book_indexes, order_book_queries),
+        CollectionIndexes(Database.raw_accounts.name, rf'\w+_{Database.balance.name}', balance_indexes,
+                          balance_queries),
+        CollectionIndexes(Database.raw_accounts.name, rf'\w+_{Database.deposit_withdraw.name}',
+                          deposit_withdraw_indexes, deposit_withdraw_queries),
+        CollectionIndexes(Database.metrics_order_depth.name,
+                          rf'({ROTATED_DAY_PREFIX})?\w+_{Database.order_depth_ratio.name}',
+                          depth_ratio_indexes, depth_ratio_queries),
+    )
+
+
+INDEX_REGISTRY = _build_registry()
+
+
+def get_collection_indexes(db_name, collection_name) -> list:
+    return [index for entry in INDEX_REGISTRY if entry.matches(db_name, collection_name) for index in entry.indexes]
+
+
+def verify_indexes(client, registry=INDEX_REGISTRY) -> list:
+    """Explain every registered query shape on every matching collection; return the unsupported ones.
+
+    Each report is `{'collection', 'query', 'missing_indexes'}`, where `query` is
+    the QueryShape repr and `missing_indexes` the registry indexes absent on that collection.
+    """
+    reports = []
+    for db_name in {entry.db_name for entry in registry}:
+        database = client[db_name]
+        for collection_name in database.list_collection_names():
+            entries = [entry for entry in registry if entry.matches(db_name, collection_name)]
+            if not entries:
+                continue
+            existing = set(database[collection_name].index_information())
+            for entry in entries:
+                missing = [index.name for index in entry.indexes if index.name not in existing]
+                for query in entry.queries:
+                    plan = database.command('explain', {'find': collection_name, 'filter': query.get_sample_filter()},
+                                            verbosity='queryPlanner')
+                    if 'COLLSCAN' in json.dumps(plan.get('queryPlanner', {}).get('winningPlan', {}), default=str):
+                        reports.append({'collection': f'{db_name}.{collection_name}', 'query': repr(query),
+                                        'missing_indexes': missing})
+    return reports
+
+
+def main():
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description='Report registered Mongo query shapes without index support.')
+    parser.add_argument('--mongodb-url', required=True)
+    args = parser.parse_args()
+    client = MongoClient(args.mongodb_url)
+    try:
+        reports = verify_indexes(client)
+    finally:
+        client.close()
+    for report in reports:
+        print(f"{report['collection']}: {report['query']} -> COLLSCAN, missing {report['missing_indexes']}")
+    print(f'{len(reports)} query shape(s) without index support')
+
+
+if __name__ == '__main__':
+    main()
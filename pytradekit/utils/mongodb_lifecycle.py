@@ -0,0 +1,213 @@
+"""Retention for high-volume time-series collections without `delete_many`.
+
+Each `Database` entry listed in LIFECYCLE_POLICIES gets one of three modes:
+
+- rotation: writes go to a day-prefixed collection (`{day}_{collection}`, the
+  naming `read_yesterday_coll` already uses), the day being that of the
+  document's time field; the nightly `run()` archives collections past
+  retention to Parquet and drops them, which is O(1) for Mongo.
+- ttl: a TTL index on a BSON date field; the server expires documents itself.
+- timeseries: new collections are created as native time-series collections
+  with `expireAfterSeconds`, so whole buckets expire.
+
+The naming helpers here are used by MongodbOperations for the rotated
+collections' writes and reads; `MongodbLifecycleManager` does the setup and
+the nightly archive-then-drop.
+"""
+import re
+from datetime import datetime, timedelta
+
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from pytradekit.utils.exceptions import DependencyException
+from pytradekit.utils.static_types import Database, OrderBookAttribute, OrderDepthRatioAttribute
+from pytradekit.utils.time_handler import DATETIME_FORMAT_DAY, TimeConvert, convert_timestamp_to_datetime, \
+    get_datetime
+
+LIFECYCLE_ROTATION = 'rotation'
+LIFECYCLE_TTL = 'ttl'
+LIFECYCLE_TIMESERIES = 'timeseries'
+ROTATED_COLLECTION_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})_(.+)')
+
+
+class LifecyclePolicy:
+    """Retention of the `{exchange_id}_{entry}` collections of one Database entry.
+
+    Args:
+        db_name: Database holding the collections.
+        mode: LIFECYCLE_ROTATION, LIFECYCLE_TTL or LIFECYCLE_TIMESERIES.
+        retention_days: Days of data kept.
+        time_field: Time field; must hold BSON dates for ttl / timeseries.
+        meta_field: timeseries metaField, e.g. 'inst_code'.
+        granularity: timeseries granularity ('seconds', 'minutes', 'hours').
+        archive: rotation only, archive a collection to Parquet before dropping it.
+    """
+
+    __slots__ = ('db_name', 'mode', 'retention_days', 'time_field', 'meta_field', 'granularity', 'archive')
+
+    def __init__(self, db_name, mode, retention_days, time_field=None, meta_field=None, granularity='seconds',
+                 archive=False):
+        self.db_name = db_name
+        self.mode = mode
+        self.retention_days = retention_days
+        self.time_field = time_field
+        self.meta_field = meta_field
+        self.granularity = granularity
+        self.archive = archive
+
+
+LIFECYCLE_POLICIES = {
+    Database.order_book_ws.name: LifecyclePolicy(Database.raw_market.name, LIFECYCLE_ROTATION, retention_days=3,
+                                                 time_field=OrderBookAttribute.time_ms.name, archive=True),
+    Database.order_depth_ratio.name: LifecyclePolicy(Database.metrics_order_depth.name, LIFECYCLE_ROTATION,
+                                                     retention_days=7,
+                                                     time_field=OrderDepthRatioAttribute.time_ms.name, archive=True),
+}
+
+
+def get_policy(db_name, collection_name, policies=LIFECYCLE_POLICIES):
+    """Policy of a plain or day-prefixed collection, or None."""
+    match = ROTATED_COLLECTION_PATTERN.fullmatch(collection_name)
+    base_name = match.group(2) if match else collection_name
+    for entry, policy in policies.items():
+        if policy.db_name == db_name and (base_name == entry or base_name.endswith(f'_{entry}')):
+            return policy
+    return None
+
+
+def get_rotated_collection_name(collection_name, day) -> str:
+    return f'{day}_{collection_name}'
+
+
+def get_write_collection_name(db_name, collection_name, policies=LIFECYCLE_POLICIES, day=None) -> str:
+    """`day`'s (default today's) day-prefixed collection for rotated entries, `collection_name` otherwise."""
+    policy = get_policy(db_name, collection_name, policies)
+    if policy is None or policy.mode != LIFECYCLE_ROTATION:
+        return collection_name
+    return get_rotated_collection_name(collection_name, day or get_datetime().strftime(DATETIME_FORMAT_DAY))
+
+
+def group_by_write_collection(db_name, collection_name, data, policies=LIFECYCLE_POLICIES) -> dict:
+    """{collection name: [documents]} for one insert.
+
+    Rotated entries file every document under the day of its policy time field,
+    so a backfill or a batch crossing midnight lands where `get_span_days` reads
+    it; documents without the field go to today's collection.
+    """
+    documents = data if isinstance(data, list) else [data]
+    policy = get_policy(db_name, collection_name, policies)
+    if policy is None or policy.mode != LIFECYCLE_ROTATION:
+        return {collection_name: documents}
+    groups = {}
+    for document in documents:
+        value = document.get(policy.time_field)
+        day = _to_day(value) if value is not None else None
+        groups.setdefault(get_write_collection_name(db_name, collection_name, policies, day), []).append(document)
+    return groups
+
+
+def _to_day(value):
+    if isinstance(value, (int, float)):
+        return convert_timestamp_to_datetime(value).strftime(DATETIME_FORMAT_DAY)
+    return str(value)[:10]
+
+
+def get_span_days(time_span) -> list:
+    """Days touched by `time_span` (ms timestamps or 'YYYY-mm-dd ...' strings), plus the following day.
+
+    Collections written before writes were filed by document time used the
+    wall-clock day, so rows stamped just before midnight can sit in the next
+    day's collection.
+    """
+    start = datetime.strptime(_to_day(time_span.start), DATETIME_FORMAT_DAY)
+    end = datetime.strptime(_to_day(time_span.end), DATETIME_FORMAT_DAY)
+    return [(start + timedelta(days=n)).strftime(DATETIME_FORMAT_DAY) for n in range((end - start).days + 2)]
+
+
+def get_read_collection_names(db_name, collection_name, days, policies=LIFECYCLE_POLICIES, legacy=False) -> list:
+    """Collections holding `days` of a rotated entry, newest first; `[collection_name]` when not rotated.
+
+    With `legacy`, the unprefixed collection the entry was written to before it
+    rotated is appended last, so data from before the switch stays readable.
+    """
+    policy = get_policy(db_name, collection_name, policies)
+    if policy is None or policy.mode != LIFECYCLE_ROTATION:
+        return [collection_name]
+    names = [get_rotated_collection_name(collection_name, day) for day in sorted(days, reverse=True)]
+    if legacy:
+        names.append(collection_name)
+    return names
+
+
+class MongodbLifecycleManager:
+    """Sets up ttl / timeseries collections and archives-then-drops expired rotated collections.
+
+    Args:
+        logger: Logger instance.
+        mongo_ops: MongodbOperations instance.
+        archive_path: Parquet archive root; required for policies with archive=True.
+        policies: {Database entry name: LifecyclePolicy}.
+    """
+
+    def __init__(self, logger, mongo_ops, archive_path=None, policies=LIFECYCLE_POLICIES):
+        self.logger = logger
+        self.mongo_ops = mongo_ops
+        self.archive_path = archive_path
+        self.policies = policies
+
+    def ensure_collection(self, db_name, collection_name):
+        """Create the ttl index or the native time-series collection its policy asks for."""
+        policy = get_policy(db_name, collection_name, self.policies)
+        if policy is None or policy.mode == LIFECYCLE_ROTATION:
+            return
+        database = self.mongo_ops.client[db_name]
+        expire_after_s = policy.retention_days * TimeConvert.DAY_TO_S
+        if policy.mode == LIFECYCLE_TTL:
+            database[collection_name].create_index([(policy.time_field, 1)], name=f'ttl_{policy.time_field}',
+                                                   expireAfterSeconds=expire_after_s, background=True)
+        elif policy.mode == LIFECYCLE_TIMESERIES:
+            timeseries = {'timeField': policy.time_field, 'granularity': policy.granularity}
+            if policy.meta_field:
+                timeseries['metaField'] = policy.meta_field
+            try:
+                database.create_collection(collection_name, timeseries=timeseries,
+                                           expireAfterSeconds=expire_after_s)
+            except CollectionInvalid:
+                # 已存在的普通集合不能原地转成时间序列集合
+                self.logger.info(f'{db_name}.{collection_name} already exists, not converted to time-series')
+
+    def run(self, today=None) -> list:
+        """Archive then drop every rotated collection older than its retention; returns the dropped names."""
+        today = today or get_datetime().strftime(DATETIME_FORMAT_DAY)
+        dropped = []
+        for db_name in {policy.db_name for policy in self.policies.values()}:
+            for collection_name in sorted(self.mongo_ops.client[db_name].list_collection_names()):
+                match = ROTATED_COLLECTION_PATTERN.fullmatch(collection_name)
+                policy = get_policy(db_name, collection_name, self.policies)
+                if not match or policy is None or policy.mode != LIFECYCLE_ROTATION:
+                    continue
+                cutoff = datetime.strptime(today, DATETIME_FORMAT_DAY) - timedelta(days=policy.retention_days)
+                if match.group(1) >= cutoff.strftime(DATETIME_FORMAT_DAY):
+                    continue
+                if policy.archive and not self._archive(db_name, collection_name, match.group(1)):
+                    continue
+                self.mongo_ops.client[db_name].drop_collection(collection_name)
+                self.logger.info(f'Dropped rotated collection {db_name}.{collection_name}')
+                dropped.append(f'{db_name}.{collection_name}')
+        return dropped
+
+    def _archive(self, db_name, collection_name, day) -> bool:
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.parquet_archive import archive_chunks
+        if not self.archive_path:
+            self.logger.info(f'No archive_path, keeping {db_name}.{collection_name}')
+            return False
+        collection_path = CollectionPath(db_name, collection_name)
+        exchange_id = ROTATED_COLLECTION_PATTERN.fullmatch(collection_name).group(2).split('_')[0]
+        try:
+            archive_chunks(self.logger, [], self.mongo_ops.read_coll_chunks(collection_path, as_arrow=True),
+                           self.archive_path, collection_path, day=day, exchange_id=exchange_id)
+        except (DependencyException, OperationFailure) as e:
+            self.logger.info(f'Archive of {db_name}.{collection_name} failed, not dropped: {e}')
+            return False
+        return True
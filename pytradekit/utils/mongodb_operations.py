@@ -5,21 +5,25 @@
 改： update
 查： read
 """
+import base64
 import json
 import re
 import threading
+import time
 from decimal import Decimal
 from urllib.parse import urlparse, quote_plus, urlunparse
 import functools
+from itertools import islice
 
 import pandas as pd
 from pandas import DataFrame
 import numpy as np
-from pymongo import MongoClient, DESCENDING, ReplaceOne
+from bson import json_util
+from pymongo import MongoClient, DESCENDING, InsertOne, ReplaceOne, UpdateOne
 from pymongo.errors import ConnectionFailure, NetworkTimeout, OperationFailure, ServerSelectionTimeoutError
 
-from pytradekit.utils.time_handler import DATETIME_FORMAT_DAY, get_yesterday_datetime, \
-    get_timestamp_s, get_rounded_time_interval, TimeSpan
+from pytradekit.utils.time_handler import DATETIME_FORMAT_DAY, get_datetime, get_yesterday_datetime, \
+    get_rounded_time_interval, TimeSpan
 from pytradekit.utils.static_types import Database, OrderAttribute, TradeAttribute, AccountAttribute, \
     LastAggtradeAttribute, InstcodeBasicAttribute, \
     OrderBookAttribute, OrderDepthRatioAttribute, RankAttribute, BalanceAttribute, DepositWithdrawAttribute, \
@@ -27,11 +31,68 @@ from pytradekit.utils.static_types import Database, OrderAttribute, TradeAttribu
     MaxInventoryAttribute, ArbitragePoolsReportAttribute, PerpPositionAttribute, PerpIncomeAttribute, \
     TradeRecordAttribute, PremiumSnapshotAttribute, FundingRateHistoryAttribute
 from pytradekit.utils.dynamic_types import DepositWithdrawAuxiliary, DuplicateFields, ExchangeId
-from pytradekit.utils.custom_types import InstCode
-from pytradekit.utils.exceptions import NoDataException
+from pytradekit.utils.custom_types import InstCode, INST_CODE_REGISTRY
+from pytradekit.utils.exceptions import NoDataException, DependencyException
+from pytradekit.utils.optional_imports import optional_import
+from pytradekit.trading_setup.inst_code_usage import SYMBOL_SPLITTER
+from pytradekit.utils.mongodb_health import MongodbHealthMonitor
+from pytradekit.utils.mongodb_indexes import TRADE_KEY_FIELDS, get_collection_indexes, verify_indexes
+from pytradekit.utils.mongodb_lifecycle import get_read_collection_names, get_span_days, group_by_write_collection
+
+pyarrow = optional_import("pyarrow")
 
 SLOW_QUERY_THRESHOLD = 60
 BATCH_SIZE = 1_000_000
+# 流式读取每块的文档数：月级 BN_trades 一次性 list(find()) 会把整表在内存里放两份
+CHUNK_SIZE = 50_000
+
+
+def _encode_resume_token(last_time, last_id) -> str:
+    # json_util keeps ObjectId/datetime types so the token round-trips exactly
+    payload = json_util.dumps({'time': last_time, '_id': last_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_resume_token(resume_token):
+    payload = json_util.loads(base64.urlsafe_b64decode(resume_token.encode()))
+    return payload['time'], payload['_id']
+
+
+BSON_NATIVE_TYPES = frozenset((str, int, float, bool, type(None)))
+# Exact-type dispatch for get_correct_value; subclasses still go through its isinstance chain.
+VALUE_CONVERTERS = {
+    dict: lambda ops, value: ops.get_correct_dict(value),
+    list: lambda ops, value: [ops.get_correct_value(item) for item in value],
+    tuple: lambda ops, value: [ops.get_correct_value(item) for item in value],
+    np.bool_: lambda ops, value: bool(value),
+    np.int64: lambda ops, value: int(value),
+    np.float64: lambda ops, value: float(value),
+    Decimal: lambda ops, value: str(value),
+    pd.Timedelta: lambda ops, value: str(value),
+}
+# insert_data_unordered 的 upsert 键，按顺序取字段全部存在于文档的第一组；成交键有唯一索引
+UPSERT_KEY_FIELDS = (('_id',), TRADE_KEY_FIELDS)
+
+
+# 字符串时间 'YYYY-mm-dd HH:MM:SS.fff' 截取前缀做时间分桶
+SUMMARY_BUCKET_LENGTHS = {'day': 10, 'hour': 13}
+PNL_SUM_FIELDS = (PnlAttribute.pnl.name, PnlAttribute.base_diff.name, PnlAttribute.quote_diff.name)
+VOLUME_FEE_SUM_FIELDS = (VolumeFeeAttribute.volume.name, VolumeFeeAttribute.inner_volume.name,
+                         VolumeFeeAttribute.maker_volume.name, VolumeFeeAttribute.taker_volume.name,
+                         VolumeFeeAttribute.fee.name, VolumeFeeAttribute.order_traded_amount.name)
+DAILY_SUMMARY_GROUP_BY = ('day', 'inst_code', 'strategy_id')
+INVENTORY_SUMMARY_FIELDS = (InventoryAttribute.inventory_quantity.name, InventoryAttribute.cumulative_profit.name,
+                            InventoryAttribute.unrealized_profit.name)
+
+
+def get_safe_mongodb_url(mongodb_url) -> str:
+    parsed = urlparse(mongodb_url)
+    # urlparse automatically decodes URL-encoded values, so we should NOT re-encode them
+    # The username and password in the URL are already properly encoded by quote_plus in tools.py
+    username = parsed.username or ""
+    password = parsed.password or ""
+    netloc = f"{username}:{password}@{parsed.hostname}:{parsed.port}"
+    return urlunparse((parsed.scheme, netloc, parsed.path, parsed.params, parsed.query, parsed.fragment))
 
 
 class AtUser:
@@ -44,10 +105,374 @@ class CollectionPath:
         self.collection_name = collection_name
 
 
-class MongodbOperations:
+class MongodbQueries:
+    """I/O-free pieces shared by MongodbOperations and AsyncMongodbOperations.
+
+    Value conversion, collection naming, filter building and result shaping live
+    here so the blocking and the asyncio clients build identical queries.
+    Subclasses provide `logger`.
+    """
+
+    def get_correct_dict(self, a_dict) -> dict:
+        return {key1: self.get_correct_value(val1) for key1, val1 in a_dict.items()}
+
+    def get_correct_value(self, value):
+        value_type = type(value)
+        # 绝大多数字段是原生标量，按类型直接放行，不走 isinstance 链
+        if value_type in BSON_NATIVE_TYPES:
+            return value
+        converter = VALUE_CONVERTERS.get(value_type)
+        if converter is not None:
+            return converter(self, value)
+        if isinstance(value, dict):
+            return self.get_correct_dict(value)
+        if isinstance(value, (list, tuple)):
+            return [self.get_correct_value(item) for item in value]
+        if isinstance(value, np.bool_):
+            return bool(value)
+        if isinstance(value, np.int64):
+            return int(value)
+        if isinstance(value, np.float64):
+            return float(value)
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, pd.Timedelta):
+            return str(value)
+        return value
+
+    def log_duplicates(self, df, subset, message):
+        duplicate_rows = df[df.duplicated(subset=subset, keep=False)]
+        if not duplicate_rows.empty:
+            self.logger.debug(f'{message}: {len(duplicate_rows)} duplicate rows')
+            return df.drop_duplicates(subset=subset, keep='last')
+        else:
+            return df
+
+    @staticmethod
+    def get_orders_collection_name(exchange_id, is_other, is_raw):
+        if is_other:
+            return f'{exchange_id}_{Database.orders_other.name}'
+        elif is_raw:
+            return f'{exchange_id}_{Database.orders_raw.name}'
+        else:
+            return f'{exchange_id}_{Database.orders.name}'
+
+    @staticmethod
+    def get_trades_collection_name(exchange_id, is_other, is_inventory=None):
+        if is_other:
+            return f'{exchange_id}_{Database.trades_other.name}'
+        elif is_inventory:
+            return f'{exchange_id}_{Database.trades_inventory.name}'
+        else:
+            return f'{exchange_id}_{Database.trades.name}'
+
+    @staticmethod
+    def _build_orders_query(time_span=None, inst_code=None, account_id=None, side=None, day=None, strategy_id=None,
+                            client_order_id=None, order_id=None) -> dict:
+        params = {}
+
+        if inst_code:
+            params[OrderAttribute.inst_code.name] = inst_code
+
+        if order_id:
+            if isinstance(order_id, list):
+                params[OrderAttribute.order_id.name] = {"$in": order_id}
+            else:
+                params[OrderAttribute.order_id.name] = order_id
+
+        if account_id:
+            if isinstance(account_id, list):
+                params[OrderAttribute.account_id.name] = {"$in": account_id}
+            else:
+                params[OrderAttribute.account_id.name] = account_id
+
+        if side:
+            params[OrderAttribute.side.name] = side
+
+        if day:
+            params[OrderAttribute.day.name] = day
+
+        if client_order_id:
+            params[OrderAttribute.client_order_id.name] = client_order_id
+
+        if strategy_id:
+            if isinstance(strategy_id, list):
+                params[OrderAttribute.strategy_id.name] = {"$in": strategy_id}
+            else:
+                params[OrderAttribute.strategy_id.name] = strategy_id
+
+        if time_span:
+            params[OrderAttribute.order_time_ms.name] = {
+                "$gte": time_span.start,
+                "$lte": time_span.end
+            }
+
+        return params
+
+    @staticmethod
+    def _build_trades_query(time_span=None, inst_code=None, account_id=None, side=None, day=None, strategy_id=None,
+                            client_order_id=None) -> dict:
+        params = {}
+
+        if inst_code:
+            params[TradeAttribute.inst_code.name] = inst_code
+
+        if account_id:
+            if isinstance(account_id, list):
+                params[OrderAttribute.account_id.name] = {"$in": account_id}
+            else:
+                params[OrderAttribute.account_id.name] = account_id
+
+        if side:
+            params[TradeAttribute.side.name] = side
+
+        if day:
+            params[TradeAttribute.day.name] = day
+
+        if strategy_id:
+            if isinstance(strategy_id, list):
+                params[OrderAttribute.strategy_id.name] = {"$in": strategy_id}
+            else:
+                params[TradeAttribute.strategy_id.name] = strategy_id
+
+        if client_order_id:
+            params[TradeAttribute.client_order_id.name] = client_order_id
+
+        if time_span:
+            params[TradeAttribute.traded_time_ms.name] = {
+                "$gte": time_span.start,
+                "$lte": time_span.end
+            }
+
+        return params
+
+    def _prepare_orders_read(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                             day=None, strategy_id=None, is_other=False, is_raw=False, client_order_id=None,
+                             order_id=None):
+        """Resolve exchange_id, collection name and filter for read_orders."""
+        if not exchange_id:
+            exchange_id = InstCode.from_string(inst_code).exchange_id
+        params = self._build_orders_query(time_span=time_span, inst_code=inst_code, account_id=account_id, side=side,
+                                          day=day, strategy_id=strategy_id, client_order_id=client_order_id,
+                                          order_id=order_id)
+        return exchange_id, self.get_orders_collection_name(exchange_id, is_other, is_raw), params
+
+    @staticmethod
+    def _get_orders_cursor(collection, params, sort=False, limit=None):
+        # find/sort/limit 在同步和异步驱动上都是同步构造游标，只有取数据时才有 I/O
+        if limit:
+            if sort:
+                return collection.find(params).sort(OrderAttribute.order_time_ms.name, -1).limit(limit)
+            return collection.find(params).limit(limit)
+        return collection.find(params)
+
+    def _shape_orders(self, res, inst_code, exchange_id, is_df=True):
+        if len(res) == 0:
+            raise NoDataException(f'No orders found for inst_code {inst_code}')
+        if is_df is False:
+            return res
+        order_df = DataFrame(res)
+        if inst_code:
+            msg = f'Duplicate orders for {inst_code} {AtUser.debug}'
+        else:
+            msg = f'Duplicate orders for {exchange_id} {AtUser.debug}'
+        if exchange_id == ExchangeId.BFX.name:
+            duplicates_col = DuplicateFields.order_bfx_raw.value
+        else:
+            duplicates_col = DuplicateFields.order.value
+        return self.log_duplicates(order_df, duplicates_col, msg)
+
+    def _prepare_trades_read(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                             day=None, strategy_id=None, is_other=False, is_inventory=None, client_order_id=None):
+        """Resolve exchange_id, collection name and filter for read_trades."""
+        if not exchange_id:
+            exchange_id = InstCode.from_string(inst_code).exchange_id
+        params = self._build_trades_query(time_span=time_span, inst_code=inst_code, account_id=account_id, side=side,
+                                          day=day, strategy_id=strategy_id, client_order_id=client_order_id)
+        collection_name = self.get_trades_collection_name(exchange_id=exchange_id, is_other=is_other,
+                                                          is_inventory=is_inventory)
+        return exchange_id, collection_name, params
+
+    @staticmethod
+    def _get_trades_cursor(collection, params, limit=None):
+        if limit:
+            return collection.find(params).sort(TradeAttribute.traded_time_ms.name, -1).limit(limit)
+        return collection.find(params)
+
+    def _shape_trades(self, res, inst_code, exchange_id):
+        if len(res) == 0:
+            raise NoDataException(f'No trades found for inst_code {inst_code}')
+        trade_df = DataFrame(res)
+        if inst_code:
+            msg = f'Duplicate trades for {inst_code} {AtUser.debug}'
+        else:
+            msg = f'Duplicate trades for {exchange_id} {AtUser.debug}'
+        return self.log_duplicates(trade_df, DuplicateFields.trade.value, msg)
+
+    def _build_if_not_exists_requests(self, data):
+        items = [self.get_correct_dict(item) for item in (data if isinstance(data, list) else [data])]
+        return items, [UpdateOne({'_id': item['_id']}, {'$setOnInsert': item}, upsert=True) for item in items]
+
+    def _log_existing(self, items, result):
+        if self.logger:
+            for index, item in enumerate(items):
+                if index not in result.upserted_ids:
+                    self.logger.info(f"Data already exists: {item}")
+
+    def _build_unordered_requests(self, data, key_fields=UPSERT_KEY_FIELDS) -> list:
+        requests = []
+        for item in (data if isinstance(data, list) else [data]):
+            item = self.get_correct_dict(item)
+            key = next((key for key in key_fields if all(field in item for field in key)), None)
+            if key is None:
+                requests.append(InsertOne(item))
+            else:
+                requests.append(ReplaceOne({field: item[field] for field in key}, item, upsert=True))
+        return requests
+
+    @staticmethod
+    def _build_accounts_query(account_id=None, account_name=None, exchange_id=None, user=None, is_mm=None) -> dict:
+        params = {}
+        if account_name:
+            params[AccountAttribute.account_name.name] = account_name
+        if isinstance(account_id, list):
+            params[BalanceAttribute.account_id.name] = {'$in': account_id}
+        elif account_id:
+            params[AccountAttribute.account_id.name] = account_id
+        if is_mm is not None:
+            params[AccountAttribute.is_mm.name] = 1
+        if exchange_id:
+            params[AccountAttribute.exchange_id.name] = exchange_id
+        if user:
+            params[AccountAttribute.user.name] = user
+        return params
+
+    @staticmethod
+    def _prepare_balance_read(account_id=None, exchange_id=None, hour=None, time_span=None):
+        if not exchange_id:
+            exchange_id = account_id.split('_')[0]
+        params = {}
+
+        if account_id:
+            params[BalanceAttribute.account_id.name] = account_id
+
+        if hour:
+            params[BalanceAttribute.hour.name] = hour
+
+        if time_span:
+            params[BalanceAttribute.hour.name] = {
+                "$gte": time_span.start,
+                "$lte": time_span.end
+            }
+        return f'{exchange_id}_{Database.balance.name}', params
+
+    @staticmethod
+    def _get_balance_cursor(collection, params, limit=1, asc=True):
+        sort_direction = 1 if asc else -1
+        if limit:
+            return collection.find(params).sort(BalanceAttribute.event_time_ms.name, sort_direction).limit(limit)
+        return collection.find(params).sort(BalanceAttribute.event_time_ms.name, sort_direction)
+
+    @staticmethod
+    def _build_day_query(attribute, day=None, inst_code=None, strategy_id=None) -> dict:
+        """Filter on `day` (value or [start, end]), `inst_code` and `strategy_id` of a daily metrics collection."""
+        params = {}
+        if day:
+            if isinstance(day, list):
+                if len(day) == 2:
+                    params[attribute.day.name] = {"$gte": day[0], "$lte": day[1]}
+                else:
+                    raise ValueError(
+                        f"day 列表需要正好包含两个元素(开始日, 结束日)，实际传入: {day}"
+                    )
+            else:
+                params[attribute.day.name] = day
+        if inst_code:
+            if isinstance(inst_code, list):
+                params[attribute.inst_code.name] = {"$in": inst_code}
+            else:
+                params[attribute.inst_code.name] = inst_code
+        if strategy_id:
+            if isinstance(strategy_id, list):
+                params[attribute.strategy_id.name] = {"$in": strategy_id}
+            else:
+                params[attribute.strategy_id.name] = strategy_id
+        return params
+
+    @staticmethod
+    def _build_group_pipeline(match, group_by, fields, accumulator='$sum') -> list:
+        """$match/$group/$sort/$project equal to `df.groupby(group_by, as_index=False)[fields].<sum|max>()`.
+
+        Documents with a null group key are dropped like pandas' default `dropna=True`,
+        and rows come back sorted by the group keys like `groupby(sort=True)`.
+        """
+        match = dict(match)
+        for key in group_by:
+            match.setdefault(key, {'$ne': None})
+        group = {'_id': {key: f'${key}' for key in group_by}}
+        group.update({field: {accumulator: f'${field}'} for field in fields})
+        projection = {'_id': 0}
+        projection.update({key: f'$_id.{key}' for key in group_by})
+        projection.update({field: 1 for field in fields})
+        return [{'$match': match}, {'$group': group}, {'$sort': {f'_id.{key}': 1 for key in group_by}},
+                {'$project': projection}]
+
+    @staticmethod
+    def _build_inventory_summary_pipeline(start_time, end_time, inst_code=None, bucket='day') -> list:
+        """First/last/max/min inventory per (inst_code, time bucket) over string `trade_update_time_ms`."""
+        time_field = InventoryAttribute.trade_update_time_ms.name
+        match = {time_field: {'$gte': start_time, '$lte': end_time}}
+        if inst_code:
+            match[InventoryAttribute.inst_code.name] = {'$in': inst_code} if isinstance(inst_code, list) \
+                else inst_code
+        group = {'_id': {InventoryAttribute.inst_code.name: f'${InventoryAttribute.inst_code.name}',
+                         'bucket': {'$substrCP': [f'${time_field}', 0, SUMMARY_BUCKET_LENGTHS[bucket]]}},
+                 'count': {'$sum': 1},
+                 f'first_{time_field}': {'$first': f'${time_field}'},
+                 f'last_{time_field}': {'$last': f'${time_field}'},
+                 f'max_{InventoryAttribute.inventory_quantity.name}': {
+                     '$max': f'${InventoryAttribute.inventory_quantity.name}'},
+                 f'min_{InventoryAttribute.inventory_quantity.name}': {
+                     '$min': f'${InventoryAttribute.inventory_quantity.name}'}}
+        for field in INVENTORY_SUMMARY_FIELDS:
+            group[f'first_{field}'] = {'$first': f'${field}'}
+            group[f'last_{field}'] = {'$last': f'${field}'}
+        projection = {'_id': 0, InventoryAttribute.inst_code.name: f'$_id.{InventoryAttribute.inst_code.name}',
+                      bucket: '$_id.bucket'}
+        projection.update({field: 1 for field in group if field != '_id'})
+        return [{'$match': match},
+                # _id 兜底，同一时间戳的多条按写入顺序取 first/last
+                {'$sort': {time_field: 1, '_id': 1}},
+                {'$group': group},
+                {'$sort': {f'_id.{InventoryAttribute.inst_code.name}': 1, '_id.bucket': 1}},
+                {'$project': projection}]
+
+    @staticmethod
+    def get_orderbook_collection_name(inst_code, exchange_id=None, is_other=False):
+        if not exchange_id:
+            exchange_id = InstCode.from_string(inst_code).exchange_id
+        if is_other:
+            return f'{exchange_id}_{Database.order_book.name}_ws'
+        return f'{exchange_id}_{Database.order_book.name}'
+
+    def _get_last_orderbook_collection_names(self, inst_code, exchange_id=None, is_other=False):
+        """Collections to search for the latest book, newest first; order_book_ws rotates daily."""
+        coll = self.get_orderbook_collection_name(inst_code, exchange_id, is_other)
+        days = [get_datetime().strftime(DATETIME_FORMAT_DAY), get_yesterday_datetime().strftime(DATETIME_FORMAT_DAY)]
+        return get_read_collection_names(Database.raw_market.name, coll, days)
+
+
+class MongodbOperations(MongodbQueries):
     _client = None
     _indexes_ensured = False
     _indexes_lock = threading.Lock()
+    # Process-wide: registered on the singleton client, read by handle_mongodb_errors
+    _health = MongodbHealthMonitor()
+    _profiler = None
+    # (db_name, collection_name, time column) whose keyset index is known to exist
+    _keyset_indexes = set()
+    # (db_name, collection_name) already checked against the index registry in this process
+    _registry_indexed = set()
 
     @staticmethod
     def handle_mongodb_errors(default_return=None):
@@ -55,14 +480,23 @@ class MongodbOperations:
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
                 instance_or_class = args[0] if args else None
+                health = MongodbOperations._health
 
                 try:
-                    if not instance_or_class._check_connection():
+                    # 连接状态来自后台 SDAM 心跳，不再每次调用前 ping 一次
+                    if not health.allow_request():
                         instance_or_class.logger.info(
-                            f"MongoDB connection failed in {func.__name__}. Using default value. {AtUser.debug}")
+                            f"MongoDB circuit {health.state} in {func.__name__}. Using default value. {AtUser.debug}")
                         return default_return
-                    return func(*args, **kwargs)
-                except (ConnectionFailure, NetworkTimeout, OperationFailure, ServerSelectionTimeoutError) as e:
+                    result = func(*args, **kwargs)
+                    health.record_success()
+                    return result
+                except (ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError) as e:
+                    health.record_failure()
+                    instance_or_class.logger.info(
+                        f"MongoDB operation failed in {func.__name__}: {str(e)}. Using default value. {AtUser.debug}")
+                    return default_return
+                except OperationFailure as e:
                     instance_or_class.logger.info(
                         f"MongoDB operation failed in {func.__name__}: {str(e)}. Using default value. {AtUser.debug}")
                     return default_return
@@ -74,11 +508,17 @@ class MongodbOperations:
 
         return decorator
 
-    def __init__(self, mongodb_url, logger=None):
+    def __init__(self, mongodb_url, logger=None, profiler=None):
         if MongodbOperations._client is None:
-            MongodbOperations._client = self._create_client(mongodb_url)
+            MongodbOperations._client = self._create_client(mongodb_url, profiler)
+            MongodbOperations._profiler = profiler
+        elif profiler is not None and profiler is not MongodbOperations._profiler and logger:
+            # 监听器只能在建 client 时注册，单例 client 已存在
+            logger.info('Mongo client already created, profiler not registered')
         self.client = MongodbOperations._client
         self.logger = logger
+        # read_timeseries_batch position -> keyset token of the page starting there
+        self._timeseries_batch_tokens = {}
         with MongodbOperations._indexes_lock:
             if not MongodbOperations._indexes_ensured:
                 self._ensure_indexes()
@@ -117,73 +557,60 @@ class MongodbOperations:
             background=True,
         )
 
-    def get_correct_dict(self, a_dict) -> dict:
-        return {key1: self.get_correct_value(val1) for key1, val1 in a_dict.items()}
-
-    def get_correct_value(self, value):
-        if isinstance(value, dict):
-            return self.get_correct_dict(value)
-        if isinstance(value, (list, tuple)):
-            return [self.get_correct_value(item) for item in value]
-        if isinstance(value, np.bool_):
-            return bool(value)
-        if isinstance(value, np.int64):
-            return int(value)
-        if isinstance(value, np.float64):
-            return float(value)
-        if isinstance(value, Decimal):
-            return str(value)
-        if isinstance(value, pd.Timedelta):
-            return str(value)
-        return value
-
-    def log_duplicates(self, df, subset, message):
-        duplicate_rows = df[df.duplicated(subset=subset, keep=False)]
-        if not duplicate_rows.empty:
-            self.logger.debug(f'{message}: {len(duplicate_rows)} duplicate rows')
-            return df.drop_duplicates(subset=subset, keep='last')
-        else:
-            return df
-
+    def _get_collection(self, db_name, collection_name):
+        """Collection handle; the first touch of a registry-matched collection creates its indexes."""
+        collection = self.client[db_name][collection_name]
+        key = (db_name, collection_name)
+        if key not in MongodbOperations._registry_indexed:
+            for index in get_collection_indexes(db_name, collection_name):
+                try:
+                    collection.create_index(index.keys, **index.get_options())
+                except OperationFailure as e:
+                    # 同键不同名的旧索引会冲突，保留旧索引即可
+                    if self.logger:
+                        self.logger.info(f'Skip index {index.name} on {db_name}.{collection_name}: {e}')
+            MongodbOperations._registry_indexed.add(key)
+        return collection
+
+    def verify_indexes(self) -> list:
+        """Registered hot query shapes that still COLLSCAN on the live collections."""
+        return verify_indexes(self.client)
+
     @staticmethod
     def log_slow_query(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             instance_or_class = args[0] if args else None
 
-            start_time = get_timestamp_s()
+            start_time = time.perf_counter()
             result = func(*args, **kwargs)
-            duration = get_timestamp_s() - start_time
+            duration = time.perf_counter() - start_time
 
             if duration > SLOW_QUERY_THRESHOLD:
                 instance_or_class.logger.info(
-                    f"Slow query detected in {func.__name__}: {duration} seconds. {AtUser.debug}")
+                    f"Slow query detected in {func.__name__}: {duration * 1000:.1f} ms. {AtUser.debug}")
 
             return result
 
         return wrapper
 
     @staticmethod
-    def _create_client(mongodb_url):
-        parsed = urlparse(mongodb_url)
-        # urlparse automatically decodes URL-encoded values, so we should NOT re-encode them
-        # The username and password in the URL are already properly encoded by quote_plus in tools.py
-        username = parsed.username or ""
-        password = parsed.password or ""
-        netloc = f"{username}:{password}@{parsed.hostname}:{parsed.port}"
-        safe_mongodb_url = urlunparse(
-            (parsed.scheme, netloc, parsed.path, parsed.params, parsed.query, parsed.fragment))
-        return MongoClient(safe_mongodb_url)
-
-    def _check_connection(self):
-        try:
-            # 尝试获取MongoDB的服务器状态
-            self.client.admin.command('ping')
-            return True
-        except (ConnectionFailure, NetworkTimeout):
-            if self.logger:
-                self.logger.info("MongoDB connection lost. Attempting to reconnect.")
-            return False
+    def _create_client(mongodb_url, profiler=None):
+        safe_mongodb_url = get_safe_mongodb_url(mongodb_url)
+        event_listeners = [MongodbOperations._health]
+        if profiler is not None:
+            event_listeners.append(profiler)
+        return MongoClient(safe_mongodb_url, event_listeners=event_listeners)
+
+    def get_health_stats(self) -> dict:
+        """Circuit state and outage/recovery timings from the heartbeat monitor."""
+        return MongodbOperations._health.get_stats()
+
+    def get_profiler_stats(self) -> dict:
+        """Per-collection and per-method command stats, empty if no profiler was registered."""
+        if MongodbOperations._profiler is None:
+            return {}
+        return MongodbOperations._profiler.get_stats()
 
     def close(self):
         """
@@ -194,6 +621,7 @@ class MongodbOperations:
             if self.logger:
                 self.logger.debug("MongoDB connection closed.")
             MongodbOperations._client = None
+            MongodbOperations._profiler = None
 
     def delete_coll(self, collection_path):
         """
@@ -281,35 +709,40 @@ class MongodbOperations:
         return result
 
     def insert_data_if_not_exists(self, data, collection_path):
-        collection = self.client[collection_path.db_name][collection_path.collection_name]
-
-        def data_exists(data_item):
-            return collection.find_one({"_id": data_item["_id"]}) is not None
-
-        if isinstance(data, list):
-            for item in data:
-                item_dict = self.get_correct_dict(item)
-                if data_exists(item_dict):
-                    if self.logger:
-                        self.logger.info(f"Data already exists: {item_dict}")
-                else:
-                    collection.insert_one(item_dict)
-        else:
-            item_dict = self.get_correct_dict(data)
-            if data_exists(item_dict):
-                if self.logger:
-                    self.logger.info(f"Data already exists: {item_dict}")
-            else:
-                collection.insert_one(item_dict)
+        """Insert documents whose `_id` is not in the collection yet, in one unordered bulk write."""
+        collection = self._get_collection(collection_path.db_name, collection_path.collection_name)
+        items, requests = self._build_if_not_exists_requests(data)
+        if not items:
+            return
+        result = collection.bulk_write(requests, ordered=False)
+        self._log_existing(items, result)
 
     def insert_data(self, data, collection_path):
         if isinstance(data, list):
-            self.client[collection_path.db_name][collection_path.collection_name].insert_many(
+            self._get_collection(collection_path.db_name, collection_path.collection_name).insert_many(
                 [self.get_correct_dict(d) for d in data])
         else:
-            self.client[collection_path.db_name][collection_path.collection_name].insert_one(
+            self._get_collection(collection_path.db_name, collection_path.collection_name).insert_one(
                 self.get_correct_dict(data))
 
+    def insert_data_unordered(self, data, collection_path, key_fields=UPSERT_KEY_FIELDS):
+        """Write documents in one `ordered=False` bulk write, upserting on the first key of `key_fields` present.
+
+        Each key is a tuple of fields, used only when the document carries all of
+        them; trades upsert on (account_id, inst_code, trade_id), which the trades
+        index registry makes unique. Re-delivered documents (ws replays, backfills)
+        replace their previous copy instead of failing the batch; documents
+        carrying none of the keys are plain inserts. One bad document does not stop the rest of the batch.
+
+        Returns:
+            pymongo BulkWriteResult, or None when `data` is empty.
+        """
+        requests = self._build_unordered_requests(data, key_fields)
+        if not requests:
+            return None
+        return self._get_collection(collection_path.db_name, collection_path.collection_name).bulk_write(
+            requests, ordered=False)
+
     def insert_orders(self, data, exchange_id):
         collection_path = CollectionPath(db_name=Database.raw_orders.name,
                                          collection_name=f'{exchange_id}_{Database.orders.name}')
@@ -371,14 +804,16 @@ class MongodbOperations:
         self.insert_data(data, collection_path)
 
     def insert_orderbook_ws(self, data, exchange_id):
-        collection_path = CollectionPath(db_name=Database.raw_market.name,
-                                         collection_name=f'{exchange_id}_{Database.order_book_ws.name}')
-        self.insert_data(data, collection_path)
+        # 按文档 time_ms 所在日期轮转，过期集合由 MongodbLifecycleManager 归档后整表 drop
+        self._insert_rotated(data, Database.raw_market.name, f'{exchange_id}_{Database.order_book_ws.name}')
 
     def insert_order_depth_ratio(self, data, exchange_id):
-        collection_path = CollectionPath(db_name=Database.metrics_order_depth.name,
-                                         collection_name=f'{exchange_id}_{Database.order_depth_ratio.name}')
-        self.insert_data(data, collection_path)
+        self._insert_rotated(data, Database.metrics_order_depth.name,
+                             f'{exchange_id}_{Database.order_depth_ratio.name}')
+
+    def _insert_rotated(self, data, db_name, collection_name):
+        for name, documents in group_by_write_collection(db_name, collection_name, data).items():
+            self.insert_data(documents, CollectionPath(db_name=db_name, collection_name=name))
 
     def insert_balances(self, data, exchange_id):
         collection_path = CollectionPath(db_name=Database.raw_accounts.name,
@@ -503,15 +938,6 @@ class MongodbOperations:
             {'inst_code': inst_code, 'frame': interval, 'open_time_s': open_time_s})
         return duplicate_count > 0
 
-    @staticmethod
-    def get_orders_collection_name(exchange_id, is_other, is_raw):
-        if is_other:
-            return f'{exchange_id}_{Database.orders_other.name}'
-        elif is_raw:
-            return f'{exchange_id}_{Database.orders_raw.name}'
-        else:
-            return f'{exchange_id}_{Database.orders.name}'
-
     def get_balance_time_span(self, account_id: str, time_span: TimeSpan) -> TimeSpan:
         res_first = self.read_balance(
             account_id=account_id,
@@ -534,29 +960,9 @@ class MongodbOperations:
         last_hour_str = res_last[0][BalanceAttribute.hour.name]
         return TimeSpan(start=first_hour_str, end=last_hour_str)
 
-    @staticmethod
-    def get_trades_collection_name(exchange_id, is_other, is_inventory=None):
-        if is_other:
-            return f'{exchange_id}_{Database.trades_other.name}'
-        elif is_inventory:
-            return f'{exchange_id}_{Database.trades_inventory.name}'
-        else:
-            return f'{exchange_id}_{Database.trades.name}'
-
     def read_accounts(self, account_id=None, account_name=None, exchange_id=None, user=None, is_mm=None, is_df=False):
-        params = {}
-        if account_name:
-            params[AccountAttribute.account_name.name] = account_name
-        if isinstance(account_id, list):
-            params[BalanceAttribute.account_id.name] = {'$in': account_id}
-        elif account_id:
-            params[AccountAttribute.account_id.name] = account_id
-        if is_mm is not None:
-            params[AccountAttribute.is_mm.name] = 1
-        if exchange_id:
-            params[AccountAttribute.exchange_id.name] = exchange_id
-        if user:
-            params[AccountAttribute.user.name] = user
+        params = self._build_accounts_query(account_id=account_id, account_name=account_name, exchange_id=exchange_id,
+                                            user=user, is_mm=is_mm)
         res = self.client[Database.raw_accounts.name][Database.all_accounts.name].find(params)
         res = list(res)
         if len(res) == 0:
@@ -599,6 +1005,10 @@ class MongodbOperations:
         res = list(res)
         if len(res) == 0:
             raise NoDataException(f'No inst_code_basic found for inst_code {inst_code}')
+        if not inst_code:
+            # 整个交易所的表：刷新 inst_code 注册表和 symbol 拆分器（注册表按交易所整体替换，部分读取不刷新）
+            INST_CODE_REGISTRY.load(res)
+            SYMBOL_SPLITTER.load_inst_code_basic(res)
         return res
 
     def read_pairs(self, inst_code_list: list, exchange_id=None) -> list:
@@ -690,18 +1100,13 @@ class MongodbOperations:
             return res
 
     def read_last_orderbook(self, inst_code, exchange_id=None, is_other=False) -> dict:
-        if not exchange_id:
-            exchange_id = InstCode.from_string(inst_code).exchange_id
-        if is_other:
-            coll = f'{exchange_id}_{Database.order_book.name}_ws'
-        else:
-            coll = f'{exchange_id}_{Database.order_book.name}'
-        last_orderbook = self.client[Database.raw_market.name][coll].find(
-            {OrderBookAttribute.inst_code.name: inst_code}).sort(OrderBookAttribute.time_ms.name, -1).limit(1)
-        last_orderbook_list = list(last_orderbook)
-        if len(last_orderbook_list) == 0:
-            raise NoDataException(f'No last order book found for inst_code {inst_code}')
-        return last_orderbook_list[0]
+        for coll in self._get_last_orderbook_collection_names(inst_code, exchange_id, is_other):
+            last_orderbook = self._get_collection(Database.raw_market.name, coll).find(
+                {OrderBookAttribute.inst_code.name: inst_code}).sort(OrderBookAttribute.time_ms.name, -1).limit(1)
+            last_orderbook_list = list(last_orderbook)
+            if last_orderbook_list:
+                return last_orderbook_list[0]
+        raise NoDataException(f'No last order book found for inst_code {inst_code}')
 
     def read_orderbook(self, time_span, inst_code=None, exchange_id=None, is_df=False):
         if not exchange_id:
@@ -713,7 +1118,7 @@ class MongodbOperations:
                 "$gte": time_span.start,
                 "$lte": time_span.end
             }
-        res = self.client[Database.raw_market.name][f'{exchange_id}_{Database.order_book.name}'].find(params)
+        res = self._get_collection(Database.raw_market.name, f'{exchange_id}_{Database.order_book.name}').find(params)
         res = list(res)
         if len(res) == 0:
             raise NoDataException(f'No orderbook found for inst_code {inst_code}')
@@ -739,15 +1144,19 @@ class MongodbOperations:
                 params[TradeAttribute.strategy_id.name] = {"$in": strategy_id}
             else:
                 params[TradeAttribute.strategy_id.name] = strategy_id
-        if limit:
-            res = self.client[Database.metrics_order_depth.name][
-                f'{exchange_id}_{Database.order_depth_ratio.name}'].find(
-                params).sort(PerpPositionAttribute.event_time_ms.name, -1).limit(limit)
-        else:
-            res = self.client[Database.metrics_order_depth.name][
-                f'{exchange_id}_{Database.order_depth_ratio.name}'].find(
-                params)
-        res = list(res)
+        res = []
+        # 轮转集合按天从新到旧读，最后读轮转前的旧集合，凑够 limit 即停
+        for collection_name in get_read_collection_names(Database.metrics_order_depth.name,
+                                                         f'{exchange_id}_{Database.order_depth_ratio.name}',
+                                                         get_span_days(time_span), legacy=True):
+            collection = self._get_collection(Database.metrics_order_depth.name, collection_name)
+            if limit:
+                res.extend(collection.find(params).sort(PerpPositionAttribute.event_time_ms.name, -1)
+                           .limit(limit - len(res)))
+                if len(res) >= limit:
+                    break
+            else:
+                res.extend(collection.find(params))
         if len(res) == 0:
             raise NoDataException(f'No order depth ratio found for inst_code {inst_code}')
         if is_df:
@@ -790,32 +1199,10 @@ class MongodbOperations:
 
     def read_balance(self, account_id=None, exchange_id=None, hour=None, time_span=None, is_df=False, limit=1,
                      asc=True):
-        if not exchange_id:
-            exchange_id = account_id.split('_')[0]
-        params = {}
-
-        if account_id:
-            params[BalanceAttribute.account_id.name] = account_id
-
-        if hour:
-            params[BalanceAttribute.hour.name] = hour
-
-        if time_span:
-            params[BalanceAttribute.hour.name] = {
-                "$gte": time_span.start,
-                "$lte": time_span.end
-            }
-
-        sort_direction = 1 if asc else -1
-
-        if limit:
-            res = self.client[Database.raw_accounts.name][f'{exchange_id}_{Database.balance.name}'].find(params).sort(
-                BalanceAttribute.event_time_ms.name, sort_direction).limit(limit)
-        else:
-            res = self.client[Database.raw_accounts.name][f'{exchange_id}_{Database.balance.name}'].find(params).sort(
-                BalanceAttribute.event_time_ms.name, sort_direction)
-
-        res = list(res)
+        collection_name, params = self._prepare_balance_read(account_id=account_id, exchange_id=exchange_id, hour=hour,
+                                                             time_span=time_span)
+        collection = self._get_collection(Database.raw_accounts.name, collection_name)
+        res = list(self._get_balance_cursor(collection, params, limit, asc))
         if len(res) == 0:
             raise NoDataException(f'No balance found for account_id {account_id}')
         if is_df:
@@ -872,7 +1259,8 @@ class MongodbOperations:
                 "$gte": time_span.start,
                 "$lte": time_span.end
             }
-        res = self.client[Database.raw_accounts.name][f'{exchange_id}_{Database.deposit_withdraw.name}'].find(params)
+        res = self._get_collection(Database.raw_accounts.name,
+                                   f'{exchange_id}_{Database.deposit_withdraw.name}').find(params)
         res = list(res)
         if len(res) == 0:
             raise NoDataException(f'No deposit withdraw found for inst_code {exchange_id}')
@@ -900,126 +1288,113 @@ class MongodbOperations:
     def read_orders(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None, day=None,
                     strategy_id=None, is_other=False, is_raw=False, sort=False, limit=None, client_order_id=None,
                     order_id=None, is_df=True):
-        if not exchange_id:
-            exchange_id = InstCode.from_string(inst_code).exchange_id
-        params = {}
-
-        if inst_code:
-            params[OrderAttribute.inst_code.name] = inst_code
-
-        if order_id:
-            if isinstance(order_id, list):
-                params[OrderAttribute.order_id.name] = {"$in": order_id}
-            else:
-                params[OrderAttribute.order_id.name] = order_id
-
-        if account_id:
-            if isinstance(account_id, list):
-                params[OrderAttribute.account_id.name] = {"$in": account_id}
-            else:
-                params[OrderAttribute.account_id.name] = account_id
-
-        if side:
-            params[OrderAttribute.side.name] = side
-
-        if day:
-            params[OrderAttribute.day.name] = day
-
-        if client_order_id:
-            params[OrderAttribute.client_order_id.name] = client_order_id
-
-        if strategy_id:
-            if isinstance(strategy_id, list):
-                params[OrderAttribute.strategy_id.name] = {"$in": strategy_id}
-            else:
-                params[OrderAttribute.strategy_id.name] = strategy_id
-
-        if time_span:
-            params[OrderAttribute.order_time_ms.name] = {
-                "$gte": time_span.start,
-                "$lte": time_span.end
-            }
-
-        collection_name = self.get_orders_collection_name(exchange_id, is_other, is_raw)
-        collection = self.client[Database.raw_orders.name][collection_name]
-        if limit:
-            if sort:
-                res = collection.find(params).sort(OrderAttribute.order_time_ms.name, -1).limit(limit)
-            else:
-                res = collection.find(params).limit(limit)
-        else:
-            res = collection.find(params)
-        res = list(res)
-        if len(res) == 0:
-            raise NoDataException(f'No orders found for inst_code {inst_code}')
-        if is_df is False:
-            return res
-        order_df = DataFrame(res)
-        if inst_code:
-            msg = f'Duplicate orders for {inst_code} {AtUser.debug}'
-        else:
-            msg = f'Duplicate orders for {exchange_id} {AtUser.debug}'
-        if exchange_id == ExchangeId.BFX.name:
-            duplicates_col = DuplicateFields.order_bfx_raw.value
-        else:
-            duplicates_col = DuplicateFields.order.value
-        order_df = self.log_duplicates(order_df, duplicates_col, msg)
-        return order_df
+        exchange_id, collection_name, params = self._prepare_orders_read(
+            time_span=time_span, inst_code=inst_code, account_id=account_id, exchange_id=exchange_id, side=side,
+            day=day, strategy_id=strategy_id, is_other=is_other, is_raw=is_raw, client_order_id=client_order_id,
+            order_id=order_id)
+        collection = self._get_collection(Database.raw_orders.name, collection_name)
+        res = list(self._get_orders_cursor(collection, params, sort, limit))
+        return self._shape_orders(res, inst_code, exchange_id, is_df)
 
     @log_slow_query
     def read_trades(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None, day=None,
                     strategy_id=None, is_other=False, is_inventory=None, limit=None, client_order_id=None) -> DataFrame:
-        if not exchange_id:
-            exchange_id = InstCode.from_string(inst_code).exchange_id
-        params = {}
-
-        if inst_code:
-            params[TradeAttribute.inst_code.name] = inst_code
-
-        if account_id:
-            if isinstance(account_id, list):
-                params[OrderAttribute.account_id.name] = {"$in": account_id}
-            else:
-                params[OrderAttribute.account_id.name] = account_id
-
-        if side:
-            params[TradeAttribute.side.name] = side
-
-        if day:
-            params[TradeAttribute.day.name] = day
+        exchange_id, collection_name, params = self._prepare_trades_read(
+            time_span=time_span, inst_code=inst_code, account_id=account_id, exchange_id=exchange_id, side=side,
+            day=day, strategy_id=strategy_id, is_other=is_other, is_inventory=is_inventory,
+            client_order_id=client_order_id)
+        collection = self._get_collection(Database.raw_orders.name, collection_name)
+        res = list(self._get_trades_cursor(collection, params, limit))
+        return self._shape_trades(res, inst_code, exchange_id)
 
-        if strategy_id:
-            if isinstance(strategy_id, list):
-                params[OrderAttribute.strategy_id.name] = {"$in": strategy_id}
-            else:
-                params[TradeAttribute.strategy_id.name] = strategy_id
+    def read_find_chunks(self, collection_path, query, chunk_size=CHUNK_SIZE, projection=None, sort=None,
+                         as_arrow=False):
+        """Stream `find(query)` as DataFrame (or pyarrow.Table) chunks of at most `chunk_size` rows.
 
-        if client_order_id:
-            params[TradeAttribute.client_order_id.name] = client_order_id
+        Only one chunk of documents is held in memory at a time; the cursor
+        fetches server batches of the same size. An empty result yields nothing.
 
-        if time_span:
-            params[TradeAttribute.traded_time_ms.name] = {
-                "$gte": time_span.start,
-                "$lte": time_span.end
-            }
+        Args:
+            collection_path: CollectionPath to read.
+            query: Mongo filter.
+            chunk_size: Documents per chunk.
+            projection: Optional Mongo projection, e.g. {'_id': 0, 'inst_code': 1}.
+            sort: Optional sort key or list of (key, direction).
+            as_arrow: Yield pyarrow.Table chunks instead of DataFrames (requires pyarrow).
+        """
+        if as_arrow and pyarrow is None:
+            raise DependencyException('pyarrow is required for as_arrow=True')
+        collection = self._get_collection(collection_path.db_name, collection_path.collection_name)
+        cursor = collection.find(query, projection).batch_size(chunk_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        documents = iter(cursor)
+        try:
+            while docs := list(islice(documents, chunk_size)):
+                yield self._docs_to_arrow(docs) if as_arrow else DataFrame(docs)
+        finally:
+            cursor.close()
 
-        collection_name = self.get_trades_collection_name(exchange_id=exchange_id, is_other=is_other,
-                                                          is_inventory=is_inventory)
-        collection = self.client[Database.raw_orders.name][collection_name]
-        if limit:
-            res = collection.find(params).sort(TradeAttribute.traded_time_ms.name, -1).limit(limit)
-        else:
-            res = collection.find(params)
-        res = list(res)
-        if len(res) == 0:
-            raise NoDataException(f'No trades found for inst_code {inst_code}')
-        trade_df = DataFrame(res)
+    @staticmethod
+    def _docs_to_arrow(docs):
+        # pyarrow has no ObjectId type; keep _id as its hex string like pymongoarrow does
+        for doc in docs:
+            if '_id' in doc:
+                doc['_id'] = str(doc['_id'])
+        return pyarrow.Table.from_pylist(docs)
+
+    def read_orders_chunks(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                           day=None, strategy_id=None, is_other=False, is_raw=False, client_order_id=None,
+                           order_id=None, chunk_size=CHUNK_SIZE, projection=None, as_arrow=False):
+        """Chunked read_orders. Duplicates are dropped within each DataFrame chunk only."""
+        if not exchange_id:
+            exchange_id = InstCode.from_string(inst_code).exchange_id
+        params = self._build_orders_query(time_span=time_span, inst_code=inst_code, account_id=account_id, side=side,
+                                          day=day, strategy_id=strategy_id, client_order_id=client_order_id,
+                                          order_id=order_id)
+        collection_path = CollectionPath(Database.raw_orders.name,
+                                         self.get_orders_collection_name(exchange_id, is_other, is_raw))
+        duplicates_col = DuplicateFields.order_bfx_raw.value if exchange_id == ExchangeId.BFX.name \
+            else DuplicateFields.order.value
+        for chunk in self.read_find_chunks(collection_path, params, chunk_size, projection, as_arrow=as_arrow):
+            yield self._drop_chunk_duplicates(chunk, duplicates_col, f'Duplicate orders for {exchange_id}')
+
+    def read_trades_chunks(self, time_span=None, inst_code=None, account_id=None, exchange_id=None, side=None,
+                           day=None, strategy_id=None, is_other=False, is_inventory=None, client_order_id=None,
+                           chunk_size=CHUNK_SIZE, projection=None, as_arrow=False):
+        """Chunked read_trades. Duplicates are dropped within each DataFrame chunk only."""
+        if not exchange_id:
+            exchange_id = InstCode.from_string(inst_code).exchange_id
+        params = self._build_trades_query(time_span=time_span, inst_code=inst_code, account_id=account_id, side=side,
+                                          day=day, strategy_id=strategy_id, client_order_id=client_order_id)
+        collection_path = CollectionPath(Database.raw_orders.name, self.get_trades_collection_name(
+            exchange_id=exchange_id, is_other=is_other, is_inventory=is_inventory))
+        for chunk in self.read_find_chunks(collection_path, params, chunk_size, projection, as_arrow=as_arrow):
+            yield self._drop_chunk_duplicates(chunk, DuplicateFields.trade.value, f'Duplicate trades for {exchange_id}')
+
+    def _drop_chunk_duplicates(self, chunk, subset, message):
+        if not isinstance(chunk, DataFrame) or not set(subset).issubset(chunk.columns):
+            return chunk
+        return self.log_duplicates(chunk, subset, f'{message} {AtUser.debug}')
+
+    def read_coll_chunks(self, collection_path, chunk_size=CHUNK_SIZE, projection=None, as_arrow=False):
+        """Chunked read_coll."""
+        return self.read_find_chunks(collection_path, {}, chunk_size, projection, as_arrow=as_arrow)
+
+    def read_timeseries_chunks(self, collection_path, time_span, columns=OrderAttribute.event_time_ms.name,
+                               chunk_size=CHUNK_SIZE, projection=None, as_arrow=False):
+        """Chunked read_timeseries, in natural order like read_timeseries (no server-side sort)."""
+        query = {columns: {"$gte": time_span.start, "$lte": time_span.end}}
+        return self.read_find_chunks(collection_path, query, chunk_size, projection, as_arrow=as_arrow)
+
+    def read_orderbook_chunks(self, time_span, exchange_id, inst_code=None, chunk_size=CHUNK_SIZE, projection=None):
+        """Chunked read_orderbook as DataFrames, sorted by time_ms."""
+        params = {OrderBookAttribute.time_ms.name: {"$gte": time_span.start, "$lte": time_span.end}}
         if inst_code:
-            msg = f'Duplicate trades for {inst_code} {AtUser.debug}'
-        else:
-            msg = f'Duplicate trades for {exchange_id} {AtUser.debug}'
-        trade_df = self.log_duplicates(trade_df, DuplicateFields.trade.value, msg)
-        return trade_df
+            params[OrderBookAttribute.inst_code.name] = inst_code
+        collection_path = CollectionPath(Database.raw_market.name, f'{exchange_id}_{Database.order_book.name}')
+        return self.read_find_chunks(collection_path, params, chunk_size, projection,
+                                     sort=OrderBookAttribute.time_ms.name)
 
     def read_coll(self, collection_path) -> pd.DataFrame:
         collection = self.client[collection_path.db_name][collection_path.collection_name]
@@ -1056,21 +1431,78 @@ class MongodbOperations:
 
     def read_timeseries_batch(self, logs_list, collection_path, time_span, start_index, batch_size=BATCH_SIZE,
                               columns=OrderAttribute.event_time_ms.name):
-        collection = self.client[collection_path.db_name][collection_path.collection_name]
-        query = {
-            columns: {
-                "$gte": time_span.start,
-                "$lte": time_span.end
-            }
-        }
+        """Offset-style wrapper over read_timeseries_page, kept for existing archive callers.
 
-        # cursor = collection.find(query).sort(columns, 1).skip(start_index).limit(batch_size)
-        cursor = collection.find(query).skip(start_index).limit(batch_size)
-        df = pd.DataFrame(list(cursor))
+        When `start_index` is where the previous call on the same range stopped,
+        the page resumes from that call's keyset token instead of skipping
+        `start_index` documents, so a sequential export stays linear.
+        """
+        position = (collection_path.db_name, collection_path.collection_name, columns, time_span.start,
+                    time_span.end)
+        resume_token = self._timeseries_batch_tokens.pop(position + (start_index,), None)
+        skip = 0 if resume_token or not start_index else start_index
+        df, next_token = self._read_keyset_page(collection_path, time_span, columns, batch_size, resume_token, skip)
+        if next_token:
+            self._timeseries_batch_tokens[position + (start_index + batch_size,)] = next_token
         logs_list.append(
             f"split read from {collection_path.db_name}_{collection_path.collection_name} between {time_span.start} and {time_span.end}.from num{start_index + 1}to{start_index + batch_size}")
         return df, logs_list
 
+    def read_timeseries_page(self, collection_path, time_span, resume_token=None, batch_size=BATCH_SIZE,
+                             columns=OrderAttribute.event_time_ms.name):
+        """One page of read_timeseries in (columns, _id) order, addressed by keyset instead of offset.
+
+        Args:
+            collection_path: CollectionPath to read.
+            time_span: Inclusive range on `columns`.
+            resume_token: Token returned with the previous page; None for the first page.
+            batch_size: Documents per page.
+            columns: Time column the range and the order apply to.
+
+        Returns:
+            (DataFrame, token for the next page or None once the range is exhausted).
+            Tokens are plain strings and stay valid across processes.
+        """
+        return self._read_keyset_page(collection_path, time_span, columns, batch_size, resume_token)
+
+    def read_timeseries_pages(self, collection_path, time_span, resume_token=None, batch_size=BATCH_SIZE,
+                              columns=OrderAttribute.event_time_ms.name):
+        """Yield (DataFrame, resume_token) for every page of the range, starting after `resume_token`.
+
+        Persist the yielded token once a page is archived; passing it back
+        resumes right after that page.
+        """
+        while True:
+            df, resume_token = self._read_keyset_page(collection_path, time_span, columns, batch_size, resume_token)
+            if not df.empty:
+                yield df, resume_token
+            if resume_token is None:
+                return
+
+    def _read_keyset_page(self, collection_path, time_span, columns, batch_size, resume_token, skip=0):
+        collection = self.client[collection_path.db_name][collection_path.collection_name]
+        self._ensure_keyset_index(collection_path, columns)
+        query = {columns: {"$gte": time_span.start, "$lte": time_span.end}}
+        if resume_token:
+            last_time, last_id = _decode_resume_token(resume_token)
+            query = {'$and': [query, {'$or': [{columns: {'$gt': last_time}},
+                                              {columns: last_time, '_id': {'$gt': last_id}}]}]}
+        cursor = collection.find(query).sort([(columns, 1), ('_id', 1)])
+        if skip:
+            cursor = cursor.skip(skip)
+        docs = list(cursor.limit(batch_size))
+        next_token = _encode_resume_token(docs[-1][columns], docs[-1]['_id']) if len(docs) == batch_size else None
+        return DataFrame(docs), next_token
+
+    def _ensure_keyset_index(self, collection_path, columns):
+        """Back the (columns, _id) keyset sort with an index, once per collection and process."""
+        key = (collection_path.db_name, collection_path.collection_name, columns)
+        if key in MongodbOperations._keyset_indexes:
+            return
+        self.client[collection_path.db_name][collection_path.collection_name].create_index(
+            [(columns, 1), ('_id', 1)], name=f"idx_{columns}_id", background=True)
+        MongodbOperations._keyset_indexes.add(key)
+
     def read_rank(self, time_span=None, exchange_id=None, inst_code: (list, str) = None, is_df=False, limit=1,
                   hour=None, volume_sort=None):
         params = {}
@@ -1086,7 +1518,7 @@ class MongodbOperations:
                 params[RankAttribute.inst_code.name] = {"$in": inst_code}
             else:
                 params[RankAttribute.inst_code.name] = inst_code
-        res = self.client[Database.raw_market.name][f'{exchange_id}_{Database.rank.name}'].find(params)
+        res = self._get_collection(Database.raw_market.name, f'{exchange_id}_{Database.rank.name}').find(params)
         if volume_sort:
             res = res.sort(RankAttribute.volume_24h.name, -1)
         elif not time_span:
@@ -1121,27 +1553,7 @@ class MongodbOperations:
             return res
 
     def read_pnl(self, day: (str, list) = None, inst_code: (str, list) = None, strategy_id=None, is_df=False):
-        params = {}
-        if day:
-            if isinstance(day, list):
-                if len(day) == 2:
-                    params[PnlAttribute.day.name] = {"$gte": day[0], "$lte": day[1]}
-                else:
-                    raise ValueError(
-                        f"day 列表需要正好包含两个元素(开始日, 结束日)，实际传入: {day}"
-                    )
-            else:
-                params[PnlAttribute.day.name] = day
-        if inst_code:
-            if isinstance(inst_code, list):
-                params[PnlAttribute.inst_code.name] = {"$in": inst_code}
-            else:
-                params[PnlAttribute.inst_code.name] = inst_code
-        if strategy_id:
-            if isinstance(strategy_id, list):
-                params[PnlAttribute.strategy_id.name] = {"$in": strategy_id}
-            else:
-                params[PnlAttribute.strategy_id.name] = strategy_id
+        params = self._build_day_query(PnlAttribute, day=day, inst_code=inst_code, strategy_id=strategy_id)
         res = self.client[Database.raw_metrics.name][Database.pnl.name].find(params)
         res = list(res)
         if len(res) == 0:
@@ -1151,28 +1563,18 @@ class MongodbOperations:
         else:
             return res
 
+    def read_pnl_summary(self, day: (str, list) = None, inst_code: (str, list) = None, strategy_id=None,
+                         group_by=DAILY_SUMMARY_GROUP_BY, fields=PNL_SUM_FIELDS) -> DataFrame:
+        """Server-side `read_pnl(is_df=True).groupby(group_by, as_index=False)[fields].sum()`."""
+        match = self._build_day_query(PnlAttribute, day=day, inst_code=inst_code, strategy_id=strategy_id)
+        pipeline = self._build_group_pipeline(match, group_by, fields)
+        res = list(self.client[Database.raw_metrics.name][Database.pnl.name].aggregate(pipeline, allowDiskUse=True))
+        if len(res) == 0:
+            raise NoDataException(f'No pnl data for {day}')
+        return DataFrame(res, columns=[*group_by, *fields])
+
     def read_volume_fee(self, day: (str, list) = None, inst_code: (str, list) = None, strategy_id=None, is_df=False):
-        params = {}
-        if day:
-            if isinstance(day, list):
-                if len(day) == 2:
-                    params[VolumeFeeAttribute.day.name] = {"$gte": day[0], "$lte": day[1]}
-                else:
-                    raise ValueError(
-                        f"day 列表需要正好包含两个元素(开始日, 结束日)，实际传入: {day}"
-                    )
-            else:
-                params[VolumeFeeAttribute.day.name] = day
-        if inst_code:
-            if isinstance(inst_code, list):
-                params[VolumeFeeAttribute.inst_code.name] = {"$in": inst_code}
-            else:
-                params[VolumeFeeAttribute.inst_code.name] = inst_code
-        if strategy_id:
-            if isinstance(strategy_id, list):
-                params[VolumeFeeAttribute.strategy_id.name] = {"$in": strategy_id}
-            else:
-                params[VolumeFeeAttribute.strategy_id.name] = strategy_id
+        params = self._build_day_query(VolumeFeeAttribute, day=day, inst_code=inst_code, strategy_id=strategy_id)
         res = self.client[Database.raw_metrics.name][Database.volume_fee.name].find(params)
         res = list(res)
         if len(res) == 0:
@@ -1182,6 +1584,17 @@ class MongodbOperations:
         else:
             return res
 
+    def read_volume_fee_summary(self, day: (str, list) = None, inst_code: (str, list) = None, strategy_id=None,
+                                group_by=DAILY_SUMMARY_GROUP_BY, fields=VOLUME_FEE_SUM_FIELDS) -> DataFrame:
+        """Server-side `read_volume_fee(is_df=True).groupby(group_by, as_index=False)[fields].sum()`."""
+        match = self._build_day_query(VolumeFeeAttribute, day=day, inst_code=inst_code, strategy_id=strategy_id)
+        pipeline = self._build_group_pipeline(match, group_by, fields)
+        res = list(self.client[Database.raw_metrics.name][Database.volume_fee.name].aggregate(pipeline,
+                                                                                           allowDiskUse=True))
+        if len(res) == 0:
+            raise NoDataException(f'No volume fee data for {day}')
+        return DataFrame(res, columns=[*group_by, *fields])
+
     @handle_mongodb_errors()
     def read_inventory(self, back_hours=None, start_time=None, end_time=None, inst_code=None, limit=None) -> DataFrame:
         params = {}
@@ -1208,6 +1621,20 @@ class MongodbOperations:
             raise NoDataException(f'No invenory data found for')
         return inventory
 
+    @handle_mongodb_errors()
+    def read_inventory_summary(self, start_time, end_time, inst_code=None, bucket='day') -> DataFrame:
+        """Per inst_code and day/hour bucket: first/last snapshot fields, max/min quantity and row count.
+
+        With bucket='day' the first_/last_ columns equal read_first_and_last_inventory
+        for every inst_code at once, without shipping the raw snapshots.
+        """
+        pipeline = self._build_inventory_summary_pipeline(start_time, end_time, inst_code=inst_code, bucket=bucket)
+        res = list(self.client[Database.inventory_management.name][Database.inventory.name].aggregate(
+            pipeline, allowDiskUse=True))
+        if len(res) == 0:
+            raise NoDataException(f'No inventory data from {start_time} to {end_time}')
+        return DataFrame(res, columns=list(pipeline[-1]['$project'])[1:])
+
     @handle_mongodb_errors()
     def read_inventory_quantity(self):
         params = [
@@ -1302,6 +1729,17 @@ class MongodbOperations:
             raise NoDataException(f'No max inventory data found for')
         return max_inventory
 
+    def read_max_inventory_summary(self, day, strategy_id=None,
+                                   group_by=(MaxInventoryAttribute.day.name, MaxInventoryAttribute.coin.name)):
+        """Server-side `read_max_inventory(...).groupby(group_by, as_index=False)['max_inventory'].max()`."""
+        match = self._build_day_query(MaxInventoryAttribute, day=day, strategy_id=strategy_id)
+        fields = (MaxInventoryAttribute.max_inventory.name,)
+        pipeline = self._build_group_pipeline(match, group_by, fields, accumulator='$max')
+        res = list(self.client[Database.inventory_management.name][Database.max_inventory.name].aggregate(pipeline))
+        if len(res) == 0:
+            raise NoDataException(f'No max inventory data found for {day}')
+        return DataFrame(res, columns=[*group_by, *fields])
+
     def read_database_name(self):
         return self.client.list_database_names()
 
@@ -0,0 +1,211 @@
+"""Command-level MongoDB profiler built on pymongo's CommandListener.
+
+Every command the driver sends is timed by the driver itself
+(`duration_micros`) and attributed to its collection, command name and the
+MongodbOperations method that issued it. Stats are kept in fixed-bucket
+latency histograms plus document/byte counters and exposed through
+`get_stats()`. Sampled `find`/`aggregate` filters are explained later, off the
+command path, to find queries that fall back to a COLLSCAN.
+
+Register it on the singleton client with `MongodbOperations(url, profiler=...)`.
+"""
+import json
+import random
+import sys
+import threading
+from collections import defaultdict, deque
+
+import bson
+from pymongo import monitoring
+
+# 桶上限（ms），最后一个桶收所有更慢的命令
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+EXPLAIN_SAMPLE_RATE = 0.01
+EXPLAIN_QUEUE_SIZE = 100
+PROFILER_DUMP_INTERVAL_S = 60
+# 在调用栈里往上找 MongodbOperations 方法的最大层数
+CALLER_SEARCH_DEPTH = 40
+UNKNOWN_METHOD = 'unknown'
+EXPLAINABLE_COMMANDS = ('find', 'aggregate')
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    __slots__ = ('counts', 'count', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms):
+        for index, upper_ms in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= upper_ms:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def get_percentile(self, percentile) -> float:
+        """Upper bound (ms) of the bucket holding the given percentile; max_ms for the overflow bucket."""
+        if not self.count:
+            return 0.0
+        threshold = self.count * percentile / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                upper_ms = LATENCY_BUCKETS_MS[index]
+                return min(upper_ms, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'mean_ms': self.total_ms / self.count if self.count else 0.0,
+                'p50_ms': self.get_percentile(50), 'p95_ms': self.get_percentile(95),
+                'p99_ms': self.get_percentile(99), 'max_ms': self.max_ms,
+                'buckets': {str(upper_ms): n for upper_ms, n in zip(LATENCY_BUCKETS_MS, self.counts) if n}}
+
+
+class _CommandStats:
+    __slots__ = ('latency', 'documents', 'reply_bytes', 'failures')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.documents = 0
+        self.reply_bytes = 0
+        self.failures = 0
+
+    def to_dict(self) -> dict:
+        return {**self.latency.to_dict(), 'documents': self.documents, 'reply_bytes': self.reply_bytes,
+                'failures': self.failures}
+
+
+def get_command_collection(command_name, command):
+    if command_name == 'getMore':
+        return command.get('collection')
+    target = command.get(command_name)
+    return target if isinstance(target, str) else None
+
+
+def get_reply_documents(reply) -> int:
+    """Documents returned (cursor batches) or written (`n`) by one command reply."""
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+    n = reply.get('n')
+    return n if isinstance(n, int) else 0
+
+
+def get_caller_method(mongodb_operations_file):
+    """Name of the nearest MongodbOperations method on the calling thread's stack."""
+    frame = sys._getframe(2)
+    for _ in range(CALLER_SEARCH_DEPTH):
+        if frame is None:
+            break
+        code = frame.f_code
+        if code.co_filename == mongodb_operations_file and code.co_name != 'wrapper' \
+                and not code.co_name.startswith('_'):
+            return code.co_name
+        frame = frame.f_back
+    return UNKNOWN_METHOD
+
+
+class MongodbProfiler(monitoring.CommandListener):
+    """Per-collection / per-method command latency, document and byte counters.
+
+    Args:
+        explain_sample_rate: Share of find/aggregate commands queued for an explain.
+        count_bytes: Also BSON-encode each reply to count its size (costs CPU per reply).
+    """
+
+    def __init__(self, explain_sample_rate=EXPLAIN_SAMPLE_RATE, count_bytes=False):
+        from pytradekit.utils import mongodb_operations
+        self._mongodb_operations_file = mongodb_operations.__file__
+        self.explain_sample_rate = explain_sample_rate
+        self.count_bytes = count_bytes
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._by_collection = defaultdict(_CommandStats)
+        self._by_method = defaultdict(_CommandStats)
+        self._explain_queue = deque(maxlen=EXPLAIN_QUEUE_SIZE)
+        self._collscans = {}
+        self._dump_stop = None
+
+    def started(self, event):
+        collection = get_command_collection(event.command_name, event.command)
+        method = get_caller_method(self._mongodb_operations_file)
+        with self._lock:
+            self._inflight[(event.connection_id, event.request_id)] = (event.database_name, collection, method)
+        if event.command_name in EXPLAINABLE_COMMANDS and random.random() < self.explain_sample_rate:
+            self._explain_queue.append((event.database_name, collection, event.command_name, event.command))
+
+    def succeeded(self, event):
+        self._record(event, event.reply, failed=False)
+
+    def failed(self, event):
+        self._record(event, {}, failed=True)
+
+    def _record(self, event, reply, failed):
+        duration_ms = event.duration_micros / 1000
+        documents = get_reply_documents(reply)
+        reply_bytes = len(bson.encode(reply)) if self.count_bytes and reply else 0
+        with self._lock:
+            db_name, collection, method = self._inflight.pop((event.connection_id, event.request_id),
+                                                             (event.database_name, None, UNKNOWN_METHOD))
+            keys = ((self._by_collection, f'{db_name}.{collection}:{event.command_name}'), (self._by_method, method))
+            for stats_map, key in keys:
+                stats = stats_map[key]
+                stats.latency.observe(duration_ms)
+                stats.documents += documents
+                stats.reply_bytes += reply_bytes
+                stats.failures += failed
+
+    def run_explain_samples(self, client):
+        """Explain queued sample queries (call off the command path) and record COLLSCANs."""
+        while self._explain_queue:
+            db_name, collection, command_name, command = self._explain_queue.popleft()
+            explain_command = {key: value for key, value in command.items() if key not in ('lsid', '$db', '$clusterTime')}
+            try:
+                plan = client[db_name].command('explain', explain_command, verbosity='queryPlanner')
+            except Exception:
+                continue
+            if 'COLLSCAN' in json.dumps(plan.get('queryPlanner', plan), default=str):
+                shape = sorted((command.get('filter') or {}).keys()) if command_name == 'find' else command_name
+                key = f'{db_name}.{collection}:{shape}'
+                with self._lock:
+                    self._collscans[key] = self._collscans.get(key, 0) + 1
+
+    def get_stats(self) -> dict:
+        """Snapshot: per `db.collection:command` and per MongodbOperations method, plus sampled COLLSCANs."""
+        with self._lock:
+            return {'collections': {key: stats.to_dict() for key, stats in self._by_collection.items()},
+                    'methods': {key: stats.to_dict() for key, stats in self._by_method.items()},
+                    'collscans': dict(self._collscans)}
+
+    def reset(self):
+        with self._lock:
+            self._by_collection.clear()
+            self._by_method.clear()
+            self._collscans.clear()
+
+    def start_periodic_dump(self, logger, client=None, interval_s=PROFILER_DUMP_INTERVAL_S):
+        """Log get_stats() as JSON every `interval_s`; with `client`, explain queued samples first."""
+        if self._dump_stop is not None:
+            return
+        self._dump_stop = threading.Event()
+
+        def dump():
+            while not self._dump_stop.wait(interval_s):
+                if client is not None:
+                    self.run_explain_samples(client)
+                logger.info(f'Mongo profiler stats: {json.dumps(self.get_stats())}')
+
+        threading.Thread(target=dump, name='mongodb-profiler-dump', daemon=True).start()
+
+    def stop_periodic_dump(self):
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
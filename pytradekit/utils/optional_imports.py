@@ -0,0 +1,8 @@
+import importlib
+
+
+def optional_import(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
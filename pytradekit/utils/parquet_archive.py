@@ -0,0 +1,212 @@
+"""Columnar archive for Mongo exports: zstd Parquet partitioned by day / exchange / collection.
+
+Replaces the CSV-in-zip files of `tools.zip_df`. Chunks from the
+`read_*_chunks` readers are streamed into Parquet row groups one at a time,
+so an export never holds more than one chunk in memory, and files land in a
+hive-style layout:
+
+    {path}/day=2024-01-01/exchange_id=BN/collection=raw_orders.BN_orders/part-{hms}-{n}.parquet
+
+`read_archive` opens that layout as a pyarrow dataset; day, exchange and
+collection filters prune directories and time / inst_code filters are pushed
+down to row-group statistics, so re-reading one day touches only its files.
+"""
+import os
+
+import pandas as pd
+
+from pytradekit.utils.exceptions import DependencyException
+from pytradekit.utils.optional_imports import optional_import
+from pytradekit.utils.time_handler import get_now_time, DATETIME_FORMAT_DAY, DATETIME_FORMAT_HMS
+
+pyarrow = optional_import("pyarrow")
+pq = optional_import("pyarrow.parquet")
+ds = optional_import("pyarrow.dataset")
+
+ARCHIVE_COMPRESSION = 'zstd'
+ARCHIVE_COMPRESSION_LEVEL = 3
+ARCHIVE_ALL_EXCHANGES = 'all'
+PARTITION_FIELDS = ('day', 'exchange_id', 'collection')
+
+
+def _require_pyarrow():
+    if pyarrow is None or pq is None or ds is None:
+        raise DependencyException('pyarrow is required for the parquet archive. Please install it with: '
+                                  'pip install pyarrow')
+
+
+def get_archive_dir(path, collection_path, day=None, exchange_id=None) -> str:
+    day = day or get_now_time(DATETIME_FORMAT_DAY)
+    return os.path.join(path, f'day={day}', f'exchange_id={exchange_id or ARCHIVE_ALL_EXCHANGES}',
+                        f'collection={collection_path.db_name}.{collection_path.collection_name}')
+
+
+def _to_table(chunk):
+    if isinstance(chunk, pd.DataFrame):
+        if '_id' in chunk.columns:
+            # pyarrow has no ObjectId type; same hex string as MongodbOperations._docs_to_arrow
+            chunk = chunk.assign(_id=chunk['_id'].astype(str))
+        return pyarrow.Table.from_pandas(chunk, preserve_index=False)
+    return chunk
+
+
+def _align(table, schema):
+    """Cast `table` to `schema`, adding missing columns as nulls; None if it has columns or types that don't fit."""
+    if set(table.column_names) - set(schema.names):
+        return None
+    columns = [table.column(field.name) if field.name in table.column_names
+               else pyarrow.nulls(table.num_rows, field.type) for field in schema]
+    try:
+        return pyarrow.Table.from_arrays(columns, schema=schema)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        try:
+            return pyarrow.Table.from_arrays([column.cast(field.type) for column, field in zip(columns, schema)],
+                                             schema=schema)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+            return None
+
+
+class ParquetArchiveWriter:
+    """Streams DataFrame / pyarrow.Table chunks into zstd Parquet row groups of one partition.
+
+    A chunk whose schema cannot be cast to the open file's schema (Mongo
+    documents are schemaless) closes that file and starts the next part, so no
+    column is dropped.
+
+    Args:
+        path: Archive root directory.
+        collection_path: CollectionPath the chunks were read from.
+        day: Partition day 'YYYY-mm-dd', defaults to today like zip_df.
+        exchange_id: Partition exchange, defaults to 'all'.
+    """
+
+    def __init__(self, path, collection_path, day=None, exchange_id=None, compression=ARCHIVE_COMPRESSION,
+                 compression_level=ARCHIVE_COMPRESSION_LEVEL):
+        _require_pyarrow()
+        self.directory = get_archive_dir(path, collection_path, day=day, exchange_id=exchange_id)
+        self.compression = compression
+        self.compression_level = compression_level
+        self.files = []
+        self.rows = 0
+        self._hms_time = get_now_time(DATETIME_FORMAT_HMS)
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk):
+        table = _to_table(chunk)
+        if table.num_rows == 0:
+            return
+        if self._writer is not None:
+            aligned = _align(table, self._schema)
+            if aligned is None:
+                self._close_file()
+            else:
+                table = aligned
+        if self._writer is None:
+            self._open_file(table.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self) -> list:
+        self._close_file()
+        return self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open_file(self, schema):
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = os.path.join(self.directory, f'part-{self._hms_time}-{len(self.files)}.parquet')
+        self._writer = pq.ParquetWriter(file_name, schema, compression=self.compression,
+                                        compression_level=self.compression_level)
+        self._schema = schema
+        self.files.append(file_name)
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def archive_chunks(logger, logs_list, chunks, path, collection_path, day=None, exchange_id=None):
+    """Stream an iterable of chunks (e.g. `read_orders_chunks(..., as_arrow=True)`) into the archive.
+
+    Returns:
+        (list of written Parquet files, logs_list), like zip_df.
+    """
+    _require_pyarrow()
+    try:
+        with ParquetArchiveWriter(path, collection_path, day=day, exchange_id=exchange_id) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    except (OSError, pyarrow.ArrowException) as e:
+        logger.exception(e)
+        raise DependencyException(f'Failed to archive {collection_path.db_name}.{collection_path.collection_name}') \
+            from e
+    logs_list.append(f'{writer.rows} rows archived as parquet into {writer.directory}')
+    return writer.files, logs_list
+
+
+def archive_df(logger, logs_list, df, path, collection_path, day=None, exchange_id=None):
+    """zip_df replacement for a DataFrame already in memory."""
+    return archive_chunks(logger, logs_list, [df], path, collection_path, day=day, exchange_id=exchange_id)
+
+
+def read_archive(path, day=None, exchange_id=None, collection_path=None, time_column=None, time_span=None,
+                 inst_code=None, columns=None) -> pd.DataFrame:
+    """Read archived rows back; every filter is pushed down to the Parquet scan.
+
+    Args:
+        path: Archive root directory.
+        day: 'YYYY-mm-dd' or [start_day, end_day] partition range.
+        exchange_id: Exchange partition.
+        collection_path: CollectionPath partition.
+        time_column: Column compared against time_span, e.g. 'order_time_ms'.
+        time_span: TimeSpan with start/end inclusive.
+        inst_code: One inst_code or a list.
+        columns: Columns to load; defaults to all archived (non-partition) columns.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    partition_filter = _build_partition_filter(day, exchange_id, collection_path)
+    # 各 part 文件 schema 可能不同（滚动出新文件），按命中的文件合并 schema，避免只认第一个文件的列
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments(filter=partition_filter)]
+    if len(schemas) > 1:
+        partition_schema = pyarrow.schema([dataset.schema.field(name) for name in PARTITION_FIELDS])
+        dataset = ds.dataset(path, format='parquet', partitioning='hive',
+                             schema=pyarrow.unify_schemas(schemas + [partition_schema]))
+    expression = partition_filter
+
+    def add(condition):
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    if time_span:
+        if not time_column:
+            raise ValueError('time_column is required with time_span')
+        add((ds.field(time_column) >= time_span.start) & (ds.field(time_column) <= time_span.end))
+    if inst_code:
+        add(ds.field('inst_code').isin(inst_code if isinstance(inst_code, list) else [inst_code]))
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name not in PARTITION_FIELDS]
+    return dataset.to_table(filter=expression, columns=columns).to_pandas()
+
+
+def _build_partition_filter(day=None, exchange_id=None, collection_path=None):
+    conditions = []
+    if day:
+        if isinstance(day, list):
+            conditions.append((ds.field('day') >= day[0]) & (ds.field('day') <= day[1]))
+        else:
+            conditions.append(ds.field('day') == day)
+    if exchange_id:
+        conditions.append(ds.field('exchange_id') == exchange_id)
+    if collection_path:
+        conditions.append(ds.field('collection') == f'{collection_path.db_name}.{collection_path.collection_name}')
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
@@ -0,0 +1,76 @@
+"""In-process read-through cache for hot, rarely-changing Redis keys.
+
+Entries carry a per-key TTL and are evicted least-recently-used once the cache
+is full. TTLs are only a safety net: writers publish the key name on the
+invalidation channel (see RedisOperations) and every process drops its copy
+as soon as the message arrives.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+NEAR_CACHE_MAX_SIZE = 1024
+
+
+class NearCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size=NEAR_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        # Bumped on invalidate; a load that raced an invalidation is not cached.
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader, ttl_s):
+        """Return the cached value for `key`, calling `loader()` on a miss or expiry.
+
+        Values are returned as shallow copies so callers cannot mutate the cached entry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(entry[0])
+            self.misses += 1
+            version = self._versions.get(key, 0)
+        value = loader()
+        with self._lock:
+            if self._versions.get(key, 0) == version:
+                self._store(key, value, ttl_s)
+        return copy.copy(value)
+
+    def put(self, key, value, ttl_s):
+        with self._lock:
+            self._store(key, value, ttl_s)
+
+    def _store(self, key, value, ttl_s):
+        self._entries[key] = (value, time.monotonic() + ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'size': len(self._entries),
+                    'hit_rate': self.hits / total if total else 0.0}
@@ -24,13 +24,119 @@ ORDER_LINK_EXPIRE_TIME = TimeConvert.DAY_TO_S
 PORTFOLIOS_EXPIRE_TIME = TimeConvert.MIN_TO_S * 60
 # Daily threshold; TTL > 24h so a single missed analyzer run does not drop it
 ARBITRAGE_THRESHOLD_EXPIRE_TIME = TimeConvert.DAY_TO_S * 2
+# Last backfilled trade id per symbol; a week covers any realistic ws outage.
+TRADE_BACKFILL_CHECKPOINT_EXPIRE_TIME = TimeConvert.DAY_TO_S * 7
 TIMEOUT_SECOND = 5
+# Near-cache TTLs are a safety net only; writers publish invalidations on
+# RedisFields.cache_invalidation as soon as a cached key changes.
+TICKER_PRICE_NEAR_CACHE_TTL = 5
+BOOK_TICKER_NEAR_CACHE_TTL = 1
+ARBITRAGE_THRESHOLD_NEAR_CACHE_TTL = 60
+NEAR_CACHE_LISTEN_SLEEP_S = 0.01
+# Optimistic WATCH/MULTI retries before giving up on a contended read-modify-write
+WATCH_RETRY_TIMES = 10
+
+# Rate-limit window counters are shared by every worker process on the box, so
+# check-and-add must be a single server-side step covering every window a
+# request is charged to: either all windows are charged or none is.
+# KEYS: n window counters, then blocked-until keys.
+# ARGV[1] now_ms, then weight, capacity, interval_ms for each counter.
+# Returns 0 if reserved, else ms until the last exhausted window or block ends.
+RESERVE_RATE_LIMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n = (#ARGV - 1) / 3
+local wait = 0
+for i = n + 1, #KEYS do
+    local blocked = tonumber(redis.call('GET', KEYS[i]) or '0') - now
+    if blocked > wait then
+        wait = blocked
+    end
+end
+for i = 1, n do
+    local used = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if used + tonumber(ARGV[i * 3 - 1]) > tonumber(ARGV[i * 3]) then
+        local remaining = tonumber(ARGV[i * 3 + 1]) - now % tonumber(ARGV[i * 3 + 1])
+        if remaining > wait then
+            wait = remaining
+        end
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i = 1, n do
+    redis.call('INCRBY', KEYS[i], ARGV[i * 3 - 1])
+    redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[i * 3 + 1]) + 1000)
+end
+return 0
+"""
+# KEYS[1] counter, ARGV: used, ttl_s. Raises the counter to the server-reported usage.
+SYNC_RATE_LIMIT_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > used then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return 1
+"""
+# KEYS[1] blocked-until key, ARGV: until_ms, ttl_ms. Only ever moves the deadline later.
+BLOCK_RATE_LIMIT_SCRIPT = """
+local blocked_until = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > blocked_until then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
 
 
 class RedisOperations:
-    def __init__(self, logger, redis_url):
+    def __init__(self, logger, redis_url, near_cache=None):
+        """
+        Args:
+            logger: Logger instance.
+            redis_url: Redis connection url.
+            near_cache: Optional NearCache; when given, hot getters (ticker price,
+                book tickers, arbitrage threshold) read through it and a pub/sub
+                thread drops entries as writers publish invalidations.
+        """
         self.client = redis.StrictRedis.from_url(redis_url, decode_responses=True, socket_timeout=TIMEOUT_SECOND)
         self.logger = logger
+        self._reserve_rate_limit = self.client.register_script(RESERVE_RATE_LIMIT_SCRIPT)
+        self._sync_rate_limit = self.client.register_script(SYNC_RATE_LIMIT_SCRIPT)
+        self._block_rate_limit = self.client.register_script(BLOCK_RATE_LIMIT_SCRIPT)
+        self.near_cache = near_cache
+        self._invalidation_thread = None
+        if near_cache is not None:
+            self._invalidation_thread = self._start_near_cache_invalidation()
+
+    def _start_near_cache_invalidation(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{RedisFields.cache_invalidation.name: self._on_cache_invalidation})
+        return pubsub.run_in_thread(sleep_time=NEAR_CACHE_LISTEN_SLEEP_S, daemon=True,
+                                    exception_handler=self._on_invalidation_error)
+
+    def _on_cache_invalidation(self, message):
+        self.near_cache.invalidate(message['data'])
+
+    def _on_invalidation_error(self, e, pubsub, thread):
+        # Invalidations may have been missed while disconnected; start cold.
+        self.logger.debug(f"Near cache invalidation listener error: {e}", exc_info=True)
+        self.near_cache.clear()
+
+    def _read_through(self, key, loader, ttl_s):
+        if self.near_cache is None:
+            return loader()
+        return self.near_cache.get_or_load(key, loader, ttl_s)
+
+    def _execute_with_invalidation(self, pipe, key):
+        """Send the queued write and its invalidation PUBLISH in one round trip."""
+        pipe.publish(RedisFields.cache_invalidation.name, key)
+        pipe.execute()
+        if self.near_cache is not None:
+            self.near_cache.invalidate(key)
+
+    def get_near_cache_stats(self) -> dict:
+        """Hit/miss/eviction/invalidation counters of the near cache, empty when disabled."""
+        return self.near_cache.get_stats() if self.near_cache is not None else {}
 
     def get_lock_for_resource(self, key):
         try:
@@ -45,28 +151,26 @@ class RedisOperations:
         lock = self.get_lock_for_resource(key)
         try:
             with lock:
-                self.client.hmset(key, value)
-                self.client.expire(key, TICKER_PRICE_EXPIRE_TIME)
+                pipe = self.client.pipeline()
+                pipe.hmset(key, value)
+                pipe.expire(key, TICKER_PRICE_EXPIRE_TIME)
+                self._execute_with_invalidation(pipe, key)
         except Exception as e:
             self.logger.exception(f"Failed to set ticker price for {exchange_id}: {e}")
             raise DependencyException(f"Failed to set ticker price for {exchange_id}") from e
 
     def get_ticker_price(self, exchange_id) -> dict:
         key = exchange_id + "_" + RedisFields.ticker_price.name
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                return self.client.hgetall(key)
+            return self._read_through(key, lambda: self.client.hgetall(key), TICKER_PRICE_NEAR_CACHE_TTL)
         except Exception as e:
             self.logger.exception(f"Failed to get ticker price for {exchange_id}: {e}")
             raise DependencyException(f"Failed to get ticker price for {exchange_id}") from e
 
     def get_order_book(self, inst_code):
         key = f"{RedisFields.orderbook.name}:{inst_code}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                return self.client.hgetall(key)
+            return self.client.hgetall(key)
         except Exception as e:
             self.logger.exception(f"Failed to get order book for {key}: {e}")
             raise DependencyException(f"Failed to get order book for {key}") from e
@@ -76,8 +180,10 @@ class RedisOperations:
         lock = self.get_lock_for_resource(key)
         try:
             with lock:
-                self.client.hmset(key, value)
-                self.client.expire(key, ORDER_TICKER_EXPIRE_TIME)
+                pipe = self.client.pipeline()
+                pipe.hmset(key, value)
+                pipe.expire(key, ORDER_TICKER_EXPIRE_TIME)
+                self._execute_with_invalidation(pipe, key)
         except Exception as e:
             self.logger.exception(f"Failed to set book ticker for {inst_code}: {e}")
             raise DependencyException(f"Failed to set book ticker for {inst_code}") from e
@@ -95,10 +201,8 @@ class RedisOperations:
 
     def get_order_ticker(self, inst_code):
         key = f"{RedisFields.book_ticker.name}:{inst_code}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                return self.client.hgetall(key)
+            return self._read_through(key, lambda: self.client.hgetall(key), BOOK_TICKER_NEAR_CACHE_TTL)
         except Exception as e:
             self.logger.exception(f"Failed to get book ticker for {key}: {e}")
             raise DependencyException(f"Failed to get book ticker for {key}") from e
@@ -116,37 +220,51 @@ class RedisOperations:
 
     def get_orders_and_delete(self, strategy_id):
         key = f"{RedisFields.orders.name}:{strategy_id}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                data = self.client.smembers(key)
-                self.client.delete(key)
-                return data
+            pipe = self.client.pipeline(transaction=True)
+            pipe.smembers(key)
+            pipe.delete(key)
+            data, _ = pipe.execute()
+            return data
         except Exception as e:
             self.logger.exception(f"Failed to get orders and delete for {key}: {e}")
             raise DependencyException(f"Failed to get orders and delete for {key}") from e
 
     def set_publish_trades(self, value, timestamp):
+        self.set_publish_trades_batch([(value, timestamp)])
+
+    def set_publish_trades_batch(self, trades):
+        """Append and publish many trades in one MULTI round trip.
+
+        Args:
+            trades: Iterable of (trade dict, timestamp) pairs.
+
+        The trades zset is append-only, so no lock is taken; each trade is
+        serialized once and the same payload is both stored and published.
+        """
         key = f"{RedisFields.trades.name}"
-        lock = self.get_lock_for_resource(key)
+        payloads = [(json.dumps(value), timestamp) for value, timestamp in trades]
+        if not payloads:
+            return
         try:
-            with lock:
-                self.client.zadd(key, {json.dumps(value): timestamp})
-                self.client.expire(key, ORDERS_EXPIRE_TIME)
-                self.client.publish(key, json.dumps(value))
-        except DependencyException as e:
-            self.logger.exception(f"Failed to set trades for : {e}")
-            raise DependencyException("Failed to set trades for ") from e
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zadd(key, dict(payloads))
+            pipe.expire(key, ORDERS_EXPIRE_TIME)
+            for payload, _ in payloads:
+                pipe.publish(key, payload)
+            pipe.execute()
+        except Exception as e:
+            self.logger.exception(f"Failed to set trades for {key}: {e}")
+            raise DependencyException(f"Failed to set trades for {key}") from e
 
     def get_trades(self):
         key = f"{RedisFields.trades.name}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                data = self.client.zrange(key, 0, -1)
-                if data != []:
-                    self.client.zrem(key, *data)
-                return data
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zrange(key, 0, -1)
+            pipe.delete(key)
+            data, _ = pipe.execute()
+            return data
         except Exception as e:
             self.logger.exception(f"Failed to get trades for {key}: {e}")
             raise DependencyException(f"Failed to get trades for {key}") from e
@@ -165,22 +283,18 @@ class RedisOperations:
 
     def get_inventory(self):
         key = f"{RedisFields.inventory.name}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                data = self.client.get(key)
-                return data
+            data = self.client.get(key)
+            return data
         except Exception as e:
             self.logger.exception(f"Failed to get inventory for {key}: {e}")
             raise DependencyException(f"Failed to get inventory for {key}") from e
 
     def get_trading_proposal(self):
         key = f"{RedisFields.trading_proposal.name}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                data = self.client.get(key)
-                return data
+            data = self.client.get(key)
+            return data
         except Exception as e:
             self.logger.exception(f"Failed to get inventory for {key}: {e}")
             raise DependencyException(f"Failed to get inventory for {key}") from e
@@ -228,18 +342,18 @@ class RedisOperations:
         lock = self.get_lock_for_resource(key)
         try:
             with lock:
-                self.client.set(key, json.dumps(value))
-                self.client.expire(key, ORDER_TICKER_EXPIRE_TIME)
+                pipe = self.client.pipeline()
+                pipe.set(key, json.dumps(value))
+                pipe.expire(key, ORDER_TICKER_EXPIRE_TIME)
+                self._execute_with_invalidation(pipe, key)
         except Exception as e:
             self.logger.exception(f"Failed to set book ticker for {exchange_id}: {e}")
             raise DependencyException(f"Failed to set book ticker for {exchange_id}") from e
 
     def get_new_book_ticker(self, exchange_id):
         key = f"{RedisFields.book_ticker.name}:{exchange_id}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                return json.loads(self.client.get(key))
+            return self._read_through(key, lambda: json.loads(self.client.get(key)), BOOK_TICKER_NEAR_CACHE_TTL)
         except Exception as e:
             self.logger.exception(f"Failed to get book ticker for {exchange_id}: {e}")
             raise DependencyException(f"Failed to get book ticker for {exchange_id}") from e
@@ -300,27 +414,41 @@ class RedisOperations:
         still receive just the per-signal delta. The key expires after
         PORTFOLIOS_EXPIRE_TIME so a quiet market cannot serve an arbitrarily
         old snapshot forever; per-tick freshness (ts_ms/local_ts) is the
-        reader's responsibility.
+        reader's responsibility. The merge runs under WATCH/MULTI and is
+        retried if another writer touches the key in between.
         """
         key = f"{RedisFields.portfolios.name}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                existing_raw = self.client.get(key)
-                try:
-                    merged = json.loads(existing_raw) if existing_raw else {}
-                except (TypeError, ValueError):
-                    merged = {}
-                if not isinstance(merged, dict):
-                    merged = {}
-                merged.update(value)
-                self.client.set(key, json.dumps(merged, cls=_DecimalEncoder))
-                self.client.expire(key, PORTFOLIOS_EXPIRE_TIME)
-                self.client.publish(key, json.dumps(value, cls=_DecimalEncoder))
+            pipe = self.client.pipeline(transaction=True)
+            try:
+                for _ in range(WATCH_RETRY_TIMES):
+                    try:
+                        pipe.watch(key)
+                        merged = self._load_json_dict(pipe.get(key))
+                        merged.update(value)
+                        pipe.multi()
+                        pipe.set(key, json.dumps(merged, cls=_DecimalEncoder))
+                        pipe.expire(key, PORTFOLIOS_EXPIRE_TIME)
+                        pipe.publish(key, json.dumps(value, cls=_DecimalEncoder))
+                        pipe.execute()
+                        return
+                    except redis.WatchError:
+                        continue
+            finally:
+                pipe.reset()
+            raise DependencyException(f"Portfolios key {key} kept changing during merge")
         except Exception as e:
             self.logger.exception(f"Failed to set portfolios for {key}: {e}")
             raise DependencyException(f"Failed to set portfolios for {key}") from e
 
+    @staticmethod
+    def _load_json_dict(raw) -> dict:
+        try:
+            loaded = json.loads(raw) if raw else {}
+        except (TypeError, ValueError):
+            return {}
+        return loaded if isinstance(loaded, dict) else {}
+
     def set_order_link(self, spot_client_order_id: str, perp_client_order_id: str):
         """Store spot→perp client_order_id mapping with 24h TTL."""
         key = f"{RedisFields.order_link.name}:{spot_client_order_id}"
@@ -336,11 +464,9 @@ class RedisOperations:
     def get_order_link(self, spot_client_order_id: str) -> str:
         """Retrieve perp client_order_id for a given spot client_order_id."""
         key = f"{RedisFields.order_link.name}:{spot_client_order_id}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                value = self.client.get(key)
-                return value.decode() if isinstance(value, bytes) else value
+            value = self.client.get(key)
+            return value.decode() if isinstance(value, bytes) else value
         except Exception as e:
             self.logger.exception(f"Failed to get order link for {spot_client_order_id}: {e}")
             raise DependencyException(f"Failed to get order link for {spot_client_order_id}") from e
@@ -358,10 +484,8 @@ class RedisOperations:
 
     def get_target_premium(self, order_id):
         key = f"{RedisFields.premium.name}:{order_id}"
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                value = self.client.get(key)
+            value = self.client.get(key)
         except Exception as e:
             self.logger.debug(f"Failed to get target premium for {order_id}: {e}", exc_info=True)
             raise DependencyException(f"Failed to get target premium for {order_id}") from e
@@ -383,8 +507,10 @@ class RedisOperations:
         lock = self.get_lock_for_resource(key)
         try:
             with lock:
-                self.client.set(key, str(value))
-                self.client.expire(key, ARBITRAGE_THRESHOLD_EXPIRE_TIME)
+                pipe = self.client.pipeline()
+                pipe.set(key, str(value))
+                pipe.expire(key, ARBITRAGE_THRESHOLD_EXPIRE_TIME)
+                self._execute_with_invalidation(pipe, key)
         except Exception as e:
             self.logger.exception(f"Failed to set arbitrage threshold: {e}")
             raise DependencyException("Failed to set arbitrage threshold") from e
@@ -392,10 +518,8 @@ class RedisOperations:
     def get_arbitrage_threshold(self):
         """Return the global arbitrage premium threshold as Decimal, or None if unset."""
         key = RedisFields.arbitrage_threshold.name
-        lock = self.get_lock_for_resource(key)
         try:
-            with lock:
-                value = self.client.get(key)
+            value = self._read_through(key, lambda: self.client.get(key), ARBITRAGE_THRESHOLD_NEAR_CACHE_TTL)
         except Exception as e:
             self.logger.debug(f"Failed to get arbitrage threshold: {e}", exc_info=True)
             raise DependencyException("Failed to get arbitrage threshold") from e
@@ -408,6 +532,60 @@ class RedisOperations:
             self.logger.debug(f"Invalid arbitrage threshold value: {value!r}", exc_info=True)
             raise DataTypeException(f"Invalid arbitrage threshold value: {value!r}") from e
 
+    def get_trade_backfill_checkpoint(self, scope) -> dict:
+        """Return {symbol: last backfilled trade id} for a backfill scope, e.g. `account_id:gap_start_ms`."""
+        key = f"{RedisFields.trade_backfill_checkpoint.name}:{scope}"
+        try:
+            return {symbol: int(trade_id) for symbol, trade_id in self.client.hgetall(key).items()}
+        except Exception as e:
+            self.logger.debug(f"Failed to get trade backfill checkpoint for {scope}: {e}", exc_info=True)
+            raise DependencyException(f"Failed to get trade backfill checkpoint for {scope}") from e
+
+    def set_trade_backfill_checkpoint(self, scope, symbol, trade_id):
+        key = f"{RedisFields.trade_backfill_checkpoint.name}:{scope}"
+        try:
+            self.client.hset(key, symbol, trade_id)
+            self.client.expire(key, TRADE_BACKFILL_CHECKPOINT_EXPIRE_TIME)
+        except Exception as e:
+            self.logger.debug(f"Failed to set trade backfill checkpoint for {scope}: {e}", exc_info=True)
+            raise DependencyException(f"Failed to set trade backfill checkpoint for {scope}") from e
+
+    def reserve_rate_limit_weights(self, counters, blocked_keys, now_ms) -> int:
+        """Atomically charge every rate-limit window in `counters`, or none of them.
+
+        Args:
+            counters: (key, weight, capacity, interval_ms) per window.
+            blocked_keys: Blocked-until keys of the charged buckets.
+            now_ms: Caller's wall clock, the one window ids were derived from.
+
+        Returns:
+            0 if reserved, otherwise ms until every exhausted window and block has passed.
+        """
+        keys = [counter[0] for counter in counters] + list(blocked_keys)
+        args = [now_ms] + [arg for _, weight, capacity, interval_ms in counters
+                           for arg in (weight, capacity, interval_ms)]
+        try:
+            return int(self._reserve_rate_limit(keys=keys, args=args))
+        except Exception as e:
+            self.logger.debug(f"Failed to reserve rate limit weight for {keys}: {e}", exc_info=True)
+            raise DependencyException(f"Failed to reserve rate limit weight for {keys}") from e
+
+    def sync_rate_limit_used(self, key, used, ttl_s):
+        """Raise a rate-limit window counter to the usage reported by the exchange."""
+        try:
+            self._sync_rate_limit(keys=[key], args=[used, ttl_s])
+        except Exception as e:
+            self.logger.debug(f"Failed to sync rate limit usage for {key}: {e}", exc_info=True)
+            raise DependencyException(f"Failed to sync rate limit usage for {key}") from e
+
+    def set_rate_limit_blocked_until(self, key, until_ms, ttl_ms):
+        """Push a bucket's blocked-until deadline (epoch ms) later, e.g. from a Retry-After header."""
+        try:
+            self._block_rate_limit(keys=[key], args=[until_ms, ttl_ms])
+        except Exception as e:
+            self.logger.debug(f"Failed to block rate limit for {key}: {e}", exc_info=True)
+            raise DependencyException(f"Failed to block rate limit for {key}") from e
+
     def ping(self):
         """Verify the Redis connection is alive. Raises DependencyException on failure."""
         try:
@@ -427,6 +605,9 @@ class RedisOperations:
     def close(self):
         """Close the underlying Redis connection. Raises DependencyException on failure."""
         try:
+            if self._invalidation_thread is not None:
+                self._invalidation_thread.stop()
+                self._invalidation_thread = None
             self.client.close()
         except Exception as e:
             self.logger.debug(f"Failed to close Redis connection: {e}", exc_info=True)
@@ -7,7 +7,6 @@ import re
 import time
 import subprocess
 import zipfile
-import importlib
 from urllib.parse import quote_plus
 
 from cryptography.fernet import Fernet
@@ -24,6 +23,7 @@ from pytradekit.utils.time_handler import get_now_time, DATETIME_FORMAT_DAY, DAT
 from pytradekit.utils.mongodb_operations import MongodbOperations
 from pytradekit.utils.redis_operations import RedisOperations
 from pytradekit.utils.exceptions import DependencyException, ExchangeException
+from pytradekit.utils.optional_imports import optional_import
 
 
 RETRY_TIMES = 3
@@ -31,12 +31,6 @@ RETRY_INTERVAL = 2
 REPORT_FILE_PATH = '/home/report_data_csv/'
 
 
-def optional_import(name):
-    try:
-        return importlib.import_module(name)
-    except ImportError:
-        return None
-
 line_profiler = optional_import("line_profiler")
 memory_profiler = optional_import("memory_profiler")
 
@@ -475,7 +469,7 @@ def get_mongo(config, logger, running_mode):
     return mongo
 
 
-def get_redis(logger, config, running_mode):
+def get_redis(logger, config, running_mode, near_cache=None):
     def get_redis_url(config, running_mode=RunningMode.testing_flag.name):
         redis_host = config.private.get(Env.REDIS_HOST.name) 
         redis_port = config.private.get(Env.REDIS_PORT.name)
@@ -493,7 +487,7 @@ def get_redis(logger, config, running_mode):
             return f"redis://{redis_host}:{redis_port}/"
     
     redis_url = get_redis_url(config, running_mode=running_mode)
-    return RedisOperations(logger, redis_url)
+    return RedisOperations(logger, redis_url, near_cache=near_cache)
 
 
 def get_coin_price(logger, coin, exchange_ticker_price, exchange_id):
@@ -545,6 +539,7 @@ def get_git_branch():
 
 
 def zip_df(logger, logs_list, df, path, collection_path, time_span=None, part_num=0):
+    """CSV-in-zip export, kept for existing archives; new exports use parquet_archive.archive_chunks."""
     day_time = get_now_time(DATETIME_FORMAT_DAY)
     hms_time = get_now_time(DATETIME_FORMAT_HMS)
     path = os.path.join(path, day_time)
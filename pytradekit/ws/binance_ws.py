@@ -9,8 +9,12 @@ from pytradekit.gateway.websocket.ws_manager import WsManager
 from pytradekit.utils.time_handler import get_timestamp_ms, get_timestamp_s, get_millisecond_str, get_datetime, TimeSpan
 from pytradekit.utils.dynamic_types import SlackUser
 from pytradekit.ws.save_restful_bn_deposit_withdraw import HandleRestfulDepositWithdraw
-from pytradekit.ws.bn_add_missing_orders import get_binance_trade
+from pytradekit.ws.bn_add_missing_orders import BinanceTradeBackfill, publish_trades_to_redis
+from pytradekit.restful.binance_rate_limiter import create_binance_rate_limiter
+from pytradekit.restful.binance_restful import BinanceClient
 from pytradekit.utils.tools import get_redis
+from pytradekit.utils.json_codec import loads
+from pytradekit.ws.local_order_book import OrderBookManager
 
 
 class AtUser:
@@ -57,6 +61,8 @@ class BinanceWsManager(WsManager):
         self._bn_client = bn_client
         self._mm_symbol_list = mm_symbol_list
         self.verify_bookticker_duplicate = {}
+        self.order_book_manager = None
+        self._depth_client = None
 
     def _get_api_url(self) -> str:
         return self._api_url
@@ -253,12 +259,48 @@ class BinanceWsManager(WsManager):
         self._ping_market(BinanceAuxiliary.ws_ping_sleep.value, symbols)
 
     def start_order_book_stream(self, symbols):
+        """Subscribe to `@depth@100ms` and keep local books; the queue receives book events, not raw messages.
+
+        Consumers get, per symbol, one full-book depthUpdate carrying `lastUpdateId` once the book
+        is synced (again after every resync), then depthUpdate events whose 'b' / 'a' hold only the
+        levels that changed. Raw diff-depth messages are never put on the queue.
+        """
+        self.order_book_manager = OrderBookManager(self.logger, self.get_depth_snapshot, self._queue.put_nowait,
+                                                   is_perp=self._is_perp)
         params = []
         for symbol in symbols:
-            params.append(f'{symbol.lower()}{BinanceAuxiliary.ws_orderbook.value}')
+            params.append(f'{symbol.lower()}{BinanceAuxiliary.ws_diff_depth.value}')
         self.start_subscribe(params)
         self._ping(BinanceAuxiliary.ws_ping_sleep.value)
 
+    def get_depth_snapshot(self, symbol):
+        """REST depth snapshot through a rate-limited BinanceClient; None when the request failed."""
+        client = self._get_depth_client()
+        if self._is_perp:
+            return client.get_perp_orderbook(symbol, limit=BinanceAuxiliary.url_limit.value)
+        return client.get_orderbook(symbol, limit=BinanceAuxiliary.url_limit.value)
+
+    def _get_depth_client(self):
+        if self._depth_client is None:
+            # 优先用注入的共享限流器；否则有配置就按 Redis 跨进程共享，再退到 bn_client 的本进程限流器
+            rate_limiter = None
+            if self._bn_client is not None and not self._bn_client.owns_rate_limiter:
+                rate_limiter = self._bn_client.rate_limiter
+            if rate_limiter is None and self.config is not None:
+                my_redis = get_redis(logger=self.logger, config=self.config, running_mode=self.running_mode)
+                rate_limiter = create_binance_rate_limiter(self.logger, my_redis, is_perp=self._is_perp)
+            if rate_limiter is None and self._bn_client is not None:
+                rate_limiter = self._bn_client.rate_limiter
+            self._depth_client = BinanceClient(self.logger, is_perp=self._is_perp, rate_limiter=rate_limiter)
+            if not self._is_perp:
+                # 现货沿用本连接配置的 api_url
+                self._depth_client._url = self._get_api_url()
+        return self._depth_client
+
+    def verify_depth_update(self, msg):
+        return self.order_book_manager is not None and isinstance(msg, dict) and msg.get(
+            BinanceWebSocket.event_type.value) == BinanceWebSocket.depth_update.value
+
     def start_bookticker_stream(self, symbols):
         params = []
         for symbol in symbols:
@@ -293,38 +335,26 @@ class BinanceWsManager(WsManager):
                     time_span = TimeSpan(start=start_time, end=times)
                     self.logger.debug(
                         f"restful start time: {time_span.start}, end time: {time_span.end}, symbol list: {self._mm_symbol_list}")
-                    for symbol in self._mm_symbol_list:
-                        trade_res = get_binance_trade(
-                            self.logger, self._bn_client, time_span, symbol,
-                            self._account_id, self._strategy_id
-                        )
-                        if trade_res:
-                            self.logger.debug(f"symbol: {symbol}, len trade: {len(trade_res)}")
-                            self.logger.debug(f"trade res0: {trade_res[0]}")
-                            self.logger.debug(f"trade res-1: {trade_res[-1]}")
-                        for trade in trade_res:
-                            my_redis.set_publish_trades(value=trade.to_dict(),
-                                                        timestamp=trade['timestamp'])
+                    rate_limiter = None
+                    # bn_client 只有本进程限流器时，另给补单一个跨进程共享的
+                    if self._bn_client.rate_limiter is None or self._bn_client.owns_rate_limiter:
+                        rate_limiter = create_binance_rate_limiter(self.logger, my_redis, is_perp=self._is_perp)
+                    backfill = BinanceTradeBackfill(self.logger, self._bn_client, self._account_id,
+                                                    self._strategy_id, checkpoint=my_redis, rate_limiter=rate_limiter)
+                    counts = backfill.backfill(self._mm_symbol_list, time_span, [publish_trades_to_redis(my_redis)])
+                    self.logger.debug(f"supplement trades per symbol: {counts}")
             elif connect_status is False:
                 self.start_end_time_dict['start_time'] = times
 
     def verify_spot_bookticker_duplicate(self, msg):
         if BinanceWebSocket.order_book_update_id.value not in msg or BinanceWebSocket.symbol.value not in msg or BinanceWebSocket.orderbook_asks.value not in msg or BinanceWebSocket.orderbook_bids.value not in msg:
             return False
-        if msg[BinanceWebSocket.symbol.value] not in self.verify_bookticker_duplicate:
-            self.verify_bookticker_duplicate[msg[BinanceWebSocket.symbol.value]] = msg[
-                                                                                       BinanceWebSocket.orderbook_asks.value] + \
-                                                                                   msg[
-                                                                                       BinanceWebSocket.orderbook_bids.value]
-        else:
-            if self.verify_bookticker_duplicate[msg[BinanceWebSocket.symbol.value]] == msg[
-                BinanceWebSocket.orderbook_asks.value] + msg[BinanceWebSocket.orderbook_bids.value]:
-                return False
-            else:
-                self.verify_bookticker_duplicate[msg[BinanceWebSocket.symbol.value]] = msg[
-                                                                                           BinanceWebSocket.orderbook_asks.value] + \
-                                                                                       msg[
-                                                                                           BinanceWebSocket.orderbook_bids.value]
+        # 比较 (ask, bid) 元组，不再每条消息拼接字符串
+        quote = (msg[BinanceWebSocket.orderbook_asks.value], msg[BinanceWebSocket.orderbook_bids.value])
+        symbol = msg[BinanceWebSocket.symbol.value]
+        if self.verify_bookticker_duplicate.get(symbol) == quote:
+            return False
+        self.verify_bookticker_duplicate[symbol] = quote
         return True
 
     def verify_spot_order_trade(self, msg):
@@ -361,7 +391,7 @@ class BinanceWsManager(WsManager):
         super()._on_error(ws, error, *args, **kwargs)
 
     def _on_message(self, _ws, message):
-        msg = json.loads(message)
+        msg = loads(message)
         # raw-msg trace: first N msgs are logged in full, rest are summarized by top-level keys.
         # Use to diagnose missing perp/spot event delivery when verify_* keeps returning False.
         self._msg_count += 1
@@ -394,6 +424,10 @@ class BinanceWsManager(WsManager):
                 if self.verify_spot_order_trade(msg):
                     self._queue.put_nowait(msg)
                     return
+                if self.verify_depth_update(msg):
+                    # 变化通过 on_update 回调进队列
+                    self.order_book_manager.on_depth_event(msg)
+                    return
                 if self.verify_spot_bookticker_duplicate(msg):
                     self._queue.put_nowait(msg)
                     return
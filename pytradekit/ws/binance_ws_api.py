@@ -25,6 +25,7 @@ from nacl.signing import SigningKey
 from websocket import WebSocketApp
 
 from pytradekit.utils.time_handler import get_timestamp_ms
+from pytradekit.utils.json_codec import loads
 
 WS_API_URL = 'wss://ws-api.binance.com:443/ws-api/v3'
 # run_forever ping keeps intermediaries from dropping the idle connection;
@@ -120,7 +121,7 @@ class BinanceWsApiUserData:
 
     def _on_message(self, ws, message):
         try:
-            msg = json.loads(message)
+            msg = loads(message)
         except (TypeError, ValueError) as e:
             self.logger.debug(f"bn ws-api undecodable frame: {e}")
             return
@@ -1,10 +1,21 @@
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from pytradekit.trading_setup.inst_code_usage import convert_symbol_to_inst_code
-from pytradekit.utils.dynamic_types import OrderType, OrderSide, ExchangeId, BinanceRestful
+from pytradekit.utils.dynamic_types import OrderType, OrderSide, ExchangeId, BinanceRestful, BinanceAuxiliary, \
+    HttpMmthod
 from pytradekit.utils.static_types import Trade
+from pytradekit.utils.exceptions import DependencyException, ExchangeException
 from pytradekit.utils.time_handler import convert_timestamp_to_str, convert_timestamp_to_datetime, \
-    get_millisecond_str, get_datetime, DATETIME_FORMAT_DAY
+    get_millisecond_str, get_datetime, DATETIME_FORMAT_DAY, TimeConvert
+
+# myTrades 权重 20：8 个并发足够把 80+ 个 symbol 的缺口在预算内尽快补齐，
+# 真正的节奏由 rate_limiter 控制
+BACKFILL_MAX_WORKERS = 8
+# myTrades 的 startTime/endTime 跨度不能超过 24h
+BACKFILL_TIME_WINDOW_MS = TimeConvert.DAY_TO_MS
+# get_trade 在 418/429 后返回 None，重试同一页的次数
+BACKFILL_PAGE_RETRIES = 3
 
 
 def handle_restful_trade_data(trade_data, account_id, strategy_id):
@@ -37,28 +48,164 @@ def handle_restful_trade_data(trade_data, account_id, strategy_id):
     return trade, timestamp
 
 
+class MemoryTradeCheckpoint:
+    """In-process stand-in for the Redis trade backfill checkpoint."""
+
+    def __init__(self):
+        self._checkpoints = {}
+        self._lock = threading.Lock()
+
+    def get_trade_backfill_checkpoint(self, scope) -> dict:
+        with self._lock:
+            return dict(self._checkpoints.get(scope, {}))
+
+    def set_trade_backfill_checkpoint(self, scope, symbol, trade_id):
+        with self._lock:
+            self._checkpoints.setdefault(scope, {})[symbol] = trade_id
+
+
+def publish_trades_to_redis(redis_ops):
+    """Page sink publishing each backfilled page in one RedisOperations.set_publish_trades_batch call."""
+    def publish(trades):
+        redis_ops.set_publish_trades_batch([(trade.to_dict(), timestamp) for trade, timestamp in trades])
+    return publish
+
+
+def insert_trades_to_mongo(mongo_ops):
+    """Page sink writing each backfilled page into the exchange's trades collection."""
+    def insert(trades):
+        if trades:
+            mongo_ops.insert_trades([trade.to_dict() for trade, _ in trades], trades[0][0].exchange_id)
+    return insert
+
+
+class BinanceTradeBackfill:
+    """Concurrent myTrades backfill driven by fromId cursors.
+
+    Each symbol is paged independently: the first page is located by time
+    (startTime, 24h windows), every following page by `fromId = last id + 1`.
+    Pages are handed to the sinks as they arrive and the last trade id is
+    checkpointed after the sinks accept a page, so an interrupted backfill of
+    the same gap resumes where it stopped instead of re-reading it. Checkpoints
+    are scoped to the gap (`time_span.start`): a later gap never resumes from
+    an earlier gap's cursor.
+
+    Args:
+        logger: Logger instance.
+        bn_client: BinanceClient used for myTrades.
+        account_id: Account the trades belong to, also the checkpoint scope.
+        strategy_id: Strategy/portfolio id stamped on each Trade.
+        checkpoint: Object with get/set_trade_backfill_checkpoint, normally
+            RedisOperations; defaults to a MemoryTradeCheckpoint.
+        max_workers: Symbols fetched concurrently.
+        rate_limiter: BinanceRateLimiter charged before every page. Only pass
+            one when `bn_client` has no shared rate_limiter of its own (none, or
+            its process-local default), otherwise each page is charged twice.
+    """
+
+    def __init__(self, logger, bn_client, account_id, strategy_id=None, checkpoint=None,
+                 max_workers=BACKFILL_MAX_WORKERS, rate_limiter=None):
+        self.logger = logger
+        self.bn_client = bn_client
+        self.account_id = account_id
+        self.strategy_id = strategy_id
+        self.checkpoint = checkpoint or MemoryTradeCheckpoint()
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self._trade_url = getattr(bn_client, '_url', BinanceAuxiliary.url.value) + BinanceAuxiliary.url_trade.value
+
+    def backfill(self, symbols, time_span, sinks) -> dict:
+        """Backfill trades with time_span.start < time < time_span.end for every symbol.
+
+        Args:
+            symbols: Exchange symbols, e.g. ['BTCUSDT'].
+            time_span: TimeSpan in ms.
+            sinks: Callables receiving each page as a list of (Trade, timestamp_ms).
+
+        Returns:
+            {symbol: number of trades streamed}.
+        """
+        scope = self.get_checkpoint_scope(time_span)
+        cursors = self._load_checkpoint(scope)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {symbol: executor.submit(self._backfill_symbol, symbol, time_span, sinks, cursors.get(symbol),
+                                               scope)
+                       for symbol in symbols}
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+    def get_checkpoint_scope(self, time_span) -> str:
+        """Checkpoint key for one gap, e.g. 'acct:1700000000000'."""
+        return f'{self.account_id}:{time_span.start}'
+
+    def _load_checkpoint(self, scope) -> dict:
+        try:
+            return self.checkpoint.get_trade_backfill_checkpoint(scope)
+        except DependencyException as e:
+            self.logger.debug(f'Trade backfill checkpoint unavailable, starting from time span: {e.note}',
+                              exc_info=True)
+            return {}
+
+    def _backfill_symbol(self, symbol, time_span, sinks, last_trade_id, scope) -> int:
+        count = 0
+        try:
+            if last_trade_id is None:
+                page = self._fetch_first_page(symbol, time_span)
+            else:
+                page = self._fetch_page(symbol, from_id=last_trade_id + 1)
+            while page:
+                trades = [handle_restful_trade_data(trade_data, self.account_id, self.strategy_id)
+                          for trade_data in page
+                          if time_span.start < trade_data[BinanceRestful.trade_time.value] < time_span.end]
+                for sink in sinks:
+                    sink(trades)
+                count += len(trades)
+                last_trade_id = page[-1][BinanceRestful.trade_id.value]
+                self.checkpoint.set_trade_backfill_checkpoint(scope, symbol, last_trade_id)
+                if len(page) < BinanceAuxiliary.url_limit.value or \
+                        page[-1][BinanceRestful.trade_time.value] >= time_span.end:
+                    break
+                page = self._fetch_page(symbol, from_id=last_trade_id + 1)
+        except (ExchangeException, DependencyException) as e:
+            self.logger.info(f'Trade backfill stopped for {symbol} after {count} trades, resumable from checkpoint: '
+                             f'{e.note}')
+        return count
+
+    def _fetch_first_page(self, symbol, time_span) -> list:
+        window_start = time_span.start
+        while window_start < time_span.end:
+            window_end = min(window_start + BACKFILL_TIME_WINDOW_MS, time_span.end)
+            page = self._fetch_page(symbol, start_time=window_start, end_time=window_end)
+            if page:
+                return page
+            window_start = window_end
+        return []
+
+    def _fetch_page(self, symbol, from_id=None, start_time=None, end_time=None) -> list:
+        for _ in range(BACKFILL_PAGE_RETRIES):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(HttpMmthod.GET.name, self._trade_url, {'symbol': symbol})
+            page = self.bn_client.get_trade(symbol, start_time=start_time, end_time=end_time, from_id=from_id)
+            if isinstance(page, dict):
+                raise ExchangeException(f'get_trade error for {symbol}: {page}')
+            if page is not None:
+                return page
+        raise ExchangeException(f'get_trade rate limited for {symbol}')
+
+
 def get_binance_trade(logger, bn_client, time_span, symbol, account_id, strategy_id=None):
-    start_tmp = time_span.start
-    end_tmp = time_span.end
+    """Backfill one symbol and return trade dicts carrying a `timestamp` key.
+
+    Kept for callers of the old time-window pager; new code should use
+    BinanceTradeBackfill with sinks so trades stream out as pages arrive.
+    """
     result = []
-    while True:
-        try:
-            trade_res = bn_client.get_trade(symbol, start_time=start_tmp, end_time=end_tmp)
-            time.sleep(1)
-        except Exception as e:
-            logger.exception(e)
-            time.sleep(3)
-            break
-        if not trade_res or 'code' in trade_res or trade_res[-1]['time'] == start_tmp:
-            break
-        if trade_res[0]['time'] == start_tmp:
-            trade_res = trade_res[1:]
-        start_tmp = trade_res[-1]['time']
-        for trade_data in trade_res:
-            trade, timestamp = handle_restful_trade_data(trade_data, account_id, strategy_id)
-            if timestamp in [time_span.start, time_span.end]:
-                continue
+
+    def collect(trades):
+        for trade, timestamp in trades:
             res = trade.to_dict()
             res['timestamp'] = timestamp
             result.append(res)
+
+    BinanceTradeBackfill(logger, bn_client, account_id, strategy_id, max_workers=1).backfill(
+        [symbol], time_span, [collect])
     return result
@@ -3,13 +3,13 @@ import hmac
 import base64
 import hashlib
 import urllib.parse
-import gzip
 from dataclasses import dataclass, field
 from typing import Optional
 
 from pytradekit.utils.dynamic_types import HuobiAuxiliary
 from pytradekit.gateway.websocket.ws_manager import WsManager
 from pytradekit.utils.time_handler import get_htx_timestamp, get_timestamp_s, sleep_min_time
+from pytradekit.utils.json_codec import loads, loads_gzip
 
 
 @dataclass
@@ -178,9 +178,7 @@ class HuobiWsManager(WsManager):
 
     def _on_message(self, _ws, message):
         try:
-            if isinstance(message, bytes):
-                message = gzip.decompress(message).decode('utf-8')
-            msg = json.loads(message)
+            msg = loads_gzip(message) if isinstance(message, bytes) else loads(message)
             if 'ping' in msg:
                 self.send(json.dumps({'pong': msg['ping']}))
                 return
@@ -0,0 +1,316 @@
+"""Local order books maintained from Binance diff-depth streams.
+
+Replaces re-sending (and comparing) whole depth ladders per message: each
+symbol keeps a sorted book, `@depth@100ms` events are applied in place, and
+only the levels whose quantity actually changed are handed downstream.
+
+Sequencing follows Binance's "how to manage a local order book":
+events are buffered until a REST snapshot (`lastUpdateId`) is loaded, then
+
+* spot drops events with `u <= lastUpdateId`, the first applied event must
+  satisfy `U <= lastUpdateId + 1 <= u` and every later one `U == last u + 1`;
+* USD-M futures drop events with `u < lastUpdateId`, the first applied event
+  must satisfy `U <= lastUpdateId <= u` and every later one `pu == last u`.
+
+A gap resyncs the symbol from a fresh snapshot. Snapshots are fetched on a
+worker pool, never on the websocket thread, with at most one request in
+flight per symbol; diffs keep being buffered meanwhile, and a failed or empty
+snapshot backs the symbol off exponentially before the next attempt.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+from pytradekit.gateway.websocket.ws_supervisor import ReconnectBackoff
+from pytradekit.utils.dynamic_types import BinanceWebSocket
+from pytradekit.utils.exceptions import OrderBookSequenceException
+
+# 重新拉快照前最多缓存的增量条数，超过说明快照迟迟拿不到，丢掉旧的
+MAX_BUFFERED_EVENTS = 1000
+# 拉快照的线程数；同一 symbol 同时只有一个请求
+SNAPSHOT_WORKERS = 2
+# 快照失败后的退避：1s 起，每次翻倍，封顶 60s
+SNAPSHOT_RETRY_BASE_DELAY_S = 1
+SNAPSHOT_RETRY_MAX_DELAY_S = 60
+
+
+class OrderBookSide:
+    """Price levels of one side; sorted keys give O(1) best price and O(n) top-n slices.
+
+    Levels keep the exchange's price / quantity strings so changed levels are
+    forwarded exactly as received.
+    """
+    __slots__ = ('is_bid', '_keys', '_levels')
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        # 买盘存负价，两侧都按升序即由优到劣
+        self._keys = []
+        self._levels = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.clear()
+        self._levels.clear()
+
+    def update(self, price, qty) -> bool:
+        """Set one level from strings; zero quantity removes it. Returns whether the book changed."""
+        key = -float(price) if self.is_bid else float(price)
+        level = self._levels.get(key)
+        if float(qty) == 0:
+            if level is None:
+                return False
+            del self._levels[key]
+            del self._keys[bisect_left(self._keys, key)]
+            return True
+        if level is not None and level[1] == qty:
+            return False
+        if level is None:
+            insort(self._keys, key)
+        self._levels[key] = (price, qty)
+        return True
+
+    def best(self):
+        """(price, qty) as floats, or None when empty."""
+        if not self._keys:
+            return None
+        price, qty = self._levels[self._keys[0]]
+        return float(price), float(qty)
+
+    def levels(self) -> list:
+        """[[price, qty], ...] as the exchange's strings, best first."""
+        return [list(self._levels[key]) for key in self._keys]
+
+    def top(self, n=None) -> list:
+        """[[price, qty], ...] as floats, best first."""
+        keys = self._keys if n is None else self._keys[:n]
+        return [[float(price), float(qty)] for price, qty in (self._levels[key] for key in keys)]
+
+
+class LocalOrderBook:
+    """Book of one symbol plus its diff-depth sequence state.
+
+    Args:
+        symbol: Exchange symbol, e.g. 'BTCUSDT'.
+        is_perp: USD-M futures sequencing (`pu`) instead of spot.
+    """
+    __slots__ = ('symbol', 'is_perp', 'bids', 'asks', 'last_update_id', 'is_synced')
+
+    def __init__(self, symbol, is_perp=False):
+        self.symbol = symbol
+        self.is_perp = is_perp
+        self.bids = OrderBookSide(is_bid=True)
+        self.asks = OrderBookSide(is_bid=False)
+        self.last_update_id = None
+        # 快照之后是否已经接上第一条增量
+        self.is_synced = False
+
+    def apply_snapshot(self, snapshot):
+        """Load a REST depth snapshot: {'lastUpdateId': n, 'bids': [[p, q], ...], 'asks': [...]}."""
+        self.bids.clear()
+        self.asks.clear()
+        for price, qty in snapshot['bids']:
+            self.bids.update(price, qty)
+        for price, qty in snapshot['asks']:
+            self.asks.update(price, qty)
+        self.last_update_id = snapshot[BinanceWebSocket.lastUpdateId.value]
+        self.is_synced = False
+
+    def apply_diff(self, event):
+        """Apply one depthUpdate event.
+
+        Returns:
+            {'b': [[p, q], ...], 'a': [...]} with only the changed levels, or None if the
+            event is stale or changed nothing.
+
+        Raises:
+            OrderBookSequenceException: The event does not continue the book; resync from a snapshot.
+        """
+        first_id = event[BinanceWebSocket.orderbook_first_update_id.value]
+        final_id = event[BinanceWebSocket.orderbook_last_update_id.value]
+        if self.last_update_id is None:
+            raise OrderBookSequenceException(f'{self.symbol} has no snapshot')
+        if not self.is_synced:
+            # 合约的第一条要跨过 lastUpdateId 本身，现货跨过 lastUpdateId + 1
+            next_id = self.last_update_id if self.is_perp else self.last_update_id + 1
+            if final_id < next_id:
+                return None
+            if first_id > next_id:
+                raise OrderBookSequenceException(
+                    f'{self.symbol} first event U={first_id} is past snapshot {self.last_update_id}')
+        else:
+            if final_id <= self.last_update_id:
+                return None
+            previous_id = event.get(BinanceWebSocket.perp_previous_update_id.value)
+            in_sequence = previous_id == self.last_update_id if self.is_perp \
+                else first_id == self.last_update_id + 1
+            if not in_sequence:
+                raise OrderBookSequenceException(
+                    f'{self.symbol} gap: last u={self.last_update_id}, got U={first_id} pu={previous_id}')
+        bids = [[price, qty] for price, qty in event[BinanceWebSocket.orderbook_bids.value]
+                if self.bids.update(price, qty)]
+        asks = [[price, qty] for price, qty in event[BinanceWebSocket.orderbook_asks.value]
+                if self.asks.update(price, qty)]
+        self.last_update_id = final_id
+        self.is_synced = True
+        if not bids and not asks:
+            return None
+        return {BinanceWebSocket.orderbook_bids.value: bids, BinanceWebSocket.orderbook_asks.value: asks}
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def top(self, n) -> dict:
+        """Top-n view in the REST depth shape, floats: {'bids': [[p, q], ...], 'asks': [...]}."""
+        return {'bids': self.bids.top(n), 'asks': self.asks.top(n)}
+
+
+class OrderBookManager:
+    """Local books for many symbols fed by one diff-depth stream.
+
+    Every change goes to `on_update`: a freshly synced symbol once as its
+    full book (the event carries `lastUpdateId`), then each depthUpdate reduced
+    to the levels that changed. `on_update` is called under the manager lock,
+    from the websocket thread or a snapshot worker, in book order.
+
+    Args:
+        logger: Logger instance.
+        get_snapshot: `get_snapshot(symbol) -> REST depth dict`; None, an empty dict or one
+            without `lastUpdateId` (e.g. BinanceClient on 418 / 429) counts as a failed sync.
+        on_update: Callback receiving the full-book and reduced events.
+        is_perp: USD-M futures sequencing.
+        executor: Runs snapshot fetches, default a small thread pool.
+        backoff: Retry delay after failed snapshots, a ReconnectBackoff.
+        clock: Monotonic clock in seconds, for the backoff deadlines.
+    """
+
+    def __init__(self, logger, get_snapshot, on_update, is_perp=False, executor=None, backoff=None,
+                 clock=time.monotonic):
+        self.logger = logger
+        self.get_snapshot = get_snapshot
+        self.on_update = on_update
+        self.is_perp = is_perp
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._backoff = backoff or ReconnectBackoff(base_delay_s=SNAPSHOT_RETRY_BASE_DELAY_S,
+                                                    max_delay_s=SNAPSHOT_RETRY_MAX_DELAY_S)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.books = {}
+        self._buffers = {}
+        self._in_flight = set()
+        self._failures = {}
+        self._retry_at = {}
+        self.resyncs = 0
+        self.snapshot_failures = 0
+
+    def get_book(self, symbol):
+        return self.books.get(symbol)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {'symbols': len(self.books), 'resyncs': self.resyncs, 'snapshot_failures': self.snapshot_failures,
+                    'in_flight': len(self._in_flight),
+                    'unsynced': sorted(symbol for symbol in self._buffers)}
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def on_depth_event(self, event):
+        """Apply one depthUpdate; an unsynced symbol buffers it and schedules a snapshot if none is due."""
+        symbol = event[BinanceWebSocket.symbol.value]
+        with self._lock:
+            book = self.books.get(symbol)
+            if book is not None and book.last_update_id is not None:
+                try:
+                    changes = book.apply_diff(event)
+                except OrderBookSequenceException as e:
+                    self.logger.debug(f'order book resync: {e.note}')
+                    self.resyncs += 1
+                    book.last_update_id = None
+                    self._buffers[symbol] = [event]
+                else:
+                    if changes is not None:
+                        self.on_update(self._to_event(event, changes))
+                    return
+            else:
+                buffer = self._buffers.setdefault(symbol, [])
+                buffer.append(event)
+                if len(buffer) > MAX_BUFFERED_EVENTS:
+                    del buffer[0]
+            if not self._should_fetch(symbol):
+                return
+            self._in_flight.add(symbol)
+        self._submit(symbol)
+
+    def _should_fetch(self, symbol) -> bool:
+        return symbol not in self._in_flight and self._clock() >= self._retry_at.get(symbol, 0)
+
+    def _submit(self, symbol):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS, thread_name_prefix='order-book-snapshot')
+        try:
+            self._executor.submit(self._sync, symbol)
+        except RuntimeError as e:
+            # executor 已关闭
+            self.logger.debug(f'order book snapshot of {symbol} not scheduled: {e}')
+            with self._lock:
+                self._in_flight.discard(symbol)
+
+    def _sync(self, symbol):
+        """Worker: load a snapshot and replay the buffered events onto it; the book is reported in full."""
+        try:
+            snapshot = self.get_snapshot(symbol)
+        except Exception as e:
+            self.logger.debug(f'order book snapshot of {symbol} failed: {e}')
+            snapshot = None
+        with self._lock:
+            self._in_flight.discard(symbol)
+            if not snapshot or BinanceWebSocket.lastUpdateId.value not in snapshot:
+                self._fail(symbol, 'empty snapshot')
+                return
+            book = self.books.get(symbol)
+            if book is None:
+                book = self.books[symbol] = LocalOrderBook(symbol, self.is_perp)
+            book.apply_snapshot(snapshot)
+            buffered = self._buffers.pop(symbol, [])
+            try:
+                for event in buffered:
+                    book.apply_diff(event)
+            except OrderBookSequenceException as e:
+                # 快照比缓存的增量还旧，保留缓存，退避后再拉
+                book.last_update_id = None
+                self._buffers[symbol] = buffered
+                self._fail(symbol, e.note)
+                return
+            self._failures.pop(symbol, None)
+            self._retry_at.pop(symbol, None)
+            # 刚同步的书整本下发一次，带 lastUpdateId 标记为全量，下游以此为基准再接增量
+            self.on_update({BinanceWebSocket.event_type.value: BinanceWebSocket.depth_update.value,
+                            BinanceWebSocket.symbol.value: symbol,
+                            BinanceWebSocket.orderbook_last_update_id.value: book.last_update_id,
+                            BinanceWebSocket.lastUpdateId.value: book.last_update_id,
+                            BinanceWebSocket.orderbook_bids.value: book.bids.levels(),
+                            BinanceWebSocket.orderbook_asks.value: book.asks.levels()})
+
+    def _fail(self, symbol, reason):
+        failures = self._failures.get(symbol, 0)
+        delay = self._backoff.get_delay(failures)
+        self._failures[symbol] = failures + 1
+        self._retry_at[symbol] = self._clock() + delay
+        self.snapshot_failures += 1
+        self.logger.warning(f'order book sync of {symbol} failed ({reason}), retry in {delay:.1f}s')
+
+    @staticmethod
+    def _to_event(event, changes):
+        res = {key: value for key, value in event.items()
+               if key not in (BinanceWebSocket.orderbook_bids.value, BinanceWebSocket.orderbook_asks.value)}
+        res.update(changes)
+        return res
@@ -6,6 +6,7 @@ import base64
 from pytradekit.utils.dynamic_types import OkexAuxiliary, OkexWebSocket, WebsocketStatus
 from pytradekit.gateway.websocket.ws_manager import WsManager
 from pytradekit.utils.time_handler import get_timestamp_s, get_millisecond_str, get_datetime
+from pytradekit.utils.json_codec import loads
 
 
 class OkexWsManager(WsManager):
@@ -111,7 +112,7 @@ class OkexWsManager(WsManager):
         try:
             if message == 'pong':
                 return
-            msg = json.loads(message)
+            msg = loads(message)
             if 'event' in msg and msg['event'] == 'login':
                 if msg['code'] == '0':
                     self._send_order()
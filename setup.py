@@ -5,7 +5,7 @@ setuptools.setup(
     version="0.0.1",
     description="Basic utilities for pytradekit projects",
     packages=setuptools.find_packages(),
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     install_requires=[
         "pandas",
         "numpy",
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+import time
+
+from pytradekit.gateway.websocket.async_ws_gateway import AsyncWsGateway, BinanceCodec, KucoinCodec, OkexCodec
+from pytradekit.gateway.websocket.ws_supervisor import ReconnectBackoff
+
+NO_WAIT = ReconnectBackoff(base_delay_s=0, jitter=0)
+
+
+class FakeWs:
+    def __init__(self, frames):
+        self.frames = asyncio.Queue()
+        for frame in frames:
+            self.frames.put_nowait(frame)
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        await self.frames.put(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.frames.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+
+class FakeServer:
+    """Hands out one FakeWs per connect; each session's frames are given up front."""
+
+    def __init__(self, *sessions):
+        self.sessions = list(sessions)
+        self.sockets = []
+        self.urls = []
+
+    async def connect(self, url, **kwargs):
+        self.urls.append(url)
+        ws = FakeWs(self.sessions.pop(0) if self.sessions else [])
+        self.sockets.append(ws)
+        return ws
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_reconnect_replays_auth_then_subs(mocker):
+    # 第一次连接收到一条消息后被服务端关闭，第二次连接保持
+    server = FakeServer(['pong', '{"arg": {"channel": "tickers"}, "data": [1]}', None], [])
+    received = []
+    gateway = AsyncWsGateway(mocker.MagicMock())
+    gateway.add_connection('okx', OkexCodec(api_key='k', api_secret='s', passphrase='p'),
+                           lambda name, msg: received.append((name, msg)), backoff=NO_WAIT, connect=server.connect)
+    gateway.subscribe('okx', {'op': 'subscribe', 'args': [{'channel': 'tickers', 'instId': 'BTC-USDT'}]})
+
+    async def scenario():
+        task = asyncio.ensure_future(gateway.run())
+        while len(server.sockets) < 2 or len(server.sockets[1].sent) < 2:
+            await asyncio.sleep(0)
+        await gateway.close()
+        await task
+
+    _run(scenario())
+
+    for ws in server.sockets:
+        assert [json.loads(m)['op'] for m in ws.sent] == ['login', 'subscribe']
+    assert received == [('okx', {'arg': {'channel': 'tickers'}, 'data': [1]})]
+    assert gateway.get_stats()['okx']['reconnects'] == 1
+    assert gateway.get_stats()['okx']['messages'] == 1
+
+
+def test_kucoin_server_ping_gets_pong(mocker):
+    server = FakeServer(['{"id": "7", "type": "ping"}', '{"type": "welcome"}', '{"type": "message", "x": 1}'])
+    received = []
+    gateway = AsyncWsGateway(mocker.MagicMock())
+    connection = gateway.add_connection('kc', KucoinCodec('wss://kc?token=t'),
+                                        lambda name, msg: received.append(msg), connect=server.connect)
+
+    async def scenario():
+        task = asyncio.ensure_future(gateway.run())
+        while not received:
+            await asyncio.sleep(0)
+        await gateway.close()
+        await task
+
+    _run(scenario())
+
+    assert server.urls == ['wss://kc?token=t']
+    assert [json.loads(m) for m in server.sockets[0].sent] == [{'id': '7', 'type': 'pong'}]
+    assert received == [{'type': 'message', 'x': 1}]
+    assert connection.status == 'STOP'
+
+
+def test_threaded_gateway_multiplexes_connections(mocker):
+    frames = ['{"result": null, "id": 0}'] + [json.dumps({'s': n}) for n in range(100)]
+    server = FakeServer(list(frames), list(frames))
+    counts = {'a': 0, 'b': 0}
+    done = threading.Event()
+
+    async def on_message(name, msg):
+        counts[name] += 1
+        if counts['a'] == counts['b'] == 100:
+            done.set()
+
+    gateway = AsyncWsGateway(mocker.MagicMock())
+    for name in counts:
+        gateway.add_connection(name, BinanceCodec(), on_message, connect=server.connect)
+    gateway.start()
+    try:
+        future = gateway.subscribe('a', {'method': 'SUBSCRIBE', 'params': ['btcusdt@bookTicker']})
+        future.result(5)
+        gateway.subscribe('b', {'method': 'SUBSCRIBE', 'params': ['ethusdt@bookTicker']}).result(5)
+        assert done.wait(5)
+    finally:
+        gateway.stop()
+
+    # 订阅回执被 codec 丢弃，id 按连接递增
+    assert [json.loads(m)['id'] for ws in server.sockets for m in ws.sent] == [0, 0]
+    assert threading.active_count() < 20
+    assert not gateway._thread.is_alive()
+
+
+def test_connect_failure_backs_off(mocker):
+    attempts = []
+
+    async def connect(url, **kwargs):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise OSError('refused')
+        return FakeWs([])
+
+    gateway = AsyncWsGateway(mocker.MagicMock())
+    connection = gateway.add_connection('bn', BinanceCodec(), lambda name, msg: None,
+                                        backoff=ReconnectBackoff(base_delay_s=0.01, jitter=0), connect=connect)
+
+    async def scenario():
+        task = asyncio.ensure_future(gateway.run())
+        while connection.status != 'ACTIVE':
+            await asyncio.sleep(0.001)
+        await gateway.close()
+        await task
+
+    _run(scenario())
+
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= 0.02
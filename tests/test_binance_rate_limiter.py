@@ -0,0 +1,255 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from pytradekit.restful import binance_rate_limiter
+from pytradekit.restful.binance_rate_limiter import (
+    BinanceRateLimiter, LocalRateLimitStore, RateLimitRule, SPOT_RATE_LIMIT_RULES,
+    create_binance_rate_limiter, get_order_scope, get_request_costs, get_request_weight)
+from pytradekit.restful.binance_restful import BinanceClient
+from pytradekit.utils.dynamic_types import BinanceRateLimitType
+from pytradekit.utils.exceptions import DependencyException
+
+BASE = 'https://api.binance.com'
+
+
+class FakeBinanceHandler(BaseHTTPRequestHandler):
+    """Answers every call with `{}` and BN-style usage headers set by the test."""
+
+    def _reply(self):
+        server = self.server
+        server.paths.append(self.path)
+        server.used_weight += 1
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-MBX-USED-WEIGHT-1M', str(server.used_weight))
+        if self.command == 'POST':
+            server.order_count += 1
+            self.send_header('X-MBX-ORDER-COUNT-10S', str(server.order_count))
+        self.end_headers()
+        self.wfile.write(json.dumps(server.body).encode())
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeBinanceHandler)
+    server.paths, server.used_weight, server.order_count, server.status, server.body = [], 0, 0, 200, {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    """Stands in for the `time` module inside the limiter; sleep() advances the clock."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _make_client(mocker, server, limiter):
+    client = BinanceClient(mocker.MagicMock(), key='test-key', account_id='acct-1', rate_limiter=limiter)
+    client._url = f'http://127.0.0.1:{server.server_address[1]}'
+    return client
+
+
+class TestRequestWeight:
+    def test_depth_weight_follows_limit(self):
+        assert get_request_weight('GET', f'{BASE}/api/v3/depth?symbol=BTCUSDT') == 5
+        assert get_request_weight('GET', f'{BASE}/api/v3/depth', {'symbol': 'BTCUSDT', 'limit': 500}) == 25
+        assert get_request_weight('GET', f'{BASE}/api/v3/depth?symbol=BTCUSDT&limit=5000') == 250
+
+    def test_perp_depth_weight_follows_limit(self):
+        perp = 'https://fapi.binance.com'
+        assert get_request_weight('GET', f'{perp}/fapi/v1/depth?symbol=BTCUSDT') == 10
+        assert get_request_weight('GET', f'{perp}/fapi/v1/depth?symbol=BTCUSDT&limit=1000') == 20
+
+    def test_symbol_dependent_weight(self):
+        assert get_request_weight('GET', f'{BASE}/api/v3/openOrders?symbol=BTCUSDT') == 6
+        assert get_request_weight('GET', f'{BASE}/api/v3/openOrders?timestamp=1') == 80
+
+    def test_unknown_endpoint_costs_default_weight(self):
+        assert get_request_weight('GET', f'{BASE}/api/v3/ping') == 1
+
+    def test_only_order_placement_costs_orders(self):
+        assert get_request_costs('POST', f'{BASE}/api/v3/order?symbol=BTCUSDT') == {
+            BinanceRateLimitType.REQUEST_WEIGHT: 1, BinanceRateLimitType.ORDERS: 1}
+        assert BinanceRateLimitType.ORDERS not in get_request_costs('GET', f'{BASE}/api/v3/order?symbol=X')
+
+    def test_order_scope_never_exposes_api_key(self):
+        assert get_order_scope('acct-1', 'secret-key') == 'acct-1'
+        scope = get_order_scope(None, 'secret-key')
+        assert 'secret-key' not in scope and len(scope) == 16
+
+    def test_rule_interval_label(self):
+        assert [rule.interval_label for rule in SPOT_RATE_LIMIT_RULES] == ['1M', '10S', '1D']
+
+
+class TestLocalRateLimitStore:
+    def test_reserve_respects_capacity(self):
+        store = LocalRateLimitStore()
+        assert store.reserve_rate_limit_weights([('k', 6, 10, 60000)], [], 0) == 0
+        assert store.reserve_rate_limit_weights([('k', 5, 10, 60000)], [], 30000) == 30000
+        assert store.reserve_rate_limit_weights([('k', 4, 10, 60000)], [], 30000) == 0
+
+    def test_rejected_reservation_charges_no_window(self):
+        store = LocalRateLimitStore()
+        store.reserve_rate_limit_weights([('orders', 9, 10, 10000)], [], 0)
+        assert store.reserve_rate_limit_weights([('weight', 1, 100, 60000), ('orders', 2, 10, 10000)], [], 0) > 0
+        assert store.reserve_rate_limit_weights([('weight', 100, 100, 60000)], [], 0) == 0
+
+    def test_counter_expires(self, mocker):
+        clock = FakeClock()
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        store = LocalRateLimitStore()
+        store.sync_rate_limit_used('k', 10, 5)
+        now_ms = int(clock.now * 1000)
+        assert store.reserve_rate_limit_weights([('k', 1, 10, 5000)], [], now_ms) > 0
+        assert store.reserve_rate_limit_weights([('k', 1, 10, 5000)], [], now_ms + 5000) == 0
+
+    def test_blocked_key_holds_reservations_until_deadline(self, mocker):
+        clock = FakeClock()
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        store = LocalRateLimitStore()
+        now_ms = int(clock.now * 1000)
+        store.set_rate_limit_blocked_until('blocked', now_ms + 7000, 7000)
+        assert store.reserve_rate_limit_weights([('k', 1, 10, 60000)], ['blocked'], now_ms) == 7000
+        assert store.reserve_rate_limit_weights([('k', 1, 10, 60000)], ['blocked'], now_ms + 7000) == 0
+
+
+class TestBinanceRateLimiter:
+    def test_waits_for_next_window_when_exhausted(self, mocker):
+        clock = FakeClock(now=120.0 + 45)
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        rule = RateLimitRule(BinanceRateLimitType.REQUEST_WEIGHT, 60, 10)
+        limiter = BinanceRateLimiter(mocker.MagicMock(), [rule])
+        for _ in range(rule.capacity):
+            limiter.acquire('GET', f'{BASE}/api/v3/ping')
+        assert clock.sleeps == []
+        limiter.acquire('GET', f'{BASE}/api/v3/ping')
+        assert clock.sleeps == [15.0]
+
+    def test_store_failure_falls_back_to_local_counters(self, mocker):
+        store = mocker.MagicMock()
+        store.reserve_rate_limit_weights.side_effect = DependencyException('redis down')
+        logger = mocker.MagicMock()
+        limiter = BinanceRateLimiter(logger, SPOT_RATE_LIMIT_RULES, store=store)
+        assert limiter.try_acquire('GET', f'{BASE}/api/v3/ping') == 0
+        logger.debug.assert_called_once()
+        assert logger.debug.call_args.kwargs.get('exc_info') is True
+
+    def test_shared_store_charges_all_windows_in_one_call(self, mocker):
+        store = mocker.MagicMock()
+        store.reserve_rate_limit_weights.return_value = 0
+        limiter = create_binance_rate_limiter(mocker.MagicMock(), redis_ops=store)
+        limiter.try_acquire('POST', f'{BASE}/api/v3/order?symbol=BTCUSDT', order_scope='acct-1')
+        (counters, blocked_keys, _), _ = store.reserve_rate_limit_weights.call_args
+        keys = [counter[0] for counter in counters]
+        assert keys[0].startswith('rate_limit:REQUEST_WEIGHT:api.binance.com:1M:')
+        assert keys[1].startswith('rate_limit:ORDERS:acct-1:10S:')
+        assert blocked_keys == ['rate_limit:REQUEST_WEIGHT:api.binance.com:blocked', 'rate_limit:ORDERS:acct-1:blocked']
+
+    def test_exhausted_orders_window_leaves_weight_uncharged(self, mocker):
+        clock = FakeClock()
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES)
+        order_url = f'{BASE}/api/v3/order?symbol=BTCUSDT'
+        for _ in range(SPOT_RATE_LIMIT_RULES[1].capacity):
+            assert limiter.try_acquire('POST', order_url, order_scope='acct-1') == 0
+        weight_key = limiter._get_key(SPOT_RATE_LIMIT_RULES[0], 'api.binance.com', clock.now)
+        now_ms = int(clock.now * 1000)
+        used = limiter.store._get_value(weight_key, now_ms)
+
+        assert limiter.try_acquire('POST', order_url, order_scope='acct-1') > 0
+        assert limiter.store._get_value(weight_key, now_ms) == used
+
+    def test_block_holds_only_the_tripped_bucket(self, mocker):
+        clock = FakeClock()
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES)
+        order_url = f'{BASE}/api/v3/order?symbol=BTCUSDT'
+        limiter.block(BinanceRateLimitType.ORDERS, order_url, 7, order_scope='acct-1')
+
+        assert limiter.try_acquire('POST', order_url, order_scope='acct-1') == 7.0
+        assert limiter.try_acquire('DELETE', order_url, order_scope='acct-1') == 0
+        clock.now += 7
+        assert limiter.try_acquire('POST', order_url, order_scope='acct-1') == 0
+
+    def test_acquire_async_keeps_store_calls_off_the_loop(self, mocker):
+        store = mocker.MagicMock()
+        threads = []
+        store.reserve_rate_limit_weights.side_effect = lambda *args: threads.append(threading.get_ident()) or 0
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES, store=store)
+
+        asyncio.new_event_loop().run_until_complete(limiter.acquire_async('GET', f'{BASE}/api/v3/ping'))
+
+        assert threads and threads[0] != threading.get_ident()
+
+
+class TestClientAgainstFakeServer:
+    def test_headers_resync_shared_counter(self, mocker, fake_server):
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES)
+        client = _make_client(mocker, fake_server, limiter)
+        fake_server.used_weight = 5398  # another process already burnt most of the minute
+
+        client.request('GET', f'{client._url}/api/v3/ping', use_sign=False)
+
+        # 5399 reported by the server, capacity is 5400: a weight-2 call no longer fits
+        assert limiter.try_acquire('GET', f'{client._url}/api/v3/klines?symbol=BTCUSDT') > 0
+        assert fake_server.paths == ['/api/v3/ping']
+
+    def test_paces_requests_before_sending(self, mocker, fake_server):
+        clock = FakeClock(now=600.0)
+        mocker.patch.object(binance_rate_limiter, 'time', clock)
+        rule = RateLimitRule(BinanceRateLimitType.REQUEST_WEIGHT, 60, 3)
+        client = _make_client(mocker, fake_server, BinanceRateLimiter(mocker.MagicMock(), [rule]))
+
+        for _ in range(3):
+            client.request('GET', f'{client._url}/api/v3/ping', use_sign=False)
+
+        assert len(fake_server.paths) == 3
+        assert clock.sleeps == [60.0]
+
+    def test_rate_limited_response_blocks_bucket(self, mocker, fake_server):
+        mocker.patch('pytradekit.restful.binance_restful.time.sleep')
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES)
+        client = _make_client(mocker, fake_server, limiter)
+        fake_server.status = 429
+
+        assert client.request('GET', f'{client._url}/api/v3/ping', use_sign=False) is None
+        assert limiter.try_acquire('GET', f'{client._url}/api/v3/ping') > 0
+
+    def test_async_request_charges_orders_window(self, mocker, fake_server):
+        limiter = BinanceRateLimiter(mocker.MagicMock(), SPOT_RATE_LIMIT_RULES)
+        client = _make_client(mocker, fake_server, limiter)
+        fake_server.order_count = 89  # capacity of the 10s ORDERS window is 90
+        url = f'{client._url}/api/v3/order?symbol=BTCUSDT'
+
+        async def place():
+            async with httpx.AsyncClient() as http_client:
+                return await client.async_request('POST', url, http_client=http_client)
+
+        assert asyncio.new_event_loop().run_until_complete(place()) == ({}, None)
+        assert limiter.try_acquire('POST', url, order_scope='acct-1') > 0
@@ -257,3 +257,135 @@ class TestCancelOrderWiring:
         assert captured['use_sign'] is True
         assert '/fapi/v1/order' in captured['url']
         assert captured['params']['orderId'] == 123
+
+
+class TestPooledAsyncTransport:
+    """async_request used to open a fresh httpx.AsyncClient (new TLS handshake)
+    per call and time.sleep() on 418/429, freezing every coroutine on the loop."""
+
+    def test_pooled_client_is_reused_across_calls(self):
+        client = _make_client()
+        first = client._get_async_client()
+        assert client._get_async_client() is first
+        asyncio.new_event_loop().run_until_complete(client.close_async_client())
+        assert first.is_closed
+        assert client._async_client is None
+
+    def test_requests_go_through_pooled_client(self):
+        import httpx
+        client = _make_client()
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get('X-MBX-APIKEY'))
+            return httpx.Response(200, json={"orderId": 1})
+
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def place_twice():
+            await client.async_request("POST", "https://api.binance.com/api/v3/order")
+            return await client.async_request("POST", "https://api.binance.com/api/v3/order")
+
+        data, err = asyncio.new_event_loop().run_until_complete(place_twice())
+        assert data == {"orderId": 1} and err is None
+        assert seen == ["test-api-key", "test-api-key"]
+
+    def test_rate_limit_sleeps_without_blocking(self, mocker):
+        import httpx
+        client = _make_client()
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(429, headers={'Retry-After': '7'},
+                                           json={"code": -1015, "msg": "Too many new orders"})))
+        blocking_sleep = mocker.patch('pytradekit.restful.binance_restful.time.sleep')
+        async_sleep = mocker.patch('pytradekit.restful.binance_restful.asyncio.sleep', new=AsyncMock())
+
+        url = "https://api.binance.com/api/v3/order"
+        data, err = asyncio.new_event_loop().run_until_complete(client.async_request("POST", url))
+
+        assert data is None and "429" in err
+        blocking_sleep.assert_not_called()
+        assert async_sleep.await_args.args[0] == pytest.approx(7, abs=0.5)
+
+    def test_rate_limit_blocks_tripped_bucket_in_shared_limiter(self, mocker):
+        import httpx
+        from pytradekit.restful.binance_rate_limiter import BinanceRateLimiter, SPOT_RATE_LIMIT_RULES
+        client = _make_client()
+        client.account_id = "acct-1"
+        client.rate_limiter = BinanceRateLimiter(Mock(), SPOT_RATE_LIMIT_RULES)
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(429, headers={'Retry-After': '7'},
+                                           json={"code": -1015, "msg": "Too many new orders"})))
+
+        url = "https://api.binance.com/api/v3/order"
+        data, err = asyncio.new_event_loop().run_until_complete(client.async_request("POST", url))
+
+        assert data is None and "429" in err
+        assert client.rate_limiter.try_acquire("POST", url, order_scope="acct-1") == pytest.approx(7, abs=0.5)
+        assert client.rate_limiter.try_acquire("DELETE", url, order_scope="acct-1") == 0
+
+
+    def test_rate_limit_without_injected_limiter_blocks_bucket_locally(self, mocker):
+        import httpx
+        client = BinanceClient(Mock(), key="test-api-key", account_id="acct-1")
+        assert client.owns_rate_limiter and client.rate_limiter is not None
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(429, headers={'Retry-After': '7'},
+                                           json={"code": -1015, "msg": "Too many new orders"})))
+        async_sleep = mocker.patch('pytradekit.restful.binance_restful.asyncio.sleep', new=AsyncMock())
+
+        url = "https://api.binance.com/api/v3/order"
+        data, err = asyncio.new_event_loop().run_until_complete(client.async_request("POST", url))
+
+        assert data is None and "429" in err
+        async_sleep.assert_not_awaited()
+        # 只有 ORDERS 桶退避，其它请求不受影响
+        assert client.rate_limiter.try_acquire("POST", url, order_scope="acct-1") == pytest.approx(7, abs=0.5)
+        assert client.rate_limiter.try_acquire("GET", "https://api.binance.com/api/v3/depth") == 0
+
+
+class TestSigningKeyCache:
+    @staticmethod
+    def _make_signing_client():
+        import base64
+        from nacl.signing import SigningKey
+        client = _make_client()
+        raw_key = SigningKey.generate()
+        client.secret_key = base64.b64encode(bytes(raw_key)).decode()
+        return client, raw_key.verify_key
+
+    def test_signing_key_built_once_per_client(self, mocker):
+        from nacl.signing import SigningKey
+        client, _ = self._make_signing_client()
+        build = mocker.patch('pytradekit.restful.binance_restful.SigningKey', wraps=SigningKey)
+        for i in range(3):
+            client._hashing(f"symbol=BTCUSDT&timestamp={i}")
+        build.assert_called_once()
+
+    def test_batch_signatures_match_single_and_verify(self):
+        import base64
+        client, verify_key = self._make_signing_client()
+        payloads = [f"symbol=BTCUSDT&orderId={i}&timestamp=1" for i in range(5)]
+
+        signatures = client.sign_query_strings(payloads)
+
+        assert signatures == [client._hashing(p) for p in payloads]
+        for payload, signature in zip(payloads, signatures):
+            verify_key.verify(payload.encode(), base64.b64decode(signature))
+
+    def test_invalid_secret_raises_exchange_exception(self):
+        from pytradekit.utils.exceptions import ExchangeException
+        client = _make_client()
+        client.secret_key = "not-a-key"
+        with pytest.raises(ExchangeException):
+            client._hashing("timestamp=1")
+
+
+def test_get_exchange_information_feeds_symbol_splitter(mocker):
+    client = _make_client()
+    client._url = "https://api.binance.com"
+    exch_info = {"symbols": [{"symbol": "ABCFDUSD", "baseAsset": "ABC", "quoteAsset": "FDUSD"}]}
+    client.request = Mock(return_value=exch_info)
+    splitter = mocker.patch("pytradekit.restful.binance_restful.SYMBOL_SPLITTER")
+
+    assert client.get_exchange_information() is exch_info
+    splitter.load_exchange_info.assert_called_once_with(exch_info)
@@ -0,0 +1,173 @@
+import pytest
+from unittest.mock import MagicMock
+
+from pytradekit.utils.dynamic_types import BinanceAuxiliary
+from pytradekit.utils.exceptions import DependencyException, ExchangeException
+from pytradekit.utils.time_handler import TimeSpan
+from pytradekit.ws.bn_add_missing_orders import (
+    BinanceTradeBackfill, MemoryTradeCheckpoint, get_binance_trade, insert_trades_to_mongo, publish_trades_to_redis)
+
+PAGE = BinanceAuxiliary.url_limit.value
+START_MS = 1_700_000_000_000
+
+
+def _trade_data(symbol, trade_id):
+    return {'symbol': symbol, 'id': trade_id, 'orderId': trade_id // 10, 'price': '100.0', 'qty': '0.5',
+            'commission': '0.01', 'commissionAsset': 'USDT', 'time': START_MS + trade_id,
+            'isBuyer': trade_id % 2 == 0, 'isMaker': True}
+
+
+class FakeTradeClient:
+    """myTrades stand-in: `count` trades per symbol, ids 1..count, time = START_MS + id."""
+
+    def __init__(self, count, fail_on_call=None):
+        self.count = count
+        self.fail_on_call = fail_on_call
+        self.calls = []
+        self.rate_limiter = None
+
+    def get_trade(self, symbol, order_id=None, start_time=None, end_time=None, from_id=None):
+        self.calls.append({'symbol': symbol, 'from_id': from_id, 'start_time': start_time})
+        if self.fail_on_call == len(self.calls):
+            raise ExchangeException('boom')
+        trades = [_trade_data(symbol, i) for i in range(1, self.count + 1)]
+        if from_id is not None:
+            trades = [t for t in trades if t['id'] >= from_id]
+        else:
+            trades = [t for t in trades if start_time <= t['time'] <= end_time]
+        return trades[:PAGE]
+
+
+def _collect():
+    pages = []
+    return pages, pages.append
+
+
+class TestBinanceTradeBackfill:
+    def test_pages_by_from_id_and_streams_each_page(self):
+        client = FakeTradeClient(count=PAGE * 2 + 10)
+        pages, sink = _collect()
+        time_span = TimeSpan(start=START_MS, end=START_MS + 10 ** 6)
+
+        counts = BinanceTradeBackfill(MagicMock(), client, 'acct').backfill(['BTCUSDT'], time_span, [sink])
+
+        assert counts == {'BTCUSDT': PAGE * 2 + 10}
+        assert [len(page) for page in pages] == [PAGE, PAGE, 10]
+        assert client.calls[0]['start_time'] == START_MS
+        assert [c['from_id'] for c in client.calls[1:]] == [PAGE + 1, PAGE * 2 + 1]
+
+    def test_time_span_bounds_are_exclusive(self):
+        client = FakeTradeClient(count=20)
+        pages, sink = _collect()
+
+        BinanceTradeBackfill(MagicMock(), client, 'acct').backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS + 5, end=START_MS + 10), [sink])
+
+        assert [timestamp for trade, timestamp in pages[0]] == [START_MS + i for i in range(6, 10)]
+
+    def test_resumes_from_checkpoint_after_failure(self):
+        checkpoint = MemoryTradeCheckpoint()
+        time_span = TimeSpan(start=START_MS, end=START_MS + 10 ** 6)
+        failing = FakeTradeClient(count=PAGE + 5, fail_on_call=2)
+
+        counts = BinanceTradeBackfill(MagicMock(), failing, 'acct', checkpoint=checkpoint).backfill(
+            ['BTCUSDT'], time_span, [lambda trades: None])
+        assert counts == {'BTCUSDT': PAGE}
+        assert checkpoint.get_trade_backfill_checkpoint(f'acct:{START_MS}') == {'BTCUSDT': PAGE}
+
+        resumed = FakeTradeClient(count=PAGE + 5)
+        counts = BinanceTradeBackfill(MagicMock(), resumed, 'acct', checkpoint=checkpoint).backfill(
+            ['BTCUSDT'], time_span, [lambda trades: None])
+        assert counts == {'BTCUSDT': 5}
+        assert resumed.calls[0]['from_id'] == PAGE + 1
+
+    def test_backfills_symbols_concurrently(self):
+        client = FakeTradeClient(count=3)
+        symbols = [f'C{i}USDT' for i in range(20)]
+
+        counts = BinanceTradeBackfill(MagicMock(), client, 'acct', max_workers=4).backfill(
+            symbols, TimeSpan(start=START_MS, end=START_MS + 10 ** 6), [lambda trades: None])
+
+        assert counts == {symbol: 3 for symbol in symbols}
+
+    def test_checkpoint_outage_falls_back_to_time_span(self):
+        checkpoint = MagicMock()
+        checkpoint.get_trade_backfill_checkpoint.side_effect = DependencyException('redis down')
+        client = FakeTradeClient(count=3)
+
+        counts = BinanceTradeBackfill(MagicMock(), client, 'acct', checkpoint=checkpoint).backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS, end=START_MS + 10 ** 6), [lambda trades: None])
+
+        assert counts == {'BTCUSDT': 3}
+
+    def test_later_gap_ignores_previous_gap_checkpoint(self):
+        checkpoint = MemoryTradeCheckpoint()
+        checkpoint.set_trade_backfill_checkpoint(f'acct:{START_MS}', 'BTCUSDT', 3)
+        client = FakeTradeClient(count=5)
+
+        counts = BinanceTradeBackfill(MagicMock(), client, 'acct', checkpoint=checkpoint).backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS + 3, end=START_MS + 10 ** 6), [lambda trades: None])
+
+        assert counts == {'BTCUSDT': 2}
+        assert client.calls[0]['from_id'] is None
+
+    def test_injected_rate_limiter_paces_pages_without_touching_client(self):
+        client = FakeTradeClient(count=PAGE + 1)
+        limiter = MagicMock()
+
+        BinanceTradeBackfill(MagicMock(), client, 'acct', rate_limiter=limiter).backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS, end=START_MS + 10 ** 6), [lambda trades: None])
+
+        assert limiter.acquire.call_count == 2
+        assert limiter.acquire.call_args.args[1].endswith(BinanceAuxiliary.url_trade.value)
+        assert client.rate_limiter is None
+
+
+class TestSinks:
+    def test_redis_sink_publishes_page_as_one_batch(self):
+        redis_ops = MagicMock()
+        client = FakeTradeClient(count=2)
+        BinanceTradeBackfill(MagicMock(), client, 'acct').backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS, end=START_MS + 10 ** 6), [publish_trades_to_redis(redis_ops)])
+
+        (batch,), _ = redis_ops.set_publish_trades_batch.call_args
+        assert [timestamp for _, timestamp in batch] == [START_MS + 1, START_MS + 2]
+        assert batch[0][0]['trade_id'] == '1-BTCUSDT'
+
+    def test_mongo_sink_inserts_page_into_exchange_collection(self):
+        mongo_ops = MagicMock()
+        client = FakeTradeClient(count=2)
+        BinanceTradeBackfill(MagicMock(), client, 'acct').backfill(
+            ['BTCUSDT'], TimeSpan(start=START_MS, end=START_MS + 10 ** 6), [insert_trades_to_mongo(mongo_ops)])
+
+        data, exchange_id = mongo_ops.insert_trades.call_args.args
+        assert len(data) == 2 and exchange_id == 'BN'
+
+
+def test_get_binance_trade_returns_dicts_with_timestamp():
+    client = FakeTradeClient(count=3)
+    result = get_binance_trade(MagicMock(), client, TimeSpan(start=START_MS, end=START_MS + 10 ** 6), 'BTCUSDT',
+                               'acct')
+    assert [r['timestamp'] for r in result] == [START_MS + 1, START_MS + 2, START_MS + 3]
+
+
+def test_supplement_orders_streams_backfill_to_redis(mocker):
+    from pytradekit.ws.binance_ws import BinanceWsManager
+    redis_ops = MagicMock()
+    redis_ops.get_trade_backfill_checkpoint.return_value = {}
+    redis_ops.reserve_rate_limit_weights.return_value = 0
+    mocker.patch('pytradekit.ws.binance_ws.get_redis', return_value=redis_ops)
+    mgr = BinanceWsManager.__new__(BinanceWsManager)
+    mgr.logger, mgr.config, mgr.running_mode = MagicMock(), None, None
+    mgr._bn_client = FakeTradeClient(count=2)
+    mgr._account_id, mgr._strategy_id = 'acct', 'strategy'
+    mgr._is_perp = False
+    mgr._mm_symbol_list = ['BTCUSDT', 'ETHUSDT']
+    mgr.start_end_time_dict = {'connect_status': True, 'start_time': START_MS}
+
+    mgr.supplement_orders(START_MS + 10 ** 6)
+
+    assert redis_ops.set_publish_trades_batch.call_count == 2
+    assert mgr.start_end_time_dict['connect_status'] is False
+    assert mgr._bn_client.rate_limiter is None
+    assert redis_ops.reserve_rate_limit_weights.call_count == 2
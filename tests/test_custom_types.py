@@ -1,5 +1,12 @@
+import dataclasses
+import pickle
 from decimal import Decimal
-from pytradekit.utils.custom_types import Pair, TradingOrder, InstCode, CancelOrder, ClientOrderId
+
+import pytest
+
+from pytradekit.utils.custom_types import Pair, TradingOrder, InstCode, CancelOrder, ClientOrderId, InstCodeRegistry, \
+    INST_CODE_REGISTRY
+from pytradekit.utils.exceptions import DataTypeException
 
 
 def test_pair_str_full():
@@ -93,3 +100,43 @@ def test_cancel_order_delay_calculation():
 
     # Assert that the delay is None when timestamps are not provided
     assert order_no_timestamps.delay is None, "The delay should be None without timestamps."
+
+
+def test_inst_code_from_string_is_interned_and_immutable():
+    inst_code = InstCode.from_string('BTCUSDT_BN.SPOT')
+    assert inst_code is InstCode.from_string('BTCUSDT_BN.SPOT')
+    assert str(inst_code) == 'BTC-USDT_BN.SPOT'
+    assert str(InstCode.from_string('btc-usdt_OKX.PERP')) == 'BTC-USDT_OKX.PERP'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        inst_code.pair = 'ETH-USDT'
+    assert pickle.loads(pickle.dumps(inst_code)) == inst_code
+    with pytest.raises(DataTypeException):
+        InstCode.from_string('BTCUSDT')
+
+
+def test_inst_code_registry_uses_base_quote_and_reloads_per_exchange():
+    registry = InstCodeRegistry()
+    registry.load([{'inst_code': 'BTCFDUSD_BN.SPOT', 'symbol': 'BTCFDUSD', 'base': 'BTC', 'quote': 'FDUSD'},
+                   {'inst_code': 'ETH-USDT_OKX.SPOT', 'symbol': 'ETHUSDT', 'base': 'ETH', 'quote': 'USDT'}])
+    inst_code = registry.get('BTCFDUSD_BN.SPOT')
+    # 启发式会拆成 BTCFD-USD，注册表按 base / quote
+    assert inst_code.pair == 'BTC-FDUSD'
+    assert registry.get('BTC-FDUSD_BN.SPOT') is inst_code is registry.get_by_symbol('BTCFDUSD', 'BN')
+    assert registry.get_by_pair('BTC-FDUSD', 'BN') is inst_code
+    assert registry.get_inst_code_str('BTCFDUSD', 'BN') == 'BTC-FDUSD_BN.SPOT'
+
+    registry.load([{'inst_code': 'SOLFDUSD_BN.SPOT', 'symbol': 'SOLFDUSD', 'base': 'SOL', 'quote': 'FDUSD'}])
+    assert registry.get('BTCFDUSD_BN.SPOT') is None and len(registry) == 2
+    assert registry.get_by_symbol('ETHUSDT', 'OKX') is not None
+
+
+def test_from_string_and_symbol_conversion_prefer_registry():
+    from pytradekit.trading_setup.inst_code_usage import convert_symbol_to_inst_code
+    assert convert_symbol_to_inst_code('ABCFDUSD', 'MEXC') == 'ABCFD-USD_MEXC.SPOT'
+    INST_CODE_REGISTRY.load([{'inst_code': 'ABCFDUSD_MEXC.SPOT', 'symbol': 'ABCFDUSD', 'base': 'ABC',
+                              'quote': 'FDUSD'}])
+    try:
+        assert InstCode.from_string('ABCFDUSD_MEXC.SPOT').pair == 'ABC-FDUSD'
+        assert convert_symbol_to_inst_code('ABCFDUSD', 'MEXC') == 'ABC-FDUSD_MEXC.SPOT'
+    finally:
+        INST_CODE_REGISTRY.clear()
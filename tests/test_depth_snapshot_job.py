@@ -0,0 +1,66 @@
+import logging
+
+import pandas as pd
+
+from pytradekit.trading_setup.inst_code_usage import DepthThreshold
+from pytradekit.utils.depth_snapshot_job import DepthSnapshotJob, compute_depth_ratio_docs, get_instrument_info, \
+    split_time_span
+from pytradekit.utils.mongodb_operations import MongodbOperations
+from pytradekit.utils.time_handler import TimeConvert, TimeSpan
+
+INST_CODE_BASIC = [{'inst_code': 'BTCUSDT_BN.SPOT', 'tick_price': '0.1', 'quote': 'USDT'},
+                   {'inst_code': 'BTCETH_BN.SPOT', 'tick_price': 0.1, 'quote': 'ETH'}]
+BOOK = {'bids': [[99.9, 1.0], [99.0, 2.0], [97.0, 5.0]], 'asks': [[100.1, 1.0], [101.0, 3.0], [103.0, 4.0]]}
+
+
+def _make_chunk(start_ms=0):
+    return pd.DataFrame([dict(BOOK, inst_code='BTCUSDT_BN.SPOT', time_ms=start_ms + 1000, event_time_ms=999),
+                         dict(BOOK, inst_code='BTCETH_BN.SPOT', time_ms=start_ms + 1001),
+                         dict(BOOK, inst_code='UNKNOWN_BN.SPOT', time_ms=start_ms + 1002),
+                         dict(BOOK, inst_code='BTCUSDT_BN.SPOT', time_ms=start_ms + 1003, bids=[])])
+
+
+def test_split_time_span_covers_range_without_overlap():
+    parts = split_time_span(TimeSpan(0, 2 * TimeConvert.HOUR_TO_MS + 5))
+    assert [(p.start, p.end) for p in parts] == [(0, TimeConvert.HOUR_TO_MS - 1),
+                                                 (TimeConvert.HOUR_TO_MS, 2 * TimeConvert.HOUR_TO_MS - 1),
+                                                 (2 * TimeConvert.HOUR_TO_MS, 2 * TimeConvert.HOUR_TO_MS + 5)]
+
+
+def test_compute_depth_ratio_docs_per_chunk():
+    docs = compute_depth_ratio_docs(logging.getLogger(), _make_chunk(), 'BN', get_instrument_info(INST_CODE_BASIC),
+                                    {'ETHUSDT': '2000'}, run_time_ms=1)
+    assert [doc['inst_code'] for doc in docs] == ['BTCUSDT_BN.SPOT', 'BTCETH_BN.SPOT']
+    usdt, eth = docs
+    assert usdt['depth_bid'] == int(99.9 + 99.0 * 2) and usdt['event_time_ms'] == 999
+    assert eth['depth_bid'] == int((99.9 + 99.0 * 2) * 2000)
+    # BN USDT 看单边目标，其它计价币看平均深度目标
+    assert usdt['bid_ratio'] == round(usdt['depth_bid'] / DepthThreshold.binance_usdt, 4)
+    assert eth['depth_ratio'] == round((eth['depth_bid'] + eth['depth_ask']) / 2 / DepthThreshold.binance, 4)
+    assert [d['depth_pct'] for d in usdt['other']['depths']] == DepthThreshold.get_depth_pcts()
+    assert usdt['other']['depths'][1]['volume_bid'] == 8.0
+    assert usdt['order_bid'] is None and usdt['run_time_ms'] == 1
+
+
+def test_job_streams_parts_and_bulk_writes(mocker):
+    mongo_ops = MongodbOperations.__new__(MongodbOperations)
+    read_chunks = mocker.patch.object(MongodbOperations, 'read_orderbook_chunks',
+                                      side_effect=lambda time_span, *args, **kwargs: iter(
+                                          [_make_chunk(time_span.start)]))
+    insert_data = mocker.patch.object(MongodbOperations, 'insert_data')
+    mocker.patch('pytradekit.utils.depth_snapshot_job.MongodbOperations', return_value=mongo_ops)
+    job = DepthSnapshotJob(logging.getLogger(), 'mongodb://localhost', 'BN', INST_CODE_BASIC,
+                           {'ETHUSDT': '2000'}, workers=1)
+    # 跨零点的两段：写入按快照 time_ms 所在日期的集合，而不是运行当天
+    assert job.run(TimeSpan(TimeConvert.DAY_TO_MS - TimeConvert.HOUR_TO_MS, TimeConvert.DAY_TO_MS + TimeConvert.HOUR_TO_MS - 1)) == 4
+    assert read_chunks.call_count == 2
+    written = [(call.args[1].db_name, call.args[1].collection_name, len(call.args[0]))
+               for call in insert_data.call_args_list]
+    assert written == [('metrics_order_depth', '1970-01-01_BN_order_depth_ratio', 2),
+                       ('metrics_order_depth', '1970-01-02_BN_order_depth_ratio', 2)]
+
+
+def test_docs_skip_quotes_without_price():
+    docs = compute_depth_ratio_docs(logging.getLogger(), _make_chunk(), 'BN', get_instrument_info(INST_CODE_BASIC),
+                                    {})
+    assert [doc['inst_code'] for doc in docs] == ['BTCUSDT_BN.SPOT']
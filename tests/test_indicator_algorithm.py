@@ -0,0 +1,131 @@
+import logging
+import random
+
+import numpy as np
+import pytest
+
+from pytradekit.trading_setup.inst_code_usage import DepthThreshold
+from pytradekit.utils.exceptions import DataTypeException
+from pytradekit.utils.indicator_algorithm import calculate_best_prices, calculate_depth_bounds, compute_depth, \
+    compute_depth_batch, get_tick_pct_spread
+from pytradekit.utils.number_tools import convert_decimal_to_str, convert_to_decimal
+
+ORDERBOOK = {'bids': [[99.9, 1.0], [99.0, 2.0], [97.0, 5.0]],
+             'asks': [[100.1, 1.0], [101.0, 3.0], [103.0, 4.0]]}
+# 大 tick 品种：tick 占比 10%，远大于深度百分比
+BIG_TICK_ORDERBOOK = {'bids': [['0.3', '10'], ['0.2', '20'], ['0.1', '30']],
+                      'asks': [['0.4', '1'], ['0.5', '2'], ['0.6', '3']]}
+
+
+def test_compute_depth_within_pct_of_mid():
+    bid_depth, ask_depth, bid_volume, ask_volume, spread, tick_pct, depth_lower, depth_upper = \
+        compute_depth(logging.getLogger(), 'BTC_USDT', ORDERBOOK, 0.1, 2, {}, 'BN')
+    assert (bid_volume, ask_volume) == (3.0, 4.0)
+    assert (bid_depth, ask_depth) == (int(99.9 + 99.0 * 2), int(100.1 + 101.0 * 3))
+    assert (spread, tick_pct) == (0.2, 0.1)
+    assert depth_lower == pytest.approx(98.0) and depth_upper == pytest.approx(102.0)
+
+
+def test_compute_depth_converts_quote_price():
+    bid_depth, ask_depth = compute_depth(logging.getLogger(), 'BTC_ETH', ORDERBOOK, 0.1, 2,
+                                         {'ETHUSDT': '2000'}, 'BN')[:2]
+    assert bid_depth == int((99.9 + 99.0 * 2) * 2000)
+    with pytest.raises(DataTypeException):
+        compute_depth(logging.getLogger(), 'BTC_XYZ', ORDERBOOK, 0.1, 2, {}, 'BN')
+
+
+def test_batch_over_depth_thresholds_and_big_tick():
+    res = compute_depth_batch([ORDERBOOK, BIG_TICK_ORDERBOOK], [0.1, 0.1])
+    assert res['bid_volume'].shape == (2, len(DepthThreshold.get_depth_pcts()))
+    # 2% 和 3% 两档
+    np.testing.assert_allclose(res['bid_volume'][0], [3.0, 8.0])
+    np.testing.assert_allclose(res['ask_volume'][0], [4.0, 8.0])
+    # 大 tick 边界为最优买卖价，价差等于一个 tick 时只统计第一档
+    np.testing.assert_allclose(res['bid_volume'][1], [10.0, 10.0])
+    np.testing.assert_allclose(res['ask_volume'][1], [1.0, 1.0])
+    np.testing.assert_allclose(res['depth_lower'][1], [0.3, 0.3])
+    np.testing.assert_allclose(res['depth_upper'][1], [0.4, 0.4])
+    np.testing.assert_allclose(res['spread'], [0.2, 28.57])
+    # 价差大于一个 tick 不统计
+    wide = dict(BIG_TICK_ORDERBOOK, asks=[['0.5', '2'], ['0.6', '3']])
+    assert compute_depth_batch([wide], [0.1])['bid_volume'].tolist() == [[0.0, 0.0]]
+
+
+def test_bttcusdt_counts_one_tick_outside_best_prices():
+    orderbook = dict(BIG_TICK_ORDERBOOK, inst_code='BTTCUSDT_BN.SPOT')
+    res = compute_depth_batch([orderbook], [0.1])
+    np.testing.assert_allclose(res['bid_volume'][0], [30.0, 30.0])
+    np.testing.assert_allclose(res['ask_volume'][0], [3.0, 3.0])
+
+
+def _baseline_compute_depth(orderbook, tick_size, depth_pct):
+    """compute_depth before vectorization, without the quote conversion."""
+    bids, asks = orderbook['bids'], orderbook['asks']
+    tick_pct, spread, median_price = get_tick_pct_spread(bids[0][0], asks[0][0], tick_size)
+    bid_amount = ask_amount = bid_volume = ask_volume = 0
+    if orderbook['inst_code'] == 'BTTCUSDT_BN.SPOT':
+        depth_lower, depth_upper, _ = calculate_best_prices(bids[0][0], asks[0][0], tick_size)
+        depth_upper += tick_size
+        depth_lower -= tick_size
+    elif tick_pct <= depth_pct:
+        depth_lower, depth_upper = calculate_depth_bounds(median_price, depth_pct)
+    else:
+        depth_lower, depth_upper, _ = calculate_best_prices(convert_to_decimal(bids[0][0]),
+                                                            convert_to_decimal(asks[0][0]),
+                                                            convert_to_decimal(tick_size))
+        if spread == tick_pct:
+            bid_amount, ask_amount = bids[0][1] * bids[0][0], asks[0][1] * asks[0][0]
+            bid_volume, ask_volume = bids[0][1], asks[0][1]
+        return (bid_amount, ask_amount, bid_volume, ask_volume, spread, tick_pct,
+                float(convert_decimal_to_str(depth_lower)), float(convert_decimal_to_str(depth_upper)))
+    for bid in bids:
+        if bid[0] >= depth_lower:
+            bid_amount += bid[1] * bid[0]
+            bid_volume += bid[1]
+    for ask in asks:
+        if ask[0] <= depth_upper:
+            ask_amount += ask[1] * ask[0]
+            ask_volume += ask[1]
+    return bid_amount, ask_amount, bid_volume, ask_volume, spread, tick_pct, depth_lower, depth_upper
+
+
+def _random_orderbook(rng):
+    decimals = rng.choice([1, 2, 4, 8])
+    tick_size = round(10 ** -decimals, decimals)
+    bid1 = rng.randint(1, rng.choice([3, 10, 50, 1000, 100000]))
+    ask1 = bid1 + rng.choice([1, 1, 2, 3, 5])
+    bids = sorted({round((bid1 - i * rng.randint(1, 3)) * tick_size, decimals) for i in range(rng.randint(1, 8))}
+                  - {0.0}, reverse=True) or [round(bid1 * tick_size, decimals)]
+    asks = sorted({round((ask1 + i * rng.randint(1, 3)) * tick_size, decimals) for i in range(rng.randint(1, 8))})
+    return {'inst_code': rng.choice(['BTCUSDT_BN.SPOT', 'BTTCUSDT_BN.SPOT']),
+            'bids': [[price, round(rng.uniform(0.1, 100), 3)] for price in bids],
+            'asks': [[price, round(rng.uniform(0.1, 100), 3)] for price in asks]}, tick_size
+
+
+def test_batch_matches_baseline_on_random_books():
+    rng = random.Random(7)
+    depth_pcts = DepthThreshold.get_depth_pcts()
+    orderbooks, tick_sizes, expected = [], [], []
+    while len(orderbooks) < 2000:
+        orderbook, tick_size = _random_orderbook(rng)
+        try:
+            rows = [_baseline_compute_depth(orderbook, tick_size, pct) for pct in depth_pcts]
+        except TypeError:
+            # 旧的 BTTC 分支在中间价取整时浮点与 Decimal 混算报错，无可比结果
+            assert orderbook['inst_code'] == 'BTTCUSDT_BN.SPOT'
+            continue
+        orderbooks.append(orderbook)
+        tick_sizes.append(tick_size)
+        expected.append(rows)
+
+    res = compute_depth_batch(orderbooks, tick_sizes, depth_pcts)
+    for i, rows in enumerate(expected):
+        for k, row in enumerate(rows):
+            assert (res['bid_amount'][i, k], res['ask_amount'][i, k], res['bid_volume'][i, k],
+                    res['ask_volume'][i, k], res['spread'][i], res['tick_pct'][i], res['depth_lower'][i, k],
+                    res['depth_upper'][i, k]) == row, (orderbooks[i], tick_sizes[i], depth_pcts[k])
+
+
+def test_batch_rejects_empty_side():
+    with pytest.raises(DataTypeException):
+        compute_depth_batch([{'bids': [], 'asks': [[1.0, 1.0]]}], [0.1])
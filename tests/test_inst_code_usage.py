@@ -4,7 +4,8 @@ from pandas import DataFrame
 from pytradekit.utils.static_types import InstcodeBasicAttribute
 from pytradekit.trading_setup.inst_code_usage import get_mm_target, DepthThreshold, RankPctThreshold, SpreadThreshold, \
     MmInstCode, \
-    fetch_mm_inst_code, get_pair_key_mm_target, get_related_inst_code
+    fetch_mm_inst_code, get_pair_key_mm_target, get_related_inst_code, convert_symbol_to_pair, \
+    convert_symbols_to_pairs, SymbolSplitter
 from pytradekit.utils.dynamic_types import MmTarget, ExchangeId
 from pytradekit.utils.custom_types import Pair
 
@@ -205,3 +206,52 @@ def test_get_related_inst_code_no_related(mocker, sample_inst_code_basic):
     # 验证只返回做市交易对
     assert len(result) == 1
     assert 'BTC-USDT_BN.SPOT' in result[InstcodeBasicAttribute.inst_code.name].values
+
+
+@pytest.mark.parametrize("symbol, expected", [
+    ("BTCUSDT", "BTC-USDT"),
+    ("ETHBTC", "ETH-BTC"),
+    ("BTCBUSD", "BTC-BUSD"),
+    ("btc-usdt", "BTC-USDT"),
+    ("btc_usdt", "BTC-USDT"),
+    ("ETH/BTC", "ETH-BTC"),
+    ("USDT", "USDT"),
+    ("ABCXYZ", "ABCXYZ"),
+])
+def test_convert_symbol_to_pair_default_quotes(symbol, expected):
+    assert convert_symbol_to_pair(symbol) == expected
+
+
+def test_symbol_splitter_uses_exchange_info_quotes():
+    splitter = SymbolSplitter()
+    assert splitter.to_pair('BTCFDUSD') == 'BTCFD-USD'
+    splitter.load_exchange_info({'symbols': [{'symbol': 'BTCFDUSD', 'baseAsset': 'BTC', 'quoteAsset': 'FDUSD'},
+                                             {'symbol': 'ETHTUSD', 'baseAsset': 'ETH', 'quoteAsset': 'TUSD'}]})
+    splitter.load_exchange_info({'code': '0', 'data': [{'instId': 'SOL-EUR', 'baseCcy': 'SOL', 'quoteCcy': 'EUR'}]})
+    splitter.load_inst_code_basic([{'symbol': 'USDTUSD', 'base': 'USDT', 'quote': 'USD'}])
+    assert splitter.to_pair('BTCFDUSD') == 'BTC-FDUSD'
+    # 未列出的交易对按最长的已知计价币拆
+    assert splitter.to_pair('XRPTUSD') == 'XRP-TUSD'
+    assert splitter.to_pair('ADAEUR') == 'ADA-EUR'
+    assert splitter.to_pair('USDTUSD') == 'USDT-USD'
+    # 多种拆法时优先已知 base
+    assert splitter.split('ETHUSD') == ('ETH', 'USD')
+
+
+def test_symbol_splitter_concurrent_loads_keep_every_asset():
+    import threading
+    splitter = SymbolSplitter()
+    batches = [[(f'C{t}X{i}Q{t}', f'C{t}X{i}', f'Q{t}') for i in range(200)] for t in range(8)]
+    threads = [threading.Thread(target=splitter.add_assets, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(splitter.split(symbol) == (base, quote) for batch in batches for symbol, base, quote in batch)
+    assert splitter.to_pair('NEW_Q3') == 'NEW-Q3'
+
+
+def test_convert_symbols_to_pairs_column():
+    df = pd.DataFrame({'symbol': ['BTCUSDT', 'ETHBTC', 'BTCUSDT', None]})
+    result = convert_symbols_to_pairs(df['symbol'])
+    assert result.tolist()[:3] == ['BTC-USDT', 'ETH-BTC', 'BTC-USDT'] and pd.isna(result.iloc[3])
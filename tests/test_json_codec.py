@@ -0,0 +1,55 @@
+import gzip
+import json
+
+import pytest
+
+from pytradekit.utils import json_codec
+from pytradekit.utils.json_codec import BookTicker, ExecutionReport, OrderTradeUpdate, decode_event, \
+    get_loads, get_struct_decoder, loads, loads_gzip
+
+BOOK_TICKER = '{"u":400900217,"s":"BNBUSDT","b":"25.35190000","B":"31.21000000","a":"25.36520000","A":"40.66000000"}'
+ORDER_TRADE_UPDATE = json.dumps({
+    'e': 'ORDER_TRADE_UPDATE', 'E': 1568879465651, 'T': 1568879465650,
+    'o': {'s': 'BTCUSDT', 'c': 'TEST', 'S': 'SELL', 'o': 'TRAILING_STOP_MARKET', 'f': 'GTC', 'q': '0.001',
+          'p': '0', 'ap': '0', 'x': 'NEW', 'X': 'NEW', 'i': 8886774, 'l': '0', 'z': '0', 'L': '0', 'N': 'USDT',
+          'n': '0', 'T': 1568879465650, 't': 0, 'm': False, 'R': False, 'ps': 'LONG', 'rp': '0'}})
+
+
+def test_backends_agree_on_str_and_bytes():
+    payload = '{"a": [1, 2.5, "x"], "b": null, "c": true}'
+    expected = json.loads(payload)
+    assert loads(payload) == loads(payload.encode()) == get_loads(json_codec.JSON_BACKEND_STDLIB)(payload) == expected
+    with pytest.raises(ValueError):
+        loads('{bad')
+    with pytest.raises(ValueError):
+        get_loads('simdjson')
+
+
+def test_loads_gzip_skips_str_round_trip():
+    assert loads_gzip(gzip.compress(b'{"ping": 1700000000000}')) == {'ping': 1700000000000}
+
+
+def test_struct_decoder_maps_wire_keys():
+    ticker = get_struct_decoder(BookTicker)(BOOK_TICKER)
+    assert (ticker.symbol, ticker.update_id, ticker.bid_price, ticker.ask_qty) == \
+           ('BNBUSDT', 400900217, '25.35190000', '40.66000000')
+    # 现货 bookTicker 没有事件时间
+    assert ticker.event_time is None
+
+    update = get_struct_decoder(OrderTradeUpdate)(ORDER_TRADE_UPDATE)
+    assert update.order.client_order_id == 'TEST' and update.order.position_side == 'LONG'
+    assert update.transaction_time == 1568879465650
+
+
+def test_decode_event_dispatches_on_event_type():
+    assert isinstance(decode_event(ORDER_TRADE_UPDATE), OrderTradeUpdate)
+    report = decode_event('{"e": "executionReport", "s": "ETHUSDT", "X": "FILLED", "m": true, "i": 5}')
+    assert isinstance(report, ExecutionReport) and report.is_maker is True and report.order_id == 5
+    assert decode_event('[{"s": "BTCUSDT"}]') == [{'s': 'BTCUSDT'}]
+    assert decode_event('{"result": null, "id": 1}') == {'result': None, 'id': 1}
+
+
+def test_fallback_struct_round_trips_to_dict():
+    update = OrderTradeUpdate.from_dict(json.loads(ORDER_TRADE_UPDATE))
+    assert update.to_dict() == json.loads(ORDER_TRADE_UPDATE)
+    assert update == OrderTradeUpdate.from_dict(json.loads(ORDER_TRADE_UPDATE))
@@ -0,0 +1,184 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradekit.gateway.websocket.ws_supervisor import ReconnectBackoff
+from pytradekit.utils.exceptions import OrderBookSequenceException
+from pytradekit.ws.local_order_book import LocalOrderBook, OrderBookManager
+
+SNAPSHOT = {'lastUpdateId': 100,
+            'bids': [['99.5', '1.0'], ['100.0', '2.0'], ['99.0', '3.0']],
+            'asks': [['101.0', '1.5'], ['100.5', '0.5']]}
+
+
+def _event(first_id, final_id, bids=(), asks=(), previous_id=None, symbol='BTCUSDT'):
+    event = {'e': 'depthUpdate', 'E': 1700000000000, 's': symbol, 'U': first_id, 'u': final_id,
+             'b': [list(level) for level in bids], 'a': [list(level) for level in asks]}
+    if previous_id is not None:
+        event['pu'] = previous_id
+    return event
+
+
+def _make_book():
+    book = LocalOrderBook('BTCUSDT')
+    book.apply_snapshot(SNAPSHOT)
+    return book
+
+
+def test_snapshot_sorted_best_first():
+    book = _make_book()
+    assert book.best_bid() == (100.0, 2.0)
+    assert book.best_ask() == (100.5, 0.5)
+    assert book.top(2) == {'bids': [[100.0, 2.0], [99.5, 1.0]], 'asks': [[100.5, 0.5], [101.0, 1.5]]}
+
+
+def test_diff_returns_only_changed_levels():
+    book = _make_book()
+    assert book.apply_diff(_event(95, 100, bids=[['100.0', '9.0']])) is None
+    changes = book.apply_diff(_event(99, 102, bids=[['100.0', '2.0'], ['100.2', '1.0']], asks=[['100.5', '0']]))
+    assert changes == {'b': [['100.2', '1.0']], 'a': [['100.5', '0']]}
+    assert book.best_bid() == (100.2, 1.0) and book.best_ask() == (101.0, 1.5)
+    # 删除不存在的档位不算变化
+    assert book.apply_diff(_event(103, 103, asks=[['105.0', '0']])) is None
+    assert book.last_update_id == 103
+
+
+def test_sequence_gaps_raise():
+    book = _make_book()
+    with pytest.raises(OrderBookSequenceException):
+        book.apply_diff(_event(102, 105))
+    book.apply_diff(_event(100, 101))
+    with pytest.raises(OrderBookSequenceException):
+        book.apply_diff(_event(103, 104))
+
+
+def test_perp_first_event_straddles_last_update_id():
+    book = LocalOrderBook('BTCUSDT', is_perp=True)
+    book.apply_snapshot(SNAPSHOT)
+    # u < lastUpdateId 丢弃；u == lastUpdateId 的事件是合约的第一条
+    assert book.apply_diff(_event(90, 99, bids=[['100.0', '9.0']], previous_id=89)) is None
+    assert book.apply_diff(_event(95, 100, bids=[['100.0', '9.0']], previous_id=94)) == {'b': [['100.0', '9.0']],
+                                                                                          'a': []}
+    # 之后按 pu 接续，U 可以不连续
+    book.apply_diff(_event(150, 160, previous_id=100))
+    with pytest.raises(OrderBookSequenceException):
+        book.apply_diff(_event(161, 170, previous_id=159))
+    book = LocalOrderBook('BTCUSDT', is_perp=True)
+    book.apply_snapshot(SNAPSHOT)
+    with pytest.raises(OrderBookSequenceException):
+        book.apply_diff(_event(101, 105, previous_id=100))
+
+
+class InlineExecutor:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        fn(*args)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _make_manager(get_snapshot, executor=None, clock=None):
+    updates = []
+    manager = OrderBookManager(MagicMock(), get_snapshot, updates.append, executor=executor or InlineExecutor(),
+                               backoff=ReconnectBackoff(base_delay_s=1, max_delay_s=8, jitter=0),
+                               clock=clock or FakeClock())
+    return manager, updates
+
+
+def test_manager_buffers_until_snapshot_and_resyncs_on_gap():
+    clock = FakeClock()
+    get_snapshot = MagicMock(side_effect=[Exception('timeout'), SNAPSHOT, dict(SNAPSHOT, lastUpdateId=200)])
+    manager, updates = _make_manager(get_snapshot, clock=clock)
+
+    manager.on_depth_event(_event(98, 99, bids=[['1.0', '1.0']]))
+    assert updates == [] and manager.snapshot_failures == 1
+    clock.now = 1
+    manager.on_depth_event(_event(100, 101, asks=[['100.5', '0.7']]))
+    full = updates.pop()
+    assert full['lastUpdateId'] == 101
+    assert full['a'] == [['100.5', '0.7'], ['101.0', '1.5']] and full['b'][0] == ['100.0', '2.0']
+
+    manager.on_depth_event(_event(102, 102, bids=[['100.0', '0']]))
+    changes = updates.pop()
+    assert changes['b'] == [['100.0', '0']] and changes['u'] == 102 and 'lastUpdateId' not in changes
+
+    manager.on_depth_event(_event(200, 201, bids=[['99.0', '5.0']]))
+    assert manager.resyncs == 1 and updates.pop()['lastUpdateId'] == 201
+    assert manager.get_book('BTCUSDT').best_bid() == (100.0, 2.0)
+
+
+def test_manager_backs_off_after_empty_snapshot():
+    clock = FakeClock()
+    # BinanceClient 遇 418/429 返回 None
+    get_snapshot = MagicMock(return_value=None)
+    manager, updates = _make_manager(get_snapshot, clock=clock)
+    for i in range(20):
+        manager.on_depth_event(_event(i, i))
+    assert get_snapshot.call_count == 1 and updates == []
+    assert manager.get_book('BTCUSDT') is None and manager.get_stats()['unsynced'] == ['BTCUSDT']
+    clock.now = 1
+    manager.on_depth_event(_event(21, 21))
+    assert get_snapshot.call_count == 2
+    # 第二次失败退避翻倍
+    clock.now = 2.5
+    manager.on_depth_event(_event(22, 22))
+    assert get_snapshot.call_count == 2
+    get_snapshot.return_value = dict(SNAPSHOT, lastUpdateId=22)
+    clock.now = 3
+    manager.on_depth_event(_event(23, 23, bids=[['100.0', '4.0']]))
+    assert get_snapshot.call_count == 3 and updates[-1]['lastUpdateId'] == 23
+
+
+def test_manager_one_snapshot_in_flight_per_symbol():
+    class DeferredExecutor:
+        def __init__(self):
+            self.calls = []
+
+        def submit(self, fn, *args):
+            self.calls.append((fn, args))
+
+    executor = DeferredExecutor()
+    manager, updates = _make_manager(MagicMock(return_value=SNAPSHOT), executor=executor)
+    for i in range(5):
+        manager.on_depth_event(_event(98 + i, 98 + i))
+        manager.on_depth_event(_event(98 + i, 98 + i, symbol='ETHUSDT'))
+    assert len(executor.calls) == 2
+    fn, args = executor.calls[0]
+    fn(*args)
+    # 快照期间缓存的增量在快照上重放
+    assert updates[-1]['s'] == 'BTCUSDT' and updates[-1]['lastUpdateId'] == 102
+
+
+def test_depth_snapshot_goes_through_rate_limited_client(mocker):
+    from pytradekit.ws.binance_ws import BinanceWsManager
+    limiter = MagicMock()
+    create_limiter = mocker.patch('pytradekit.ws.binance_ws.create_binance_rate_limiter', return_value=limiter)
+    mocker.patch('pytradekit.ws.binance_ws.get_redis')
+    mgr = BinanceWsManager.__new__(BinanceWsManager)
+    mgr.logger, mgr.config, mgr.running_mode = MagicMock(), MagicMock(), None
+    mgr._bn_client, mgr._depth_client = None, None
+    mgr._is_perp, mgr._api_url = True, 'https://api.binance.com'
+    request = mocker.patch('pytradekit.restful.binance_restful.BinanceClient.request', return_value=SNAPSHOT)
+    assert mgr.get_depth_snapshot('BTCUSDT') == SNAPSHOT
+    assert request.call_args.args[1] == 'https://fapi.binance.com/fapi/v1/depth?symbol=BTCUSDT&limit=1000'
+    assert mgr._depth_client.rate_limiter is limiter and create_limiter.call_args.kwargs == {'is_perp': True}
+
+
+def test_bookticker_duplicate_compares_quote_tuple():
+    from pytradekit.ws.binance_ws import BinanceWsManager
+    mgr = BinanceWsManager.__new__(BinanceWsManager)
+    mgr.verify_bookticker_duplicate = {}
+    msg = {'u': 1, 's': 'BTCUSDT', 'a': '1.2', 'b': '3'}
+    assert mgr.verify_spot_bookticker_duplicate(msg) is True
+    assert mgr.verify_spot_bookticker_duplicate(dict(msg, u=2)) is False
+    # 拼接字符串时 '1.2'+'3' 与 '1.'+'23' 会被误判为重复
+    assert mgr.verify_spot_bookticker_duplicate(dict(msg, a='1.', b='23')) is True
@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from pytradekit.utils.exceptions import DependencyException
+from pytradekit.utils.mongodb_bulk_writer import MongodbBulkWriter
+from pytradekit.utils.mongodb_operations import CollectionPath, MongodbOperations
+
+PATH = CollectionPath('raw_orders', 'BN_trades')
+
+
+class FakeMongoOps:
+    """Records insert_data_unordered batches; optional errors are raised on the first calls."""
+
+    get_orders_collection_name = staticmethod(MongodbOperations.get_orders_collection_name)
+    get_trades_collection_name = staticmethod(MongodbOperations.get_trades_collection_name)
+
+    def __init__(self, errors=()):
+        self.batches = []
+        self.errors = list(errors)
+        self.written = threading.Event()
+
+    def insert_data_unordered(self, data, collection_path, key_fields=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.batches.append(((collection_path.db_name, collection_path.collection_name), list(data)))
+        self.written.set()
+
+
+@pytest.fixture
+def make_writer(mocker):
+    writers = []
+
+    def make(ops, **kwargs):
+        writer = MongodbBulkWriter(mocker.MagicMock(), ops, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        if not writer._closed:
+            writer.close()
+
+
+def test_full_batch_is_flushed_by_background_thread(make_writer):
+    ops = FakeMongoOps()
+    writer = make_writer(ops, max_batch=3, flush_interval_s=60)
+
+    writer.insert([{'trade_id': '1'}, {'trade_id': '2'}], PATH)
+    assert ops.batches == []
+    writer.insert({'trade_id': '3'}, PATH)
+
+    assert ops.written.wait(5)
+    assert ops.batches == [(('raw_orders', 'BN_trades'), [{'trade_id': '1'}, {'trade_id': '2'}, {'trade_id': '3'}])]
+
+
+def test_partial_batch_is_flushed_after_interval(make_writer):
+    ops = FakeMongoOps()
+    writer = make_writer(ops, max_batch=100, flush_interval_s=0.05)
+
+    writer.insert_trades([{'trade_id': '1'}], 'BN')
+
+    assert ops.written.wait(5)
+    assert ops.batches == [(('raw_orders', 'BN_trades'), [{'trade_id': '1'}])]
+
+
+def test_close_flushes_remaining_and_rejects_new_documents(make_writer):
+    ops = FakeMongoOps()
+    writer = make_writer(ops, max_batch=100, flush_interval_s=60)
+    writer.insert_orders([{'_id': 'o1'}], 'OKX')
+
+    writer.close()
+
+    assert ops.batches == [(('raw_orders', 'OKX_orders'), [{'_id': 'o1'}])]
+    with pytest.raises(DependencyException):
+        writer.insert({'_id': 'o2'}, PATH)
+
+
+def test_connection_error_requeues_batch(make_writer):
+    ops = FakeMongoOps(errors=[AutoReconnect('down')])
+    writer = make_writer(ops, max_batch=100, flush_interval_s=60)
+    writer.insert([{'trade_id': '1'}], PATH)
+
+    writer.flush()
+    assert writer.get_stats()['pending'] == 1
+    writer.flush()
+
+    assert ops.batches == [(('raw_orders', 'BN_trades'), [{'trade_id': '1'}])]
+    assert writer.get_stats() == {'pending': 0, 'written': 1, 'dropped': 0, 'failed_batches': 1}
+
+
+def test_rejected_documents_are_not_retried(make_writer):
+    error = BulkWriteError({'writeErrors': [{'index': 0, 'code': 2, 'errmsg': 'bad'}]})
+    ops = FakeMongoOps(errors=[error])
+    writer = make_writer(ops, max_batch=100, flush_interval_s=60)
+    writer.insert([{'trade_id': '1'}, {'trade_id': '2'}], PATH)
+
+    writer.flush()
+
+    assert writer.get_stats() == {'pending': 0, 'written': 1, 'dropped': 1, 'failed_batches': 1}
+
+
+def test_pending_is_bounded_while_mongo_is_down(make_writer):
+    writer = make_writer(FakeMongoOps(), max_batch=100, flush_interval_s=60, max_pending=2)
+
+    writer.insert([{'trade_id': str(i)} for i in range(5)], PATH)
+
+    assert writer._buffers[('raw_orders', 'BN_trades')] == [{'trade_id': '3'}, {'trade_id': '4'}]
+    assert writer.get_stats()['dropped'] == 3
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from pytradekit.utils import mongodb_health
+from pytradekit.utils.mongodb_health import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, MongodbHealthMonitor
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+def _event(host):
+    return SimpleNamespace(connection_id=(host, 27017))
+
+
+def test_failed_heartbeat_on_every_server_opens_circuit():
+    monitor = MongodbHealthMonitor()
+    monitor.succeeded(_event('a'))
+    monitor.failed(_event('b'))
+    assert monitor.is_healthy()
+    monitor.failed(_event('a'))
+    assert monitor.state == CIRCUIT_OPEN
+
+
+def test_open_circuit_rejects_until_probe_interval(mocker):
+    clock = FakeClock()
+    mocker.patch.object(mongodb_health, 'time', clock)
+    monitor = MongodbHealthMonitor(probe_interval_s=5)
+    monitor.record_failure()
+
+    assert not monitor.allow_request()
+    clock.now += 5
+    assert monitor.allow_request()
+    assert monitor.state == CIRCUIT_HALF_OPEN
+    assert not monitor.allow_request()  # one trial call per interval
+    assert monitor.get_stats()['rejected_calls'] == 2
+
+
+def test_recovery_metrics(mocker):
+    clock = FakeClock()
+    mocker.patch.object(mongodb_health, 'time', clock)
+    monitor = MongodbHealthMonitor()
+    monitor.failed(_event('a'))
+    clock.now += 3
+    assert monitor.get_stats()['current_outage_s'] == 3
+    clock.now += 4
+    monitor.succeeded(_event('a'))
+
+    stats = monitor.get_stats()
+    assert stats['state'] == CIRCUIT_CLOSED
+    assert stats['outages'] == 1
+    assert stats['last_recovery_s'] == 7
+    assert stats['total_downtime_s'] == 7
+    assert stats['current_outage_s'] == 0
+
+
+def test_successful_trial_call_closes_circuit(mocker):
+    clock = FakeClock()
+    mocker.patch.object(mongodb_health, 'time', clock)
+    monitor = MongodbHealthMonitor(probe_interval_s=1)
+    monitor.record_failure()
+    clock.now += 1
+    assert monitor.allow_request()
+    monitor.record_success()
+    assert monitor.is_healthy()
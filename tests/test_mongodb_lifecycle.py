@@ -0,0 +1,112 @@
+from pytradekit.utils import mongodb_lifecycle
+from pytradekit.utils.mongodb_indexes import get_collection_indexes
+from pytradekit.utils.mongodb_lifecycle import LIFECYCLE_TIMESERIES, LIFECYCLE_TTL, LifecyclePolicy, \
+    MongodbLifecycleManager, get_read_collection_names, get_span_days, get_write_collection_name, \
+    group_by_write_collection
+from pytradekit.utils.mongodb_operations import MongodbOperations
+from pytradekit.utils.time_handler import TimeSpan
+
+
+def test_write_and_read_names_follow_read_yesterday_coll_prefix():
+    assert get_write_collection_name('raw_market', 'BN_order_book_ws', day='2024-01-02') == \
+           '2024-01-02_BN_order_book_ws'
+    # 未配置轮转的集合保持原名
+    assert get_write_collection_name('raw_market', 'BN_order_book', day='2024-01-02') == 'BN_order_book'
+    assert get_read_collection_names('metrics_order_depth', 'BN_order_depth_ratio', ['2024-01-01', '2024-01-02']) == \
+           ['2024-01-02_BN_order_depth_ratio', '2024-01-01_BN_order_depth_ratio']
+    assert get_collection_indexes('raw_market', '2024-01-02_BN_order_book_ws')
+
+
+def test_writes_are_filed_under_the_document_day(mocker):
+    # 2024-01-01 23:59:59.999 UTC 与 2024-01-02 00:00:00 UTC
+    docs = [{'time_ms': 1704153599999}, {'time_ms': 1704153600000}, {'time_ms': 1704153599000}]
+    assert group_by_write_collection('metrics_order_depth', 'BN_order_depth_ratio', docs) == {
+        '2024-01-01_BN_order_depth_ratio': [docs[0], docs[2]], '2024-01-02_BN_order_depth_ratio': [docs[1]]}
+    assert group_by_write_collection('raw_market', 'BN_order_book', docs[0]) == {'BN_order_book': [docs[0]]}
+
+    ops = MongodbOperations.__new__(MongodbOperations)
+    insert_data = mocker.patch.object(MongodbOperations, 'insert_data')
+    ops.insert_orderbook_ws(docs, 'BN')
+    assert [call.args[1].collection_name for call in insert_data.call_args_list] == \
+           ['2024-01-01_BN_order_book_ws', '2024-01-02_BN_order_book_ws']
+
+
+def test_read_order_depth_ratio_falls_back_to_unrotated_collection(mocker):
+    ops = MongodbOperations.__new__(MongodbOperations)
+    ops.logger = mocker.MagicMock()
+    rotated, legacy = mocker.MagicMock(), mocker.MagicMock()
+    rotated.find.return_value = []
+    legacy.find.return_value = [{'time_ms': 1704067200000}]
+    get_collection = mocker.patch.object(MongodbOperations, '_get_collection',
+                                         side_effect=lambda db_name, name: legacy if name == 'BN_order_depth_ratio'
+                                         else rotated)
+
+    assert ops.read_order_depth_ratio(TimeSpan(1704067200000, 1704067200000), 'BN') == [{'time_ms': 1704067200000}]
+    assert [call.args[1] for call in get_collection.call_args_list] == \
+           ['2024-01-02_BN_order_depth_ratio', '2024-01-01_BN_order_depth_ratio', 'BN_order_depth_ratio']
+
+
+def test_span_days_accepts_ms_and_strings():
+    # 2024-01-01 00:00:00 UTC 到 2024-01-02 12:00:00 UTC
+    assert get_span_days(TimeSpan(1704067200000, 1704196800000)) == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert get_span_days(TimeSpan('2024-01-31 10:00:00', '2024-01-31 11:00:00')) == ['2024-01-31', '2024-02-01']
+
+
+def test_run_archives_then_drops_expired_collections(mocker, tmp_path):
+    database = mocker.MagicMock()
+    database.list_collection_names.return_value = ['2024-01-01_BN_order_book_ws', '2024-01-08_BN_order_book_ws',
+                                                   'BN_order_book', '2024-01-01_BN_order_book']
+    mongo_ops = mocker.MagicMock()
+    mongo_ops.client.__getitem__.return_value = database
+    archive = mocker.patch('pytradekit.utils.parquet_archive.archive_chunks', return_value=([], []))
+    policies = {'order_book_ws': LifecyclePolicy('raw_market', mongodb_lifecycle.LIFECYCLE_ROTATION, 3,
+                                                 archive=True)}
+
+    dropped = MongodbLifecycleManager(mocker.MagicMock(), mongo_ops, str(tmp_path), policies).run('2024-01-09')
+
+    assert dropped == ['raw_market.2024-01-01_BN_order_book_ws']
+    database.drop_collection.assert_called_once_with('2024-01-01_BN_order_book_ws')
+    assert archive.call_args.kwargs == {'day': '2024-01-01', 'exchange_id': 'BN'}
+
+
+def test_run_keeps_collection_when_archive_fails(mocker, tmp_path):
+    database = mocker.MagicMock()
+    database.list_collection_names.return_value = ['2024-01-01_BN_order_depth_ratio']
+    mongo_ops = mocker.MagicMock()
+    mongo_ops.client.__getitem__.return_value = database
+    mocker.patch('pytradekit.utils.parquet_archive.archive_chunks',
+                 side_effect=mongodb_lifecycle.DependencyException('disk full'))
+
+    assert MongodbLifecycleManager(mocker.MagicMock(), mongo_ops, str(tmp_path)).run('2024-02-01') == []
+    database.drop_collection.assert_not_called()
+
+
+def test_ensure_collection_creates_ttl_index_and_timeseries(mocker):
+    database = mocker.MagicMock()
+    mongo_ops = mocker.MagicMock()
+    mongo_ops.client.__getitem__.return_value = database
+    policies = {'order_book': LifecyclePolicy('raw_market', LIFECYCLE_TTL, 2, time_field='created_at'),
+                'order_depth_ratio': LifecyclePolicy('metrics_order_depth', LIFECYCLE_TIMESERIES, 7,
+                                                     time_field='created_at', meta_field='inst_code')}
+    manager = MongodbLifecycleManager(mocker.MagicMock(), mongo_ops, policies=policies)
+
+    manager.ensure_collection('raw_market', 'BN_order_book')
+    manager.ensure_collection('metrics_order_depth', 'BN_order_depth_ratio')
+
+    assert database.__getitem__.return_value.create_index.call_args.kwargs['expireAfterSeconds'] == 2 * 86400
+    database.create_collection.assert_called_once_with(
+        'BN_order_depth_ratio', timeseries={'timeField': 'created_at', 'granularity': 'seconds',
+                                            'metaField': 'inst_code'}, expireAfterSeconds=7 * 86400)
+
+
+def test_read_last_orderbook_falls_back_to_yesterday(mocker):
+    ops = MongodbOperations.__new__(MongodbOperations)
+    ops.logger = mocker.MagicMock()
+    today, yesterday = mocker.MagicMock(), mocker.MagicMock()
+    today.find.return_value.sort.return_value.limit.return_value = []
+    yesterday.find.return_value.sort.return_value.limit.return_value = [{'time_ms': 1}]
+    get_collection = mocker.patch.object(MongodbOperations, '_get_collection', side_effect=[today, yesterday])
+
+    assert ops.read_last_orderbook('BTCUSDT_BN.SPOT', is_other=True) == {'time_ms': 1}
+    names = [call.args[1] for call in get_collection.call_args_list]
+    assert names[0] > names[1] and all(name.endswith('_BN_order_book_ws') for name in names)
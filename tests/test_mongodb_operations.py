@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from pytradekit.utils.custom_types import InstCode
+from pytradekit.utils.mongodb_health import MongodbHealthMonitor
 from pytradekit.utils.mongodb_operations import MongodbOperations
 
 
@@ -17,7 +18,7 @@ def test_create_client(mocker):
     spy = mocker.spy(MongodbOperations, '_create_client')
     MongodbOperations(MONGODB_URL)
     # 现在使用spy对象来断言_create_client是否被正确调用
-    spy.assert_called_once_with(MONGODB_URL)
+    spy.assert_called_once_with(MONGODB_URL, None)
 
 
 # 测试关闭MongoDB连接
@@ -32,37 +33,6 @@ def test_close(mocker):
     assert MongodbOperations._client is None
 
 
-def test_check_connection(mocker):
-    # 重置 singleton 状态，使 mocker.patch 的 MongoClient 一定被注入
-    # （如果 _client 已被前序测试初始化过，__init__ 会跳过 _create_client，
-    # mocked_mongo_client 永远不会成为 self.client，断言会因执行顺序失败）
-    MongodbOperations._client = None
-    MongodbOperations._indexes_ensured = False
-
-    # 创建MongoClient的模拟实例
-    mocked_mongo_client = mocker.Mock()
-    # 创建admin属性的模拟对象
-    mocked_admin = mocker.Mock()
-    # 将mocked_admin设置为mocked_mongo_client的admin属性的返回值
-    mocked_mongo_client.admin = mocked_admin
-    # 设置admin.command方法的返回值为True
-    mocked_admin.command.return_value = True
-
-    # 使用patch替换MongoClient，使其返回模拟的MongoClient实例
-    mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_mongo_client)
-    # _ensure_indexes 在 __init__ 中会被调用，mock 掉避免访问 mock client 的索引方法链
-    mocker.patch.object(MongodbOperations, '_ensure_indexes')
-
-    mongodb_operations_instance = MongodbOperations(MONGODB_URL)
-    # 调用待测试的方法
-    connection_status = mongodb_operations_instance._check_connection()
-
-    # 验证admin.command方法是否被正确调用
-    mocked_admin.command.assert_called_once_with('ping')
-    # 验证返回值是否为True，即连接正常
-    assert connection_status is True
-
-
 class TestUpdateTradeRecordStripsDecimal:
     """update_trade_record was previously skipping get_correct_dict; raw Decimal in the
     payload caused pymongo to raise `cannot encode object: Decimal(...)` and the update
@@ -148,3 +118,473 @@ class TestUpdateTradeRecordStripsDecimal:
         ops.update_trade_record('perp_sell_xxx', update_data)
         sent_update = mocked_client['arbitrage']['trade_records'].update_one.call_args[0][1]
         assert sent_update['$set']['legs']['LONG_LEG']['position_size'] == '0.57500000'
+
+
+class FakeCursor:
+    """Iterable stand-in for a pymongo cursor that records chained calls."""
+
+    def __init__(self, docs):
+        self._docs = docs
+        self.batch_size_value = None
+        self.sort_value = None
+        self.closed = False
+
+    def batch_size(self, size):
+        self.batch_size_value = size
+        return self
+
+    def sort(self, sort):
+        self.sort_value = sort
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def close(self):
+        self.closed = True
+
+
+class TestChunkedReaders:
+    def _make_ops(self, mocker, docs):
+        MongodbOperations._client = None
+        MongodbOperations._indexes_ensured = False
+        mocked_client = mocker.MagicMock()
+        mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_client)
+        mocker.patch.object(MongodbOperations, '_ensure_indexes')
+        ops = MongodbOperations(MONGODB_URL, logger=mocker.MagicMock())
+        cursor = FakeCursor(docs)
+        collection = mocked_client.__getitem__.return_value.__getitem__.return_value
+        collection.find.return_value = cursor
+        return ops, collection, cursor
+
+    def test_yields_bounded_chunks_and_closes_cursor(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        docs = [{'event_time_ms': i} for i in range(5)]
+        ops, collection, cursor = self._make_ops(mocker, docs)
+
+        chunks = list(ops.read_coll_chunks(CollectionPath('db', 'coll'), chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert cursor.batch_size_value == 2
+        assert cursor.closed
+
+    def test_empty_result_yields_nothing(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        ops, _, _ = self._make_ops(mocker, [])
+        assert list(ops.read_coll_chunks(CollectionPath('db', 'coll'))) == []
+
+    def test_trades_chunks_reuse_read_trades_query_and_projection(self, mocker):
+        from pytradekit.utils.time_handler import TimeSpan
+        docs = [{'trade_id': '1', 'side': 'buy'}, {'trade_id': '1', 'side': 'buy'}, {'trade_id': '2', 'side': 'sell'}]
+        ops, collection, _ = self._make_ops(mocker, docs)
+        projection = {'_id': 0, 'trade_id': 1, 'side': 1}
+
+        chunks = list(ops.read_trades_chunks(time_span=TimeSpan(1, 2), exchange_id='BN', account_id='acct',
+                                             projection=projection))
+
+        query, sent_projection = collection.find.call_args.args
+        assert query == ops._build_trades_query(time_span=TimeSpan(1, 2), account_id='acct')
+        assert query['traded_time_ms'] == {'$gte': 1, '$lte': 2}
+        assert sent_projection == projection
+        assert len(chunks[0]) == 2  # in-chunk duplicate dropped
+
+    def test_timeseries_chunks_do_not_sort_server_side(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.time_handler import TimeSpan
+        ops, collection, cursor = self._make_ops(mocker, [{'event_time_ms': 1}])
+
+        list(ops.read_timeseries_chunks(CollectionPath('db', 'coll'), TimeSpan(0, 10)))
+
+        assert collection.find.call_args.args[0] == {'event_time_ms': {'$gte': 0, '$lte': 10}}
+        # event_time_ms is not indexed; a sort would block until the whole range is read
+        assert cursor.sort_value is None
+
+    def test_arrow_path_requires_pyarrow(self, mocker):
+        import pytest
+        from pytradekit.utils import mongodb_operations
+        from pytradekit.utils.exceptions import DependencyException
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        mocker.patch.object(mongodb_operations, 'pyarrow', None)
+        ops, _, _ = self._make_ops(mocker, [{'a': 1}])
+        with pytest.raises(DependencyException):
+            list(ops.read_coll_chunks(CollectionPath('db', 'coll'), as_arrow=True))
+
+    def test_arrow_path_builds_tables(self, mocker):
+        from bson import ObjectId
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        ops, _, _ = self._make_ops(mocker, [{'_id': ObjectId(), 'price': 1.5}, {'_id': ObjectId(), 'price': 2.5}])
+
+        tables = list(ops.read_coll_chunks(CollectionPath('db', 'coll'), as_arrow=True))
+
+        assert tables[0].num_rows == 2
+        assert tables[0].column('price').to_pylist() == [1.5, 2.5]
+
+
+def _matches(doc, query):
+    """Evaluate the subset of Mongo filters the keyset reader sends."""
+    for field, cond in query.items():
+        if field == '$and':
+            if not all(_matches(doc, sub) for sub in cond):
+                return False
+        elif field == '$or':
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict):
+            ops = {'$gte': lambda a, b: a >= b, '$lte': lambda a, b: a <= b, '$gt': lambda a, b: a > b,
+                   '$in': lambda a, b: a in b, '$ne': lambda a, b: a != b}
+            if field not in doc or not all(ops[op](doc[field], value) for op, value in cond.items()):
+                return False
+        elif doc.get(field) != cond:
+            return False
+    return True
+
+
+class FakeKeysetCursor:
+    def __init__(self, collection, docs):
+        self._collection = collection
+        self._docs = docs
+
+    def sort(self, keys):
+        self._docs = sorted(self._docs, key=lambda doc: tuple(doc[key] for key, _ in keys))
+        return self
+
+    def skip(self, n):
+        self._collection.skips.append(n)
+        self._docs = self._docs[n:]
+        return self
+
+    def limit(self, n):
+        self._docs = self._docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class FakeKeysetCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+        self.skips = []
+        self.indexes = []
+
+    def find(self, query):
+        self.queries.append(query)
+        return FakeKeysetCursor(self, [doc for doc in self.docs if _matches(doc, query)])
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append(keys)
+
+
+class TestKeysetTimeseriesPages:
+    def _make_ops(self, mocker, docs):
+        MongodbOperations._client = None
+        MongodbOperations._indexes_ensured = False
+        MongodbOperations._keyset_indexes = set()
+        mocked_client = mocker.MagicMock()
+        mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_client)
+        mocker.patch.object(MongodbOperations, '_ensure_indexes')
+        ops = MongodbOperations(MONGODB_URL, logger=mocker.MagicMock())
+        collection = FakeKeysetCollection(docs)
+        mocked_client.__getitem__.return_value.__getitem__.return_value = collection
+        return ops, collection
+
+    @staticmethod
+    def _docs():
+        from bson import ObjectId
+        # several documents share a timestamp, so paging must tie-break on _id
+        return [{'_id': ObjectId(), 'event_time_ms': t // 3} for t in range(10)]
+
+    def test_pages_cover_range_once_without_skip(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.time_handler import TimeSpan
+        docs = self._docs()
+        ops, collection = self._make_ops(mocker, docs)
+
+        pages = list(ops.read_timeseries_pages(CollectionPath('db', 'coll'), TimeSpan(0, 10), batch_size=4))
+
+        ids = [doc_id for df, _ in pages for doc_id in df['_id']]
+        assert ids == [doc['_id'] for doc in docs]
+        assert [len(df) for df, _ in pages] == [4, 4, 2]
+        assert pages[-1][1] is None
+        assert collection.skips == []
+        assert collection.indexes == [[('event_time_ms', 1), ('_id', 1)]]
+
+    def test_token_resumes_after_page(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.time_handler import TimeSpan
+        docs = self._docs()
+        ops, _ = self._make_ops(mocker, docs)
+        path, span = CollectionPath('db', 'coll'), TimeSpan(0, 10)
+
+        _, token = ops.read_timeseries_page(path, span, batch_size=5)
+        df, _ = ops.read_timeseries_page(path, span, resume_token=token, batch_size=5)
+
+        assert list(df['_id']) == [doc['_id'] for doc in docs[5:]]
+
+    def test_sequential_batch_calls_seek_instead_of_skip(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.time_handler import TimeSpan
+        docs = self._docs()
+        ops, collection = self._make_ops(mocker, docs)
+        path, span = CollectionPath('db', 'coll'), TimeSpan(0, 10)
+
+        seen = []
+        for start_index in range(0, 10, 4):
+            df, _ = ops.read_timeseries_batch([], path, span, start_index, batch_size=4)
+            seen.extend(df['_id'])
+
+        assert seen == [doc['_id'] for doc in docs]
+        assert collection.skips == []
+
+    def test_unknown_offset_falls_back_to_sorted_skip(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        from pytradekit.utils.time_handler import TimeSpan
+        docs = self._docs()
+        ops, collection = self._make_ops(mocker, docs)
+
+        df, _ = ops.read_timeseries_batch([], CollectionPath('db', 'coll'), TimeSpan(0, 10), 8, batch_size=4)
+
+        assert list(df['_id']) == [doc['_id'] for doc in docs[8:]]
+        assert collection.skips == [8]
+
+
+class TestUnorderedWrites:
+    def _make_ops(self, mocker):
+        MongodbOperations._client = None
+        MongodbOperations._indexes_ensured = False
+        mocked_client = mocker.MagicMock()
+        mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_client)
+        mocker.patch.object(MongodbOperations, '_ensure_indexes')
+        ops = MongodbOperations(MONGODB_URL, logger=mocker.MagicMock())
+        return ops, mocked_client.__getitem__.return_value.__getitem__.return_value
+
+    def test_insert_if_not_exists_is_one_bulk_write_without_find(self, mocker):
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        ops, collection = self._make_ops(mocker)
+        collection.bulk_write.return_value.upserted_ids = {0: 'a'}
+
+        ops.insert_data_if_not_exists([{'_id': 'a', 'fee': Decimal('0.1')}, {'_id': 'b'}], CollectionPath('db', 'c'))
+
+        collection.find_one.assert_not_called()
+        requests = collection.bulk_write.call_args.args[0]
+        assert collection.bulk_write.call_args.kwargs == {'ordered': False}
+        assert requests[0]._filter == {'_id': 'a'}
+        assert requests[0]._doc == {'$setOnInsert': {'_id': 'a', 'fee': '0.1'}}
+        assert requests[0]._upsert is True
+        ops.logger.info.assert_called_once_with("Data already exists: {'_id': 'b'}")
+
+    def test_insert_unordered_upserts_on_first_key_present(self, mocker):
+        from pymongo import InsertOne, ReplaceOne
+        from pytradekit.utils.mongodb_operations import CollectionPath
+        ops, collection = self._make_ops(mocker)
+
+        trade = {'account_id': 'BN_1', 'inst_code': 'BTCUSDT_BN.SPOT', 'trade_id': 't2'}
+        ops.insert_data_unordered([{'_id': 1, 'trade_id': 't1'}, trade, {'trade_id': 't3'}, {'price': 1}],
+                                  CollectionPath('db', 'c'))
+
+        first, second, third, fourth = collection.bulk_write.call_args.args[0]
+        assert isinstance(first, ReplaceOne) and first._filter == {'_id': 1}
+        # trade_id 只在账户、品种内唯一，缺字段的不能按它 upsert
+        assert isinstance(second, ReplaceOne) and second._filter == trade
+        assert isinstance(third, InsertOne) and isinstance(fourth, InsertOne)
+        assert collection.bulk_write.call_args.kwargs == {'ordered': False}
+
+    def test_correct_value_dispatch_matches_numpy_types(self, mocker):
+        import numpy as np
+        import pandas as pd
+        ops, _ = self._make_ops(mocker)
+        converted = ops.get_correct_dict({'a': np.int64(3), 'b': np.float64(1.5), 'c': np.bool_(True),
+                                          'd': pd.Timedelta(seconds=1), 'e': ('x', Decimal('2'))})
+        assert converted == {'a': 3, 'b': 1.5, 'c': True, 'd': '0 days 00:00:01', 'e': ['x', '2']}
+        assert type(converted['a']) is int and type(converted['b']) is float and type(converted['c']) is bool
+
+
+class TestHandleMongodbErrors:
+    def _make_ops(self, mocker):
+        from pytradekit.utils.mongodb_health import MongodbHealthMonitor
+        MongodbOperations._client = None
+        MongodbOperations._indexes_ensured = False
+        mocker.patch.object(MongodbOperations, '_health', MongodbHealthMonitor())
+        mocked_client = mocker.MagicMock()
+        mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_client)
+        mocker.patch.object(MongodbOperations, '_ensure_indexes')
+        ops = MongodbOperations(MONGODB_URL, logger=mocker.MagicMock())
+        return ops, mocked_client
+
+    def test_guarded_call_sends_no_ping(self, mocker):
+        ops, client = self._make_ops(mocker)
+        client.__getitem__.return_value.__getitem__.return_value.aggregate.return_value = []
+
+        ops.read_inventory_quantity()
+
+        client.admin.command.assert_not_called()
+
+    def test_connection_failure_opens_circuit_and_short_circuits(self, mocker):
+        from pymongo.errors import AutoReconnect
+        ops, client = self._make_ops(mocker)
+        collection = client.__getitem__.return_value.__getitem__.return_value
+        collection.aggregate.side_effect = AutoReconnect('down')
+
+        assert ops.read_inventory_quantity() is None
+        assert ops.read_inventory_quantity() is None
+
+        assert collection.aggregate.call_count == 1
+        assert ops.get_health_stats()['state'] == 'open'
+
+    def test_query_error_does_not_open_circuit(self, mocker):
+        from pymongo.errors import OperationFailure
+        ops, client = self._make_ops(mocker)
+        client.__getitem__.return_value.__getitem__.return_value.aggregate.side_effect = OperationFailure('bad query')
+
+        assert ops.read_inventory_quantity() is None
+        assert ops.get_health_stats()['state'] == 'closed'
+
+    def test_client_registers_heartbeat_listener(self, mocker):
+        mongo_client = mocker.patch('pytradekit.utils.mongodb_operations.MongoClient')
+        MongodbOperations._create_client(MONGODB_URL)
+        assert mongo_client.call_args.kwargs['event_listeners'] == [MongodbOperations._health]
+
+
+def _evaluate(doc, expression):
+    if expression == '$$ROOT':
+        return doc
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = doc
+        for part in expression[1:].split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+    if isinstance(expression, dict) and '$substrCP' in expression:
+        source, start, length = expression['$substrCP']
+        return _evaluate(doc, source)[start:start + length]
+    if isinstance(expression, dict):
+        return {key: _evaluate(doc, value) for key, value in expression.items()}
+    return expression
+
+
+def _aggregate(docs, pipeline):
+    """Evaluate the $match/$sort/$group/$project subset the summary readers send."""
+    accumulators = {'$sum': lambda values: sum(v for v in values if isinstance(v, (int, float))),
+                    '$max': lambda values: max(v for v in values if v is not None),
+                    '$min': lambda values: min(v for v in values if v is not None),
+                    '$first': lambda values: values[0], '$last': lambda values: values[-1]}
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == '$match':
+            docs = [doc for doc in docs if _matches(doc, spec)]
+        elif name == '$sort':
+            for key, direction in reversed(list(spec.items())):
+                docs = sorted(docs, key=lambda doc: _evaluate(doc, f'${key}'), reverse=direction == -1)
+        elif name == '$group':
+            groups = {}
+            for doc in docs:
+                key = _evaluate(doc, spec['_id'])
+                groups.setdefault(repr(key), (key, []))[1].append(doc)
+            docs = []
+            for key, members in groups.values():
+                row = {'_id': key}
+                for field, accumulator in spec.items():
+                    if field != '_id':
+                        (op, expression), = accumulator.items()
+                        row[field] = accumulators[op]([_evaluate(doc, expression) for doc in members])
+                docs.append(row)
+        elif name == '$project':
+            docs = [{field: doc.get(field) if value == 1 else _evaluate(doc, value)
+                     for field, value in spec.items() if value != 0} for doc in docs]
+    return docs
+
+
+class TestSummaryPipelines:
+    @staticmethod
+    def _make_ops(mocker, docs):
+        MongodbOperations._client = None
+        MongodbOperations._indexes_ensured = False
+        mocked_client = mocker.MagicMock()
+        mocker.patch('pytradekit.utils.mongodb_operations.MongoClient', return_value=mocked_client)
+        mocker.patch.object(MongodbOperations, '_ensure_indexes')
+        ops = MongodbOperations(MONGODB_URL, logger=mocker.MagicMock())
+        collection = mocked_client.__getitem__.return_value.__getitem__.return_value
+        # 前面的用例可能把熔断器打开，inventory 读取带 handle_mongodb_errors
+        mocker.patch.object(MongodbOperations, '_health', MongodbHealthMonitor())
+        collection.aggregate.side_effect = lambda pipeline, **kwargs: iter(_aggregate(docs, pipeline))
+        collection.find.side_effect = lambda params: iter([doc for doc in docs if _matches(doc, params)])
+        return ops
+
+    def test_pnl_summary_matches_pandas_groupby(self, mocker):
+        import pandas as pd
+        docs = [{'day': day, 'inst_code': inst, 'strategy_id': strategy, 'pnl': pnl, 'base_diff': pnl * 2,
+                 'quote_diff': -pnl}
+                for day, inst, strategy, pnl in [('2024-01-02', 'ETH', 's1', 1.5), ('2024-01-01', 'BTC', 's1', 2.0),
+                                                 ('2024-01-01', 'BTC', 's1', 3.25), ('2024-01-01', 'ETH', 's2', -1.0),
+                                                 ('2024-01-01', 'ETH', None, 9.0), ('2024-01-03', 'BTC', 's1', 7.0)]]
+        ops = self._make_ops(mocker, docs)
+        day = ['2024-01-01', '2024-01-02']
+
+        summary = ops.read_pnl_summary(day=day)
+        expected = ops.read_pnl(day=day, is_df=True).groupby(
+            ['day', 'inst_code', 'strategy_id'], as_index=False)[['pnl', 'base_diff', 'quote_diff']].sum()
+
+        pd.testing.assert_frame_equal(summary, expected)
+
+    def test_volume_fee_summary_by_inst_code(self, mocker):
+        import pandas as pd
+        from pytradekit.utils.mongodb_operations import VOLUME_FEE_SUM_FIELDS
+        docs = [{'day': '2024-01-01', 'inst_code': inst, 'strategy_id': 's1',
+                 **{field: i + n for n, field in enumerate(VOLUME_FEE_SUM_FIELDS)}}
+                for i, inst in enumerate(['BTC', 'ETH', 'BTC'])]
+        ops = self._make_ops(mocker, docs)
+
+        summary = ops.read_volume_fee_summary(day='2024-01-01', group_by=('inst_code',))
+        expected = ops.read_volume_fee(day='2024-01-01', is_df=True).groupby(
+            ['inst_code'], as_index=False)[list(VOLUME_FEE_SUM_FIELDS)].sum()
+
+        pd.testing.assert_frame_equal(summary, expected)
+
+    def test_inventory_summary_matches_first_and_last(self, mocker):
+        docs = [{'_id': i, 'inst_code': inst, 'trade_update_time_ms': t, 'inventory_quantity': q,
+                 'cumulative_profit': q / 10, 'unrealized_profit': -q}
+                for i, (inst, t, q) in enumerate([('BTC', '2024-01-01 10:00:00.000', 5),
+                                                   ('BTC', '2024-01-01 09:00:00.000', 3),
+                                                   ('BTC', '2024-01-01 23:00:00.000', 1),
+                                                   ('ETH', '2024-01-01 12:00:00.000', 7),
+                                                   ('BTC', '2024-01-02 01:00:00.000', 9)])]
+        ops = self._make_ops(mocker, docs)
+
+        summary = ops.read_inventory_summary('2024-01-01 00:00:00.000', '2024-01-02 23:59:59.999')
+        btc = summary[(summary['inst_code'] == 'BTC') & (summary['day'] == '2024-01-01')].iloc[0]
+        first, last = ops.read_first_and_last_inventory('BTC', '2024-01-01')
+
+        assert list(summary[['inst_code', 'day']].itertuples(index=False, name=None)) == [
+            ('BTC', '2024-01-01'), ('BTC', '2024-01-02'), ('ETH', '2024-01-01')]
+        assert btc['first_inventory_quantity'] == first['inventory_quantity'] == 3
+        assert btc['last_inventory_quantity'] == last['inventory_quantity'] == 1
+        assert (btc['max_inventory_quantity'], btc['min_inventory_quantity'], btc['count']) == (5, 1, 3)
+
+    def test_max_inventory_summary(self, mocker):
+        import pandas as pd
+        docs = [{'day': '2024-01-01', 'coin': coin, 'strategy_id': 's1', 'max_inventory': value}
+                for coin, value in [('BTC', 1.0), ('BTC', 4.0), ('ETH', 2.0)]]
+        ops = self._make_ops(mocker, docs)
+
+        summary = ops.read_max_inventory_summary('2024-01-01')
+        expected = ops.read_max_inventory('2024-01-01').groupby(['day', 'coin'], as_index=False)[
+            ['max_inventory']].max()
+
+        pd.testing.assert_frame_equal(summary, expected)
+
+
+def test_read_inst_code_basic_loads_registry_and_splitter_on_full_read(mocker):
+    rows = [{'inst_code': 'ABCFDUSD_MEXC.SPOT', 'symbol': 'ABCFDUSD', 'base': 'ABC', 'quote': 'FDUSD'}]
+    mongo_ops = MongodbOperations.__new__(MongodbOperations)
+    mongo_ops.client = mocker.MagicMock()
+    mongo_ops.client.__getitem__.return_value.__getitem__.return_value.find.side_effect = lambda params: iter(rows)
+    registry = mocker.patch('pytradekit.utils.mongodb_operations.INST_CODE_REGISTRY')
+    splitter = mocker.patch('pytradekit.utils.mongodb_operations.SYMBOL_SPLITTER')
+
+    assert mongo_ops.read_inst_code_basic(exchange_id='MEXC') == rows
+    registry.load.assert_called_once_with(rows)
+    splitter.load_inst_code_basic.assert_called_once_with(rows)
+
+    # 按 inst_code 的部分读取不能替换整个交易所的注册表
+    mongo_ops.read_inst_code_basic(inst_code='ABCFDUSD_MEXC.SPOT')
+    assert registry.load.call_count == 1 and splitter.load_inst_code_basic.call_count == 1
@@ -0,0 +1,57 @@
+import pandas as pd
+import pyarrow.parquet as pq
+from bson import ObjectId
+
+from pytradekit.utils.mongodb_operations import CollectionPath
+from pytradekit.utils.parquet_archive import ParquetArchiveWriter, archive_chunks, archive_df, read_archive
+from pytradekit.utils.time_handler import TimeSpan
+
+ORDERS = CollectionPath('raw_orders', 'BN_orders')
+
+
+def _orders(start, n, inst_codes=('BTC-USDT_BN.SPOT', 'ETH-USDT_BN.SPOT')):
+    return pd.DataFrame({'_id': [ObjectId() for _ in range(n)],
+                         'inst_code': [inst_codes[i % len(inst_codes)] for i in range(n)],
+                         'order_time_ms': list(range(start, start + n)),
+                         'price': [1.5 * i for i in range(n)]})
+
+
+def test_chunks_stream_into_zstd_row_groups(tmp_path, mocker):
+    files, logs_list = archive_chunks(mocker.MagicMock(), [], [_orders(0, 10), _orders(10, 5)], str(tmp_path),
+                                      ORDERS, day='2024-01-01', exchange_id='BN')
+
+    assert len(files) == 1
+    assert '/day=2024-01-01/exchange_id=BN/collection=raw_orders.BN_orders/' in files[0]
+    metadata = pq.ParquetFile(files[0]).metadata
+    assert metadata.num_row_groups == 2
+    assert metadata.row_group(0).column(0).compression == 'ZSTD'
+    assert logs_list == [f'15 rows archived as parquet into {tmp_path}/day=2024-01-01/exchange_id=BN/'
+                         f'collection=raw_orders.BN_orders']
+
+
+def test_read_archive_pushes_down_filters(tmp_path, mocker):
+    logger = mocker.MagicMock()
+    archive_df(logger, [], _orders(0, 20), str(tmp_path), ORDERS, day='2024-01-01', exchange_id='BN')
+    archive_df(logger, [], _orders(100, 20), str(tmp_path), ORDERS, day='2024-01-02', exchange_id='BN')
+
+    df = read_archive(str(tmp_path), day='2024-01-02', collection_path=ORDERS, time_column='order_time_ms',
+                      time_span=TimeSpan(105, 110), inst_code='ETH-USDT_BN.SPOT')
+
+    assert list(df.columns) == ['_id', 'inst_code', 'order_time_ms', 'price']
+    assert df['order_time_ms'].tolist() == [105, 107, 109]
+    assert len(read_archive(str(tmp_path), day=['2024-01-01', '2024-01-02'], exchange_id='BN')) == 40
+
+
+def test_schema_change_rolls_over_to_new_part(tmp_path):
+    with ParquetArchiveWriter(str(tmp_path), ORDERS, day='2024-01-01', exchange_id='BN') as writer:
+        writer.write(_orders(0, 3))
+        # missing column is filled with nulls in the same file
+        writer.write(_orders(3, 2).drop(columns=['price']))
+        # a new column cannot be added to an open file
+        writer.write(_orders(5, 2).assign(side='buy'))
+
+    assert len(writer.files) == 2
+    df = read_archive(str(tmp_path), day='2024-01-01').sort_values('order_time_ms')
+    assert df['side'].tolist()[-2:] == ['buy', 'buy']
+    assert df['price'].isna().sum() == 2
+    assert len(df) == 7
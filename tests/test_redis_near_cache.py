@@ -0,0 +1,50 @@
+from pytradekit.utils import redis_near_cache
+from pytradekit.utils.redis_near_cache import NearCache
+
+
+class TestNearCache:
+    def test_hit_after_first_load(self, mocker):
+        loader = mocker.MagicMock(return_value={"BTCUSDT": "1"})
+        cache = NearCache()
+        assert cache.get_or_load("k", loader, 5) == {"BTCUSDT": "1"}
+        assert cache.get_or_load("k", loader, 5) == {"BTCUSDT": "1"}
+        loader.assert_called_once()
+        assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+
+    def test_returned_value_is_a_copy(self):
+        cache = NearCache()
+        cache.get_or_load("k", lambda: {"a": "1"}, 5)["a"] = "mutated"
+        assert cache.get_or_load("k", lambda: {}, 5) == {"a": "1"}
+
+    def test_entry_expires_after_ttl(self, mocker):
+        clock = mocker.patch.object(redis_near_cache.time, "monotonic", return_value=100.0)
+        cache = NearCache()
+        cache.get_or_load("k", lambda: "old", 5)
+        clock.return_value = 105.0
+        assert cache.get_or_load("k", lambda: "new", 5) == "new"
+
+    def test_least_recently_used_is_evicted(self):
+        cache = NearCache(max_size=2)
+        cache.put("a", 1, 5)
+        cache.put("b", 2, 5)
+        cache.get_or_load("a", lambda: None, 5)
+        cache.put("c", 3, 5)
+        assert cache.get_or_load("b", lambda: "reloaded", 5) == "reloaded"
+        assert cache.get_stats()["evictions"] >= 1
+
+    def test_invalidate_drops_entry(self):
+        cache = NearCache()
+        cache.put("k", "old", 5)
+        cache.invalidate("k")
+        assert cache.get_or_load("k", lambda: "new", 5) == "new"
+        assert cache.get_stats()["invalidations"] == 1
+
+    def test_load_racing_invalidation_is_not_cached(self):
+        cache = NearCache()
+
+        def loader():
+            cache.invalidate("k")  # writer changes the key while we are reading it
+            return "stale"
+
+        assert cache.get_or_load("k", loader, 5) == "stale"
+        assert cache.get_or_load("k", lambda: "fresh", 5) == "fresh"
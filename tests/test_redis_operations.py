@@ -114,45 +114,69 @@ class TestSetPortfolios:
         import json
         from pytradekit.utils.redis_operations import PORTFOLIOS_EXPIRE_TIME
         ops, client, _ = redis_ops
-        client.get.return_value = json.dumps({"BTCUSDT": {"short": {"ask": "1"}}})
+        pipe = client.pipeline.return_value
+        pipe.get.return_value = json.dumps({"BTCUSDT": {"short": {"ask": "1"}}})
 
         ops.set_portfolios({"REUSDT": {"short": {"ask": "2"}}})
 
-        stored = json.loads(client.set.call_args.args[1])
+        stored = json.loads(pipe.set.call_args.args[1])
         assert set(stored) == {"BTCUSDT", "REUSDT"}
-        published = json.loads(client.publish.call_args.args[1])
+        published = json.loads(pipe.publish.call_args.args[1])
         assert set(published) == {"REUSDT"}
-        client.expire.assert_called_once()
-        assert client.expire.call_args.args[1] == PORTFOLIOS_EXPIRE_TIME
+        pipe.expire.assert_called_once()
+        assert pipe.expire.call_args.args[1] == PORTFOLIOS_EXPIRE_TIME
 
     def test_new_value_overwrites_same_symbol(self, redis_ops):
         import json
         ops, client, _ = redis_ops
-        client.get.return_value = json.dumps({"REUSDT": {"short": {"ask": "1"}}})
+        pipe = client.pipeline.return_value
+        pipe.get.return_value = json.dumps({"REUSDT": {"short": {"ask": "1"}}})
 
         ops.set_portfolios({"REUSDT": {"short": {"ask": "9"}}})
 
-        stored = json.loads(client.set.call_args.args[1])
+        stored = json.loads(pipe.set.call_args.args[1])
         assert stored["REUSDT"]["short"]["ask"] == "9"
 
     def test_corrupt_or_missing_existing_starts_fresh(self, redis_ops):
         import json
         ops, client, _ = redis_ops
-        client.get.return_value = "not-json"
+        pipe = client.pipeline.return_value
+        pipe.get.return_value = "not-json"
 
         ops.set_portfolios({"REUSDT": {"short": {"ask": "2"}}})
 
-        stored = json.loads(client.set.call_args.args[1])
+        stored = json.loads(pipe.set.call_args.args[1])
         assert set(stored) == {"REUSDT"}
 
+    def test_retries_when_key_changes_during_merge(self, redis_ops):
+        import json
+        import redis
+        ops, client, _ = redis_ops
+        pipe = client.pipeline.return_value
+        pipe.get.return_value = json.dumps({"BTCUSDT": {}})
+        pipe.execute.side_effect = [redis.WatchError(), None]
+
+        ops.set_portfolios({"REUSDT": {}})
+
+        assert pipe.watch.call_count == 2
+        client.lock.assert_not_called()
+
+    def test_gives_up_after_repeated_conflicts(self, redis_ops):
+        import redis
+        ops, client, _ = redis_ops
+        client.pipeline.return_value.execute.side_effect = redis.WatchError()
+        with pytest.raises(DependencyException):
+            ops.set_portfolios({"REUSDT": {}})
+
 
 class TestArbitrageThreshold:
     def test_set_writes_value_and_expiry(self, redis_ops):
         ops, client, _ = redis_ops
+        pipe = client.pipeline.return_value
         ops.set_arbitrage_threshold(Decimal("0.0042"))
-        client.set.assert_called_once_with("arbitrage_threshold", "0.0042")
-        client.expire.assert_called_once()
-        assert client.expire.call_args[0][0] == "arbitrage_threshold"
+        pipe.set.assert_called_once_with("arbitrage_threshold", "0.0042")
+        pipe.expire.assert_called_once()
+        assert pipe.expire.call_args[0][0] == "arbitrage_threshold"
 
     def test_get_returns_decimal_from_str_value(self, redis_ops):
         ops, client, _ = redis_ops
@@ -174,7 +198,7 @@ class TestArbitrageThreshold:
     def test_set_failure_wraps_as_dependency_exception(self, redis_ops):
         ops, client, logger = redis_ops
         original = Exception("boom")
-        client.set.side_effect = original
+        client.pipeline.return_value.execute.side_effect = original
         with pytest.raises(DependencyException) as exc_info:
             ops.set_arbitrage_threshold(Decimal("0.0042"))
         assert exc_info.value.__cause__ is original
@@ -184,3 +208,193 @@ class TestArbitrageThreshold:
             redis_ops,
             FailureSpec(client_attr="get", op_name="get_arbitrage_threshold"),
         )
+
+
+class TestRateLimitCounters:
+    def test_reserve_charges_all_windows_in_one_script_call(self, redis_ops):
+        ops, _, _ = redis_ops
+        ops._reserve_rate_limit.return_value = 0
+        counters = [("rate_limit:a", 1, 90, 10000), ("rate_limit:b", 4, 5400, 60000)]
+        assert ops.reserve_rate_limit_weights(counters, ["rate_limit:blocked"], 1000) == 0
+        ops._reserve_rate_limit.assert_called_once_with(
+            keys=["rate_limit:a", "rate_limit:b", "rate_limit:blocked"], args=[1000, 1, 90, 10000, 4, 5400, 60000])
+
+    def test_reserve_returns_wait_ms_when_rejected(self, redis_ops):
+        ops, _, _ = redis_ops
+        ops._reserve_rate_limit.return_value = 1500
+        assert ops.reserve_rate_limit_weights([("rate_limit:k", 2, 100, 60000)], [], 1000) == 1500
+
+    def test_block_runs_script_with_deadline(self, redis_ops):
+        ops, _, _ = redis_ops
+        ops.set_rate_limit_blocked_until("rate_limit:k:blocked", 8000, 7000)
+        ops._block_rate_limit.assert_called_once_with(keys=["rate_limit:k:blocked"], args=[8000, 7000])
+
+    def test_sync_failure_wraps_as_dependency_exception(self, redis_ops):
+        ops, _, logger = redis_ops
+        original = Exception("boom")
+        ops._sync_rate_limit.side_effect = original
+        with pytest.raises(DependencyException) as exc_info:
+            ops.sync_rate_limit_used("rate_limit:k", 10, 61)
+        assert exc_info.value.__cause__ is original
+        assert logger.debug.call_args.kwargs.get('exc_info') is True
+
+
+class TestTradeBackfillCheckpoint:
+    def test_get_returns_int_trade_ids(self, redis_ops):
+        ops, client, _ = redis_ops
+        client.hgetall.return_value = {"BTCUSDT": "42"}
+        assert ops.get_trade_backfill_checkpoint("acct") == {"BTCUSDT": 42}
+        client.hgetall.assert_called_once_with("trade_backfill_checkpoint:acct")
+
+    def test_set_writes_field_and_expiry(self, redis_ops):
+        ops, client, _ = redis_ops
+        ops.set_trade_backfill_checkpoint("acct", "BTCUSDT", 42)
+        client.hset.assert_called_once_with("trade_backfill_checkpoint:acct", "BTCUSDT", 42)
+        client.expire.assert_called_once()
+
+    def test_get_failure_wraps_as_dependency_exception(self, redis_ops):
+        assert_wraps_as_dependency_exception(
+            redis_ops,
+            FailureSpec(client_attr="hgetall", op_name="get_trade_backfill_checkpoint", op_args=("acct",)),
+        )
+
+
+class TestSetPublishTradesBatch:
+    def test_single_pipelined_transaction_without_lock(self, redis_ops):
+        import json
+        ops, client, _ = redis_ops
+        pipe = client.pipeline.return_value
+        trades = [({"trade_id": "1"}, 1000), ({"trade_id": "2"}, 2000)]
+
+        ops.set_publish_trades_batch(trades)
+
+        client.pipeline.assert_called_once_with(transaction=True)
+        client.lock.assert_not_called()
+        pipe.zadd.assert_called_once_with("trades", {json.dumps({"trade_id": "1"}): 1000,
+                                                     json.dumps({"trade_id": "2"}): 2000})
+        assert [c.args[1] for c in pipe.publish.call_args_list] == [json.dumps(v) for v, _ in trades]
+        pipe.execute.assert_called_once()
+
+    def test_serializes_each_trade_once(self, redis_ops, mocker):
+        ops, client, _ = redis_ops
+        dumps = mocker.patch("pytradekit.utils.redis_operations.json.dumps", return_value="{}")
+        ops.set_publish_trades({"trade_id": "1"}, 1000)
+        dumps.assert_called_once()
+
+    def test_empty_batch_skips_round_trip(self, redis_ops):
+        ops, client, _ = redis_ops
+        ops.set_publish_trades_batch([])
+        client.pipeline.assert_not_called()
+
+    def test_failure_wraps_as_dependency_exception(self, redis_ops):
+        ops, client, _ = redis_ops
+        original = Exception("boom")
+        client.pipeline.return_value.execute.side_effect = original
+        with pytest.raises(DependencyException) as exc_info:
+            ops.set_publish_trades_batch([({"trade_id": "1"}, 1000)])
+        assert exc_info.value.__cause__ is original
+
+
+class TestLockFreeReads:
+    @pytest.mark.parametrize("op_name,op_args", [
+        ("get_ticker_price", ("binance",)),
+        ("get_order_book", ("BTC-USDT",)),
+        ("get_order_ticker", ("BTC-USDT",)),
+        ("get_inventory", ()),
+        ("get_order_link", ("cid",)),
+        ("get_target_premium", ("cid",)),
+    ])
+    def test_reads_take_no_lock(self, redis_ops, op_name, op_args):
+        ops, client, _ = redis_ops
+        client.get.return_value = None
+        getattr(ops, op_name)(*op_args)
+        client.lock.assert_not_called()
+
+
+class TestAtomicPopReads:
+    def test_get_orders_and_delete_in_one_transaction(self, redis_ops):
+        ops, client, _ = redis_ops
+        pipe = client.pipeline.return_value
+        pipe.execute.return_value = [{"o1", "o2"}, 1]
+
+        assert ops.get_orders_and_delete("s1") == {"o1", "o2"}
+        client.pipeline.assert_called_once_with(transaction=True)
+        pipe.smembers.assert_called_once_with("orders:s1")
+        pipe.delete.assert_called_once_with("orders:s1")
+        client.lock.assert_not_called()
+
+    def test_get_trades_in_one_transaction(self, redis_ops):
+        ops, client, _ = redis_ops
+        pipe = client.pipeline.return_value
+        pipe.execute.return_value = [["t1"], 1]
+
+        assert ops.get_trades() == ["t1"]
+        pipe.zrange.assert_called_once_with("trades", 0, -1)
+        client.lock.assert_not_called()
+
+
+class TestNearCache:
+    @pytest.fixture
+    def cached_ops(self, mocker):
+        from pytradekit.utils.redis_near_cache import NearCache
+        mock_client = mocker.MagicMock()
+        mocker.patch('redis.StrictRedis.from_url', return_value=mock_client)
+        ops = RedisOperations(mocker.MagicMock(), 'redis://localhost:6379', near_cache=NearCache())
+        return ops, mock_client
+
+    def test_disabled_by_default(self, redis_ops):
+        ops, client, _ = redis_ops
+        ops.get_ticker_price("binance")
+        ops.get_ticker_price("binance")
+        assert client.hgetall.call_count == 2
+        client.pubsub.assert_not_called()
+        assert ops.get_near_cache_stats() == {}
+
+    def test_ticker_price_reads_through_cache(self, cached_ops):
+        ops, client = cached_ops
+        client.hgetall.return_value = {"BTCUSDT": "1"}
+        for _ in range(3):
+            assert ops.get_ticker_price("binance") == {"BTCUSDT": "1"}
+        client.hgetall.assert_called_once_with("binance_ticker_price")
+        assert ops.get_near_cache_stats()["hits"] == 2
+
+    def test_writer_publishes_invalidation(self, cached_ops):
+        ops, client = cached_ops
+        client.get.return_value = "0.1"
+        assert ops.get_arbitrage_threshold() == Decimal("0.1")
+        ops.set_arbitrage_threshold(Decimal("0.2"))
+        client.pipeline.return_value.publish.assert_called_with("cache_invalidation", "arbitrage_threshold")
+        client.get.return_value = "0.2"
+        assert ops.get_arbitrage_threshold() == Decimal("0.2")
+
+    def test_write_and_invalidation_share_one_round_trip(self, cached_ops):
+        ops, client = cached_ops
+        pipe = client.pipeline.return_value
+        ops.set_book_ticker("BTC-USDT", {"bid": "1"})
+        pipe.hmset.assert_called_once_with("book_ticker:BTC-USDT", {"bid": "1"})
+        pipe.publish.assert_called_once_with("cache_invalidation", "book_ticker:BTC-USDT")
+        pipe.execute.assert_called_once()
+        client.hmset.assert_not_called()
+        client.publish.assert_not_called()
+
+    def test_invalidation_message_drops_entry(self, cached_ops):
+        ops, client = cached_ops
+        client.hgetall.return_value = {"BTCUSDT": "1"}
+        ops.get_order_ticker("BTC-USDT")
+        handler = client.pubsub.return_value.subscribe.call_args.kwargs["cache_invalidation"]
+        handler({"data": "book_ticker:BTC-USDT"})
+        ops.get_order_ticker("BTC-USDT")
+        assert client.hgetall.call_count == 2
+
+    def test_listener_error_clears_cache(self, cached_ops):
+        ops, client = cached_ops
+        ops.get_ticker_price("binance")
+        _, kwargs = client.pubsub.return_value.run_in_thread.call_args
+        kwargs["exception_handler"](Exception("disconnected"), None, None)
+        assert ops.get_near_cache_stats()["size"] == 0
+
+    def test_close_stops_listener(self, cached_ops):
+        ops, client = cached_ops
+        thread = client.pubsub.return_value.run_in_thread.return_value
+        ops.close()
+        thread.stop.assert_called_once()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from pytradekit.gateway.websocket.base_ws_manager import BaseWebsocketManager
+from pytradekit.gateway.websocket.ws_supervisor import ReconnectBackoff, WebsocketSupervisor
+from pytradekit.utils.dynamic_types import WebsocketStatus
+
+
+class FlakyManager:
+    def __init__(self, mocker, failures):
+        self.logger = mocker.MagicMock()
+        self.failures = failures
+        self.calls = 0
+        self.recovered = threading.Event()
+
+    def _recovery(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return False
+        self.recovered.set()
+        return True
+
+
+def test_backoff_grows_caps_and_jitters():
+    backoff = ReconnectBackoff(base_delay_s=1, max_delay_s=8, factor=2, jitter=0.5)
+    delays = [backoff.get_delay(attempt) for attempt in range(6)]
+    assert all(0.5 * min(8, 2 ** n) <= delay <= min(8, 2 ** n) for n, delay in enumerate(delays))
+    assert ReconnectBackoff(jitter=0).get_delay(20) == 60
+
+
+def test_supervisor_retries_with_backoff_and_records_metrics(mocker):
+    supervisor = WebsocketSupervisor(backoff=ReconnectBackoff(base_delay_s=0.01, jitter=0))
+    manager = FlakyManager(mocker, failures=2)
+
+    supervisor.request_recovery(manager, 'closed')
+    # 恢复排队期间的重复事件合并为一次
+    supervisor.request_recovery(manager, 'error')
+
+    assert manager.recovered.wait(2)
+    time.sleep(0.05)
+    stats = list(supervisor.get_stats().values())[0]
+    assert manager.calls == 3
+    assert stats['reconnects'] == 1 and stats['failed_attempts'] == 2
+    assert stats['last_reason'] == 'closed' and not stats['is_down']
+    assert stats['last_downtime_s'] >= 0.03
+
+
+def test_unregistered_manager_is_not_recovered(mocker):
+    supervisor = WebsocketSupervisor()
+    manager = FlakyManager(mocker, failures=0)
+    supervisor.request_recovery(manager, delay_s=0.05)
+    supervisor.unregister(manager)
+
+    assert not manager.recovered.wait(0.2)
+    assert supervisor.get_stats() == {}
+
+
+def test_reconnect_is_ignored_until_connected_and_after_close(mocker):
+    manager = BaseWebsocketManager(mocker.MagicMock(), None)
+    request = mocker.patch.object(BaseWebsocketManager._supervisor, 'request_recovery')
+
+    manager.reconnect('closed')
+    manager.status = WebsocketStatus.STOP.name
+    manager.reconnect('closed')
+    request.assert_not_called()
+
+    manager.status = WebsocketStatus.ACTIVE.name
+    manager.reconnect('closed')
+    request.assert_called_once_with(manager, 'closed')
+
+
+class FakeWebSocketApp:
+    """Stands in for websocket-client: run_forever opens, then blocks until closed like the real loop."""
+    apps = []
+
+    def __init__(self, url, on_message, on_open, on_close, on_error, on_ping, on_pong):
+        self.on_open, self.on_close = on_open, on_close
+        self.sent = []
+        self.closed = threading.Event()
+        FakeWebSocketApp.apps.append(self)
+
+    def run_forever(self, ping_interval, ping_timeout):
+        self.ping_args = (ping_interval, ping_timeout)
+        self.on_open(self)
+        self.closed.wait()
+        self.on_close(self, 1006, 'abnormal')
+
+    def send(self, message, opcode):
+        self.sent.append(message)
+
+    def close(self):
+        self.closed.set()
+
+
+class StreamManager(BaseWebsocketManager):
+    def _get_url(self):
+        return 'ws://localhost'
+
+    def _on_message(self, ws, message, *args, **kwargs):
+        pass
+
+
+def test_close_event_triggers_reconnect_and_resubscribe(mocker):
+    FakeWebSocketApp.apps = []
+    mocker.patch('pytradekit.gateway.websocket.base_ws_manager.WebSocketApp', FakeWebSocketApp)
+    manager = StreamManager(mocker.MagicMock(), None)
+    manager._ping_interval = 60
+    manager._subs.append({'method': 'SUBSCRIBE'})
+    try:
+        manager.send_json({'method': 'SUBSCRIBE'})
+        # 服务端断开：run_forever 退出并回调 on_close
+        FakeWebSocketApp.apps[0].close()
+
+        deadline = time.time() + 5
+        while time.time() < deadline and (len(FakeWebSocketApp.apps) < 2 or not FakeWebSocketApp.apps[1].sent):
+            time.sleep(0.01)
+        assert FakeWebSocketApp.apps[1].sent == ['{"method": "SUBSCRIBE"}']
+        assert FakeWebSocketApp.apps[0].ping_args == (60, 30)
+        assert manager.status == WebsocketStatus.ACTIVE.name
+        stats = [stats for name, stats in BaseWebsocketManager.get_reconnect_stats().items()
+                 if name.startswith('StreamManager')]
+        assert stats[0]['reconnects'] == 1 and stats[0]['last_reason'] == 'closed'
+    finally:
+        manager.close()